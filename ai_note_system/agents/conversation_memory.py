@@ -0,0 +1,238 @@
+"""
+Conversation memory module for AI Note System.
+Keeps conversation prompts within a token budget with rolling summaries and semantic recall.
+"""
+
+import logging
+from typing import Dict, Any, List, Optional, Callable, Sequence
+
+from ..embeddings.vector_index import VectorIndex
+
+# Setup logging
+logger = logging.getLogger("ai_note_system.agents.conversation_memory")
+
+# Tokens of role and framing around every chat message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:"
+RECALL_PREFIX = "Earlier turns relevant to the latest message:"
+
+class ConversationMemory:
+    """
+    Builds conversation prompts that stay within a token budget however long the conversation gets.
+    
+    Leading system messages are always kept and the most recent turns are kept
+    verbatim. Once the verbatim turns outgrow the budget, the oldest of them are
+    folded into a running summary, which is updated from the previous summary and
+    the newly folded turns only. Folding goes down to half the budget, so the
+    summary is updated every few turns rather than on every one. Folded turns stay
+    available for semantic recall and are added back verbatim when they are
+    relevant to the latest message.
+    
+    The memory does not own the conversation: it is given the full history on
+    every build and remembers how much of it has been folded.
+    """
+    
+    def __init__(
+        self,
+        llm,
+        token_budget: int = 3000,
+        min_recent_turns: int = 4,
+        summary_tokens: int = 300,
+        recall_tokens: int = 400,
+        recall_limit: int = 3,
+        recall_threshold: float = 0.35,
+        embed: Optional[Callable[[str], Sequence[float]]] = None,
+        recall: Optional[Callable[[str, List[Dict[str, Any]], int, float], List[Dict[str, Any]]]] = None
+    ):
+        """
+        Initialize the conversation memory.
+        
+        Args:
+            llm (LLMInterface): LLM interface used to count tokens and write summaries
+            token_budget (int): Maximum tokens of the conversation part of a prompt
+            min_recent_turns (int): Number of recent turns always kept verbatim
+            summary_tokens (int): Maximum tokens of the running summary
+            recall_tokens (int): Tokens set aside for recalled turns
+            recall_limit (int): Maximum number of recalled turns
+            recall_threshold (float): Minimum cosine similarity of a recalled turn
+            embed (Callable, optional): Embeds a text, enables recall from an index of folded turns
+            recall (Callable, optional): Finds the folded turns relevant to a query, replaces the index
+        """
+        self.llm = llm
+        self.token_budget = token_budget
+        self.min_recent_turns = min_recent_turns
+        self.summary_tokens = summary_tokens
+        self.recall_tokens = recall_tokens
+        self.recall_limit = recall_limit
+        self.recall_threshold = recall_threshold
+        self.embed = embed
+        self.recall = recall
+        
+        # Prompt and full history tokens of every build
+        self.usage: List[Dict[str, int]] = []
+        self.reset()
+    
+    def reset(self) -> None:
+        """
+        Forget the summary and folded turns, for a history that was cleared or replaced.
+        """
+        self.summary = ""
+        self.folded = 0
+        self._tokens: List[int] = []
+        self._index = VectorIndex()
+    
+    @property
+    def last_usage(self) -> Optional[Dict[str, int]]:
+        """
+        Token usage of the latest build, None before the first one.
+        """
+        return self.usage[-1] if self.usage else None
+    
+    def count_tokens(self, text: str) -> int:
+        return self.llm.count_tokens(text) + MESSAGE_OVERHEAD_TOKENS
+    
+    def _count(self, history: List[Dict[str, Any]]) -> List[int]:
+        # Turns never change once added, so their counts are kept
+        for message in history[len(self._tokens):]:
+            self._tokens.append(self.count_tokens(message["content"]))
+        return self._tokens
+    
+    @staticmethod
+    def render(messages: List[Dict[str, Any]]) -> str:
+        """
+        Render messages as a plain-text transcript.
+        
+        Args:
+            messages (List[Dict[str, Any]]): Messages with 'role' and 'content'
+        
+        Returns:
+            str: One line per message, system messages without a role
+        """
+        return "\n".join(
+            message["content"] if message["role"] == "system" else f"{message['role']}: {message['content']}"
+            for message in messages
+        )
+    
+    def build(self, history: List[Dict[str, Any]], query: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Build the messages to send for the next turn.
+        
+        Args:
+            history (List[Dict[str, Any]]): Full conversation so far, messages with 'role' and 'content'
+            query (str, optional): Latest message, used to recall relevant folded turns
+        
+        Returns:
+            List[Dict[str, Any]]: Pinned system messages, summary, recalled turns and recent turns
+        """
+        if len(history) < len(self._tokens):
+            self.reset()
+        
+        counts = self._count(history)
+        
+        pinned = 0
+        while pinned < len(history) and history[pinned]["role"] == "system":
+            pinned += 1
+        start = max(self.folded, pinned)
+        
+        recalling = query is not None and (self.recall is not None or self.embed is not None)
+        budget = self.token_budget - sum(counts[:pinned]) - self._summary_cost() - (self.recall_tokens if recalling else 0)
+        
+        if sum(counts[start:]) > budget and len(history) - start > self.min_recent_turns:
+            # Fold down to half the budget, so the next few turns fit without summarizing again
+            end = start
+            remaining = sum(counts[start:])
+            while remaining > budget // 2 and len(history) - end > self.min_recent_turns:
+                remaining -= counts[end]
+                end += 1
+            
+            self._fold(history, start, end)
+            start = end
+        
+        messages = list(history[:pinned])
+        if self.summary:
+            messages.append({"role": "system", "content": f"{SUMMARY_PREFIX}\n{self.summary}"})
+        
+        recalled = self._recall(query, history[pinned:start]) if recalling and start > pinned else []
+        if recalled:
+            messages.append({"role": "system", "content": f"{RECALL_PREFIX}\n{self.render(recalled)}"})
+        
+        messages.extend(history[start:])
+        
+        usage = {
+            "turns": len(history),
+            "summarized_turns": start - pinned,
+            "recalled_turns": len(recalled),
+            "prompt_tokens": sum(self.count_tokens(message["content"]) for message in messages),
+            "history_tokens": sum(counts)
+        }
+        self.usage.append(usage)
+        logger.debug(f"Conversation prompt of {usage['prompt_tokens']} tokens for {usage['history_tokens']} tokens of history")
+        
+        return messages
+    
+    def _summary_cost(self) -> int:
+        return self.count_tokens(f"{SUMMARY_PREFIX}\n{self.summary}") if self.summary else 0
+    
+    def _fold(self, history: List[Dict[str, Any]], start: int, end: int) -> None:
+        """
+        Fold history[start:end] into the running summary and the recall index.
+        """
+        turns = history[start:end]
+        
+        prompt = f"""
+        Update the running summary of a conversation with the new turns below.
+        Keep facts, explanations, decisions, open questions and the user's goals and difficulties; drop small talk.
+        Reply with the updated summary only, in at most {self.summary_tokens * 3 // 4} words.
+        
+        Current summary:
+        {self.summary or "(none)"}
+        
+        New turns:
+        {self.render(turns)}
+        """
+        
+        try:
+            self.summary = self.llm.generate_text(prompt, max_tokens=self.summary_tokens, temperature=0.2).strip()
+        except Exception as e:
+            logger.error(f"Error summarizing conversation, keeping the start of each turn instead: {e}")
+            excerpts = [f"{turn['role']}: {turn['content'][:200]}" for turn in turns]
+            self.summary = "\n".join(([self.summary] if self.summary else []) + excerpts)[-self.summary_tokens * 4:]
+        
+        if self.embed is not None and self.recall is None:
+            for position, turn in enumerate(turns, start):
+                try:
+                    self._index.add(position, self.embed(turn["content"]))
+                except Exception as e:
+                    logger.error(f"Error embedding conversation turn: {e}")
+        
+        self.folded = end
+        logger.debug(f"Folded {len(turns)} conversation turns into the summary")
+    
+    def _recall(self, query: str, folded: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Find the folded turns relevant to a query that fit in the recall budget.
+        """
+        try:
+            if self.recall is not None:
+                candidates = self.recall(query, folded, self.recall_limit, self.recall_threshold)
+            elif len(self._index):
+                hits = self._index.search(self.embed(query), self.recall_limit, self.recall_threshold)
+                # Index positions count from the start of the history, after the pinned messages
+                offset = self.folded - len(folded)
+                candidates = [folded[position - offset] for position, _ in hits]
+            else:
+                candidates = []
+        except Exception as e:
+            logger.error(f"Error recalling conversation turns: {e}")
+            return []
+        
+        recalled = []
+        remaining = self.recall_tokens
+        for turn in candidates[:self.recall_limit]:
+            tokens = self.count_tokens(turn["content"])
+            if tokens <= remaining:
+                recalled.append(turn)
+                remaining -= tokens
+        
+        return recalled
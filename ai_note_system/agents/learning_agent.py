@@ -14,6 +14,7 @@ logger = logging.getLogger("ai_note_system.agents.learning_agent")
 
 # Import LLM interface
 from ..api.llm_interface import LLMInterface, get_llm_interface
+from .conversation_memory import ConversationMemory
 
 class LearningStyle:
     """
@@ -47,7 +48,8 @@ class LearningAgent:
         llm_model: str = "gpt-4",
         user_profile: Optional[Dict[str, Any]] = None,
         session_memory: Optional[List[Dict[str, str]]] = None,
-        config: Optional[Dict[str, Any]] = None
+        config: Optional[Dict[str, Any]] = None,
+        embedding_interface=None
     ):
         """
         Initialize the learning agent.
@@ -59,6 +61,7 @@ class LearningAgent:
             user_profile (Dict[str, Any], optional): User profile with learning preferences
             session_memory (List[Dict[str, str]], optional): Memory of the current session
             config (Dict[str, Any], optional): Configuration dictionary
+            embedding_interface (EmbeddingInterface, optional): Enables recall of relevant earlier turns
         """
         # Set LLM interface
         if llm_interface:
@@ -79,6 +82,14 @@ class LearningAgent:
         # Set configuration
         self.config = config or {}
         
+        # Keep the prompts of long sessions within a token budget
+        self.conversation_memory = ConversationMemory(
+            self.llm,
+            token_budget=self.config.get("MEMORY_TOKEN_BUDGET", 3000),
+            min_recent_turns=self.config.get("MEMORY_RECENT_TURNS", 4),
+            embed=embedding_interface.get_embeddings if embedding_interface else None
+        )
+        
         # Initialize session if not already started
         if not self.session_memory:
             self._initialize_session()
@@ -278,9 +289,9 @@ class LearningAgent:
             "content": message
         })
         
-        # Generate response
+        # Generate response from the budgeted session memory
         response = self.llm.generate_chat_response(
-            self.session_memory,
+            self.conversation_memory.build(self.session_memory, query=message),
             temperature=0.7
         )
         
@@ -643,6 +654,7 @@ class LearningAgent:
             # Set session data
             self.user_profile = session_data.get("user_profile", {})
             self.session_memory = session_data.get("session_memory", [])
+            self.conversation_memory.reset()
             
             logger.info(f"Session loaded from {file_path}")
             return True
@@ -681,6 +693,7 @@ class LearningAgent:
             if not self.session_memory:
                 self._initialize_session()
         
+        self.conversation_memory.reset()
         logger.debug("Session memory cleared")
 
 
@@ -17,10 +17,14 @@ import queue
 import tempfile
 import uuid
 
+import numpy as np
+
 # Import related components
 from ..database.db_manager import DatabaseManager
 from ..api.llm_interface import LLMInterface, get_llm_interface
 from ..embeddings.embedder import Embedder
+from ..embeddings.vector_index import VectorIndex
+from .conversation_memory import ConversationMemory
 from ..outputs.speech_generator import generate_speech_from_text, available_voices
 
 # Set up logging
@@ -34,6 +38,104 @@ except ImportError:
     logger.warning("speech_recognition library not available. Voice input will be disabled.")
     SPEECH_RECOGNITION_AVAILABLE = False
 
+# Messages shorter than this are not embedded
+MIN_EMBEDDED_MESSAGE_LENGTH = 10
+
+# Tokens of conversation context in a question prompt
+CONVERSATION_TOKEN_BUDGET = 1500
+
+class MessageEmbeddingIndex:
+    """
+    Normalized embeddings of the voice messages of one database and embedding model.
+    
+    Embeddings are persisted in voice_message_embeddings when messages are added and
+    appended to the index straight away; syncing only loads rows inserted after the
+    last one already loaded, by rowid, so embeddings stored elsewhere are picked up
+    without rereading the rest. SQLite hands out rowids in commit order and a
+    replaced row gets a new one, so backfilled embeddings of old messages are
+    picked up as well.
+    """
+    
+    def __init__(self, model_name: str):
+        """
+        Initialize an empty index.
+        
+        Args:
+            model_name: Name of the embedding model
+        """
+        self.model_name = model_name
+        self.index = VectorIndex()
+        self.last_rowid = 0
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self.index)
+    
+    def sync(self, conn, batch_size: int = 1000) -> int:
+        """
+        Load embeddings stored since the last sync.
+        
+        Args:
+            conn: SQLite connection of the database
+            batch_size: Embeddings loaded per query
+            
+        Returns:
+            The number of embeddings loaded
+        """
+        loaded = 0
+        
+        with self._lock:
+            while True:
+                rows = conn.execute('''
+                SELECT rowid, message_id, embedding FROM voice_message_embeddings
+                WHERE rowid > ? AND model_name = ?
+                ORDER BY rowid
+                LIMIT ?
+                ''', (self.last_rowid, self.model_name, batch_size)).fetchall()
+                
+                if not rows:
+                    break
+                
+                self.index.add_many(
+                    [row[1] for row in rows],
+                    np.stack([np.frombuffer(row[2], dtype=np.float32) for row in rows])
+                )
+                self.last_rowid = rows[-1][0]
+                loaded += len(rows)
+        
+        return loaded
+    
+    def add(self, message_id: int, vector: np.ndarray) -> None:
+        """
+        Append the embedding of a new message.
+        
+        Args:
+            message_id: The ID of the message
+            vector: Normalized embedding of the message
+        """
+        self.index.add(message_id, vector)
+    
+    def search(self, vector: Union[np.ndarray, List[float]], k: int,
+               allowed: Optional[List[int]] = None,
+               threshold: Optional[float] = None) -> List[Tuple[int, float]]:
+        """
+        Find the messages most similar to a query embedding.
+        
+        Args:
+            vector: Query embedding
+            k: Maximum number of results
+            allowed: Only consider these message IDs, all messages if None
+            threshold: Minimum cosine similarity
+            
+        Returns:
+            (message_id, similarity) pairs, most similar first
+        """
+        return self.index.search(vector, k, threshold, allowed=allowed)
+
+# Message embeddings per (database, embedding model)
+_message_indexes: Dict[Tuple[str, str], MessageEmbeddingIndex] = {}
+_message_indexes_lock = threading.Lock()
+
 class VoiceAgent:
     """
     Voice-Based Conversational Agent with Semantic Memory
@@ -69,6 +171,7 @@ class VoiceAgent:
         
         # Initialize conversation memory
         self.current_conversation_id = None
+        self.conversation_memories: Dict[int, ConversationMemory] = {}
         
         # Initialize audio queue for background processing
         self.audio_queue = queue.Queue()
@@ -106,6 +209,27 @@ class VoiceAgent:
         )
         ''')
         
+        # Create message embeddings table, kept apart from the note embeddings
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS voice_message_embeddings (
+            message_id INTEGER NOT NULL,
+            model_name TEXT NOT NULL,
+            embedding BLOB NOT NULL,
+            PRIMARY KEY (message_id, model_name),
+            FOREIGN KEY (message_id) REFERENCES voice_messages(id)
+        )
+        ''')
+        
+        # Index the columns conversation history searches filter on
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_voice_messages_conversation
+        ON voice_messages(conversation_id, timestamp)
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_voice_conversations_user
+        ON voice_conversations(user_id)
+        ''')
+        
         # Create flashcard sessions table
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS voice_flashcard_sessions (
@@ -189,24 +313,79 @@ class VoiceAgent:
         conn.commit()
         
         # Generate embedding for the message if it's not a system message
-        if role != "system" and len(content) > 10:
+        if role != "system" and len(content) > MIN_EMBEDDED_MESSAGE_LENGTH:
             try:
-                # Store the embedding in the database
-                embedding_id = self.embedder.store_note_embedding(message_id, content)
-                
-                # Update the message with the embedding ID
-                cursor.execute('''
-                UPDATE voice_messages
-                SET embedding_id = ?
-                WHERE id = ?
-                ''', (embedding_id, message_id))
-                
-                conn.commit()
+                self._store_message_embedding(message_id, content)
             except Exception as e:
                 logger.error(f"Failed to generate embedding for message: {e}")
         
         return message_id
     
+    def _store_message_embedding(self, message_id: int, content: str) -> None:
+        """
+        Embed a message, store the embedding and append it to the message index
+        
+        Args:
+            message_id: The ID of the message
+            content: The content of the message
+        """
+        vector = VectorIndex.normalize(self.embedder.generate_embedding(content))
+        
+        conn = self.db_manager.get_connection()
+        conn.execute('''
+        INSERT OR REPLACE INTO voice_message_embeddings (message_id, model_name, embedding)
+        VALUES (?, ?, ?)
+        ''', (message_id, self.embedder.model_name, vector.tobytes()))
+        conn.commit()
+        
+        self._message_index().add(message_id, vector)
+    
+    def _message_index(self) -> MessageEmbeddingIndex:
+        key = (os.path.abspath(self.db_manager.db_path), self.embedder.model_name)
+        
+        with _message_indexes_lock:
+            index = _message_indexes.get(key)
+            if index is None:
+                index = _message_indexes[key] = MessageEmbeddingIndex(self.embedder.model_name)
+            return index
+    
+    def get_message_index(self) -> MessageEmbeddingIndex:
+        """
+        Get the message embedding index of the database, loading embeddings stored since the last call
+        
+        Returns:
+            Up-to-date message embedding index
+        """
+        index = self._message_index()
+        index.sync(self.db_manager.get_connection())
+        return index
+    
+    def index_conversation_history(self) -> int:
+        """
+        Embed the stored messages that have no embedding for the current model yet
+        
+        Returns:
+            The number of messages embedded
+        """
+        conn = self.db_manager.get_connection()
+        rows = conn.execute('''
+        SELECT vm.id, vm.content
+        FROM voice_messages vm
+        LEFT JOIN voice_message_embeddings e ON e.message_id = vm.id AND e.model_name = ?
+        WHERE e.message_id IS NULL AND vm.role != 'system' AND LENGTH(vm.content) > ?
+        ORDER BY vm.id
+        ''', (self.embedder.model_name, MIN_EMBEDDED_MESSAGE_LENGTH)).fetchall()
+        
+        embedded = 0
+        for message_id, content in rows:
+            try:
+                self._store_message_embedding(message_id, content)
+                embedded += 1
+            except Exception as e:
+                logger.error(f"Failed to generate embedding for message {message_id}: {e}")
+        
+        return embedded
+    
     def get_conversation(self, conversation_id: int) -> Dict[str, Any]:
         """
         Get a conversation by ID
@@ -293,39 +472,73 @@ class VoiceAgent:
         
         return conversations
     
-    def search_conversation_history(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+    def search_conversation_history(self, query: str, limit: int = 5,
+                                    user_id: Optional[int] = None,
+                                    conversation_id: Optional[int] = None,
+                                    start: Optional[Union[datetime, str]] = None,
+                                    end: Optional[Union[datetime, str]] = None) -> List[Dict[str, Any]]:
         """
         Search conversation history using semantic search
         
         Args:
             query: The search query
             limit: Maximum number of results to return
+            user_id: Only search the conversations of this user
+            conversation_id: Only search this conversation
+            start: Only search messages sent at or after this time
+            end: Only search messages sent before this time
             
         Returns:
             List of relevant messages with conversation context
         """
-        # Generate embedding for the query
-        results = self.embedder.search_notes_by_embedding(query, limit=limit)
-        
-        # Filter results to only include voice messages
-        voice_message_results = []
+        index = self.get_message_index()
+        if not len(index):
+            return []
         
         conn = self.db_manager.get_connection()
-        cursor = conn.cursor()
         
-        for result in results:
-            note_id = result['note_id']
-            
-            # Check if this is a voice message
-            cursor.execute('''
-            SELECT vm.id, vm.conversation_id, vm.role, vm.content, vm.timestamp,
-                   vc.title as conversation_title
+        # Resolve the filters to the message IDs they allow in one query
+        conditions = []
+        params: List[Any] = []
+        if user_id is not None:
+            conditions.append("vc.user_id = ?")
+            params.append(user_id)
+        if conversation_id is not None:
+            conditions.append("vm.conversation_id = ?")
+            params.append(conversation_id)
+        if start is not None:
+            conditions.append("vm.timestamp >= ?")
+            params.append(start.isoformat() if isinstance(start, datetime) else start)
+        if end is not None:
+            conditions.append("vm.timestamp < ?")
+            params.append(end.isoformat() if isinstance(end, datetime) else end)
+        
+        allowed = None
+        if conditions:
+            allowed = [row[0] for row in conn.execute(f'''
+            SELECT vm.id
             FROM voice_messages vm
             JOIN voice_conversations vc ON vm.conversation_id = vc.id
-            WHERE vm.id = ?
-            ''', (note_id,))
-            
-            row = cursor.fetchone()
+            WHERE {" AND ".join(conditions)}
+            ''', params)]
+            if not allowed:
+                return []
+        
+        hits = index.search(self.embedder.generate_embedding(query), limit, allowed=allowed)
+        if not hits:
+            return []
+        
+        rows = {row[0]: row for row in conn.execute(f'''
+        SELECT vm.id, vm.conversation_id, vm.role, vm.content, vm.timestamp,
+               vc.title as conversation_title
+        FROM voice_messages vm
+        JOIN voice_conversations vc ON vm.conversation_id = vc.id
+        WHERE vm.id IN ({", ".join("?" * len(hits))})
+        ''', [message_id for message_id, _ in hits])}
+        
+        voice_message_results = []
+        for message_id, similarity in hits:
+            row = rows.get(message_id)
             if row:
                 voice_message_results.append({
                     'message_id': row[0],
@@ -334,7 +547,7 @@ class VoiceAgent:
                     'content': row[3],
                     'timestamp': row[4],
                     'conversation_title': row[5],
-                    'similarity': result['similarity']
+                    'similarity': similarity
                 })
         
         return voice_message_results
@@ -375,13 +588,13 @@ class VoiceAgent:
         conversation = self.get_conversation(conversation_id)
         messages = conversation.get('messages', [])
         
-        # Prepare context from recent messages (last 10)
-        recent_messages = messages[-10:] if len(messages) > 10 else messages
-        context = "\n".join([f"{msg['role']}: {msg['content']}" for msg in recent_messages])
+        # Prepare context from recent messages, with older ones summarized or recalled
+        memory = self._get_conversation_memory(conversation_id)
+        context = memory.render(memory.build(messages, query=question))
         
         # Search for relevant information in notes and previous conversations
         note_results = self.embedder.search_notes_by_embedding(question, limit=5)
-        conversation_results = self.search_conversation_history(question, limit=3)
+        conversation_results = self.search_conversation_history(question, limit=3, user_id=user_id)
         
         # Format search results for the prompt
         notes_context = ""
@@ -414,6 +627,7 @@ class VoiceAgent:
         """
         
         # Generate answer using LLM
+        prompt_tokens = self.llm_interface.count_tokens(prompt)
         answer = self.llm_interface.generate_text(prompt, max_tokens=500)
         
         # Add the assistant's answer to the conversation
@@ -432,9 +646,49 @@ class VoiceAgent:
             'message_id': message_id,
             'question': question,
             'answer': answer,
-            'audio_path': audio_path
+            'audio_path': audio_path,
+            'prompt_tokens': prompt_tokens
         }
     
+    def _get_conversation_memory(self, conversation_id: int) -> ConversationMemory:
+        """
+        Get the token-budgeted memory of a conversation
+        
+        Args:
+            conversation_id: The ID of the conversation
+            
+        Returns:
+            Memory recalling earlier messages from the message index
+        """
+        memory = self.conversation_memories.get(conversation_id)
+        if memory is None:
+            memory = self.conversation_memories[conversation_id] = ConversationMemory(
+                self.llm_interface,
+                token_budget=CONVERSATION_TOKEN_BUDGET,
+                recall=self._recall_messages
+            )
+        return memory
+    
+    def _recall_messages(self, query: str, candidates: List[Dict[str, Any]],
+                         limit: int, threshold: float) -> List[Dict[str, Any]]:
+        """
+        Find the candidate messages most relevant to a query in the message index
+        
+        Args:
+            query: The latest message
+            candidates: Messages that may be recalled
+            limit: Maximum number of messages to return
+            threshold: Minimum cosine similarity
+            
+        Returns:
+            Relevant messages, most similar first
+        """
+        by_id = {message['id']: message for message in candidates}
+        hits = self.get_message_index().search(
+            self.embedder.generate_embedding(query), limit, allowed=list(by_id), threshold=threshold
+        )
+        return [by_id[message_id] for message_id, _ in hits]
+    
     def start_flashcard_session(self, user_id: int, topic: Optional[str] = None) -> int:
         """
         Start a new flashcard session
@@ -922,7 +1176,9 @@ def conduct_flashcard_drill(db_manager, user_id: int, topic: Optional[str] = Non
     agent = VoiceAgent(db_manager)
     return agent.conduct_flashcard_drill(user_id, topic, count, use_voice)
 
-def search_conversation_history(db_manager, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+def search_conversation_history(db_manager, query: str, limit: int = 5,
+                                user_id: Optional[int] = None,
+                                conversation_id: Optional[int] = None) -> List[Dict[str, Any]]:
     """
     Search conversation history using semantic search
     
@@ -930,9 +1186,11 @@ def search_conversation_history(db_manager, query: str, limit: int = 5) -> List[
         db_manager: Database manager instance
         query: The search query
         limit: Maximum number of results to return
+        user_id: Only search the conversations of this user
+        conversation_id: Only search this conversation
         
     Returns:
         List of relevant messages with conversation context
     """
     agent = VoiceAgent(db_manager)
-    return agent.search_conversation_history(query, limit)
\ No newline at end of file
+    return agent.search_conversation_history(query, limit, user_id=user_id, conversation_id=conversation_id)
\ No newline at end of file
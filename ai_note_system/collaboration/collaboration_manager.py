@@ -6,10 +6,12 @@ Enables sharing knowledge packs with classmates or team members, collaborative a
 import os
 import logging
 import json
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, List, Optional, Union, Tuple
 from datetime import datetime
 import uuid
 
+from .revision_store import RevisionStore
+
 # Setup logging
 logger = logging.getLogger("ai_note_system.collaboration.collaboration_manager")
 
@@ -18,15 +20,23 @@ class CollaborationManager:
     Manages collaboration features including workspaces, sharing, comments, and change tracking.
     """
     
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, snapshot_interval: int = 32):
         """
         Initialize the collaboration manager.
         
+        A manager serves one request; note access checks are cached for its lifetime.
+        
         Args:
             db_manager: Database manager instance
+            snapshot_interval (int): Maximum number of diffs between full snapshots of a changed field
         """
         self.db_manager = db_manager
         self._ensure_collaboration_tables()
+        
+        self.revisions = RevisionStore(db_manager, snapshot_interval=snapshot_interval)
+        
+        # (note exists, user has access) per (note_id, user_id)
+        self._access_cache: Dict[Tuple[int, int], Tuple[bool, bool]] = {}
     
     def _ensure_collaboration_tables(self) -> None:
         """
@@ -102,12 +112,52 @@ class CollaborationManager:
             field_name TEXT NOT NULL,
             old_value TEXT,
             new_value TEXT,
+            revision INTEGER,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (note_id) REFERENCES notes(id) ON DELETE CASCADE,
             FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
         )
         """
         self.db_manager.execute_query(changes_query)
+        
+        # Values of tracked changes live in the revision store; older rows keep them inline
+        columns = [row["name"] for row in self.db_manager.execute_query("PRAGMA table_info(note_changes)").fetchall()]
+        if "revision" not in columns:
+            self.db_manager.execute_query("ALTER TABLE note_changes ADD COLUMN revision INTEGER")
+        
+        self.db_manager.execute_query("""
+        CREATE INDEX IF NOT EXISTS idx_note_changes_note ON note_changes (note_id, user_id)
+        """)
+    
+    def _check_note_access(self, note_id: int, user_id: int) -> Tuple[bool, bool]:
+        """
+        Check whether a note exists and a user may access it, with one query per note and user.
+        
+        The user has access to notes they own and to notes shared with their workspaces.
+        
+        Args:
+            note_id (int): ID of the note
+            user_id (int): ID of the user
+            
+        Returns:
+            Tuple[bool, bool]: Whether the note exists and whether the user has access to it
+        """
+        key = (note_id, user_id)
+        if key not in self._access_cache:
+            access_query = """
+            SELECT n.user_id = ? OR EXISTS (
+                SELECT 1 FROM shared_notes sn
+                JOIN workspace_members wm ON sn.workspace_id = wm.workspace_id
+                WHERE sn.note_id = n.id AND wm.user_id = ?
+            ) AS has_access
+            FROM notes n
+            WHERE n.id = ?
+            """
+            
+            row = self.db_manager.execute_query(access_query, (user_id, user_id, note_id)).fetchone()
+            self._access_cache[key] = (row is not None, bool(row and row["has_access"]))
+        
+        return self._access_cache[key]
     
     def create_workspace(self, name: str, description: str, user_id: int) -> int:
         """
@@ -287,6 +337,8 @@ class CollaborationManager:
         
         self.db_manager.execute_query(update_query, (workspace_id,))
         
+        self._access_cache.clear()
+        
         logger.info(f"Added user {user_id} to workspace {workspace_id} with role {role}")
         return True
     
@@ -340,6 +392,8 @@ class CollaborationManager:
         
         self.db_manager.execute_query(update_query, (workspace_id,))
         
+        self._access_cache.clear()
+        
         logger.info(f"Removed user {user_id} from workspace {workspace_id}")
         return True
     
@@ -411,6 +465,8 @@ class CollaborationManager:
         
         self.db_manager.execute_query(update_query, (workspace_id,))
         
+        self._access_cache.clear()
+        
         logger.info(f"Shared note {note_id} with workspace {workspace_id}")
         return True
     
@@ -476,6 +532,8 @@ class CollaborationManager:
         
         self.db_manager.execute_query(update_query, (workspace_id,))
         
+        self._access_cache.clear()
+        
         logger.info(f"Unshared note {note_id} from workspace {workspace_id}")
         return True
     
@@ -544,28 +602,12 @@ class CollaborationManager:
         Returns:
             int: ID of the newly added comment
         """
-        # Check if note exists
-        note_query = """
-        SELECT 1 FROM notes
-        WHERE id = ?
-        """
-        
-        note_exists = self.db_manager.execute_query(note_query, (note_id,)).fetchone()
+        # Check if note exists and user has access to it
+        note_exists, has_access = self._check_note_access(note_id, user_id)
         if not note_exists:
             logger.error(f"Note with ID {note_id} not found")
             raise ValueError(f"Note with ID {note_id} not found")
         
-        # Check if user has access to the note
-        access_query = """
-        SELECT 1 FROM shared_notes sn
-        JOIN workspace_members wm ON sn.workspace_id = wm.workspace_id
-        WHERE sn.note_id = ? AND wm.user_id = ?
-        UNION
-        SELECT 1 FROM notes
-        WHERE id = ? AND user_id = ?
-        """
-        
-        has_access = self.db_manager.execute_query(access_query, (note_id, user_id, note_id, user_id)).fetchone()
         if not has_access:
             logger.error(f"User {user_id} does not have access to note {note_id}")
             raise ValueError(f"User {user_id} does not have access to note {note_id}")
@@ -606,16 +648,7 @@ class CollaborationManager:
             List[Dict[str, Any]]: List of comments
         """
         # Check if user has access to the note
-        access_query = """
-        SELECT 1 FROM shared_notes sn
-        JOIN workspace_members wm ON sn.workspace_id = wm.workspace_id
-        WHERE sn.note_id = ? AND wm.user_id = ?
-        UNION
-        SELECT 1 FROM notes
-        WHERE id = ? AND user_id = ?
-        """
-        
-        has_access = self.db_manager.execute_query(access_query, (note_id, user_id, note_id, user_id)).fetchone()
+        _, has_access = self._check_note_access(note_id, user_id)
         if not has_access:
             logger.error(f"User {user_id} does not have access to note {note_id}")
             return []
@@ -655,6 +688,9 @@ class CollaborationManager:
         """
         Track a change to a note.
         
+        The new value is added to the revision store as a diff against the previous
+        revision of the field; old_value is only stored for the first tracked change.
+        
         Args:
             note_id (int): ID of the note
             user_id (int): ID of the user making the change
@@ -666,66 +702,69 @@ class CollaborationManager:
         Returns:
             int: ID of the tracked change
         """
-        # Check if note exists
-        note_query = """
-        SELECT 1 FROM notes
-        WHERE id = ?
-        """
-        
-        note_exists = self.db_manager.execute_query(note_query, (note_id,)).fetchone()
+        # Check if note exists and user has access to it
+        note_exists, has_access = self._check_note_access(note_id, user_id)
         if not note_exists:
             logger.error(f"Note with ID {note_id} not found")
             raise ValueError(f"Note with ID {note_id} not found")
         
-        # Check if user has access to the note
-        access_query = """
-        SELECT 1 FROM shared_notes sn
-        JOIN workspace_members wm ON sn.workspace_id = wm.workspace_id
-        WHERE sn.note_id = ? AND wm.user_id = ?
-        UNION
-        SELECT 1 FROM notes
-        WHERE id = ? AND user_id = ?
-        """
-        
-        has_access = self.db_manager.execute_query(access_query, (note_id, user_id, note_id, user_id)).fetchone()
         if not has_access:
             logger.error(f"User {user_id} does not have access to note {note_id}")
             raise ValueError(f"User {user_id} does not have access to note {note_id}")
         
+        # Store the new value as a revision of the field
+        revision = self.revisions.append(note_id, field_name, new_value, base_value=old_value)
+        
         # Track change
         query = """
-        INSERT INTO note_changes (note_id, user_id, change_type, field_name, old_value, new_value)
-        VALUES (?, ?, ?, ?, ?, ?)
+        INSERT INTO note_changes (note_id, user_id, change_type, field_name, revision)
+        VALUES (?, ?, ?, ?, ?)
         """
         
-        cursor = self.db_manager.execute_query(query, (note_id, user_id, change_type, field_name, old_value, new_value))
+        cursor = self.db_manager.execute_query(query, (note_id, user_id, change_type, field_name, revision))
         change_id = cursor.lastrowid
         
         logger.info(f"Tracked change {change_id} to note {note_id}")
         return change_id
     
-    def get_note_changes(self, note_id: int, user_id: int) -> List[Dict[str, Any]]:
+    def _fill_change_values(self, note_id: int, changes: List[Dict[str, Any]]) -> None:
+        """
+        Set old_value and new_value of changes stored as revisions, one pass over the history per field.
+        
+        Args:
+            note_id (int): ID of the note
+            changes (List[Dict[str, Any]]): Changes of the note
+        """
+        wanted: Dict[str, set] = {}
+        for change in changes:
+            if change.get("revision") is not None:
+                wanted.setdefault(change["field_name"], set()).update((change["revision"] - 1, change["revision"]))
+        
+        values = {
+            field_name: self.revisions.get_revisions(note_id, field_name, revisions)
+            for field_name, revisions in wanted.items()
+        }
+        
+        for change in changes:
+            if change.get("revision") is not None:
+                field_values = values[change["field_name"]]
+                change["old_value"] = field_values.get(change["revision"] - 1)
+                change["new_value"] = field_values.get(change["revision"])
+    
+    def get_note_changes(self, note_id: int, user_id: int, include_values: bool = True) -> List[Dict[str, Any]]:
         """
         Get change history for a note.
         
         Args:
             note_id (int): ID of the note
             user_id (int): ID of the user requesting the changes
+            include_values (bool): Whether to reconstruct the old and new values of each change
             
         Returns:
             List[Dict[str, Any]]: List of changes
         """
         # Check if user has access to the note
-        access_query = """
-        SELECT 1 FROM shared_notes sn
-        JOIN workspace_members wm ON sn.workspace_id = wm.workspace_id
-        WHERE sn.note_id = ? AND wm.user_id = ?
-        UNION
-        SELECT 1 FROM notes
-        WHERE id = ? AND user_id = ?
-        """
-        
-        has_access = self.db_manager.execute_query(access_query, (note_id, user_id, note_id, user_id)).fetchone()
+        _, has_access = self._check_note_access(note_id, user_id)
         if not has_access:
             logger.error(f"User {user_id} does not have access to note {note_id}")
             return []
@@ -736,12 +775,15 @@ class CollaborationManager:
         FROM note_changes nc
         JOIN users u ON nc.user_id = u.id
         WHERE nc.note_id = ?
-        ORDER BY nc.created_at DESC
+        ORDER BY nc.created_at DESC, nc.id DESC
         """
         
         results = self.db_manager.execute_query(query, (note_id,)).fetchall()
         
         changes = [dict(result) for result in results]
+        if include_values:
+            self._fill_change_values(note_id, changes)
+        
         return changes
     
     def merge_changes(self, note_id: int, user_id: int, from_user_id: int) -> bool:
@@ -775,38 +817,45 @@ class CollaborationManager:
         changes_query = """
         SELECT * FROM note_changes
         WHERE note_id = ? AND user_id = ?
-        ORDER BY created_at ASC
+        ORDER BY created_at ASC, id ASC
         """
         
-        changes = self.db_manager.execute_query(changes_query, (note_id, from_user_id)).fetchall()
+        changes = [dict(change) for change in self.db_manager.execute_query(changes_query, (note_id, from_user_id)).fetchall()]
         
         if not changes:
             logger.warning(f"No changes found from user {from_user_id} for note {note_id}")
             return True
         
-        # Apply changes
+        # Only the last modification of each field decides its merged value
+        latest: Dict[str, Dict[str, Any]] = {}
         for change in changes:
-            # Update the note with the change
             if change["change_type"] == "modify":
-                update_query = f"""
-                UPDATE notes
-                SET {change["field_name"]} = ?
-                WHERE id = ?
-                """
-                
-                self.db_manager.execute_query(update_query, (change["new_value"], note_id))
+                latest[change["field_name"]] = change
+        
+        self._fill_change_values(note_id, list(latest.values()))
+        
+        # Apply changes
+        for field_name, change in latest.items():
+            # Update the note with the change
+            update_query = f"""
+            UPDATE notes
+            SET {field_name} = ?
+            WHERE id = ?
+            """
+            
+            self.db_manager.execute_query(update_query, (change["new_value"], note_id))
             
             # Track that we merged this change
             self.track_note_change(
                 note_id=note_id,
                 user_id=user_id,
                 change_type="merge",
-                field_name=change["field_name"],
-                old_value=f"Merged change {change['id']} from user {from_user_id}",
+                field_name=field_name,
+                old_value=change["old_value"],
                 new_value=change["new_value"]
             )
         
-        logger.info(f"Merged changes from user {from_user_id} into note {note_id}")
+        logger.info(f"Merged {len(changes)} changes from user {from_user_id} into note {note_id}")
         return True
 
 def create_workspace(db_manager, name: str, description: str, user_id: int) -> int:
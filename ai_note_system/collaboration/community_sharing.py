@@ -8,6 +8,8 @@ upvoting high-quality resources, and building collective learning packs.
 import os
 import logging
 import json
+import math
+import time
 from typing import Dict, Any, List, Optional, Union, Tuple
 from datetime import datetime
 import uuid
@@ -16,10 +18,27 @@ import re
 # Import related components
 from ..database.db_manager import DatabaseManager
 from ..api.llm_interface import LLMInterface, get_llm_interface
+from ..utils.periodic_task import PeriodicTask
+from .recommendation_index import RecommendationIndex
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Trend scores add these weights per event, halving every TREND_HALF_LIFE seconds after it
+UPVOTE_WEIGHT = 3.0
+VIEW_WEIGHT = 1.0
+SHARE_WEIGHT = 1.0
+TREND_HALF_LIFE = 24 * 3600.0
+
+# Scores are stored relative to an epoch and rebased when events get this many half-lives past it
+MAX_TREND_EXPONENT = 512
+
+# Tables with trend scores, and the upvotes column referencing each
+TREND_TABLES = {'shared_content': 'content_id', 'learning_packs': 'pack_id'}
+
+# Trending results per (database, table, limit), with the time they expire
+_trending_cache: Dict[Tuple[Any, str, int], Tuple[float, List[Dict[str, Any]]]] = {}
+
 class SharingPermission:
     """Permission levels for shared content"""
     PUBLIC = "public"  # Anyone can view
@@ -47,13 +66,39 @@ class CommunitySharing:
     """
     
     def __init__(self, db_manager: DatabaseManager, 
-                 llm_interface: Optional[LLMInterface] = None):
-        """Initialize the community sharing system"""
+                 llm_interface: Optional[LLMInterface] = None,
+                 trending_ttl: float = 30.0,
+                 embedding_interface=None,
+                 embedding_model: Optional[str] = None):
+        """
+        Initialize the community sharing system
+        
+        Args:
+            db_manager: Database manager instance
+            llm_interface: Optional LLM interface for anonymization
+            trending_ttl: Seconds that trending results are served from the cache
+            embedding_interface: Optional embedding interface; recommendations use tag matching without it
+            embedding_model: Name of the embedding model of the stored note embeddings
+        """
         self.db_manager = db_manager
         self.llm_interface = llm_interface or get_llm_interface()
+        self.trending_ttl = trending_ttl
+        
+        self._compactor_task = PeriodicTask(
+            "trend-compactor",
+            db_manager,
+            lambda task_db_manager: CommunitySharing(task_db_manager, self.llm_interface).compact_trend_scores,
+            run_immediately=False
+        )
         
         # Ensure database tables exist
         self._ensure_tables()
+        
+        self.recommendations = None
+        if embedding_interface is not None:
+            model = getattr(embedding_interface, 'model', None)
+            model_name = embedding_model or (model if isinstance(model, str) else type(embedding_interface).__name__)
+            self.recommendations = RecommendationIndex(db_manager, embedding_interface, model_name)
     
     def _ensure_tables(self) -> None:
         """Ensure that all required tables exist in the database"""
@@ -76,6 +121,7 @@ class CommunitySharing:
             updated_at TEXT NOT NULL,
             views INTEGER NOT NULL DEFAULT 0,
             upvotes INTEGER NOT NULL DEFAULT 0,
+            trend_score REAL NOT NULL DEFAULT 0,
             FOREIGN KEY (user_id) REFERENCES users(id)
         )
         ''')
@@ -115,6 +161,7 @@ class CommunitySharing:
             updated_at TEXT NOT NULL,
             views INTEGER NOT NULL DEFAULT 0,
             upvotes INTEGER NOT NULL DEFAULT 0,
+            trend_score REAL NOT NULL DEFAULT 0,
             FOREIGN KEY (user_id) REFERENCES users(id)
         )
         ''')
@@ -146,6 +193,35 @@ class CommunitySharing:
         )
         ''')
         
+        # Create trend state table with the epoch trend scores are relative to
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS trend_state (
+            table_name TEXT PRIMARY KEY,
+            epoch REAL NOT NULL
+        )
+        ''')
+        
+        for table in TREND_TABLES:
+            cursor.execute('''
+            INSERT OR IGNORE INTO trend_state (table_name, epoch)
+            VALUES (?, ?)
+            ''', (table, time.time()))
+            
+            # Score tables created before trend scores from their upvotes and views
+            cursor.execute(f"PRAGMA table_info({table})")
+            if 'trend_score' not in [row[1] for row in cursor.fetchall()]:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN trend_score REAL NOT NULL DEFAULT 0")
+                self._rebuild_trend_scores(cursor, table)
+        
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_shared_content_trend
+        ON shared_content(permission, trend_score DESC, created_at DESC)
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_learning_packs_trend
+        ON learning_packs(trend_score DESC, created_at DESC)
+        ''')
+        
         conn.commit()
     
     def share_content(self, user_id: int, content_type: str, 
@@ -186,12 +262,13 @@ class CommunitySharing:
         cursor.execute('''
         INSERT INTO shared_content (
             user_id, content_type, original_id, title, description, content,
-            anonymized, permission, created_at, updated_at
+            anonymized, permission, created_at, updated_at, trend_score
         )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
             user_id, content_type, original_id, title, description, content,
-            1 if anonymized else 0, permission, now, now
+            1 if anonymized else 0, permission, now, now,
+            self._trend_increment(cursor, 'shared_content', SHARE_WEIGHT)
         ))
         
         content_id = cursor.lastrowid
@@ -258,12 +335,12 @@ class CommunitySharing:
         
         shared_content['tags'] = [row[0] for row in cursor.fetchall()]
         
-        # Increment view count
+        # Increment view count and trend score
         cursor.execute('''
         UPDATE shared_content
-        SET views = views + 1
+        SET views = views + 1, trend_score = trend_score + ?
         WHERE id = ?
-        ''', (content_id,))
+        ''', (self._trend_increment(cursor, 'shared_content', VIEW_WEIGHT), content_id))
         
         conn.commit()
         
@@ -377,15 +454,19 @@ class CommunitySharing:
         VALUES (?, ?, ?)
         ''', (user_id, content_id, now))
         
-        # Update upvote count
+        # Update upvote count and trend score
         cursor.execute('''
         UPDATE shared_content
-        SET upvotes = upvotes + 1
+        SET upvotes = upvotes + 1, trend_score = trend_score + ?
         WHERE id = ?
-        ''', (content_id,))
+        ''', (self._trend_increment(cursor, 'shared_content', UPVOTE_WEIGHT), content_id))
         
         conn.commit()
         
+        # The upvoted content joins the user's interests
+        if self.recommendations:
+            self.recommendations.invalidate(user_id)
+        
         return True
     
     def create_learning_pack(self, user_id: int, title: str, 
@@ -415,10 +496,13 @@ class CommunitySharing:
         
         cursor.execute('''
         INSERT INTO learning_packs (
-            user_id, title, description, topic, difficulty, created_at, updated_at
+            user_id, title, description, topic, difficulty, created_at, updated_at, trend_score
         )
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (user_id, title, description, topic, difficulty, now, now))
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            user_id, title, description, topic, difficulty, now, now,
+            self._trend_increment(cursor, 'learning_packs', SHARE_WEIGHT)
+        ))
         
         pack_id = cursor.lastrowid
         
@@ -494,12 +578,12 @@ class CommunitySharing:
             }
             learning_pack['items'].append(item)
         
-        # Increment view count
+        # Increment view count and trend score
         cursor.execute('''
         UPDATE learning_packs
-        SET views = views + 1
+        SET views = views + 1, trend_score = trend_score + ?
         WHERE id = ?
-        ''', (pack_id,))
+        ''', (self._trend_increment(cursor, 'learning_packs', VIEW_WEIGHT), pack_id))
         
         conn.commit()
         
@@ -610,12 +694,12 @@ class CommunitySharing:
         VALUES (?, ?, ?)
         ''', (user_id, pack_id, now))
         
-        # Update upvote count
+        # Update upvote count and trend score
         cursor.execute('''
         UPDATE learning_packs
-        SET upvotes = upvotes + 1
+        SET upvotes = upvotes + 1, trend_score = trend_score + ?
         WHERE id = ?
-        ''', (pack_id,))
+        ''', (self._trend_increment(cursor, 'learning_packs', UPVOTE_WEIGHT), pack_id))
         
         conn.commit()
         
@@ -711,43 +795,237 @@ class CommunitySharing:
         
         return True
     
-    def get_trending_content(self, limit: int = 10) -> List[Dict[str, Any]]:
+    def _trend_increment(self, cursor, table: str, weight: float, timestamp: Optional[float] = None) -> float:
         """
-        Get trending shared content
+        Get the amount an event adds to a trend score, relative to the table's epoch
+        
+        Scores of events at different times compare as if all were decayed to now, so the
+        ordering of the stored scores is the trending order without rescoring any row.
+        
+        Args:
+            cursor: Database cursor
+            table: The table of the scored item
+            weight: The weight of the event
+            timestamp: Optional time of the event (defaults to now)
+            
+        Returns:
+            The weight grown by one doubling per half-life between the epoch and the event
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        
+        # The epoch must not move between reading it and writing the score with it
+        self._begin_write(cursor)
+        
+        cursor.execute('SELECT epoch FROM trend_state WHERE table_name = ?', (table,))
+        epoch = cursor.fetchone()[0]
+        
+        exponent = (timestamp - epoch) / TREND_HALF_LIFE
+        if exponent > MAX_TREND_EXPONENT:
+            # Rebase before scores grow out of floating point range
+            self._rebase_trend_scores(cursor, table, timestamp)
+            exponent = 0.0
+        
+        return weight * math.pow(2.0, exponent)
+    
+    def _rebase_trend_scores(self, cursor, table: str, epoch: float, floor: float = 0.0) -> int:
+        """
+        Move the epoch of a table's trend scores, scaling the stored scores to match
+        
+        Args:
+            cursor: Database cursor
+            table: The table of the scored items
+            epoch: The new epoch
+            floor: Scores below this after rebasing are reset to zero
+            
+        Returns:
+            The number of scores this rebase reset to zero
+        """
+        self._begin_write(cursor)
+        
+        cursor.execute('SELECT epoch FROM trend_state WHERE table_name = ?', (table,))
+        factor = math.pow(2.0, (cursor.fetchone()[0] - epoch) / TREND_HALF_LIFE)
+        
+        cursor.execute(f'''
+        SELECT COUNT(*) FROM {table}
+        WHERE trend_score > 0 AND trend_score * ? < ?
+        ''', (factor, floor))
+        reset = cursor.fetchone()[0]
+        
+        cursor.execute(f'''
+        UPDATE {table}
+        SET trend_score = CASE WHEN trend_score * ? < ? THEN 0 ELSE trend_score * ? END
+        WHERE trend_score > 0
+        ''', (factor, floor, factor))
+        
+        cursor.execute('''
+        UPDATE trend_state
+        SET epoch = ?
+        WHERE table_name = ?
+        ''', (epoch, table))
+        
+        return reset
+    
+    @staticmethod
+    def _begin_write(cursor) -> None:
+        """
+        Take the database write lock unless the connection's transaction already holds it
+        
+        The connection only opens a transaction implicitly before a write, so a
+        transaction in progress already holds the lock.
+        
+        Args:
+            cursor: Database cursor
+        """
+        if not cursor.connection.in_transaction:
+            cursor.execute('BEGIN IMMEDIATE')
+    
+    def _rebuild_trend_scores(self, cursor, table: str) -> None:
+        """
+        Score all items of a table from their upvotes, with views counted at creation time
+        
+        Args:
+            cursor: Database cursor
+            table: The table of the scored items
+        """
+        cursor.execute('SELECT epoch FROM trend_state WHERE table_name = ?', (table,))
+        epoch = cursor.fetchone()[0]
+        
+        def decayed(weight: float, created_at: str) -> float:
+            try:
+                timestamp = datetime.fromisoformat(created_at).timestamp()
+            except (TypeError, ValueError):
+                timestamp = epoch
+            return weight * math.pow(2.0, min((timestamp - epoch) / TREND_HALF_LIFE, MAX_TREND_EXPONENT))
+        
+        cursor.execute(f'SELECT id, created_at, views FROM {table}')
+        scores = {
+            row[0]: decayed(SHARE_WEIGHT + VIEW_WEIGHT * row[2], row[1])
+            for row in cursor.fetchall()
+        }
+        
+        column = TREND_TABLES[table]
+        cursor.execute(f'SELECT {column}, created_at FROM upvotes WHERE {column} IS NOT NULL')
+        for item_id, created_at in cursor.fetchall():
+            if item_id in scores:
+                scores[item_id] += decayed(UPVOTE_WEIGHT, created_at)
+        
+        cursor.executemany(f'''
+        UPDATE {table}
+        SET trend_score = ?
+        WHERE id = ?
+        ''', [(score, item_id) for item_id, score in scores.items()])
+        
+        logger.info(f"Computed trend scores for {len(scores)} rows of {table}")
+    
+    def compact_trend_scores(self, floor: float = 1e-3) -> Dict[str, int]:
+        """
+        Rebase trend scores to the current time and reset scores that have decayed away
+        
+        Args:
+            floor: Decayed scores below this are reset to zero
+            
+        Returns:
+            Dictionary with the number of scores reset to zero per table
+        """
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        
+        now = time.time()
+        
+        stats = {}
+        for table in TREND_TABLES:
+            stats[table] = self._rebase_trend_scores(cursor, table, now, floor)
+        
+        conn.commit()
+        
+        return stats
+    
+    def start_trend_compactor(self, interval_seconds: float = 3600) -> bool:
+        """
+        Compact trend scores periodically in a background thread
+        
+        Args:
+            interval_seconds: Seconds between runs
+            
+        Returns:
+            True if the compactor was started, False if it is already running
+        """
+        if not self._compactor_task.start(interval_seconds):
+            return False
+        
+        logger.info(f"Trend score compactor started, every {interval_seconds} seconds")
+        return True
+    
+    def stop_trend_compactor(self) -> None:
+        """Stop the background compactor thread, waiting for a running compaction to finish"""
+        self._compactor_task.stop()
+    
+    def _get_trending(self, table: str, query: str, limit: int, make_result) -> List[Dict[str, Any]]:
+        """
+        Read the top trend scores of a table, through the short-lived trending cache
         
         Args:
+            table: The table of the scored items
+            query: The query selecting items by trend score, ending with the trend score column
             limit: Maximum number of results to return
+            make_result: Function turning a row into a result
             
         Returns:
-            List of trending content summaries
+            List of results with their trend scores decayed to now
         """
+        db_path = getattr(self.db_manager, 'db_path', None)
+        key = (os.path.abspath(db_path) if isinstance(db_path, str) else id(self.db_manager), table, limit)
+        
+        cached = _trending_cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            return [dict(result) for result in cached[1]]
+        
         conn = self.db_manager.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-        SELECT id, user_id, content_type, title, description,
-               created_at, views, upvotes
-        FROM shared_content
-        WHERE permission = 'public'
-        ORDER BY (upvotes * 3 + views) DESC, created_at DESC
-        LIMIT ?
-        ''', (limit,))
+        cursor.execute('SELECT epoch FROM trend_state WHERE table_name = ?', (table,))
+        decay = math.pow(2.0, (cursor.fetchone()[0] - time.time()) / TREND_HALF_LIFE)
+        
+        cursor.execute(query, (limit,))
         
         results = []
         for row in cursor.fetchall():
-            result = {
-                'id': row[0],
-                'user_id': row[1],
-                'content_type': row[2],
-                'title': row[3],
-                'description': row[4],
-                'created_at': row[5],
-                'views': row[6],
-                'upvotes': row[7]
-            }
+            result = make_result(row)
+            result['trend_score'] = row[-1] * decay
             results.append(result)
         
-        return results
+        if self.trending_ttl > 0:
+            _trending_cache[key] = (time.monotonic() + self.trending_ttl, results)
+        
+        return [dict(result) for result in results]
+    
+    def get_trending_content(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Get trending shared content
+        
+        Args:
+            limit: Maximum number of results to return
+            
+        Returns:
+            List of trending content summaries
+        """
+        return self._get_trending('shared_content', '''
+        SELECT id, user_id, content_type, title, description,
+               created_at, views, upvotes, trend_score
+        FROM shared_content
+        WHERE permission = 'public'
+        ORDER BY trend_score DESC, created_at DESC
+        LIMIT ?
+        ''', limit, lambda row: {
+            'id': row[0],
+            'user_id': row[1],
+            'content_type': row[2],
+            'title': row[3],
+            'description': row[4],
+            'created_at': row[5],
+            'views': row[6],
+            'upvotes': row[7]
+        })
     
     def get_trending_learning_packs(self, limit: int = 10) -> List[Dict[str, Any]]:
         """
@@ -759,37 +1037,83 @@ class CommunitySharing:
         Returns:
             List of trending learning pack summaries
         """
-        conn = self.db_manager.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        return self._get_trending('learning_packs', '''
         SELECT id, user_id, title, description, topic, difficulty,
-               created_at, views, upvotes
+               created_at, views, upvotes, trend_score
         FROM learning_packs
-        ORDER BY (upvotes * 3 + views) DESC, created_at DESC
+        ORDER BY trend_score DESC, created_at DESC
         LIMIT ?
-        ''', (limit,))
+        ''', limit, lambda row: {
+            'id': row[0],
+            'user_id': row[1],
+            'title': row[2],
+            'description': row[3],
+            'topic': row[4],
+            'difficulty': row[5],
+            'created_at': row[6],
+            'views': row[7],
+            'upvotes': row[8]
+        })
+    
+    def get_recommended_content(self, user_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Get recommended content for a user based on their interests and activity
+        
+        Args:
+            user_id: The ID of the user
+            limit: Maximum number of results to return
+            
+        Returns:
+            List of recommended content summaries
+        """
+        if self.recommendations is None:
+            return self._get_tag_recommendations(user_id, limit)
+        
+        matches = self.recommendations.recommend(user_id, limit)
+        
+        # If the user has no interests yet, return trending content
+        if matches is None:
+            return self.get_trending_content(limit)
+        
+        if not matches:
+            return []
+        
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        
+        placeholders = ', '.join(['?'] * len(matches))
+        cursor.execute(f'''
+        SELECT id, user_id, content_type, title, description, created_at, views, upvotes
+        FROM shared_content
+        WHERE id IN ({placeholders})
+        ''', [content_id for content_id, _ in matches])
+        
+        rows = {row[0]: row for row in cursor.fetchall()}
         
         results = []
-        for row in cursor.fetchall():
+        for content_id, similarity in matches:
+            row = rows.get(content_id)
+            if not row:
+                continue
+            
             result = {
                 'id': row[0],
                 'user_id': row[1],
-                'title': row[2],
-                'description': row[3],
-                'topic': row[4],
-                'difficulty': row[5],
-                'created_at': row[6],
-                'views': row[7],
-                'upvotes': row[8]
+                'content_type': row[2],
+                'title': row[3],
+                'description': row[4],
+                'created_at': row[5],
+                'views': row[6],
+                'upvotes': row[7],
+                'relevance': similarity  # Cosine similarity to the user's interests
             }
             results.append(result)
         
         return results
     
-    def get_recommended_content(self, user_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+    def _get_tag_recommendations(self, user_id: int, limit: int = 10) -> List[Dict[str, Any]]:
         """
-        Get recommended content for a user based on their interests and activity
+        Get recommended content for a user by matching the tags of their notes and upvoted content
         
         Args:
             user_id: The ID of the user
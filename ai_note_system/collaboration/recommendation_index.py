@@ -0,0 +1,409 @@
+"""
+Recommendation index module for AI Note System.
+Recommends shared content by nearest-neighbour search between per-user interest
+vectors and an in-memory index of shared content embeddings.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+import numpy as np
+
+from ..embeddings.vector_index import VectorIndex
+from ..embeddings.embedding_sync import sync_embeddings
+from ..utils.periodic_task import PeriodicTask
+
+# Setup logging
+logger = logging.getLogger("ai_note_system.collaboration.recommendation_index")
+
+# Characters of shared content embedded along with its title and description
+CONTENT_EMBEDDING_CHARS = 2000
+
+# Shared content indexes per (database, embedding model), with the signature they were synced at
+_content_indexes: Dict[Tuple[Any, str], Tuple[Optional[Tuple], VectorIndex, Dict[int, str]]] = {}
+_content_indexes_lock = threading.Lock()
+
+class RecommendationIndex:
+    """
+    Recommends public shared content close to the centroid of what a user wrote and upvoted.
+    
+    A user's interest vector is the running sum of the embeddings of their notes and
+    upvoted content, stored with the last note embedding and upvote row it includes,
+    so refreshing it only reads the rows added since. Shared content embeddings are
+    persisted with a hash of the embedded text and held in a VectorIndex per database
+    and model; recommendations for active users can be precomputed in the background.
+    """
+    
+    def __init__(self, db_manager, embedder, model_name: str, max_age: float = 3600):
+        """
+        Initialize the recommendation index.
+        
+        Args:
+            db_manager: Database manager instance
+            embedder: Embedding interface used for shared content, the same model as the note embeddings
+            model_name (str): Name of the embedding model, as stored in note_embeddings
+            max_age (float): Seconds that precomputed recommendations are served
+        """
+        self.db_manager = db_manager
+        self.embedder = embedder
+        self.model_name = model_name
+        self.max_age = max_age
+        
+        self._precompute_task = PeriodicTask(
+            "recommendation-precompute",
+            db_manager,
+            lambda task_db_manager: RecommendationIndex(task_db_manager, embedder, model_name, max_age).precompute
+        )
+        
+        self._ensure_recommendation_tables()
+    
+    def _ensure_recommendation_tables(self) -> None:
+        """
+        Ensure the recommendation tables exist in the database.
+        """
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS shared_content_embeddings (
+            content_id INTEGER NOT NULL,
+            model_name TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            embedding BLOB NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (content_id, model_name),
+            FOREIGN KEY (content_id) REFERENCES shared_content(id)
+        )
+        ''')
+        
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_interest_vectors (
+            user_id INTEGER NOT NULL,
+            model_name TEXT NOT NULL,
+            vector_sum BLOB,
+            note_count INTEGER NOT NULL DEFAULT 0,
+            note_watermark INTEGER NOT NULL DEFAULT 0,
+            upvote_count INTEGER NOT NULL DEFAULT 0,
+            upvote_watermark INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (user_id, model_name),
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        ''')
+        
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS content_recommendations (
+            user_id INTEGER NOT NULL,
+            model_name TEXT NOT NULL,
+            results TEXT NOT NULL,
+            computed_at REAL NOT NULL,
+            PRIMARY KEY (user_id, model_name),
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        ''')
+        
+        conn.commit()
+    
+    @staticmethod
+    def content_text(title: str, description: Optional[str], content: Optional[str]) -> str:
+        """
+        Get the text embedded for a shared content item.
+        """
+        return "\n".join(part for part in (title, description, (content or "")[:CONTENT_EMBEDDING_CHARS]) if part)
+    
+    def get_content_index(self) -> VectorIndex:
+        """
+        Get the index of public shared content, embedding content added or changed since the last call.
+        
+        Returns:
+            VectorIndex: Normalized shared content embeddings by content ID
+        """
+        db_path = getattr(self.db_manager, 'db_path', None)
+        key = (os.path.abspath(db_path) if isinstance(db_path, str) else id(self.db_manager), self.model_name)
+        
+        with _content_indexes_lock:
+            signature, index, hashes = _content_indexes.get(key, (None, VectorIndex(), {}))
+            
+            cursor = self.db_manager.get_connection().cursor()
+            cursor.execute('''
+            SELECT COUNT(*), MAX(id), TOTAL(id), MAX(updated_at) FROM shared_content
+            WHERE permission = 'public'
+            ''')
+            current = tuple(cursor.fetchone())
+            
+            if current != signature:
+                self._sync_content(index, hashes)
+                _content_indexes[key] = (current, index, hashes)
+        
+        return index
+    
+    def _sync_content(self, index: VectorIndex, hashes: Dict[int, str], batch_size: int = 256) -> int:
+        """
+        Bring a content index up to date with the public shared content.
+        
+        Args:
+            index (VectorIndex): Index to update
+            hashes (Dict[int, str]): Hash of the indexed text per content ID, updated in place
+            batch_size (int): Texts per embedding request
+        
+        Returns:
+            int: Number of content items embedded
+        """
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+        SELECT sc.id, sc.title, sc.description, sc.content, e.content_hash
+        FROM shared_content sc
+        LEFT JOIN shared_content_embeddings e ON e.content_id = sc.id AND e.model_name = ?
+        WHERE sc.permission = 'public'
+        ''', (self.model_name,))
+        rows = cursor.fetchall()
+        
+        embedded = sync_embeddings(
+            conn, self.embedder, self.model_name, "shared_content_embeddings", "content_id",
+            [(content_id, self.content_text(title, description, content), stored_hash)
+             for content_id, title, description, content, stored_hash in rows],
+            hashes, index.add_many, index.remove, batch_size
+        )
+        
+        if embedded:
+            logger.info(f"Embedded {embedded} new or changed shared content items")
+        
+        return embedded
+    
+    def get_interest_vector(self, user_id: int) -> Optional[np.ndarray]:
+        """
+        Get the centroid of a user's note and upvoted content embeddings, adding those new since the last call.
+        
+        Args:
+            user_id (int): ID of the user
+        
+        Returns:
+            Optional[np.ndarray]: Interest vector, or None if the user has nothing embedded yet
+        """
+        conn = self.db_manager.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+        SELECT vector_sum, note_count, note_watermark, upvote_count, upvote_watermark
+        FROM user_interest_vectors
+        WHERE user_id = ? AND model_name = ?
+        ''', (user_id, self.model_name))
+        row = cursor.fetchone()
+        
+        vector_sum = np.frombuffer(row[0], dtype=np.float32).copy() if row and row[0] else None
+        note_count, note_watermark, upvote_count, upvote_watermark = tuple(row[1:]) if row else (0, 0, 0, 0)
+        
+        # Re-embedded or deleted notes drop rows the sum includes, so it is rebuilt
+        cursor.execute('''
+        SELECT COUNT(*) FROM note_embeddings ne
+        JOIN notes n ON ne.note_id = n.id
+        WHERE n.user_id = ? AND ne.model_name = ? AND ne.id <= ?
+        ''', (user_id, self.model_name, note_watermark))
+        if cursor.fetchone()[0] != note_count:
+            vector_sum, note_count, note_watermark, upvote_count, upvote_watermark = None, 0, 0, 0, 0
+        
+        cursor.execute('''
+        SELECT ne.id, ne.embedding FROM note_embeddings ne
+        JOIN notes n ON ne.note_id = n.id
+        WHERE n.user_id = ? AND ne.model_name = ? AND ne.id > ?
+        ''', (user_id, self.model_name, note_watermark))
+        new_notes = cursor.fetchall()
+        
+        cursor.execute('''
+        SELECT id, content_id FROM upvotes
+        WHERE user_id = ? AND content_id IS NOT NULL AND id > ?
+        ''', (user_id, upvote_watermark))
+        new_upvotes = cursor.fetchall()
+        
+        if not new_notes and not new_upvotes:
+            return None if vector_sum is None else vector_sum / max(note_count + upvote_count, 1)
+        
+        vectors = [np.frombuffer(embedding, dtype=np.float32) for _, embedding in new_notes]
+        
+        if new_upvotes:
+            index = self.get_content_index()
+            vectors.extend(vector for vector in (index.get(content_id) for _, content_id in new_upvotes) if vector is not None)
+        
+        if vectors:
+            added = VectorIndex.normalize(np.stack(vectors)).sum(axis=0)
+            if vector_sum is not None and vector_sum.shape != added.shape:
+                logger.warning(f"Embedding dimensions of user {user_id} changed, rebuilding the interest vector")
+                return self._reset_interest(user_id)
+            vector_sum = added if vector_sum is None else vector_sum + added
+        
+        note_count += len(new_notes)
+        upvote_count += len(vectors) - len(new_notes)
+        note_watermark = max([note_watermark] + [row[0] for row in new_notes])
+        upvote_watermark = max([upvote_watermark] + [row[0] for row in new_upvotes])
+        
+        cursor.execute('''
+        INSERT OR REPLACE INTO user_interest_vectors
+        (user_id, model_name, vector_sum, note_count, note_watermark, upvote_count, upvote_watermark, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            user_id, self.model_name, None if vector_sum is None else vector_sum.astype(np.float32).tobytes(),
+            note_count, note_watermark, upvote_count, upvote_watermark, datetime.now().isoformat()
+        ))
+        conn.commit()
+        
+        return None if vector_sum is None else vector_sum / max(note_count + upvote_count, 1)
+    
+    def _reset_interest(self, user_id: int) -> Optional[np.ndarray]:
+        conn = self.db_manager.get_connection()
+        conn.cursor().execute('''
+        DELETE FROM user_interest_vectors WHERE user_id = ? AND model_name = ?
+        ''', (user_id, self.model_name))
+        conn.commit()
+        return self.get_interest_vector(user_id)
+    
+    def _get_exclusions(self, user_id: int) -> List[int]:
+        """
+        Get the content a user shared or upvoted, which is not recommended to them.
+        """
+        cursor = self.db_manager.get_connection().cursor()
+        cursor.execute('''
+        SELECT id FROM shared_content WHERE user_id = ?
+        UNION
+        SELECT content_id FROM upvotes WHERE user_id = ? AND content_id IS NOT NULL
+        ''', (user_id, user_id))
+        return [row[0] for row in cursor.fetchall()]
+    
+    def recommend(self, user_id: int, limit: int = 10,
+                  exclude: Optional[Iterable[int]] = None) -> Optional[List[Tuple[int, float]]]:
+        """
+        Find the public shared content nearest to a user's interests.
+        
+        Precomputed recommendations are used while they are recent enough.
+        
+        Args:
+            user_id (int): ID of the user
+            limit (int): Maximum number of results
+            exclude (Iterable[int], optional): Further content IDs to leave out
+        
+        Returns:
+            Optional[List[Tuple[int, float]]]: (content_id, similarity) pairs, most similar first,
+                or None if the user has no interests yet
+        """
+        exclusions = set(self._get_exclusions(user_id))
+        exclusions.update(exclude or [])
+        
+        cursor = self.db_manager.get_connection().cursor()
+        cursor.execute('''
+        SELECT results, computed_at FROM content_recommendations
+        WHERE user_id = ? AND model_name = ?
+        ''', (user_id, self.model_name))
+        row = cursor.fetchone()
+        
+        if row and time.time() - row[1] < self.max_age:
+            results = [(content_id, score) for content_id, score in json.loads(row[0]) if content_id not in exclusions]
+            if len(results) >= limit:
+                return results[:limit]
+        
+        vector = self.get_interest_vector(user_id)
+        if vector is None:
+            return None
+        
+        return self.get_content_index().search(vector, k=limit, exclude=exclusions)
+    
+    def invalidate(self, user_id: int) -> None:
+        """
+        Drop the precomputed recommendations of a user.
+        
+        Args:
+            user_id (int): ID of the user
+        """
+        conn = self.db_manager.get_connection()
+        conn.cursor().execute('''
+        DELETE FROM content_recommendations WHERE user_id = ? AND model_name = ?
+        ''', (user_id, self.model_name))
+        conn.commit()
+    
+    def get_active_users(self, since: timedelta = timedelta(days=7)) -> List[int]:
+        """
+        Get the users who wrote notes or upvoted content recently.
+        
+        Args:
+            since (timedelta): How far back activity counts
+        
+        Returns:
+            List[int]: IDs of the active users
+        """
+        cutoff = (datetime.now() - since).isoformat()
+        
+        cursor = self.db_manager.get_connection().cursor()
+        cursor.execute('''
+        SELECT user_id FROM notes WHERE updated_at >= ? AND user_id IS NOT NULL
+        UNION
+        SELECT user_id FROM upvotes WHERE created_at >= ?
+        ''', (cutoff, cutoff))
+        return [row[0] for row in cursor.fetchall()]
+    
+    def precompute(self, user_ids: Optional[List[int]] = None, k: int = 50) -> int:
+        """
+        Compute and store recommendations for many users with one matrix product per block of users.
+        
+        Args:
+            user_ids (List[int], optional): IDs of the users (defaults to the active users)
+            k (int): Number of recommendations stored per user
+        
+        Returns:
+            int: Number of users with stored recommendations
+        """
+        if user_ids is None:
+            user_ids = self.get_active_users()
+        
+        interests = [(user_id, self.get_interest_vector(user_id)) for user_id in user_ids]
+        interests = [(user_id, vector) for user_id, vector in interests if vector is not None]
+        if not interests:
+            return 0
+        
+        exclusions = {user_id: set(self._get_exclusions(user_id)) for user_id, _ in interests}
+        extra = max(len(excluded) for excluded in exclusions.values())
+        
+        index = self.get_content_index()
+        matches = index.search_many(np.stack([vector for _, vector in interests]), k=k + extra)
+        
+        computed_at = time.time()
+        rows = []
+        for (user_id, _), results in zip(interests, matches):
+            results = [(content_id, round(score, 6)) for content_id, score in results if content_id not in exclusions[user_id]]
+            rows.append((user_id, self.model_name, json.dumps(results[:k]), computed_at))
+        
+        conn = self.db_manager.get_connection()
+        conn.cursor().executemany('''
+        INSERT OR REPLACE INTO content_recommendations (user_id, model_name, results, computed_at)
+        VALUES (?, ?, ?, ?)
+        ''', rows)
+        conn.commit()
+        
+        logger.info(f"Precomputed recommendations for {len(rows)} users")
+        return len(rows)
+    
+    def start_precompute_scheduler(self, interval_seconds: float = 3600) -> bool:
+        """
+        Precompute recommendations for active users periodically in a background thread.
+        
+        Args:
+            interval_seconds (float): Seconds between runs
+        
+        Returns:
+            bool: True if the scheduler was started, False if it is already running
+        """
+        if not self._precompute_task.start(interval_seconds):
+            return False
+        
+        logger.info(f"Recommendation precompute scheduler started, every {interval_seconds} seconds")
+        return True
+    
+    def stop_precompute_scheduler(self) -> None:
+        """
+        Stop the background precompute thread, waiting for a running precompute to finish.
+        """
+        self._precompute_task.stop()
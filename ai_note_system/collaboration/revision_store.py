@@ -0,0 +1,335 @@
+"""
+Revision store module for AI Note System.
+Keeps the history of note fields as periodic full snapshots plus compact text diffs.
+"""
+
+import re
+import json
+import logging
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import Dict, Any, List, Optional, Union, Tuple, Iterable, Iterator
+
+# Setup logging
+logger = logging.getLogger("ai_note_system.collaboration.revision_store")
+
+# Words and the whitespace between them, so that joining the tokens gives back the text
+_WORD_PATTERN = re.compile(r"\s+|\S+")
+
+Delta = List[Union[int, str]]
+
+def _append_op(delta: Delta, op: Union[int, str]) -> None:
+    """
+    Append an operation to a delta, merging it with the previous one of the same kind.
+    """
+    if not op:
+        return
+    
+    if delta:
+        last = delta[-1]
+        if isinstance(op, str) and isinstance(last, str):
+            delta[-1] = last + op
+            return
+        if isinstance(op, int) and isinstance(last, int) and (op > 0) == (last > 0):
+            delta[-1] = last + op
+            return
+    
+    delta.append(op)
+
+def _diff_tokens(delta: Delta, old_tokens: List[str], new_tokens: List[str], word_level: bool) -> None:
+    """
+    Append the operations turning one token sequence into another to a delta.
+    
+    Replaced blocks of lines are diffed again word by word.
+    """
+    matcher = SequenceMatcher(None, old_tokens, new_tokens)
+    
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        old_text = "".join(old_tokens[i1:i2])
+        new_text = "".join(new_tokens[j1:j2])
+        
+        if tag == "equal":
+            _append_op(delta, len(old_text))
+        elif tag == "replace" and not word_level:
+            _diff_tokens(delta, _WORD_PATTERN.findall(old_text), _WORD_PATTERN.findall(new_text), True)
+        else:
+            _append_op(delta, -len(old_text))
+            _append_op(delta, new_text)
+
+def make_delta(old: str, new: str) -> Delta:
+    """
+    Compute a compact diff between two texts, by line and then by word.
+    
+    Args:
+        old (str): Previous text
+        new (str): New text
+    
+    Returns:
+        Delta: Operations over the previous text: a positive int copies that many
+            characters, a negative int skips them and a string is inserted
+    """
+    delta: Delta = []
+    _diff_tokens(delta, old.splitlines(keepends=True), new.splitlines(keepends=True), False)
+    return delta
+
+def apply_delta(old: str, delta: Delta) -> str:
+    """
+    Apply a diff computed by make_delta.
+    
+    Args:
+        old (str): Previous text
+        delta (Delta): Operations over the previous text
+    
+    Returns:
+        str: New text
+    """
+    parts = []
+    position = 0
+    
+    for op in delta:
+        if isinstance(op, str):
+            parts.append(op)
+        elif op > 0:
+            parts.append(old[position:position + op])
+            position += op
+        else:
+            position -= op
+    
+    return "".join(parts)
+
+class RevisionStore:
+    """
+    Stores every revision of note fields as full snapshots or diffs against the previous revision.
+    
+    A snapshot is written every snapshot_interval revisions, or earlier once the diffs since
+    the last snapshot outgrow the text, so reconstructing any revision applies a bounded
+    number of diffs to one snapshot.
+    """
+    
+    def __init__(self, db_manager, snapshot_interval: int = 32, cache_size: int = 256):
+        """
+        Initialize the revision store.
+        
+        Args:
+            db_manager: Database manager instance
+            snapshot_interval (int): Maximum number of diffs between snapshots
+            cache_size (int): Number of latest field revisions kept in memory
+        """
+        self.db_manager = db_manager
+        self.snapshot_interval = snapshot_interval
+        self.cache_size = cache_size
+        
+        # Latest (revision, value, last snapshot revision, diff size since it) per (note_id, field_name)
+        self._tips: "OrderedDict[Tuple[int, str], Tuple[int, Optional[str], int, int]]" = OrderedDict()
+        
+        self._ensure_revision_tables()
+    
+    def _ensure_revision_tables(self) -> None:
+        """
+        Ensure the revision table exists in the database.
+        """
+        revisions_query = """
+        CREATE TABLE IF NOT EXISTS note_revisions (
+            note_id INTEGER NOT NULL,
+            field_name TEXT NOT NULL,
+            revision INTEGER NOT NULL,
+            is_snapshot BOOLEAN NOT NULL,
+            content TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (note_id, field_name, revision),
+            FOREIGN KEY (note_id) REFERENCES notes(id) ON DELETE CASCADE
+        )
+        """
+        self.db_manager.execute_query(revisions_query)
+    
+    def _load_range(self, note_id: int, field_name: str, revision: Optional[int]) -> List[Any]:
+        """
+        Load the rows needed to reconstruct a revision: its last snapshot and the diffs after it.
+        """
+        revision_filter = "" if revision is None else "AND revision <= ?"
+        params: Tuple = (note_id, field_name) if revision is None else (note_id, field_name, revision)
+        
+        snapshot = self.db_manager.execute_query(f"""
+        SELECT MAX(revision) AS revision FROM note_revisions
+        WHERE note_id = ? AND field_name = ? AND is_snapshot = 1 {revision_filter}
+        """, params).fetchone()
+        
+        if not snapshot or snapshot["revision"] is None:
+            return []
+        
+        return self.db_manager.execute_query(f"""
+        SELECT revision, is_snapshot, content FROM note_revisions
+        WHERE note_id = ? AND field_name = ? AND revision >= ? {revision_filter}
+        ORDER BY revision
+        """, (note_id, field_name, snapshot["revision"]) + params[2:]).fetchall()
+    
+    @staticmethod
+    def _replay(rows: Iterable[Any]) -> Iterator[Tuple[int, Optional[str]]]:
+        """
+        Reconstruct revisions from a snapshot row and the diff rows after it.
+        """
+        value: Optional[str] = None
+        for row in rows:
+            if row["is_snapshot"]:
+                value = row["content"]
+            else:
+                value = apply_delta(value or "", json.loads(row["content"]))
+            yield row["revision"], value
+    
+    def _get_tip(self, note_id: int, field_name: str) -> Optional[Tuple[int, Optional[str], int, int]]:
+        """
+        Get the latest revision of a field, from memory if no other writer added one since.
+        """
+        key = (note_id, field_name)
+        latest = self.db_manager.execute_query("""
+        SELECT MAX(revision) AS revision FROM note_revisions
+        WHERE note_id = ? AND field_name = ?
+        """, key).fetchone()
+        
+        if not latest or latest["revision"] is None:
+            self._tips.pop(key, None)
+            return None
+        
+        tip = self._tips.get(key)
+        if tip and tip[0] == latest["revision"]:
+            self._tips.move_to_end(key)
+            return tip
+        
+        rows = self._load_range(note_id, field_name, None)
+        revision, value = None, None
+        for revision, value in self._replay(rows):
+            pass
+        
+        diff_size = sum(len(row["content"]) for row in rows[1:])
+        tip = (revision, value, rows[0]["revision"], diff_size)
+        self._remember(key, tip)
+        return tip
+    
+    def _remember(self, key: Tuple[int, str], tip: Tuple[int, Optional[str], int, int]) -> None:
+        self._tips[key] = tip
+        self._tips.move_to_end(key)
+        while len(self._tips) > self.cache_size:
+            self._tips.popitem(last=False)
+    
+    def append(self, note_id: int, field_name: str, value: Optional[str], base_value: Optional[str] = None) -> int:
+        """
+        Add a revision of a note field.
+        
+        Args:
+            note_id (int): ID of the note
+            field_name (str): Name of the field
+            value (str): New value of the field
+            base_value (str, optional): Value before the first tracked change, stored as revision 0
+        
+        Returns:
+            int: Number of the new revision
+        """
+        value = None if value is None else str(value)
+        tip = self._get_tip(note_id, field_name)
+        
+        if tip is None:
+            # Start the history with the value the field had before
+            self.db_manager.execute_query("""
+            INSERT INTO note_revisions (note_id, field_name, revision, is_snapshot, content)
+            VALUES (?, ?, 0, 1, ?)
+            """, (note_id, field_name, None if base_value is None else str(base_value)))
+            tip = (0, base_value, 0, 0)
+        
+        previous_revision, previous_value, snapshot_revision, diff_size = tip
+        revision = previous_revision + 1
+        
+        delta = None
+        if value is not None and previous_value is not None and revision - snapshot_revision < self.snapshot_interval:
+            delta = json.dumps(make_delta(previous_value, value), separators=(",", ":"), ensure_ascii=False)
+            
+            # Replaying more diff text than the field holds is slower than reading a snapshot
+            if diff_size + len(delta) > max(len(value), 1024):
+                delta = None
+        
+        if delta is None:
+            content, is_snapshot = value, 1
+            snapshot_revision, diff_size = revision, 0
+        else:
+            content, is_snapshot = delta, 0
+            diff_size += len(delta)
+        
+        self.db_manager.execute_query("""
+        INSERT INTO note_revisions (note_id, field_name, revision, is_snapshot, content)
+        VALUES (?, ?, ?, ?, ?)
+        """, (note_id, field_name, revision, is_snapshot, content))
+        
+        self._remember((note_id, field_name), (revision, value, snapshot_revision, diff_size))
+        return revision
+    
+    def get_revision(self, note_id: int, field_name: str, revision: Optional[int] = None) -> Optional[str]:
+        """
+        Reconstruct a revision of a note field.
+        
+        Args:
+            note_id (int): ID of the note
+            field_name (str): Name of the field
+            revision (int, optional): Number of the revision (defaults to the latest)
+        
+        Returns:
+            Optional[str]: Value of the field at that revision, or None if it has no such revision
+        """
+        tip = self._tips.get((note_id, field_name))
+        if tip and revision is not None and tip[0] == revision:
+            return tip[1]
+        
+        rows = self._load_range(note_id, field_name, revision)
+        if not rows or (revision is not None and rows[-1]["revision"] != revision):
+            return None
+        
+        value = None
+        for _, value in self._replay(rows):
+            pass
+        return value
+    
+    def get_revisions(self, note_id: int, field_name: str, revisions: Iterable[int]) -> Dict[int, Optional[str]]:
+        """
+        Reconstruct many revisions of a note field in one pass over its history.
+        
+        Args:
+            note_id (int): ID of the note
+            field_name (str): Name of the field
+            revisions (Iterable[int]): Numbers of the revisions
+        
+        Returns:
+            Dict[int, Optional[str]]: Value per revision number
+        """
+        wanted = set(revisions)
+        if not wanted:
+            return {}
+        
+        # Start from the last snapshot at or before the earliest wanted revision
+        first = self._load_range(note_id, field_name, min(wanted))
+        if not first:
+            return {}
+        
+        rows = self.db_manager.execute_query("""
+        SELECT revision, is_snapshot, content FROM note_revisions
+        WHERE note_id = ? AND field_name = ? AND revision >= ? AND revision <= ?
+        ORDER BY revision
+        """, (note_id, field_name, first[0]["revision"], max(wanted)))
+        
+        return {revision: value for revision, value in self._replay(rows) if revision in wanted}
+    
+    def get_storage_size(self, note_id: Optional[int] = None) -> int:
+        """
+        Get the number of characters stored for revisions.
+        
+        Args:
+            note_id (int, optional): Only count revisions of this note
+        
+        Returns:
+            int: Total length of snapshots and diffs
+        """
+        query = "SELECT TOTAL(LENGTH(content)) AS size FROM note_revisions"
+        params: Tuple = ()
+        
+        if note_id is not None:
+            query += " WHERE note_id = ?"
+            params = (note_id,)
+        
+        return int(self.db_manager.execute_query(query, params).fetchone()["size"])
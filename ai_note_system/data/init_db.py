@@ -99,6 +99,7 @@ def init_db(db_path):
         note_id INTEGER,
         related_note_id INTEGER,
         similarity REAL,
+        link_type TEXT NOT NULL DEFAULT 'similarity',
         PRIMARY KEY (note_id, related_note_id),
         FOREIGN KEY (note_id) REFERENCES notes (id) ON DELETE CASCADE,
         FOREIGN KEY (related_note_id) REFERENCES notes (id) ON DELETE CASCADE
@@ -7,19 +7,32 @@ import os
 import sqlite3
 import logging
 import json
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple, Callable, Iterable
 from datetime import datetime
 from pathlib import Path
 
 # Setup logging
 logger = logging.getLogger("ai_note_system.database.db_manager")
 
+# Link type of related_notes rows written by embedding similarity; only these are replaced on relinking
+SIMILARITY_LINK = "similarity"
+
+# Writes a similarity link without overwriting a link of another type between the same notes
+_UPSERT_SIMILARITY_LINK = f"""
+INSERT INTO related_notes (note_id, related_note_id, similarity, link_type) VALUES (?, ?, ?, '{SIMILARITY_LINK}')
+ON CONFLICT (note_id, related_note_id) DO UPDATE SET similarity = excluded.similarity
+WHERE link_type = '{SIMILARITY_LINK}'
+"""
+
 class DatabaseManager:
     """
     Database manager class for AI Note System.
     Handles SQLite database operations for storing and retrieving notes.
     """
     
+    # Callbacks notified of note and relationship writes
+    _change_listeners: List[Callable[[str, str, List[int]], None]] = []
+    
     def __init__(self, db_path: str):
         """
         Initialize the DatabaseManager.
@@ -70,6 +83,47 @@ class DatabaseManager:
         """
         self.close()
         
+    @classmethod
+    def add_change_listener(cls, listener: Callable[[str, str, List[int]], None]) -> None:
+        """
+        Register a callback for note and relationship writes, e.g. to invalidate caches.
+        
+        The callback is called as listener(db_path, kind, note_ids) where kind is
+        'notes' (created or updated), 'deleted' or 'related_notes' (outgoing
+        relationships of note_ids changed).
+        
+        Args:
+            listener (Callable): Callback to register
+        """
+        if listener not in cls._change_listeners:
+            cls._change_listeners.append(listener)
+    
+    @classmethod
+    def remove_change_listener(cls, listener: Callable[[str, str, List[int]], None]) -> None:
+        """
+        Unregister a callback registered with add_change_listener.
+        
+        Args:
+            listener (Callable): Callback to remove
+        """
+        if listener in cls._change_listeners:
+            cls._change_listeners.remove(listener)
+    
+    def _notify_change(self, kind: str, note_ids: Iterable[int]) -> None:
+        """
+        Notify registered listeners of a write.
+        
+        Args:
+            kind (str): 'notes', 'deleted' or 'related_notes'
+            note_ids (Iterable[int]): IDs of the affected notes
+        """
+        note_ids = list(note_ids)
+        for listener in list(self._change_listeners):
+            try:
+                listener(self.db_path, kind, note_ids)
+            except Exception as e:
+                logger.warning(f"Error in database change listener: {e}")
+    
     # CRUD operations for notes
     
     def create_note(self, note_data: Dict[str, Any]) -> int:
@@ -130,6 +184,7 @@ class DatabaseManager:
             
             self.conn.commit()
             logger.info(f"Created note with ID {note_id}: {title}")
+            self._notify_change("notes", [note_id])
             return note_id
             
         except sqlite3.Error as e:
@@ -252,6 +307,7 @@ class DatabaseManager:
             
             self.conn.commit()
             logger.info(f"Updated note with ID {note_id}")
+            self._notify_change("notes", [note_id])
             return True
             
         except sqlite3.Error as e:
@@ -281,6 +337,7 @@ class DatabaseManager:
             
             self.conn.commit()
             logger.info(f"Deleted note with ID {note_id}")
+            self._notify_change("deleted", [note_id])
             return True
             
         except sqlite3.Error as e:
@@ -520,23 +577,35 @@ class DatabaseManager:
     
     # Methods for related notes
     
-    def add_related_notes(self, note_id: int, related_notes: List[Tuple[int, float]]) -> None:
+    def add_related_notes(
+        self,
+        note_id: int,
+        related_notes: List[Tuple[int, float]],
+        link_type: str = "manual"
+    ) -> None:
         """
         Add related notes.
         
+        Links of any type other than SIMILARITY_LINK are kept when the note's
+        similarity links are recomputed.
+        
         Args:
             note_id (int): ID of the note
             related_notes (List[Tuple[int, float]]): List of (related_note_id, similarity) tuples
+            link_type (str): Source of the links, e.g. "manual" or "near_duplicate"
         """
         for related_id, similarity in related_notes:
             self.cursor.execute(
                 """
                 INSERT OR REPLACE INTO related_notes 
-                (note_id, related_note_id, similarity) 
-                VALUES (?, ?, ?)
+                (note_id, related_note_id, similarity, link_type) 
+                VALUES (?, ?, ?, ?)
                 """,
-                (note_id, related_id, similarity)
+                (note_id, related_id, similarity, link_type)
             )
+        
+        if related_notes:
+            self._notify_change("related_notes", [note_id])
     
     def get_related_notes(self, note_id: int, limit: int = 5) -> List[Dict[str, Any]]:
         """
@@ -560,6 +629,264 @@ class DatabaseManager:
         
         return [dict(row) for row in self.cursor.fetchall()]
     
+    # Methods for content fingerprints
+    
+    def find_note_by_source(self, path: str) -> Optional[int]:
+        """
+        Find the most recent note imported from a source path or URL.
+        
+        Args:
+            path (str): Source file path or URL
+            
+        Returns:
+            Optional[int]: ID of the note or None if not found
+        """
+        self.cursor.execute("""
+        SELECT id FROM notes
+        WHERE path = ?
+        ORDER BY id DESC
+        LIMIT 1
+        """, (path,))
+        
+        row = self.cursor.fetchone()
+        return row["id"] if row else None
+    
+    def find_note_by_fingerprint(self, stage: str, fingerprint: str) -> Optional[int]:
+        """
+        Find a note whose stored fingerprint for a stage matches.
+        
+        Args:
+            stage (str): Stage name (e.g. "text")
+            fingerprint (str): Fingerprint to look up
+            
+        Returns:
+            Optional[int]: ID of the note or None if not found
+        """
+        self.cursor.execute("""
+        SELECT note_id FROM note_fingerprints
+        WHERE stage = ? AND fingerprint = ?
+        ORDER BY note_id DESC
+        LIMIT 1
+        """, (stage, fingerprint))
+        
+        row = self.cursor.fetchone()
+        return row["note_id"] if row else None
+    
+    def get_note_fingerprints(self, note_id: int) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the stored fingerprints of a note.
+        
+        Args:
+            note_id (int): ID of the note
+            
+        Returns:
+            Dict[str, Dict[str, Any]]: Stage name mapped to its fingerprint and stored artifact
+        """
+        self.cursor.execute("""
+        SELECT stage, fingerprint, artifact FROM note_fingerprints
+        WHERE note_id = ?
+        """, (note_id,))
+        
+        fingerprints = {}
+        for row in self.cursor.fetchall():
+            artifact = json.loads(row["artifact"]) if row["artifact"] else None
+            fingerprints[row["stage"]] = {"fingerprint": row["fingerprint"], "artifact": artifact}
+        
+        return fingerprints
+    
+    def save_note_fingerprints(
+        self,
+        note_id: int,
+        fingerprints: Dict[str, str],
+        artifacts: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """
+        Store fingerprints for a note in a single transaction.
+        
+        Args:
+            note_id (int): ID of the note
+            fingerprints (Dict[str, str]): Stage name mapped to fingerprint
+            artifacts (Dict[str, Any], optional): Artifacts to store for stages
+                that have no table of their own (e.g. visualizations)
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        artifacts = artifacts or {}
+        now = datetime.now().isoformat()
+        
+        try:
+            self.cursor.executemany("""
+            INSERT OR REPLACE INTO note_fingerprints
+            (note_id, stage, fingerprint, artifact, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            """, [
+                (
+                    note_id,
+                    stage,
+                    fingerprint,
+                    json.dumps(artifacts[stage]) if stage in artifacts else None,
+                    now
+                )
+                for stage, fingerprint in fingerprints.items()
+            ])
+            
+            self.conn.commit()
+            return True
+            
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logger.error(f"Error saving fingerprints: {e}")
+            return False
+    
+    # Methods for near-duplicate detection
+    
+    def save_note_minhash(self, note_id: int, signature: bytes, band_keys: List[int]) -> bool:
+        """
+        Store a note's MinHash signature and its LSH bucket keys in a single transaction.
+        
+        Args:
+            note_id (int): ID of the note
+            signature (bytes): Serialized MinHash signature
+            band_keys (List[int]): One LSH bucket key per band
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            self.cursor.execute(
+                "INSERT OR REPLACE INTO note_minhash (note_id, signature, updated_at) VALUES (?, ?, ?)",
+                (note_id, signature, datetime.now().isoformat())
+            )
+            self.cursor.execute("DELETE FROM note_lsh_buckets WHERE note_id = ?", (note_id,))
+            self.cursor.executemany(
+                "INSERT OR IGNORE INTO note_lsh_buckets (bucket, note_id) VALUES (?, ?)",
+                [(key, note_id) for key in band_keys]
+            )
+            
+            self.conn.commit()
+            return True
+            
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logger.error(f"Error saving MinHash signature: {e}")
+            return False
+    
+    def find_lsh_candidates(self, band_keys: List[int]) -> List[int]:
+        """
+        Find notes sharing at least one LSH bucket with the given keys.
+        
+        Args:
+            band_keys (List[int]): LSH bucket keys of the query signature
+            
+        Returns:
+            List[int]: Candidate note IDs, most shared buckets first
+        """
+        if not band_keys:
+            return []
+        
+        placeholders = ", ".join(["?"] * len(band_keys))
+        self.cursor.execute(f"""
+        SELECT note_id, COUNT(*) AS shared FROM note_lsh_buckets
+        WHERE bucket IN ({placeholders})
+        GROUP BY note_id
+        ORDER BY shared DESC
+        """, band_keys)
+        
+        return [row["note_id"] for row in self.cursor.fetchall()]
+    
+    def get_note_minhashes(self, note_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Get MinHash signatures and titles for notes.
+        
+        Args:
+            note_ids (List[int]): IDs of the notes
+            
+        Returns:
+            Dict[int, Dict[str, Any]]: Note ID mapped to its 'signature' bytes and 'title'
+        """
+        results = {}
+        
+        # Stay below SQLite's bound parameter limit
+        for i in range(0, len(note_ids), 500):
+            chunk = note_ids[i:i + 500]
+            placeholders = ", ".join(["?"] * len(chunk))
+            self.cursor.execute(f"""
+            SELECT m.note_id, m.signature, n.title
+            FROM note_minhash m
+            JOIN notes n ON n.id = m.note_id
+            WHERE m.note_id IN ({placeholders})
+            """, chunk)
+            
+            for row in self.cursor.fetchall():
+                results[row["note_id"]] = {"signature": row["signature"], "title": row["title"]}
+        
+        return results
+    
+    def get_minhash_params(self) -> Optional[Dict[str, int]]:
+        """
+        Get the parameters the stored MinHash index was built with.
+        
+        Returns:
+            Optional[Dict[str, int]]: 'num_perm', 'shingle_size', 'bands' and 'band_rows',
+                or None if the index was never built
+        """
+        row = self.conn.execute(
+            "SELECT num_perm, shingle_size, bands, band_rows FROM note_minhash_state WHERE id = 1"
+        ).fetchone()
+        return dict(row) if row else None
+    
+    def set_minhash_params(self, params: Dict[str, int]) -> None:
+        """
+        Record the parameters the stored MinHash index was built with.
+        
+        Args:
+            params (Dict[str, int]): 'num_perm', 'shingle_size', 'bands' and 'band_rows'
+        """
+        self.cursor.execute(
+            """
+            INSERT OR REPLACE INTO note_minhash_state (id, num_perm, shingle_size, bands, band_rows, updated_at)
+            VALUES (1, ?, ?, ?, ?, ?)
+            """,
+            (params["num_perm"], params["shingle_size"], params["bands"], params["band_rows"], datetime.now().isoformat())
+        )
+        self.conn.commit()
+    
+    def clear_note_minhashes(self) -> None:
+        """
+        Remove every stored MinHash signature, LSH bucket and the index parameters in one transaction.
+        """
+        try:
+            self.cursor.execute("DELETE FROM note_lsh_buckets")
+            self.cursor.execute("DELETE FROM note_minhash")
+            self.cursor.execute("DELETE FROM note_minhash_state")
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+    
+    def iter_note_texts(self, batch_size: int = 500):
+        """
+        Iterate over the ID and text of every note in batches.
+        
+        Args:
+            batch_size (int): Number of notes fetched per query
+            
+        Yields:
+            Tuple[int, str]: Note ID and text
+        """
+        last_id = 0
+        while True:
+            rows = self.conn.execute(
+                "SELECT id, text FROM notes WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, batch_size)
+            ).fetchall()
+            if not rows:
+                break
+            for row in rows:
+                yield row["id"], row["text"]
+            last_id = rows[-1]["id"]
+    
     # Methods for spaced repetition
     
     def schedule_review(self, note_id: int, quality: int) -> bool:
@@ -658,97 +985,891 @@ class DatabaseManager:
         """, (now, limit))
         
         return [dict(row) for row in self.cursor.fetchall()]
-
-def init_db(db_path: str) -> None:
-    """
-    Initialize the database with the required tables.
     
-    Args:
-        db_path (str): Path to the SQLite database file
-    """
-    logger.info(f"Initializing database at {db_path}")
+    # Review state columns, in table order
+    REVIEW_STATE_FIELDS = (
+        "item_id", "item_type", "easiness_factor", "interval", "repetitions",
+        "review_count", "box", "last_reviewed", "next_review"
+    )
     
-    # Ensure directory exists
-    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    def _review_state_from_row(self, row: sqlite3.Row) -> Dict[str, Any]:
+        state = {field: row[field] for field in self.REVIEW_STATE_FIELDS}
+        if row["metadata"]:
+            state.update(json.loads(row["metadata"]))
+        return state
     
-    try:
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
+    def get_review_states(self, items: Optional[List[Tuple[str, str]]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """
+        Get the spaced repetition state of many items.
+        
+        Args:
+            items (List[Tuple[str, str]]): (item_id, item_type) pairs, or None for all items
             
-            # Create notes table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS notes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                text TEXT NOT NULL,
-                summary TEXT,
-                timestamp TEXT NOT NULL,
-                source_type TEXT NOT NULL,
-                word_count INTEGER,
-                char_count INTEGER,
-                path TEXT,
-                last_reviewed TEXT,
-                review_count INTEGER DEFAULT 0,
-                next_review TEXT
-            )
-            ''')
+        Returns:
+            Dict[Tuple[str, str], Dict[str, Any]]: State per (item_id, item_type), for items that have one
+        """
+        return {
+            (row["item_id"], row["item_type"]): self._review_state_from_row(row)
+            for row in self._select_by_items("SELECT * FROM review_state WHERE {conditions}", items)
+        }
+    
+    def save_review_states(
+        self,
+        states: List[Dict[str, Any]],
+        overwrite: bool = True,
+        reviews: Optional[List[Tuple[str, str, int, str]]] = None
+    ) -> bool:
+        """
+        Insert or update the spaced repetition state of many items in one transaction.
+        
+        Keys other than the review state columns are stored as JSON metadata.
+        
+        Args:
+            states (List[Dict[str, Any]]): Review states with at least item_id, item_type and next_review
+            overwrite (bool): Whether to replace existing states. If False, an existing
+                state is only replaced by one that was reviewed more recently.
+            reviews (List[Tuple[str, str, int, str]], optional): (item_id, item_type, quality, reviewed_at)
+                reviews that led to the states, appended to the review log in the same transaction
             
-            # Create tags table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS tags (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        rows = []
+        for state in states:
+            metadata = {key: value for key, value in state.items() if key not in self.REVIEW_STATE_FIELDS}
+            rows.append((
+                str(state["item_id"]),
+                state["item_type"],
+                state.get("easiness_factor", 2.5),
+                state.get("interval", 0),
+                state.get("repetitions", 0),
+                state.get("review_count", 0),
+                state.get("box", 0),
+                state.get("last_reviewed"),
+                state["next_review"],
+                json.dumps(metadata) if metadata else None
+            ))
+        
+        condition = "" if overwrite else "WHERE COALESCE(excluded.last_reviewed, '') > COALESCE(review_state.last_reviewed, '')"
+        
+        try:
+            self.cursor.executemany(f"""
+            INSERT INTO review_state (
+                item_id, item_type, easiness_factor, interval, repetitions,
+                review_count, box, last_reviewed, next_review, metadata
             )
-            ''')
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (item_type, item_id) DO UPDATE SET
+                easiness_factor = excluded.easiness_factor,
+                interval = excluded.interval,
+                repetitions = excluded.repetitions,
+                review_count = excluded.review_count,
+                box = excluded.box,
+                last_reviewed = excluded.last_reviewed,
+                next_review = excluded.next_review,
+                metadata = excluded.metadata
+            {condition}
+            """, rows)
+            
+            if reviews:
+                self.cursor.executemany("""
+                INSERT INTO review_log (item_id, item_type, quality, reviewed_at)
+                VALUES (?, ?, ?, ?)
+                """, [(str(item_id), item_type, quality, reviewed_at) for item_id, item_type, quality, reviewed_at in reviews])
             
-            # Create note_tags table (many-to-many relationship)
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS note_tags (
-                note_id INTEGER,
-                tag_id INTEGER,
-                PRIMARY KEY (note_id, tag_id),
-                FOREIGN KEY (note_id) REFERENCES notes (id) ON DELETE CASCADE,
-                FOREIGN KEY (tag_id) REFERENCES tags (id) ON DELETE CASCADE
-            )
-            ''')
+            self.conn.commit()
+            return True
             
-            # Create keypoints table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS keypoints (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                note_id INTEGER,
-                content TEXT NOT NULL,
-                order_index INTEGER,
-                FOREIGN KEY (note_id) REFERENCES notes (id) ON DELETE CASCADE
-            )
-            ''')
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logger.error(f"Error saving review states: {e}")
+            return False
+    
+    def get_due_review_states(
+        self,
+        due_before: str,
+        item_type: Optional[str] = None,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the items due for review, most overdue first, with one indexed query.
+        
+        Args:
+            due_before (str): ISO timestamp; items with an earlier or equal next_review are due
+            item_type (str, optional): Type of item to filter by
+            limit (int): Maximum number of items to return
             
-            # Create glossary table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS glossary (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                note_id INTEGER,
-                term TEXT NOT NULL,
-                definition TEXT NOT NULL,
-                FOREIGN KEY (note_id) REFERENCES notes (id) ON DELETE CASCADE
-            )
-            ''')
+        Returns:
+            List[Dict[str, Any]]: Review states of the due items
+        """
+        query = "SELECT * FROM review_state WHERE next_review <= ?"
+        params: List[Any] = [due_before]
+        
+        if item_type:
+            query += " AND item_type = ?"
+            params.append(item_type)
+        
+        query += " ORDER BY next_review LIMIT ?"
+        params.append(limit)
+        
+        return [self._review_state_from_row(row) for row in self.conn.execute(query, params)]
+    
+    def _select_by_items(self, query: str, items: Optional[List[Tuple[str, str]]]) -> List[sqlite3.Row]:
+        """
+        Run a query on a table with item_id and item_type columns, for some or all items.
+        
+        Args:
+            query (str): Query with a {conditions} placeholder for the WHERE clause
+            items (List[Tuple[str, str]], optional): (item_id, item_type) pairs, or None for all items
             
-            # Create questions table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS questions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                note_id INTEGER,
-                question TEXT NOT NULL,
-                answer TEXT NOT NULL,
-                type TEXT NOT NULL,
-                difficulty TEXT,
-                last_reviewed TEXT,
-                review_count INTEGER DEFAULT 0,
-                next_review TEXT,
-                FOREIGN KEY (note_id) REFERENCES notes (id) ON DELETE CASCADE
-            )
-            ''')
+        Returns:
+            List[sqlite3.Row]: Rows of all chunks
+        """
+        if items is None:
+            return self.conn.execute(query.format(conditions="1")).fetchall()
+        
+        rows = []
+        
+        # Two parameters per item
+        for i in range(0, len(items), 250):
+            chunk = items[i:i + 250]
+            conditions = " OR ".join(["(item_type = ? AND item_id = ?)"] * len(chunk))
+            params = [value for item_id, item_type in chunk for value in (item_type, str(item_id))]
+            rows.extend(self.conn.execute(query.format(conditions=conditions), params))
+        
+        return rows
+    
+    def get_review_log(self, items: Optional[List[Tuple[str, str]]] = None) -> List[sqlite3.Row]:
+        """
+        Get the logged reviews of many items, oldest first per item.
+        
+        Args:
+            items (List[Tuple[str, str]], optional): (item_id, item_type) pairs, or None for all items
+            
+        Returns:
+            List[sqlite3.Row]: Rows with item_id, item_type, quality and reviewed_at
+        """
+        return self._select_by_items("""
+        SELECT item_id, item_type, quality, reviewed_at FROM review_log
+        WHERE {conditions}
+        ORDER BY item_type, item_id, id
+        """, items)
+    
+    def save_quiz_results(self, results: List[Dict[str, Any]]) -> bool:
+        """
+        Record many quiz results in one transaction.
+        
+        Args:
+            results (List[Dict[str, Any]]): Results with item_id, item_type, score and optionally
+                quiz_id, difficulty, topic and timestamp
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        now = datetime.now().isoformat()
+        rows = [
+            (
+                str(result["item_id"]),
+                result.get("item_type", "note"),
+                result.get("quiz_id"),
+                result["score"],
+                result.get("difficulty", "medium"),
+                result.get("topic", "general"),
+                result.get("timestamp", now)
+            )
+            for result in results
+        ]
+        
+        try:
+            self.cursor.executemany("""
+            INSERT INTO quiz_results (item_id, item_type, quiz_id, score, difficulty, topic, taken_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            self.conn.commit()
+            return True
+            
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logger.error(f"Error saving quiz results: {e}")
+            return False
+    
+    def get_quiz_results(self, items: Optional[List[Tuple[str, str]]] = None) -> List[sqlite3.Row]:
+        """
+        Get the quiz results of many items, oldest first per item.
+        
+        Args:
+            items (List[Tuple[str, str]], optional): (item_id, item_type) pairs, or None for all items
+            
+        Returns:
+            List[sqlite3.Row]: Rows with item_id, item_type, quiz_id, score, difficulty, topic and taken_at
+        """
+        return self._select_by_items("""
+        SELECT item_id, item_type, quiz_id, score, difficulty, topic, taken_at FROM quiz_results
+        WHERE {conditions}
+        ORDER BY item_type, item_id, id
+        """, items)
+    
+    def get_learning_signature(self) -> Tuple:
+        """
+        Get a cheap signature of the review states, review log and quiz results,
+        changing whenever a review or quiz result is recorded.
+        
+        Returns:
+            Tuple: Signature to compare with an earlier one
+        """
+        return tuple(self.conn.execute("""
+        SELECT
+            (SELECT COUNT(*) FROM review_state),
+            (SELECT MAX(last_reviewed) FROM review_state),
+            (SELECT MAX(id) FROM review_log),
+            (SELECT MAX(id) FROM quiz_results)
+        """).fetchone())
+    
+    # Methods for reminders
+    
+    def save_reminders(self, reminders: List[Dict[str, Any]]) -> bool:
+        """
+        Insert or replace many reminders in one transaction.
+        
+        There is one reminder per item; saving a reminder for an item replaces its previous one.
+        
+        Args:
+            reminders (List[Dict[str, Any]]): Reminder data with item_id, item_type, reminder_time and status
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        rows = [
+            (
+                str(reminder["item_id"]),
+                reminder["item_type"],
+                reminder["reminder_time"],
+                reminder.get("status", "scheduled"),
+                json.dumps(reminder)
+            )
+            for reminder in reminders
+        ]
+        
+        try:
+            self.cursor.executemany("""
+            INSERT OR REPLACE INTO reminders (item_id, item_type, reminder_time, status, data)
+            VALUES (?, ?, ?, ?, ?)
+            """, rows)
+            self.conn.commit()
+            return True
+            
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logger.error(f"Error saving reminders: {e}")
+            return False
+    
+    def get_reminders(
+        self,
+        item_id: Optional[str] = None,
+        item_type: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: Optional[int] = 100
+    ) -> List[Dict[str, Any]]:
+        """
+        Get reminders ordered by reminder time.
+        
+        Args:
+            item_id (str, optional): Filter by item ID
+            item_type (str, optional): Filter by item type
+            status (str, optional): Filter by status
+            limit (int, optional): Maximum number of reminders to return, or None for all
+            
+        Returns:
+            List[Dict[str, Any]]: Reminder data
+        """
+        conditions = []
+        params: List[Any] = []
+        
+        if item_id is not None:
+            conditions.append("item_id = ?")
+            params.append(str(item_id))
+        
+        if item_type:
+            conditions.append("item_type = ?")
+            params.append(item_type)
+        
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        
+        query = "SELECT data FROM reminders"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY reminder_time"
+        
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        return [json.loads(row["data"]) for row in self.conn.execute(query, params)]
+    
+    # Methods for the knowledge graph
+    
+    def get_graph_notes(self, note_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """
+        Get the fields the knowledge graph needs for notes in bulk.
+        
+        Tags and key points are fetched with one query each instead of one
+        query per note.
+        
+        Args:
+            note_ids (List[int], optional): IDs of the notes. If None, gets all notes.
+            
+        Returns:
+            List[Dict[str, Any]]: Notes with id, title, summary, timestamp,
+                source_type, tags and keypoints (list of strings)
+        """
+        columns = "id, title, summary, timestamp, source_type"
+        
+        if note_ids is None:
+            notes = {row["id"]: dict(row) for row in self.conn.execute(f"SELECT {columns} FROM notes")}
+            tag_rows = self.conn.execute("""
+            SELECT note_tags.note_id, tags.name FROM note_tags
+            JOIN tags ON tags.id = note_tags.tag_id
+            """).fetchall()
+            keypoint_rows = self.conn.execute(
+                "SELECT note_id, content FROM keypoints ORDER BY note_id, order_index"
+            ).fetchall()
+        else:
+            notes, tag_rows, keypoint_rows = {}, [], []
+            # Stay below SQLite's bound parameter limit
+            for i in range(0, len(note_ids), 500):
+                chunk = list(note_ids[i:i + 500])
+                placeholders = ", ".join(["?"] * len(chunk))
+                for row in self.conn.execute(f"SELECT {columns} FROM notes WHERE id IN ({placeholders})", chunk):
+                    notes[row["id"]] = dict(row)
+                tag_rows.extend(self.conn.execute(f"""
+                SELECT note_tags.note_id, tags.name FROM note_tags
+                JOIN tags ON tags.id = note_tags.tag_id
+                WHERE note_tags.note_id IN ({placeholders})
+                """, chunk).fetchall())
+                keypoint_rows.extend(self.conn.execute(f"""
+                SELECT note_id, content FROM keypoints
+                WHERE note_id IN ({placeholders})
+                ORDER BY note_id, order_index
+                """, chunk).fetchall())
+        
+        for note in notes.values():
+            note["tags"] = []
+            note["keypoints"] = []
+        for row in tag_rows:
+            if row["note_id"] in notes:
+                notes[row["note_id"]]["tags"].append(row["name"])
+        for row in keypoint_rows:
+            if row["note_id"] in notes:
+                notes[row["note_id"]]["keypoints"].append(row["content"])
+        
+        return list(notes.values())
+    
+    def get_relationships(self, note_ids: Optional[List[int]] = None) -> List[Tuple[int, int, float]]:
+        """
+        Get related-note relationships in bulk.
+        
+        Args:
+            note_ids (List[int], optional): Source notes to get outgoing relationships for.
+                If None, gets all relationships.
+            
+        Returns:
+            List[Tuple[int, int, float]]: (note_id, related_note_id, similarity) tuples
+        """
+        query = "SELECT note_id, related_note_id, similarity FROM related_notes"
+        
+        if note_ids is None:
+            return [tuple(row) for row in self.conn.execute(query)]
+        
+        relationships = []
+        for i in range(0, len(note_ids), 500):
+            chunk = list(note_ids[i:i + 500])
+            placeholders = ", ".join(["?"] * len(chunk))
+            relationships.extend(
+                tuple(row) for row in self.conn.execute(f"{query} WHERE note_id IN ({placeholders})", chunk)
+            )
+        return relationships
+
+    
+    # Methods for embedding-based note links
+    
+    def get_note_embeddings(self, model_name: str) -> Tuple[List[int], List[bytes]]:
+        """
+        Get every stored note embedding for a model in one query.
+        
+        Args:
+            model_name (str): Embedding model name
+            
+        Returns:
+            Tuple[List[int], List[bytes]]: Note IDs and their float32 embedding blobs
+        """
+        try:
+            rows = self.conn.execute(
+                "SELECT note_id, embedding FROM note_embeddings WHERE model_name = ?",
+                (model_name,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error getting note embeddings: {e}")
+            return [], []
+        
+        return [row["note_id"] for row in rows], [row["embedding"] for row in rows]
+    
+    def count_note_embeddings(self, model_name: str) -> int:
+        """
+        Count the stored note embeddings for a model.
+        
+        Args:
+            model_name (str): Embedding model name
+            
+        Returns:
+            int: Number of embeddings
+        """
+        try:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM note_embeddings WHERE model_name = ?", (model_name,)
+            ).fetchone()[0]
+        except sqlite3.Error:
+            return 0
+    
+    def get_notes_missing_embeddings(self, model_name: str) -> List[Tuple[int, str]]:
+        """
+        Get notes that have no embedding for a model.
+        
+        Args:
+            model_name (str): Embedding model name
+            
+        Returns:
+            List[Tuple[int, str]]: Note IDs and texts
+        """
+        try:
+            rows = self.conn.execute("""
+            SELECT id, text FROM notes
+            WHERE id NOT IN (SELECT note_id FROM note_embeddings WHERE model_name = ?)
+            """, (model_name,)).fetchall()
+        except sqlite3.Error:
+            rows = self.conn.execute("SELECT id, text FROM notes").fetchall()
+        
+        return [(row["id"], row["text"]) for row in rows]
+    
+    def replace_note_links(
+        self,
+        note_id: int,
+        neighbours: List[Tuple[int, float]],
+        max_links: int
+    ) -> bool:
+        """
+        Replace a note's similarity links with its nearest neighbours, in both directions, in one transaction.
+        
+        Similarity links to and from the note that are no longer among its
+        neighbours are removed, and each neighbour keeps only its max_links
+        strongest similarity links. Links of other types are left alone, and a
+        neighbour already linked by another type keeps that link.
+        
+        Args:
+            note_id (int): ID of the note
+            neighbours (List[Tuple[int, float]]): (related_note_id, similarity) pairs
+            max_links (int): Maximum links kept per neighbour
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        neighbour_ids = [related_id for related_id, _ in neighbours]
+        
+        try:
+            # Notes whose outgoing links change
+            affected = {note_id, *neighbour_ids}
+            affected.update(
+                row["note_id"] for row in self.conn.execute(
+                    "SELECT note_id FROM related_notes WHERE related_note_id = ? AND link_type = ?",
+                    (note_id, SIMILARITY_LINK)
+                )
+            )
+            
+            self.cursor.execute(
+                "DELETE FROM related_notes WHERE (note_id = ? OR related_note_id = ?) AND link_type = ?",
+                (note_id, note_id, SIMILARITY_LINK)
+            )
+            
+            self.cursor.executemany(
+                _UPSERT_SIMILARITY_LINK,
+                [(note_id, related_id, similarity) for related_id, similarity in neighbours]
+                + [(related_id, note_id, similarity) for related_id, similarity in neighbours]
+            )
+            
+            # Keep each neighbour's strongest similarity links only
+            self.cursor.executemany("""
+            DELETE FROM related_notes
+            WHERE note_id = ? AND link_type = ? AND related_note_id NOT IN (
+                SELECT related_note_id FROM related_notes
+                WHERE note_id = ? AND link_type = ?
+                ORDER BY similarity DESC
+                LIMIT ?
+            )
+            """, [
+                (related_id, SIMILARITY_LINK, related_id, SIMILARITY_LINK, max_links)
+                for related_id in neighbour_ids
+            ])
+            
+            self.conn.commit()
+            
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logger.error(f"Error replacing links of note {note_id}: {e}")
+            return False
+        
+        self._notify_change("related_notes", affected)
+        return True
+    
+    def replace_all_links(self, links: Dict[int, List[Tuple[int, float]]], model_name: str) -> bool:
+        """
+        Replace the similarity links of many notes in one transaction and record the model they came from.
+        
+        Args:
+            links (Dict[int, List[Tuple[int, float]]]): Note ID mapped to its (related_note_id, similarity) pairs
+            model_name (str): Embedding model the links were computed with
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            self.cursor.executemany(
+                "DELETE FROM related_notes WHERE note_id = ? AND link_type = ?",
+                [(note_id, SIMILARITY_LINK) for note_id in links]
+            )
+            self.cursor.executemany(
+                _UPSERT_SIMILARITY_LINK,
+                [
+                    (note_id, related_id, similarity)
+                    for note_id, neighbours in links.items()
+                    for related_id, similarity in neighbours
+                ]
+            )
+            self.set_links_model(model_name, commit=False)
+            self.conn.commit()
+            
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logger.error(f"Error replacing note links: {e}")
+            return False
+        
+        self._notify_change("related_notes", links.keys())
+        return True
+    
+    def get_links_model(self) -> Optional[str]:
+        """
+        Get the embedding model the stored links were computed with.
+        
+        Returns:
+            Optional[str]: Model name, or None if links were never computed
+        """
+        row = self.conn.execute("SELECT model_name FROM related_notes_state WHERE id = 1").fetchone()
+        return row["model_name"] if row else None
+    
+    def set_links_model(self, model_name: str, commit: bool = True) -> None:
+        """
+        Record the embedding model the stored links were computed with.
+        
+        Args:
+            model_name (str): Embedding model name
+            commit (bool): Whether to commit immediately
+        """
+        self.cursor.execute(
+            "INSERT OR REPLACE INTO related_notes_state (id, model_name, updated_at) VALUES (1, ?, ?)",
+            (model_name, datetime.now().isoformat())
+        )
+        if commit:
+            self.conn.commit()
+    
+    # Methods for topic clusters
+    
+    def get_note_ids(self) -> List[int]:
+        """
+        Get the IDs of all notes.
+        
+        Returns:
+            List[int]: Note IDs in ascending order
+        """
+        return [row[0] for row in self.conn.execute("SELECT id FROM notes ORDER BY id")]
+    
+    def get_note_clusters(self, method: str, note_ids: Optional[List[int]] = None) -> Dict[int, int]:
+        """
+        Get the cluster assignments of notes.
+        
+        Args:
+            method (str): Clustering method ("graph" or "embedding")
+            note_ids (List[int], optional): Notes to get assignments for. If None, gets all.
+            
+        Returns:
+            Dict[int, int]: Note ID mapped to cluster ID
+        """
+        query = "SELECT note_id, cluster_id FROM note_clusters WHERE method = ?"
+        
+        if note_ids is None:
+            return {row[0]: row[1] for row in self.conn.execute(query, (method,))}
+        
+        clusters = {}
+        for i in range(0, len(note_ids), 500):
+            chunk = list(note_ids[i:i + 500])
+            placeholders = ", ".join(["?"] * len(chunk))
+            clusters.update(
+                (row[0], row[1]) for row in self.conn.execute(f"{query} AND note_id IN ({placeholders})", [method] + chunk)
+            )
+        return clusters
+    
+    def get_neighbour_cluster(self, method: str, note_id: int) -> Optional[int]:
+        """
+        Get the cluster holding the most similarity weight among a note's related notes.
+        
+        Args:
+            method (str): Clustering method
+            note_id (int): ID of the note
+            
+        Returns:
+            Optional[int]: Cluster ID, or None if no related note is clustered
+        """
+        row = self.conn.execute("""
+        SELECT nc.cluster_id
+        FROM related_notes rn
+        CROSS JOIN note_clusters nc ON nc.note_id = rn.related_note_id AND nc.method = ?
+        WHERE rn.note_id = ?
+        GROUP BY nc.cluster_id
+        ORDER BY SUM(rn.similarity) DESC
+        LIMIT 1
+        """, (method, note_id)).fetchone()
+        return row[0] if row else None
+    
+    def next_cluster_id(self, method: str) -> int:
+        """
+        Get an unused cluster ID for a method.
+        
+        Args:
+            method (str): Clustering method
+            
+        Returns:
+            int: One more than the highest cluster ID in use
+        """
+        row = self.conn.execute("SELECT MAX(cluster_id) FROM note_clusters WHERE method = ?", (method,)).fetchone()
+        return 0 if row[0] is None else row[0] + 1
+    
+    def get_cluster_model(self, method: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the stored model of a clustering method.
+        
+        Args:
+            method (str): Clustering method
+            
+        Returns:
+            Optional[Dict[str, Any]]: model_name, dimensions, centroids and counts (bytes), or None
+        """
+        row = self.conn.execute(
+            "SELECT model_name, dimensions, centroids, counts FROM cluster_models WHERE method = ?", (method,)
+        ).fetchone()
+        return dict(row) if row else None
+    
+    def _save_cluster_model(self, method: str, model: Dict[str, Any]) -> None:
+        self.cursor.execute("""
+        INSERT OR REPLACE INTO cluster_models (method, model_name, dimensions, centroids, counts, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """, (method, model["model_name"], model["dimensions"], model["centroids"], model["counts"], datetime.now().isoformat()))
+    
+    def set_note_cluster(
+        self,
+        method: str,
+        note_id: int,
+        cluster_id: int,
+        model: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """
+        Assign a note to a cluster, updating the method's model in the same transaction.
+        
+        Args:
+            method (str): Clustering method
+            note_id (int): ID of the note
+            cluster_id (int): ID of the cluster
+            model (Dict[str, Any], optional): Updated model, as returned by get_cluster_model
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            self.cursor.execute(
+                "INSERT OR REPLACE INTO note_clusters (note_id, method, cluster_id, updated_at) VALUES (?, ?, ?, ?)",
+                (note_id, method, cluster_id, datetime.now().isoformat())
+            )
+            if model is not None:
+                self._save_cluster_model(method, model)
+            self.conn.commit()
+            return True
+            
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logger.error(f"Error assigning note {note_id} to {method} cluster: {e}")
+            return False
+    
+    def replace_note_clusters(
+        self,
+        method: str,
+        assignments: Dict[int, int],
+        model: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """
+        Replace all cluster assignments of a method, and its model, in one transaction.
+        
+        Args:
+            method (str): Clustering method
+            assignments (Dict[int, int]): Note ID mapped to cluster ID
+            model (Dict[str, Any], optional): Model, as returned by get_cluster_model
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        now = datetime.now().isoformat()
+        
+        try:
+            self.cursor.execute("DELETE FROM note_clusters WHERE method = ?", (method,))
+            self.cursor.executemany(
+                "INSERT INTO note_clusters (note_id, method, cluster_id, updated_at) VALUES (?, ?, ?, ?)",
+                [(note_id, method, cluster_id, now) for note_id, cluster_id in assignments.items()]
+            )
+            if model is not None:
+                self._save_cluster_model(method, model)
+            self.conn.commit()
+            return True
+            
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logger.error(f"Error replacing {method} clusters: {e}")
+            return False
+    
+    def get_cluster_summaries(self, method: str, top_tags: int = 3) -> List[Dict[str, Any]]:
+        """
+        Get the clusters of a method with their sizes and most common tags.
+        
+        Args:
+            method (str): Clustering method
+            top_tags (int): Number of tags reported per cluster
+            
+        Returns:
+            List[Dict[str, Any]]: Clusters (cluster_id, size, tags), largest first
+        """
+        summaries = {
+            row[0]: {"cluster_id": row[0], "size": row[1], "tags": []}
+            for row in self.conn.execute("""
+            SELECT nc.cluster_id, COUNT(*)
+            FROM note_clusters nc
+            JOIN notes n ON n.id = nc.note_id
+            WHERE nc.method = ?
+            GROUP BY nc.cluster_id
+            """, (method,))
+        }
+        
+        for cluster_id, name, _ in self.conn.execute("""
+        SELECT nc.cluster_id, t.name, COUNT(*) AS uses
+        FROM note_clusters nc
+        JOIN note_tags nt ON nt.note_id = nc.note_id
+        JOIN tags t ON t.id = nt.tag_id
+        WHERE nc.method = ?
+        GROUP BY nc.cluster_id, t.id
+        ORDER BY nc.cluster_id, uses DESC, t.name
+        """, (method,)):
+            summary = summaries.get(cluster_id)
+            if summary is not None and len(summary["tags"]) < top_tags:
+                summary["tags"].append(name)
+        
+        return sorted(summaries.values(), key=lambda summary: (-summary["size"], summary["cluster_id"]))
+
+
+def init_db(db_path: str) -> None:
+    """
+    Initialize the database with the required tables.
+    
+    Args:
+        db_path (str): Path to the SQLite database file
+    """
+    logger.info(f"Initializing database at {db_path}")
+    
+    # Ensure directory exists
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    
+    try:
+        with sqlite3.connect(db_path) as conn:
+            cursor = conn.cursor()
+            
+            # Create notes table
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS notes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                text TEXT NOT NULL,
+                summary TEXT,
+                timestamp TEXT NOT NULL,
+                source_type TEXT NOT NULL,
+                word_count INTEGER,
+                char_count INTEGER,
+                path TEXT,
+                last_reviewed TEXT,
+                review_count INTEGER DEFAULT 0,
+                next_review TEXT
+            )
+            ''')
+            
+            # Create tags table
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS tags (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT UNIQUE NOT NULL
+            )
+            ''')
+            
+            # Create note_tags table (many-to-many relationship)
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS note_tags (
+                note_id INTEGER,
+                tag_id INTEGER,
+                PRIMARY KEY (note_id, tag_id),
+                FOREIGN KEY (note_id) REFERENCES notes (id) ON DELETE CASCADE,
+                FOREIGN KEY (tag_id) REFERENCES tags (id) ON DELETE CASCADE
+            )
+            ''')
+            
+            # Create keypoints table
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS keypoints (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                note_id INTEGER,
+                content TEXT NOT NULL,
+                order_index INTEGER,
+                FOREIGN KEY (note_id) REFERENCES notes (id) ON DELETE CASCADE
+            )
+            ''')
+            
+            # Create glossary table
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS glossary (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                note_id INTEGER,
+                term TEXT NOT NULL,
+                definition TEXT NOT NULL,
+                FOREIGN KEY (note_id) REFERENCES notes (id) ON DELETE CASCADE
+            )
+            ''')
+            
+            # Create questions table
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS questions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                note_id INTEGER,
+                question TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                type TEXT NOT NULL,
+                difficulty TEXT,
+                last_reviewed TEXT,
+                review_count INTEGER DEFAULT 0,
+                next_review TEXT,
+                FOREIGN KEY (note_id) REFERENCES notes (id) ON DELETE CASCADE
+            )
+            ''')
             
             # Create related_notes table
             cursor.execute('''
@@ -756,12 +1877,187 @@ def init_db(db_path: str) -> None:
                 note_id INTEGER,
                 related_note_id INTEGER,
                 similarity REAL,
+                link_type TEXT NOT NULL DEFAULT 'similarity',
                 PRIMARY KEY (note_id, related_note_id),
                 FOREIGN KEY (note_id) REFERENCES notes (id) ON DELETE CASCADE,
                 FOREIGN KEY (related_note_id) REFERENCES notes (id) ON DELETE CASCADE
             )
             ''')
             
+            # Add the link type column to tables created before links were tagged by source
+            cursor.execute("PRAGMA table_info(related_notes)")
+            if 'link_type' not in [row[1] for row in cursor.fetchall()]:
+                cursor.execute("ALTER TABLE related_notes ADD COLUMN link_type TEXT NOT NULL DEFAULT 'similarity'")
+            
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_related_notes_related ON related_notes (related_note_id)
+            ''')
+            
+            # Create related_notes_state table (embedding model the links were computed with)
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS related_notes_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                model_name TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            ''')
+            
+            # Create review_state table (spaced repetition state of notes, questions and other items)
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS review_state (
+                item_id TEXT NOT NULL,
+                item_type TEXT NOT NULL,
+                easiness_factor REAL NOT NULL DEFAULT 2.5,
+                interval INTEGER NOT NULL DEFAULT 0,
+                repetitions INTEGER NOT NULL DEFAULT 0,
+                review_count INTEGER NOT NULL DEFAULT 0,
+                box INTEGER NOT NULL DEFAULT 0,
+                last_reviewed TEXT,
+                next_review TEXT NOT NULL,
+                metadata TEXT,
+                PRIMARY KEY (item_type, item_id)
+            )
+            ''')
+            
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_review_state_due ON review_state (next_review, item_type)
+            ''')
+            
+            # Create review_log table (every graded review of an item)
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS review_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                item_id TEXT NOT NULL,
+                item_type TEXT NOT NULL,
+                quality INTEGER NOT NULL,
+                reviewed_at TEXT NOT NULL
+            )
+            ''')
+            
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_review_log_item ON review_log (item_type, item_id)
+            ''')
+            
+            # Create quiz_results table (score of an item per quiz and topic)
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS quiz_results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                item_id TEXT NOT NULL,
+                item_type TEXT NOT NULL,
+                quiz_id TEXT,
+                score REAL NOT NULL,
+                difficulty TEXT NOT NULL DEFAULT 'medium',
+                topic TEXT NOT NULL DEFAULT 'general',
+                taken_at TEXT NOT NULL
+            )
+            ''')
+            
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_quiz_results_item ON quiz_results (item_type, item_id)
+            ''')
+            
+            # Create reminders table (one review reminder per item)
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS reminders (
+                item_id TEXT NOT NULL,
+                item_type TEXT NOT NULL,
+                reminder_time TEXT NOT NULL,
+                status TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (item_type, item_id)
+            )
+            ''')
+            
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_reminders_status ON reminders (status, reminder_time)
+            ''')
+            
+            # Create note_clusters table (topic cluster of each note per clustering method)
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS note_clusters (
+                note_id INTEGER NOT NULL,
+                method TEXT NOT NULL,
+                cluster_id INTEGER NOT NULL,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (note_id, method),
+                FOREIGN KEY (note_id) REFERENCES notes (id) ON DELETE CASCADE
+            )
+            ''')
+            
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_note_clusters_cluster ON note_clusters (method, cluster_id)
+            ''')
+            
+            # Create cluster_models table (centroids of incrementally updated clusterings)
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS cluster_models (
+                method TEXT PRIMARY KEY,
+                model_name TEXT,
+                dimensions INTEGER NOT NULL,
+                centroids BLOB NOT NULL,
+                counts BLOB NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            ''')
+            
+            # Create note_fingerprints table (content fingerprints per processing stage)
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS note_fingerprints (
+                note_id INTEGER,
+                stage TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                artifact TEXT,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (note_id, stage),
+                FOREIGN KEY (note_id) REFERENCES notes (id) ON DELETE CASCADE
+            )
+            ''')
+            
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_note_fingerprints_stage
+            ON note_fingerprints (stage, fingerprint)
+            ''')
+            
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_notes_path ON notes (path)
+            ''')
+            
+            # Create note_minhash table (MinHash signatures for near-duplicate detection)
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS note_minhash (
+                note_id INTEGER PRIMARY KEY,
+                signature BLOB NOT NULL,
+                updated_at TEXT NOT NULL,
+                FOREIGN KEY (note_id) REFERENCES notes (id) ON DELETE CASCADE
+            )
+            ''')
+            
+            # Create note_lsh_buckets table (LSH band buckets over the signatures)
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS note_lsh_buckets (
+                bucket INTEGER NOT NULL,
+                note_id INTEGER NOT NULL,
+                PRIMARY KEY (bucket, note_id),
+                FOREIGN KEY (note_id) REFERENCES notes (id) ON DELETE CASCADE
+            )
+            ''')
+            
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_note_lsh_buckets_note ON note_lsh_buckets (note_id)
+            ''')
+            
+            # Create note_minhash_state table (parameters the MinHash index was built with)
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS note_minhash_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                num_perm INTEGER NOT NULL,
+                shingle_size INTEGER NOT NULL,
+                bands INTEGER NOT NULL,
+                band_rows INTEGER NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            ''')
+            
             conn.commit()
             logger.info("Database initialized successfully")
             
@@ -0,0 +1,105 @@
+"""
+Embedding sync module for AI Note System.
+Keeps in-memory embeddings of database rows in step with a table of stored, hash-keyed embeddings.
+"""
+
+import hashlib
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .vector_index import VectorIndex
+
+# Setup logging
+logger = logging.getLogger("ai_note_system.embeddings.embedding_sync")
+
+def text_hash(text: str) -> str:
+    """
+    Get the hash stored with the embedding of a text.
+    """
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def sync_embeddings(
+    conn,
+    embedder,
+    model_name: str,
+    table: str,
+    key_column: str,
+    items: Iterable[Tuple[int, str, Optional[str]]],
+    hashes: Dict[int, str],
+    place: Callable[[List[int], np.ndarray], None],
+    forget: Callable[[int], None],
+    batch_size: int = 256
+) -> int:
+    """
+    Bring in-memory embeddings up to date with the current items.
+
+    An item is embedded again only when the hash of its text differs from the one
+    stored with its embedding. Stored embeddings of items whose text is unchanged
+    are loaded if they are not in memory yet, and items that no longer exist are
+    forgotten.
+
+    Args:
+        conn: SQLite connection of the embeddings table
+        embedder: Embedding interface used for new or changed items
+        model_name (str): Name of the embedding model
+        table (str): Table of stored embeddings, with key_column, model_name,
+            content_hash, embedding and updated_at columns
+        key_column (str): Column of the item ID in the table
+        items (Iterable[Tuple[int, str, Optional[str]]]): (item_id, text, stored_hash) of
+            every current item, with stored_hash None if it has no stored embedding
+        hashes (Dict[int, str]): Hash of the text of every item in memory, updated in place
+        place (Callable): Receives the IDs and normalized embeddings of loaded or embedded items
+        forget (Callable): Receives the ID of an item that no longer exists
+        batch_size (int): Texts per embedding request
+
+    Returns:
+        int: Number of items embedded
+    """
+    current = set()
+    to_load = []
+    to_embed = []
+    for item_id, text, stored_hash in items:
+        current.add(item_id)
+        current_hash = text_hash(text)
+
+        if stored_hash != current_hash:
+            to_embed.append((item_id, text, current_hash))
+        elif hashes.get(item_id) != current_hash:
+            to_load.append(item_id)
+
+    for i in range(0, len(to_load), 500):
+        chunk = to_load[i:i + 500]
+        loaded = conn.execute(f'''
+        SELECT {key_column}, content_hash, embedding FROM {table}
+        WHERE model_name = ? AND {key_column} IN ({", ".join("?" * len(chunk))})
+        ''', [model_name] + chunk).fetchall()
+
+        if loaded:
+            place([row[0] for row in loaded], np.stack([np.frombuffer(row[2], dtype=np.float32) for row in loaded]))
+            hashes.update((row[0], row[1]) for row in loaded)
+
+    timestamp = datetime.now().isoformat()
+    for i in range(0, len(to_embed), batch_size):
+        batch = to_embed[i:i + batch_size]
+        vectors = VectorIndex.normalize(np.atleast_2d(embedder.get_embeddings([text for _, text, _ in batch])))
+
+        conn.executemany(f'''
+        INSERT OR REPLACE INTO {table} ({key_column}, model_name, content_hash, embedding, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+        ''', [
+            (item_id, model_name, content_hash, vector.tobytes(), timestamp)
+            for (item_id, _, content_hash), vector in zip(batch, vectors)
+        ])
+        conn.commit()
+
+        place([item_id for item_id, _, _ in batch], vectors)
+        hashes.update((item_id, content_hash) for item_id, _, content_hash in batch)
+
+    for item_id in [item_id for item_id in hashes if item_id not in current]:
+        forget(item_id)
+        del hashes[item_id]
+
+    return len(to_embed)
@@ -0,0 +1,259 @@
+"""
+Vector index module for AI Note System.
+Keeps embeddings in a normalized in-memory matrix for fast top-k cosine search.
+"""
+
+import logging
+import threading
+from typing import Dict, List, Optional, Iterable, Tuple, Union
+
+import numpy as np
+
+# Setup logging
+logger = logging.getLogger("ai_note_system.embeddings.vector_index")
+
+class VectorIndex:
+    """
+    Exact cosine-similarity index over integer-keyed vectors.
+
+    Vectors are L2-normalized on insert and stored row-wise in a float32 matrix
+    that grows geometrically, so a search is a single matrix-vector product
+    followed by a partial sort. Removal swaps the last row into the gap.
+    """
+
+    def __init__(self, dimensions: Optional[int] = None, initial_capacity: int = 1024):
+        """
+        Initialize an empty index.
+
+        Args:
+            dimensions (int, optional): Vector dimensions; inferred from the first vector if None
+            initial_capacity (int): Number of rows allocated up front
+        """
+        self.dimensions = dimensions
+        self._initial_capacity = max(1, initial_capacity)
+        self._lock = threading.RLock()
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._matrix = np.zeros((0, dimensions or 0), dtype=np.float32)
+        self._positions: Dict[int, int] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._positions
+
+    @staticmethod
+    def normalize(vectors: np.ndarray) -> np.ndarray:
+        """
+        L2-normalize vectors row-wise, leaving zero vectors as zeros.
+
+        Args:
+            vectors (np.ndarray): 1-D vector or 2-D matrix
+
+        Returns:
+            np.ndarray: float32 normalized copy
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._ids)
+        if size <= capacity:
+            return
+
+        new_capacity = max(self._initial_capacity, capacity)
+        while new_capacity < size:
+            new_capacity *= 2
+
+        ids = np.zeros(new_capacity, dtype=np.int64)
+        matrix = np.zeros((new_capacity, self.dimensions), dtype=np.float32)
+        ids[:self._size] = self._ids[:self._size]
+        matrix[:self._size] = self._matrix[:self._size]
+        self._ids, self._matrix = ids, matrix
+
+    def add_many(self, item_ids: Iterable[int], vectors: Union[np.ndarray, List[List[float]]]) -> None:
+        """
+        Insert or replace many vectors at once.
+
+        Args:
+            item_ids (Iterable[int]): IDs of the vectors
+            vectors (np.ndarray): Matrix with one vector per ID
+        """
+        item_ids = [int(item_id) for item_id in item_ids]
+        if not item_ids:
+            return
+
+        vectors = self.normalize(np.atleast_2d(vectors))
+
+        with self._lock:
+            if self.dimensions is None:
+                self.dimensions = vectors.shape[1]
+                self._matrix = np.zeros((0, self.dimensions), dtype=np.float32)
+            if vectors.shape[1] != self.dimensions:
+                raise ValueError(f"Expected {self.dimensions}-dimensional vectors, got {vectors.shape[1]}")
+
+            self._reserve(self._size + len(item_ids))
+
+            for item_id, vector in zip(item_ids, vectors):
+                position = self._positions.get(item_id)
+                if position is None:
+                    position = self._size
+                    self._positions[item_id] = position
+                    self._ids[position] = item_id
+                    self._size += 1
+                self._matrix[position] = vector
+
+    def add(self, item_id: int, vector: Union[np.ndarray, List[float]]) -> None:
+        """
+        Insert or replace a vector.
+
+        Args:
+            item_id (int): ID of the vector
+            vector (np.ndarray): Vector
+        """
+        self.add_many([item_id], np.asarray(vector, dtype=np.float32)[None, :])
+
+    def remove(self, item_id: int) -> bool:
+        """
+        Remove a vector.
+
+        Args:
+            item_id (int): ID of the vector
+
+        Returns:
+            bool: True if the vector was present
+        """
+        with self._lock:
+            position = self._positions.pop(int(item_id), None)
+            if position is None:
+                return False
+
+            last = self._size - 1
+            if position != last:
+                moved_id = int(self._ids[last])
+                self._ids[position] = moved_id
+                self._matrix[position] = self._matrix[last]
+                self._positions[moved_id] = position
+            self._size -= 1
+            return True
+
+    def get(self, item_id: int) -> Optional[np.ndarray]:
+        """
+        Get the normalized vector stored for an ID.
+
+        Args:
+            item_id (int): ID of the vector
+
+        Returns:
+            Optional[np.ndarray]: Copy of the vector, or None if absent
+        """
+        with self._lock:
+            position = self._positions.get(int(item_id))
+            return None if position is None else self._matrix[position].copy()
+
+    @property
+    def ids(self) -> np.ndarray:
+        """IDs in row order."""
+        return self._ids[:self._size]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Normalized vectors in row order (a view; do not modify)."""
+        return self._matrix[:self._size]
+
+    def search(
+        self,
+        vector: Union[np.ndarray, List[float]],
+        k: int = 10,
+        threshold: Optional[float] = None,
+        exclude: Optional[Iterable[int]] = None,
+        allowed: Optional[Iterable[int]] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Find the most similar vectors.
+
+        Args:
+            vector (np.ndarray): Query vector
+            k (int): Maximum number of results
+            threshold (float, optional): Minimum cosine similarity
+            exclude (Iterable[int], optional): IDs to leave out
+            allowed (Iterable[int], optional): Only consider these IDs
+
+        Returns:
+            List[Tuple[int, float]]: (id, similarity) pairs, most similar first
+        """
+        query = self.normalize(vector)
+
+        with self._lock:
+            if self._size == 0 or k <= 0:
+                return []
+            scores = self.matrix @ query
+            ids = self.ids
+
+            if allowed is not None:
+                rows = [self._positions[item_id] for item_id in allowed if item_id in self._positions]
+                mask = np.full(self._size, -np.inf, dtype=np.float32)
+                mask[rows] = 0.0
+                scores = scores + mask
+            if exclude is not None:
+                rows = [self._positions[item_id] for item_id in exclude if item_id in self._positions]
+                scores = scores.copy()
+                scores[rows] = -np.inf
+
+            ids = ids.copy()
+
+        return self._top_k(ids, scores, k, threshold)
+
+    def search_many(
+        self,
+        vectors: np.ndarray,
+        k: int = 10,
+        threshold: Optional[float] = None,
+        exclude_self: bool = False,
+        query_ids: Optional[Iterable[int]] = None
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Find the most similar vectors for many queries with one matrix product per block.
+
+        Args:
+            vectors (np.ndarray): Query matrix
+            k (int): Maximum number of results per query
+            threshold (float, optional): Minimum cosine similarity
+            exclude_self (bool): Leave out each query's own ID (requires query_ids)
+            query_ids (Iterable[int], optional): IDs of the queries
+
+        Returns:
+            List[List[Tuple[int, float]]]: Results per query, most similar first
+        """
+        queries = self.normalize(np.atleast_2d(vectors))
+        query_ids = list(query_ids) if query_ids is not None else None
+        results = []
+
+        with self._lock:
+            if self._size == 0:
+                return [[] for _ in range(len(queries))]
+            matrix = self.matrix
+            ids = self.ids.copy()
+            self_rows = [self._positions.get(int(item_id)) for item_id in query_ids] if exclude_self and query_ids else None
+
+            for start in range(0, len(queries), 1024):
+                scores = queries[start:start + 1024] @ matrix.T
+                for offset, row_scores in enumerate(scores):
+                    if self_rows is not None and self_rows[start + offset] is not None:
+                        row_scores[self_rows[start + offset]] = -np.inf
+                    results.append(self._top_k(ids, row_scores, k, threshold))
+
+        return results
+
+    @staticmethod
+    def _top_k(ids: np.ndarray, scores: np.ndarray, k: int, threshold: Optional[float]) -> List[Tuple[int, float]]:
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        floor = -np.inf if threshold is None else threshold
+        return [(int(ids[i]), float(scores[i])) for i in top if scores[i] >= floor and np.isfinite(scores[i])]
@@ -0,0 +1,789 @@
+"""
+Ingest daemon module for AI Note System.
+Watches directories for new or changed files, records them in a durable
+SQLite-backed queue and processes them with a pool of long-lived workers.
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Callable, Iterable
+
+# Setup logging
+logger = logging.getLogger("ai_note_system.inputs.ingest_daemon")
+
+# File extension -> input type understood by the process pipeline
+INPUT_TYPES = {
+    ".pdf": "pdf",
+    ".png": "image",
+    ".jpg": "image",
+    ".jpeg": "image",
+    ".tif": "image",
+    ".tiff": "image",
+    ".bmp": "image",
+    ".mp3": "speech",
+    ".wav": "speech",
+    ".m4a": "speech",
+    ".ogg": "speech",
+    ".flac": "speech",
+    ".txt": "text",
+    ".md": "text"
+}
+
+PENDING = "pending"
+PROCESSING = "processing"
+DONE = "done"
+DEAD = "dead"
+
+def get_input_type(path: str) -> Optional[str]:
+    """
+    Get the pipeline input type for a file.
+
+    Args:
+        path (str): File path
+
+    Returns:
+        Optional[str]: Input type, or None if the file is not ingestible
+    """
+    return INPUT_TYPES.get(os.path.splitext(path)[1].lower())
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Compute the SHA-256 digest of a file's content.
+
+    Args:
+        path (str): File path
+        chunk_size (int): Bytes read per chunk
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class IngestQueue:
+    """
+    Durable work queue stored in SQLite.
+
+    Every file version (path and content hash) is one job. Jobs are claimed
+    atomically, retried with exponential backoff when processing fails and
+    moved to the dead-letter state after max_attempts failures. Jobs left in
+    'processing' by a crashed daemon are recovered on startup.
+    """
+
+    def __init__(self, db_path: str, max_attempts: int = 3, retry_delay: float = 30.0):
+        """
+        Initialize the queue.
+
+        Args:
+            db_path (str): Path to the SQLite database file
+            max_attempts (int): Attempts before a job is dead-lettered
+            retry_delay (float): Delay in seconds before the first retry; doubles per attempt
+        """
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._ensure_queue_table()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """
+        Get this thread's connection, opening it on first use.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _ensure_queue_table(self) -> None:
+        """
+        Create the queue table and its indexes if they don't exist.
+        """
+        conn = self._get_connection()
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS ingest_queue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            path TEXT NOT NULL,
+            file_hash TEXT NOT NULL,
+            input_type TEXT NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            note_id INTEGER,
+            worker TEXT,
+            available_at TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+        ''')
+        conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ingest_queue_status ON ingest_queue (status, available_at)
+        ''')
+        conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ingest_queue_path ON ingest_queue (path, file_hash)
+        ''')
+
+    def close(self) -> None:
+        """
+        Close this thread's connection.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def enqueue(self, path: str, file_hash: str, input_type: str) -> Optional[int]:
+        """
+        Add a file version to the queue.
+
+        A version that is already queued, being processed, done or dead is not
+        added again. A pending job for an older version of the same file is
+        replaced by the new version.
+
+        Args:
+            path (str): Absolute file path
+            file_hash (str): Content hash of the file
+            input_type (str): Pipeline input type
+
+        Returns:
+            Optional[int]: Job ID, or None if the version was already known
+        """
+        conn = self._get_connection()
+        now = datetime.now().isoformat()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            known = conn.execute(
+                "SELECT id FROM ingest_queue WHERE path = ? AND file_hash = ?",
+                (path, file_hash)
+            ).fetchone()
+            if known:
+                conn.execute("COMMIT")
+                return None
+
+            superseded = conn.execute(
+                "SELECT id FROM ingest_queue WHERE path = ? AND status = ?",
+                (path, PENDING)
+            ).fetchone()
+
+            if superseded:
+                job_id = superseded["id"]
+                conn.execute(
+                    '''
+                    UPDATE ingest_queue
+                    SET file_hash = ?, input_type = ?, attempts = 0, last_error = NULL,
+                        available_at = ?, updated_at = ?
+                    WHERE id = ?
+                    ''',
+                    (file_hash, input_type, now, now, job_id)
+                )
+            else:
+                cursor = conn.execute(
+                    '''
+                    INSERT INTO ingest_queue
+                    (path, file_hash, input_type, status, available_at, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''',
+                    (path, file_hash, input_type, PENDING, now, now, now)
+                )
+                job_id = cursor.lastrowid
+
+            conn.execute("COMMIT")
+            logger.debug(f"Enqueued {path} as job {job_id}")
+            return job_id
+
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """
+        Atomically claim the next job that is due.
+
+        Args:
+            worker (str): Name of the claiming worker
+
+        Returns:
+            Optional[Dict[str, Any]]: Claimed job, or None if no job is due
+        """
+        conn = self._get_connection()
+        now = datetime.now().isoformat()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                '''
+                SELECT * FROM ingest_queue
+                WHERE status = ? AND available_at <= ?
+                ORDER BY available_at, id
+                LIMIT 1
+                ''',
+                (PENDING, now)
+            ).fetchone()
+
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            conn.execute(
+                '''
+                UPDATE ingest_queue
+                SET status = ?, attempts = attempts + 1, worker = ?, updated_at = ?
+                WHERE id = ?
+                ''',
+                (PROCESSING, worker, now, row["id"])
+            )
+            conn.execute("COMMIT")
+
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        job = dict(row)
+        job["status"] = PROCESSING
+        job["attempts"] += 1
+        job["worker"] = worker
+        return job
+
+    def complete(self, job_id: int, note_id: Optional[int] = None) -> None:
+        """
+        Mark a job as done.
+
+        Args:
+            job_id (int): Job ID
+            note_id (int, optional): ID of the note created or updated
+        """
+        self._get_connection().execute(
+            "UPDATE ingest_queue SET status = ?, note_id = ?, last_error = NULL, updated_at = ? WHERE id = ?",
+            (DONE, note_id, datetime.now().isoformat(), job_id)
+        )
+
+    def fail(self, job_id: int, error: str) -> str:
+        """
+        Record a failed attempt and schedule a retry or dead-letter the job.
+
+        Args:
+            job_id (int): Job ID
+            error (str): Error message
+
+        Returns:
+            str: New status of the job ('pending' or 'dead')
+        """
+        conn = self._get_connection()
+        now = datetime.now()
+
+        row = conn.execute("SELECT attempts FROM ingest_queue WHERE id = ?", (job_id,)).fetchone()
+        attempts = row["attempts"] if row else self.max_attempts
+
+        if attempts >= self.max_attempts:
+            status = DEAD
+            available_at = now
+        else:
+            status = PENDING
+            available_at = now + timedelta(seconds=self.retry_delay * 2 ** (attempts - 1))
+
+        conn.execute(
+            '''
+            UPDATE ingest_queue
+            SET status = ?, last_error = ?, available_at = ?, updated_at = ?
+            WHERE id = ?
+            ''',
+            (status, error, available_at.isoformat(), now.isoformat(), job_id)
+        )
+        return status
+
+    def recover_stale(self) -> int:
+        """
+        Return jobs left in 'processing' by a previous run to the queue.
+
+        Must only be called while no workers are running.
+
+        Returns:
+            int: Number of recovered jobs
+        """
+        now = datetime.now().isoformat()
+        cursor = self._get_connection().execute(
+            "UPDATE ingest_queue SET status = ?, available_at = ?, updated_at = ? WHERE status = ?",
+            (PENDING, now, now, PROCESSING)
+        )
+        if cursor.rowcount:
+            logger.info(f"Recovered {cursor.rowcount} interrupted ingest jobs")
+        return cursor.rowcount
+
+    def retry_dead(self, job_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Move dead-lettered jobs back to the queue with a fresh attempt budget.
+
+        Args:
+            job_ids (Iterable[int], optional): Jobs to retry. If None, retries all dead jobs.
+
+        Returns:
+            int: Number of jobs requeued
+        """
+        now = datetime.now().isoformat()
+        query = "UPDATE ingest_queue SET status = ?, attempts = 0, available_at = ?, updated_at = ? WHERE status = ?"
+        params: List[Any] = [PENDING, now, now, DEAD]
+
+        if job_ids is not None:
+            job_ids = list(job_ids)
+            if not job_ids:
+                return 0
+            query += f" AND id IN ({','.join('?' * len(job_ids))})"
+            params.extend(job_ids)
+
+        return self._get_connection().execute(query, params).rowcount
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        List jobs, most recently updated first.
+
+        Args:
+            status (str, optional): Filter by status
+            limit (int): Maximum number of jobs
+
+        Returns:
+            List[Dict[str, Any]]: Jobs
+        """
+        query = "SELECT * FROM ingest_queue"
+        params: List[Any] = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY updated_at DESC LIMIT ?"
+        params.append(limit)
+
+        return [dict(row) for row in self._get_connection().execute(query, params)]
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get queue counts per status.
+
+        Returns:
+            Dict[str, Any]: Count per status, plus the oldest pending job's creation time
+        """
+        conn = self._get_connection()
+        counts = {status: 0 for status in (PENDING, PROCESSING, DONE, DEAD)}
+        for row in conn.execute("SELECT status, COUNT(*) AS count FROM ingest_queue GROUP BY status"):
+            counts[row["status"]] = row["count"]
+
+        oldest = conn.execute(
+            "SELECT MIN(created_at) AS oldest FROM ingest_queue WHERE status = ?", (PENDING,)
+        ).fetchone()
+
+        return {"counts": counts, "oldest_pending": oldest["oldest"] if oldest else None}
+
+class DirectoryWatcher:
+    """
+    Reports new or changed files in a set of directories.
+
+    Uses the watchdog package (inotify on Linux) when installed and falls back
+    to polling file modification times otherwise. A file is only reported once
+    its size and modification time have been stable for settle_time seconds,
+    so files still being copied are not picked up half-written.
+    """
+
+    def __init__(
+        self,
+        directories: List[str],
+        callback: Callable[[str], None],
+        poll_interval: float = 5.0,
+        settle_time: float = 2.0,
+        recursive: bool = True,
+        use_native: bool = True
+    ):
+        """
+        Initialize the watcher.
+
+        Args:
+            directories (List[str]): Directories to watch
+            callback (Callable[[str], None]): Called with the absolute path of each new or changed file
+            poll_interval (float): Seconds between directory scans in polling mode
+            settle_time (float): Seconds a file must be unchanged before it is reported
+            recursive (bool): Whether to watch subdirectories
+            use_native (bool): Whether to use native file system events if available
+        """
+        self.directories = [os.path.abspath(directory) for directory in directories]
+        self.callback = callback
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time
+        self.recursive = recursive
+        self.use_native = use_native
+
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+
+        # path -> (mtime, size) last reported
+        self._reported: Dict[str, tuple] = {}
+        # path -> (mtime, size, first seen at) waiting to settle
+        self._candidates: Dict[str, tuple] = {}
+
+    @property
+    def native(self) -> bool:
+        """Whether native file system events are in use."""
+        return self._observer is not None
+
+    def start(self) -> None:
+        """
+        Start watching. Files already present are reported once they settle.
+        """
+        for directory in self.directories:
+            os.makedirs(directory, exist_ok=True)
+
+        if self.use_native:
+            self._start_observer()
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="ingest-watcher", daemon=True)
+        self._thread.start()
+
+        mode = "file system events" if self.native else f"polling every {self.poll_interval}s"
+        logger.info(f"Watching {len(self.directories)} directories using {mode}")
+
+    def stop(self) -> None:
+        """
+        Stop watching.
+        """
+        self._stop_event.set()
+
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _start_observer(self) -> None:
+        """
+        Start a watchdog observer, leaving polling mode on if watchdog is unavailable.
+        """
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            logger.info("watchdog package not installed. Falling back to polling.")
+            return
+
+        watcher = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory:
+                    return
+                path = getattr(event, "dest_path", None) or event.src_path
+                watcher._observe(path)
+
+        observer = Observer()
+        try:
+            for directory in self.directories:
+                observer.schedule(_Handler(), directory, recursive=self.recursive)
+            observer.start()
+        except Exception as e:
+            logger.warning(f"Could not start file system observer, falling back to polling: {e}")
+            return
+
+        self._observer = observer
+
+    def _observe(self, path: str) -> None:
+        """
+        Record the current state of a file as a candidate for reporting.
+        """
+        path = os.path.abspath(path)
+        if get_input_type(path) is None or os.path.basename(path).startswith("."):
+            return
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            with self._lock:
+                self._candidates.pop(path, None)
+            return
+
+        state = (stat.st_mtime, stat.st_size)
+        with self._lock:
+            if self._reported.get(path) == state:
+                return
+            candidate = self._candidates.get(path)
+            if candidate is None or candidate[:2] != state:
+                self._candidates[path] = (state[0], state[1], time.monotonic())
+
+    def scan(self) -> None:
+        """
+        Observe every ingestible file in the watched directories.
+        """
+        for directory in self.directories:
+            if self.recursive:
+                walker = os.walk(directory)
+            else:
+                walker = [(directory, [], os.listdir(directory))]
+
+            for root, _, filenames in walker:
+                for filename in filenames:
+                    self._observe(os.path.join(root, filename))
+
+    def _flush_settled(self) -> None:
+        """
+        Report candidates whose state has been stable for settle_time.
+        """
+        now = time.monotonic()
+        ready = []
+
+        with self._lock:
+            for path, (mtime, size, seen_at) in list(self._candidates.items()):
+                if now - seen_at < self.settle_time:
+                    continue
+                del self._candidates[path]
+                ready.append((path, (mtime, size)))
+
+        for path, state in ready:
+            # Recheck: a write since the last observation restarts the settle timer
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if (stat.st_mtime, stat.st_size) != state:
+                self._observe(path)
+                continue
+
+            with self._lock:
+                self._reported[path] = state
+
+            try:
+                self.callback(path)
+            except Exception as e:
+                logger.error(f"Error handling watched file {path}: {e}")
+
+    def _run(self) -> None:
+        """
+        Watcher loop: scan (always once, then only in polling mode) and flush settled files.
+        """
+        self.scan()
+        last_scan = time.monotonic()
+        tick = min(self.poll_interval, max(self.settle_time / 2, 0.1))
+
+        while not self._stop_event.wait(tick):
+            if not self.native and time.monotonic() - last_scan >= self.poll_interval:
+                self.scan()
+                last_scan = time.monotonic()
+            self._flush_settled()
+
+class IngestDaemon:
+    """
+    Long-running ingest service.
+
+    A DirectoryWatcher feeds new file versions into an IngestQueue and a pool
+    of worker threads processes them. Each worker creates its resources
+    (database connections, loaded embedding models, LLM clients) once when it
+    starts and reuses them for every job, so per-file latency does not include
+    model loading or connection setup.
+    """
+
+    def __init__(
+        self,
+        queue: IngestQueue,
+        process_file: Callable[[Dict[str, Any], Dict[str, Any]], Optional[int]],
+        resource_factory: Optional[Callable[[], Dict[str, Any]]] = None,
+        directories: Optional[List[str]] = None,
+        num_workers: int = 2,
+        poll_interval: float = 5.0,
+        settle_time: float = 2.0,
+        use_native_watch: bool = True
+    ):
+        """
+        Initialize the daemon.
+
+        Args:
+            queue (IngestQueue): Durable job queue
+            process_file (Callable): Called as process_file(job, resources) for each job;
+                returns the ID of the note created or updated. Raising marks the attempt failed.
+            resource_factory (Callable, optional): Creates a worker's long-lived resources.
+                Resources with a close() method are closed when the worker stops.
+            directories (List[str], optional): Directories to watch
+            num_workers (int): Number of worker threads
+            poll_interval (float): Seconds between scans when polling
+            settle_time (float): Seconds a file must be unchanged before it is queued
+            use_native_watch (bool): Whether to use native file system events if available
+        """
+        self.queue = queue
+        self.process_file = process_file
+        self.resource_factory = resource_factory or dict
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval
+
+        self._stop_event = threading.Event()
+        self._work_available = threading.Condition()
+        self._workers: List[threading.Thread] = []
+        self._stats_lock = threading.Lock()
+        self._stats = {"enqueued": 0, "processed": 0, "failed": 0, "dead_lettered": 0}
+
+        self.watcher = None
+        if directories:
+            self.watcher = DirectoryWatcher(
+                directories,
+                self.enqueue_file,
+                poll_interval=poll_interval,
+                settle_time=settle_time,
+                use_native=use_native_watch
+            )
+
+    def _count(self, stat: str) -> None:
+        with self._stats_lock:
+            self._stats[stat] += 1
+
+    def enqueue_file(self, path: str) -> Optional[int]:
+        """
+        Queue a file if this version of it hasn't been queued before.
+
+        Args:
+            path (str): File path
+
+        Returns:
+            Optional[int]: Job ID, or None if the file was skipped
+        """
+        input_type = get_input_type(path)
+        if input_type is None:
+            return None
+
+        path = os.path.abspath(path)
+        try:
+            file_hash = hash_file(path)
+        except OSError as e:
+            logger.warning(f"Could not read {path}: {e}")
+            return None
+
+        job_id = self.queue.enqueue(path, file_hash, input_type)
+        if job_id is not None:
+            self._count("enqueued")
+            logger.info(f"Queued {path} ({input_type})")
+            with self._work_available:
+                self._work_available.notify()
+        return job_id
+
+    def start(self) -> None:
+        """
+        Recover interrupted jobs and start the workers and watcher.
+        """
+        self.queue.recover_stale()
+        self._stop_event.clear()
+
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._worker_loop, args=(f"worker-{i + 1}",), name=f"ingest-worker-{i + 1}")
+            worker.start()
+            self._workers.append(worker)
+
+        if self.watcher:
+            self.watcher.start()
+
+        logger.info(f"Ingest daemon started with {self.num_workers} workers")
+
+    def stop(self) -> None:
+        """
+        Stop the watcher, let workers finish their current job and wait for them.
+        """
+        if self.watcher:
+            self.watcher.stop()
+
+        self._stop_event.set()
+        with self._work_available:
+            self._work_available.notify_all()
+
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+        self.queue.close()
+        logger.info("Ingest daemon stopped")
+
+    def run_forever(self) -> None:
+        """
+        Start the daemon and block until interrupted.
+        """
+        self.start()
+        try:
+            while not self._stop_event.wait(1.0):
+                pass
+        except KeyboardInterrupt:
+            logger.info("Interrupted, shutting down ingest daemon")
+        finally:
+            self.stop()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get counters for this run.
+
+        Returns:
+            Dict[str, Any]: Jobs enqueued, processed, failed and dead-lettered
+        """
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _worker_loop(self, name: str) -> None:
+        """
+        Claim and process jobs until stopped, keeping the worker's resources warm.
+        """
+        try:
+            resources = self.resource_factory()
+        except Exception as e:
+            logger.error(f"{name} could not initialize its resources: {e}")
+            return
+
+        try:
+            while not self._stop_event.is_set():
+                job = self.queue.claim(name)
+
+                if job is None:
+                    # Wake up on new work, or periodically for retries that became due
+                    with self._work_available:
+                        self._work_available.wait(timeout=self.poll_interval)
+                    continue
+
+                self._run_job(name, job, resources)
+
+        finally:
+            for resource in resources.values():
+                close = getattr(resource, "close", None)
+                if callable(close):
+                    try:
+                        close()
+                    except Exception as e:
+                        logger.warning(f"Error closing {name} resource: {e}")
+            self.queue.close()
+
+    def _run_job(self, name: str, job: Dict[str, Any], resources: Dict[str, Any]) -> None:
+        """
+        Process one job and record its outcome in the queue.
+        """
+        logger.info(f"{name} processing {job['path']} (attempt {job['attempts']})")
+        start = time.perf_counter()
+
+        try:
+            note_id = self.process_file(job, resources)
+        except (Exception, SystemExit) as e:
+            # The pipeline exits on unusable input; that must not take the worker down
+            error = str(e) or e.__class__.__name__
+            status = self.queue.fail(job["id"], error)
+            self._count("failed")
+            if status == DEAD:
+                self._count("dead_lettered")
+                logger.error(f"Giving up on {job['path']} after {job['attempts']} attempts: {error}")
+            else:
+                logger.warning(f"Failed to process {job['path']}, will retry: {error}")
+            return
+
+        self.queue.complete(job["id"], note_id)
+        self._count("processed")
+        logger.info(f"{name} processed {job['path']} into note {note_id} in {time.perf_counter() - start:.1f}s")
@@ -5,6 +5,7 @@ Handles extraction of text from images using OCR.
 
 import os
 import logging
+import functools
 from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 
@@ -13,6 +14,7 @@ logger = logging.getLogger("ai_note_system.inputs.ocr_input")
 
 # Import text_input for processing extracted text
 from . import text_input
+from .ocr_service import OCRService
 
 def extract_text_from_image(
     image_path: str,
@@ -133,6 +135,14 @@ def extract_with_pytesseract(
         logger.error(f"Error extracting text with pytesseract: {e}")
         return ""
 
+@functools.lru_cache(maxsize=4)
+def _get_easyocr_reader(lang: str):
+    """
+    Get an EasyOCR reader for a language, loading its models only once per process.
+    """
+    import easyocr
+    return easyocr.Reader([lang])
+
 def extract_with_easyocr(
     image_path: str,
     lang: str = "en"
@@ -148,12 +158,10 @@ def extract_with_easyocr(
         str: Extracted text
     """
     try:
-        import easyocr
-        
         logger.debug(f"Opening image with EasyOCR: {image_path}")
         
-        # Initialize reader
-        reader = easyocr.Reader([lang])
+        # Reuse the reader for this language
+        reader = _get_easyocr_reader(lang)
         
         # Extract text
         results = reader.readtext(image_path)
@@ -178,17 +186,27 @@ def batch_process_images(
     output_dir: Optional[str] = None,
     engine: str = "pytesseract",
     lang: str = "eng",
-    preprocess: bool = True
+    preprocess: bool = True,
+    max_workers: Optional[int] = None,
+    cache_dir: Optional[str] = None,
+    target_dpi: Optional[int] = 300
 ) -> List[Dict[str, Any]]:
     """
     Process multiple images in a directory.
     
+    Images are OCR'd in batches across a process pool that keeps one OCR
+    handle per worker. Results are cached by image content, so re-importing
+    the same slides skips OCR entirely.
+    
     Args:
         image_dir (str): Directory containing images
         output_dir (str, optional): Directory to save extracted text. If None, uses default.
         engine (str): OCR engine to use
         lang (str): Language code for OCR
         preprocess (bool): Whether to preprocess images
+        max_workers (int, optional): Number of OCR worker processes
+        cache_dir (str, optional): Directory for cached OCR results. If None, uses default.
+        target_dpi (int, optional): Resolution images are downscaled to before OCR
         
     Returns:
         List[Dict[str, Any]]: List of results for each processed image
@@ -211,17 +229,44 @@ def batch_process_images(
         logger.warning(f"No image files found in directory: {image_dir}")
         return [{"error": f"No image files found in directory: {image_dir}"}]
     
-    # Process each image
+    # Deduplicate paths matched by both the lower and upper case patterns
+    image_paths = sorted({str(image_file) for image_file in image_files})
+    
+    # Run OCR on all images in batches
+    with OCRService(
+        engine=engine,
+        lang=lang,
+        max_workers=max_workers,
+        cache_dir=cache_dir,
+        target_dpi=target_dpi,
+        preprocess=preprocess
+    ) as service:
+        ocr_results = service.extract_batch(image_paths)
+        logger.info(f"OCR cache: {service.stats['cache_hits']} hits, {service.stats['cache_misses']} misses")
+    
+    # Process the extracted text of each image
     results = []
-    for image_file in image_files:
-        result = extract_text_from_image(
-            str(image_file),
-            engine=engine,
+    for ocr_result in ocr_results:
+        image_path = ocr_result["image_path"]
+        text = ocr_result.get("text")
+        
+        if not text:
+            error = ocr_result.get("error", f"Failed to extract text from image: {image_path}")
+            logger.error(error)
+            results.append({"error": error})
+            continue
+        
+        title = os.path.splitext(os.path.basename(image_path))[0].replace('_', ' ')
+        result = text_input.process_text(
+            text=text,
+            title=title,
+            tags=["image", "ocr"],
             save_raw=True,
-            raw_dir=output_dir,
-            lang=lang,
-            preprocess=preprocess
+            raw_dir=output_dir
         )
+        result["source_type"] = "image"
+        result["source_path"] = image_path
+        result["ocr_cached"] = ocr_result.get("cached", False)
         results.append(result)
     
     logger.info(f"Processed {len(results)} images")
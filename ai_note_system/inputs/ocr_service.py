@@ -0,0 +1,467 @@
+"""
+OCR service module for AI Note System.
+Provides a batched OCR engine that keeps one OCR handle per worker process,
+preprocesses images in vectorized batches and caches results by image content.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import concurrent.futures
+from typing import Dict, Any, List, Optional, Tuple
+
+# Setup logging
+logger = logging.getLogger("ai_note_system.inputs.ocr_service")
+
+# OCR handle owned by the current worker process (see _init_worker)
+_worker_engine = None
+
+def _to_easyocr_lang(lang: str) -> str:
+    """
+    Map Tesseract language codes to EasyOCR ones.
+    """
+    return {"eng": "en", "fra": "fr", "deu": "de", "spa": "es", "ita": "it", "por": "pt"}.get(lang, lang)
+
+class _OCREngine:
+    """
+    Long-lived OCR handle for a single worker.
+
+    EasyOCR readers load their detection and recognition models once. For
+    Tesseract, tesserocr's PyTessBaseAPI is kept open when installed and
+    pytesseract is used otherwise.
+    """
+
+    def __init__(self, engine: str, lang: str):
+        self.engine = engine.lower()
+        self.lang = lang
+        self._handle = None
+
+        if self.engine == "easyocr":
+            import easyocr
+            self._handle = easyocr.Reader([_to_easyocr_lang(lang)])
+        elif self.engine == "pytesseract":
+            try:
+                import tesserocr
+                self._handle = tesserocr.PyTessBaseAPI(lang=lang)
+            except ImportError:
+                import pytesseract  # Fail early if neither Tesseract binding is installed
+                self._handle = None
+        else:
+            raise ValueError(f"Unsupported OCR engine: {engine}")
+
+    def read(self, image) -> str:
+        """
+        Run OCR on a preprocessed grayscale image array.
+        """
+        if self.engine == "easyocr":
+            results = self._handle.readtext(image)
+            return "\n".join(result[1] for result in results)
+
+        from PIL import Image
+        pil_image = Image.fromarray(image)
+
+        if self._handle is not None:
+            self._handle.SetImage(pil_image)
+            return self._handle.GetUTF8Text()
+
+        import pytesseract
+        return pytesseract.image_to_string(pil_image, lang=self.lang)
+
+def _init_worker(engine: str, lang: str) -> None:
+    """
+    Process pool initializer that creates the worker's OCR handle.
+
+    A failing initializer would break the whole pool, so errors are only logged
+    here; _ocr_chunk tries again and reports the error for each of its images.
+    """
+    global _worker_engine
+    try:
+        _worker_engine = _OCREngine(engine, lang)
+    except Exception as e:
+        logger.error(f"Error initializing OCR engine {engine}: {e}")
+        _worker_engine = None
+
+def _get_worker_engine(engine: str, lang: str) -> _OCREngine:
+    """
+    Get the OCR handle for the current process, creating it on first use.
+    """
+    global _worker_engine
+    if _worker_engine is None or _worker_engine.engine != engine.lower() or _worker_engine.lang != lang:
+        _worker_engine = _OCREngine(engine, lang)
+    return _worker_engine
+
+def load_image(image_path: str, target_dpi: Optional[int] = 300):
+    """
+    Load an image as a grayscale array, downscaled to the target DPI.
+
+    Args:
+        image_path (str): Path to the image file
+        target_dpi (int, optional): Resolution to downscale to. Images without
+            DPI metadata are assumed to be 300 DPI when wider than 2500 pixels.
+
+    Returns:
+        numpy.ndarray: 2-D uint8 grayscale image
+    """
+    import numpy as np
+    from PIL import Image
+
+    with Image.open(image_path) as image:
+        dpi = image.info.get("dpi", (None, None))[0]
+        image = image.convert("L")
+
+        if target_dpi:
+            if not dpi and image.width > 2500:
+                dpi = 300 * image.width / 2500
+            if dpi and dpi > target_dpi:
+                scale = target_dpi / float(dpi)
+                size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+                image = image.resize(size, Image.LANCZOS)
+
+        return np.asarray(image, dtype=np.uint8)
+
+def otsu_thresholds(images) -> Any:
+    """
+    Compute Otsu binarization thresholds for a stack of grayscale images at once.
+
+    Args:
+        images (numpy.ndarray): Array of shape (N, H, W) with uint8 pixels
+
+    Returns:
+        numpy.ndarray: Threshold per image, shape (N,)
+    """
+    import numpy as np
+
+    n = images.shape[0]
+    offsets = (np.arange(n, dtype=np.int64) * 256)[:, None]
+    flat = images.reshape(n, -1).astype(np.int64) + offsets
+    hist = np.bincount(flat.ravel(), minlength=256 * n).reshape(n, 256).astype(np.float64)
+
+    levels = np.arange(256, dtype=np.float64)
+    weight_bg = np.cumsum(hist, axis=1)
+    weight_fg = weight_bg[:, -1:] - weight_bg
+    cum_mean = np.cumsum(hist * levels, axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_bg = cum_mean / weight_bg
+        mean_fg = (cum_mean[:, -1:] - cum_mean) / weight_fg
+        between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+
+    between = np.nan_to_num(between)
+    return np.argmax(between, axis=1)
+
+def deskew(image):
+    """
+    Rotate a binarized image so that its text lines are horizontal.
+
+    Args:
+        image (numpy.ndarray): Binarized grayscale image (text dark on light)
+
+    Returns:
+        numpy.ndarray: Deskewed image
+    """
+    try:
+        import cv2
+        import numpy as np
+    except ImportError:
+        return image
+
+    coords = np.column_stack(np.where(image < 128))
+    if len(coords) < 50:
+        return image
+
+    # Normalize across OpenCV's old [-90, 0) and new (0, 90] angle conventions
+    angle = cv2.minAreaRect(coords.astype(np.float32))[-1]
+    if angle > 45:
+        angle -= 90
+    elif angle < -45:
+        angle += 90
+    angle = -angle
+    if abs(angle) < 0.5:
+        return image
+
+    height, width = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width // 2, height // 2), angle, 1.0)
+    return cv2.warpAffine(
+        image, matrix, (width, height),
+        flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE
+    )
+
+def preprocess_batch(images: List[Any], binarize: bool = True, deskew_images: bool = True) -> List[Any]:
+    """
+    Preprocess a batch of grayscale images.
+
+    Images of the same shape (e.g. slides from one deck) are stacked and
+    binarized in a single vectorized pass; deskewing is applied per image.
+
+    Args:
+        images (List[numpy.ndarray]): Grayscale images
+        binarize (bool): Whether to apply Otsu binarization
+        deskew_images (bool): Whether to correct page rotation
+
+    Returns:
+        List[numpy.ndarray]: Preprocessed images in the same order
+    """
+    import numpy as np
+
+    processed = list(images)
+
+    if binarize:
+        by_shape: Dict[Tuple[int, ...], List[int]] = {}
+        for i, image in enumerate(images):
+            by_shape.setdefault(image.shape, []).append(i)
+
+        for indices in by_shape.values():
+            stack = np.stack([images[i] for i in indices])
+            thresholds = otsu_thresholds(stack)
+            binary = np.where(stack > thresholds[:, None, None], 255, 0).astype(np.uint8)
+            for j, i in enumerate(indices):
+                processed[i] = binary[j]
+
+    if deskew_images:
+        processed = [deskew(image) for image in processed]
+
+    return processed
+
+def _ocr_chunk(
+    image_paths: List[str],
+    engine: str,
+    lang: str,
+    preprocess: bool,
+    target_dpi: Optional[int]
+) -> List[Dict[str, Any]]:
+    """
+    Load, preprocess and OCR a chunk of images inside a worker.
+    """
+    try:
+        ocr_engine = _get_worker_engine(engine, lang)
+    except Exception as e:
+        # A missing OCR package or unknown engine fails every image of the chunk
+        return [
+            {"image_path": path, "error": f"Failed to extract text from image: OCR engine {engine} unavailable: {e}"}
+            for path in image_paths
+        ]
+
+    results: List[Dict[str, Any]] = []
+    images = []
+    loaded = []
+
+    for path in image_paths:
+        try:
+            images.append(load_image(path, target_dpi))
+            loaded.append(path)
+        except Exception as e:
+            results.append({"image_path": path, "error": f"Error loading image: {e}"})
+
+    if preprocess and images:
+        images = preprocess_batch(images)
+
+    for path, image in zip(loaded, images):
+        try:
+            results.append({"image_path": path, "text": ocr_engine.read(image)})
+        except Exception as e:
+            results.append({"image_path": path, "error": f"Error extracting text: {e}"})
+
+    return results
+
+class OCRService:
+    """
+    Batched OCR engine with persistent per-worker handles and a content-hash cache.
+    """
+
+    def __init__(
+        self,
+        engine: str = "pytesseract",
+        lang: str = "eng",
+        max_workers: Optional[int] = None,
+        cache_dir: Optional[str] = None,
+        target_dpi: Optional[int] = 300,
+        preprocess: bool = True,
+        chunk_size: int = 8
+    ):
+        """
+        Initialize the OCR service.
+
+        Args:
+            engine (str): OCR engine to use ('pytesseract' or 'easyocr')
+            lang (str): Language code for OCR
+            max_workers (int, optional): Number of worker processes. If None, uses the CPU count.
+            cache_dir (str, optional): Directory for cached OCR results. If None, uses default.
+            target_dpi (int, optional): Resolution images are downscaled to before OCR
+            preprocess (bool): Whether to binarize and deskew images
+            chunk_size (int): Number of images preprocessed together in each worker task
+        """
+        self.engine = engine.lower()
+        self.lang = lang
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.target_dpi = target_dpi
+        self.preprocess = preprocess
+        self.chunk_size = max(1, chunk_size)
+
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "ocr_cache")
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._executor = None
+        self.stats = {"cache_hits": 0, "cache_misses": 0}
+
+    def _get_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        """
+        Start the worker pool on first use; workers keep their OCR handle for the service lifetime.
+        """
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(self.engine, self.lang)
+            )
+        return self._executor
+
+    def close(self) -> None:
+        """
+        Shut down the worker pool.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def cache_key(self, image_path: str) -> str:
+        """
+        Build the cache key for an image from its content and the OCR settings.
+
+        Args:
+            image_path (str): Path to the image file
+
+        Returns:
+            str: Cache key
+        """
+        digest = hashlib.sha256()
+        with open(image_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        digest.update(f"|{self.engine}|{self.lang}|{self.preprocess}|{self.target_dpi}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def _cache_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _load_cached(self, key: str) -> Optional[str]:
+        path = self._cache_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)["text"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _store_cached(self, key: str, text: str) -> None:
+        path = self._cache_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"text": text, "engine": self.engine, "lang": self.lang}, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def extract_text(self, image_path: str) -> str:
+        """
+        Extract text from a single image in the current process.
+
+        Args:
+            image_path (str): Path to the image file
+
+        Returns:
+            str: Extracted text, or an empty string on failure
+        """
+        key = self.cache_key(image_path)
+        cached = self._load_cached(key)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            return cached
+
+        self.stats["cache_misses"] += 1
+        result = _ocr_chunk([image_path], self.engine, self.lang, self.preprocess, self.target_dpi)[0]
+        if "error" in result:
+            logger.error(f"{result['error']} ({image_path})")
+            return ""
+
+        self._store_cached(key, result["text"])
+        return result["text"]
+
+    def extract_batch(self, image_paths: List[str]) -> List[Dict[str, Any]]:
+        """
+        Extract text from many images, skipping any whose content was seen before.
+
+        Args:
+            image_paths (List[str]): Paths to the image files
+
+        Returns:
+            List[Dict[str, Any]]: One result per image, in input order, with
+                'image_path' and either 'text' (plus 'cached') or 'error'
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        pending: Dict[str, List[str]] = {}
+
+        for path in image_paths:
+            if not os.path.exists(path):
+                results[path] = {"image_path": path, "error": f"Image file not found: {path}"}
+                continue
+
+            key = self.cache_key(path)
+            cached = self._load_cached(key)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                results[path] = {"image_path": path, "text": cached, "cached": True}
+            else:
+                # Identical images within the batch are OCR'd once
+                pending.setdefault(key, []).append(path)
+
+        if pending:
+            self.stats["cache_misses"] += len(pending)
+            logger.info(f"Running OCR on {len(pending)} images ({len(results)} served from cache)")
+
+            first_paths = [paths[0] for paths in pending.values()]
+            key_by_path = {paths[0]: key for key, paths in pending.items()}
+            chunks = [first_paths[i:i + self.chunk_size] for i in range(0, len(first_paths), self.chunk_size)]
+
+            if self.max_workers > 1 and len(chunks) > 1:
+                executor = self._get_executor()
+                futures = [
+                    executor.submit(_ocr_chunk, chunk, self.engine, self.lang, self.preprocess, self.target_dpi)
+                    for chunk in chunks
+                ]
+                chunk_results = []
+                for chunk, future in zip(chunks, futures):
+                    try:
+                        chunk_results.append(future.result())
+                    except Exception as e:
+                        # A crashed worker breaks the pool, so the next batch starts a new one
+                        logger.error(f"OCR worker failed: {e}")
+                        self.close()
+                        chunk_results.append([
+                            {"image_path": path, "error": f"Failed to extract text from image: {e}"}
+                            for path in chunk
+                        ])
+            else:
+                chunk_results = [
+                    _ocr_chunk(chunk, self.engine, self.lang, self.preprocess, self.target_dpi)
+                    for chunk in chunks
+                ]
+
+            for chunk_result in chunk_results:
+                for result in chunk_result:
+                    key = key_by_path[result["image_path"]]
+                    if "error" not in result:
+                        self._store_cached(key, result["text"])
+                        result["cached"] = False
+                    for path in pending[key]:
+                        results[path] = dict(result, image_path=path)
+
+        return [results[path] for path in image_paths]
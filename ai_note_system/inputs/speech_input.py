@@ -7,6 +7,7 @@ import os
 import logging
 import tempfile
 import time
+import functools
 from typing import Dict, Any, Optional, Tuple, BinaryIO
 from pathlib import Path
 
@@ -78,6 +79,14 @@ def transcribe_audio(
     logger.debug(f"Audio transcribed: {title} ({result['word_count']} words, {duration:.2f} seconds)")
     return result
 
+@functools.lru_cache(maxsize=2)
+def _get_whisper_model(model_size: str):
+    """
+    Get a Whisper model, loading it only once per process.
+    """
+    import whisper
+    return whisper.load_model(model_size)
+
 def transcribe_with_whisper(
     audio_path: str,
     language: Optional[str] = None,
@@ -100,8 +109,8 @@ def transcribe_with_whisper(
         
         logger.debug(f"Loading Whisper model: {model_size}")
         
-        # Load model
-        model = whisper.load_model(model_size)
+        # Load model (cached across calls)
+        model = _get_whisper_model(model_size)
         
         # Transcribe audio
         logger.debug(f"Transcribing audio with Whisper: {audio_path}")
@@ -16,6 +16,7 @@ logger = logging.getLogger("ai_note_system.learning.discussion_simulator")
 
 # Import required modules
 from ..api.llm_interface import get_llm_interface
+from ..agents.conversation_memory import ConversationMemory
 
 class DiscussionSimulator:
     """
@@ -27,7 +28,8 @@ class DiscussionSimulator:
         self,
         llm_provider: str = "openai",
         llm_model: str = "gpt-4",
-        output_dir: Optional[str] = None
+        output_dir: Optional[str] = None,
+        memory_token_budget: int = 2000
     ):
         """
         Initialize the Discussion Simulator.
@@ -36,10 +38,15 @@ class DiscussionSimulator:
             llm_provider (str): LLM provider to use for generating discussions
             llm_model (str): LLM model to use for generating discussions
             output_dir (str, optional): Directory to save discussion transcripts
+            memory_token_budget (int): Maximum tokens of previous turns in a turn prompt
         """
         # Initialize LLM interface
         self.llm = get_llm_interface(llm_provider, model=llm_model)
         
+        # Summarize earlier turns of long discussions, per discussion ID
+        self.memory_token_budget = memory_token_budget
+        self.memories: Dict[str, ConversationMemory] = {}
+        
         # Set output directory
         self.output_dir = output_dir
         if output_dir:
@@ -308,9 +315,18 @@ class DiscussionSimulator:
         agent_idx = turn_number % len(personas)
         agent = personas[agent_idx]
         
+        # Keep the previous turns within the token budget
+        memory = self.memories.get(discussion["id"])
+        if memory is None:
+            memory = self.memories[discussion["id"]] = ConversationMemory(self.llm, token_budget=self.memory_token_budget)
+        transcript = memory.render(memory.build([
+            {"role": turn.get("agent_name", "Moderator"), "content": turn["content"]}
+            for turn in previous_turns
+        ]))
+        
         # Create the prompt for generating the turn
         prompt = self._create_turn_prompt(
-            topic, concept, agent, personas, previous_turns, user_interventions
+            topic, concept, agent, personas, previous_turns, user_interventions, transcript
         )
         
         try:
@@ -324,7 +340,8 @@ class DiscussionSimulator:
                 "agent_name": agent["name"],
                 "content": response.strip(),
                 "timestamp": datetime.now().isoformat(),
-                "type": "agent_turn"
+                "type": "agent_turn",
+                "prompt_tokens": self.llm.count_tokens(prompt)
             }
             
             return turn
@@ -349,7 +366,8 @@ class DiscussionSimulator:
         current_agent: Dict[str, str],
         all_agents: List[Dict[str, str]],
         previous_turns: List[Dict[str, Any]],
-        user_interventions: List[Dict[str, Any]]
+        user_interventions: List[Dict[str, Any]],
+        transcript: str
     ) -> str:
         """
         Create a prompt for generating a turn.
@@ -361,6 +379,7 @@ class DiscussionSimulator:
             all_agents (List[Dict[str, str]]): All agent personas
             previous_turns (List[Dict[str, Any]]): Previous turns in the discussion
             user_interventions (List[Dict[str, Any]]): User interventions
+            transcript (str): Previous turns, with the earlier ones summarized
             
         Returns:
             str: Prompt for generating the turn
@@ -380,8 +399,8 @@ class DiscussionSimulator:
         """
         
         # Add previous turns
-        for turn in previous_turns:
-            prompt += f"\n{turn['agent_name']}: {turn['content']}\n"
+        if transcript:
+            prompt += f"\n{transcript}\n"
         
         # Add recent user interventions
         recent_interventions = [i for i in user_interventions if i["turn"] == len(previous_turns) - 1]
@@ -36,17 +36,21 @@ from inputs.pdf_input import extract_text_from_pdf
 from inputs.ocr_input import extract_text_from_image
 from inputs.speech_input import transcribe_audio, record_audio
 from inputs.youtube_input import process_youtube_video
+from inputs.ingest_daemon import IngestQueue, IngestDaemon
 
 # Import processing modules
 from processing.summarizer import summarize_text
 from processing.keypoints_extractor import extract_keypoints, extract_glossary
 from processing.active_recall_gen import generate_questions, generate_mcqs, generate_fill_blanks
-from processing.topic_linker import find_related_topics
 from processing.misconception_checker import check_misconceptions
 from processing.simplifier import simplify_text
 from processing.retrieval_qa import ask_question
 from processing.math_formula_processor import process_math_formulas, detect_math_formulas
 from processing.citation_tracker import add_source, get_sources, search_by_source, generate_citation, generate_citations_for_note
+from processing.fingerprinting import plan_reprocessing, fingerprint_text, format_plan_report, TEXT_STAGE
+from processing.near_duplicate import NearDuplicateDetector
+from processing.note_linker import NoteLinker, start_background_rebuild
+from processing.topic_clustering import TopicClusterer, GRAPH, EMBEDDING
 
 # Import visualization modules
 from visualization.flowchart_gen import generate_flowchart
@@ -123,6 +127,29 @@ def setup_argparse() -> argparse.ArgumentParser:
                                default="auto", help="Translation provider to use")
     process_parser.add_argument("--output", "-o", choices=["notion", "markdown", "pdf", "anki", "json"],
                                default="json", help="Output format")
+    process_parser.add_argument("--dry-run", action="store_true",
+                               help="Report which processing stages would run without running them")
+    process_parser.add_argument("--force", action="store_true",
+                               help="Recompute all stages even if their inputs are unchanged")
+    process_parser.add_argument("--on-duplicate", choices=["skip", "merge", "link", "ignore"],
+                               help="What to do when the input is a near-duplicate of an existing note")
+    
+    # Ingest daemon command
+    daemon_parser = subparsers.add_parser("daemon", help="Watch folders and ingest new or changed files")
+    daemon_subparsers = daemon_parser.add_subparsers(dest="daemon_command", help="Daemon command to execute")
+    
+    start_daemon_parser = daemon_subparsers.add_parser("start", help="Run the ingest daemon in the foreground")
+    start_daemon_parser.add_argument("--watch", type=str, nargs="+", help="Directories to watch (default: INGEST_WATCH_DIRS)")
+    start_daemon_parser.add_argument("--workers", type=int, help="Number of worker threads (default: INGEST_WORKERS)")
+    start_daemon_parser.add_argument("--poll", action="store_true", help="Poll directories instead of using file system events")
+    start_daemon_parser.add_argument("--process-args", type=str, nargs=argparse.REMAINDER,
+                                    help="Options passed to 'process' for every file (default: INGEST_PROCESS_ARGS)")
+    
+    status_daemon_parser = daemon_subparsers.add_parser("status", help="Show ingest queue status")
+    status_daemon_parser.add_argument("--limit", type=int, default=10, help="Maximum number of failed jobs to list")
+    
+    retry_daemon_parser = daemon_subparsers.add_parser("retry", help="Requeue dead-lettered jobs")
+    retry_daemon_parser.add_argument("--id", type=int, nargs="+", help="Job IDs to retry (default: all dead jobs)")
     
     # Export command
     export_parser = subparsers.add_parser("export", help="Export notes to various formats")
@@ -164,11 +191,34 @@ def setup_argparse() -> argparse.ArgumentParser:
     graph_parser.add_argument("--layout", choices=["fdp", "neato", "dot", "sfdp", "twopi", "circo"],
                              default="fdp", help="Graphviz layout engine")
     graph_parser.add_argument("--no-3d", action="store_true", help="Disable 3D-like styling")
-    graph_parser.add_argument("--max-nodes", type=int, default=100, help="Maximum number of nodes to include")
+    graph_parser.add_argument("--max-nodes", type=int, help="Maximum number of nodes to include (default: all notes)")
     graph_parser.add_argument("--threshold", type=float, default=0.5, 
                              help="Minimum similarity threshold for related notes (0-1)")
     graph_parser.add_argument("--tags", type=str, nargs="+", help="Filter notes by tags")
     graph_parser.add_argument("--open", action="store_true", help="Open the output file in a browser")
+    graph_parser.add_argument("--clusters", choices=["graph", "embedding"],
+                             help="Group the HTML graph by stored topic clusters instead of detecting communities")
+    
+    # Topic clusters command
+    cluster_parser = subparsers.add_parser("cluster", help="Group notes into topic clusters")
+    cluster_subparsers = cluster_parser.add_subparsers(dest="cluster_command", help="Cluster command to execute")
+    
+    rebuild_cluster_parser = cluster_subparsers.add_parser("rebuild", help="Recompute topic clusters from scratch")
+    rebuild_cluster_parser.add_argument("--method", choices=["graph", "embedding", "all"], default="all",
+                                       help="Cluster the related-notes graph, the embeddings, or both")
+    rebuild_cluster_parser.add_argument("--k", type=int, help="Number of embedding clusters (default: about sqrt(notes / 2))")
+    
+    show_cluster_parser = cluster_subparsers.add_parser("show", help="List topic clusters")
+    show_cluster_parser.add_argument("--method", choices=["graph", "embedding"], default="graph", help="Clustering method")
+    show_cluster_parser.add_argument("--limit", type=int, default=20, help="Maximum number of clusters to list")
+    
+    # Near-duplicate index command
+    duplicates_parser = subparsers.add_parser("duplicates", help="Manage the near-duplicate index")
+    duplicates_subparsers = duplicates_parser.add_subparsers(dest="duplicates_command", help="Duplicates command to execute")
+    
+    duplicates_subparsers.add_parser(
+        "rebuild", help="Recompute the MinHash signatures of all notes"
+    )
     
     # Retrieval-Augmented Q&A command
     qa_parser = subparsers.add_parser("pansophy_ask", help="Ask questions and get answers based on your notes")
@@ -353,13 +403,244 @@ def setup_argparse() -> argparse.ArgumentParser:
     return parser
 
 
-def process_input(args: argparse.Namespace, config: Dict[str, Any]) -> Dict[str, Any]:
+def _get_source_identity(args: argparse.Namespace) -> Optional[str]:
+    """
+    Get a stable identity for the source of an import, used to find earlier imports.
+    
+    Args:
+        args (argparse.Namespace): Command line arguments
+        
+    Returns:
+        Optional[str]: Absolute file path or URL, or None for direct text input
+    """
+    # Text read from a file, e.g. by the ingest daemon, is identified by that file
+    source_path = getattr(args, "source_path", None)
+    if source_path:
+        return os.path.abspath(source_path)
+    
+    if not args.input:
+        return None
+    
+    if args.type == "youtube":
+        return args.input
+    
+    if args.type in ("pdf", "image", "speech") and os.path.exists(args.input):
+        return os.path.abspath(args.input)
+    
+    return None
+
+
+def _get_requested_stages(args: argparse.Namespace, config: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Get the fingerprinted stages requested for this run, with the parameters that affect them.
+    
+    Args:
+        args (argparse.Namespace): Command line arguments
+        config (Dict[str, Any]): Configuration dictionary
+        
+    Returns:
+        Dict[str, Dict[str, Any]]: Stage name mapped to its parameters
+    """
+    model = config.get("LLM_MODEL", "gpt-4")
+    stages = {}
+    
+    if args.summarize:
+        stages["summary"] = {
+            "model": model,
+            "max_length": config.get("SUMMARIZATION_MAX_LENGTH", 500),
+            "source_language": args.source_language,
+            "target_language": args.target_language,
+            "translate": not args.no_translate,
+            "translation_provider": args.translation_provider
+        }
+    
+    if args.keypoints:
+        stages["keypoints"] = {"model": model, "max_points": config.get("KEYPOINTS_MAX_COUNT", 10)}
+    
+    if args.glossary:
+        stages["glossary"] = {"model": model}
+    
+    if args.questions:
+        stages["questions"] = {"model": model, "count": config.get("ACTIVE_RECALL_QUESTIONS_COUNT", 5)}
+    
+    if config.get("AUTO_EMBED_NOTES", True):
+        stages["embedding"] = {"model": config.get("EMBEDDING_MODEL", "all-MiniLM-L6-v2")}
+    
+    if args.visualize:
+        stages["visualization"] = {
+            "type": args.visualize,
+            "format": config.get("VISUALIZATION_FORMAT", "png"),
+            "theme": config.get("VISUALIZATION_THEME", "default")
+        }
+    
+    return stages
+
+
+def _get_near_duplicate_detector(db_manager: DatabaseManager, config: Dict[str, Any]) -> NearDuplicateDetector:
+    """
+    Create a near-duplicate detector configured from the config.
+    
+    Args:
+        db_manager (DatabaseManager): Database manager
+        config (Dict[str, Any]): Configuration dictionary
+        
+    Returns:
+        NearDuplicateDetector: Detector backed by the database's LSH index
+    """
+    detector = NearDuplicateDetector(
+        db_manager,
+        threshold=config.get("NEAR_DUPLICATE_THRESHOLD", 0.8),
+        num_perm=config.get("MINHASH_NUM_PERM", 128)
+    )
+    detector.ensure_index()
+    return detector
+
+
+def _get_db_path(config: Dict[str, Any]) -> str:
+    """
+    Get the absolute database path from the config.
+    
+    Args:
+        config (Dict[str, Any]): Configuration dictionary
+        
+    Returns:
+        str: Absolute path to the database
+    """
+    db_path = config.get("DATABASE_PATH", "../data/pansophy.db")
+    # Convert relative path to absolute path
+    if not os.path.isabs(db_path):
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        db_path = os.path.abspath(os.path.join(current_dir, db_path))
+    return db_path
+
+
+def _find_near_duplicates(
+    config: Dict[str, Any],
+    text: str,
+    db_manager: Optional[DatabaseManager] = None
+) -> List[Dict[str, Any]]:
+    """
+    Find existing notes that are near-duplicates of the given text.
+    
+    Args:
+        config (Dict[str, Any]): Configuration dictionary
+        text (str): Extracted text
+        db_manager (DatabaseManager, optional): Open database manager to reuse
+        
+    Returns:
+        List[Dict[str, Any]]: Near-duplicate notes with 'id', 'title' and 'jaccard'
+    """
+    owns_db = db_manager is None
+    if owns_db:
+        db_manager = DatabaseManager(_get_db_path(config))
+    
+    try:
+        detector = _get_near_duplicate_detector(db_manager, config)
+        return detector.find_near_duplicates(detector.compute_signature(text))
+    finally:
+        if owns_db:
+            db_manager.close()
+
+
+def _plan_incremental_processing(
+    args: argparse.Namespace,
+    config: Dict[str, Any],
+    result: Dict[str, Any],
+    existing_note_id: Optional[int] = None,
+    db_manager: Optional[DatabaseManager] = None
+) -> Any:
+    """
+    Find an earlier import of the same source and decide which stages must be recomputed.
+    
+    Artifacts of stages whose fingerprint is unchanged are copied from the
+    existing note into the result so the stage can be skipped.
+    
+    Args:
+        args (argparse.Namespace): Command line arguments
+        config (Dict[str, Any]): Configuration dictionary
+        result (Dict[str, Any]): Result containing the extracted text
+        existing_note_id (int, optional): Note to update instead of looking one up
+        db_manager (DatabaseManager, optional): Open database manager to reuse
+        
+    Returns:
+        ReprocessingPlan: Plan for the processing stages
+    """
+    logger = logging.getLogger("ai_note_system.main")
+    
+    source = _get_source_identity(args)
+    if source and not result.get("path"):
+        result["path"] = source
+    
+    requested_stages = _get_requested_stages(args, config)
+    
+    owns_db = db_manager is None
+    if owns_db:
+        db_manager = DatabaseManager(_get_db_path(config))
+    
+    try:
+        # Match by source first, then by identical text
+        existing_id = existing_note_id
+        if existing_id is None and source:
+            existing_id = db_manager.find_note_by_source(source)
+        if existing_id is None:
+            existing_id = db_manager.find_note_by_fingerprint(TEXT_STAGE, fingerprint_text(result["text"]))
+        
+        stored = {}
+        existing_note = None
+        if existing_id is not None and not args.force:
+            stored = db_manager.get_note_fingerprints(existing_id)
+            existing_note = db_manager.get_note(existing_id)
+        
+        plan = plan_reprocessing(
+            result["text"],
+            requested_stages,
+            {stage: entry["fingerprint"] for stage, entry in stored.items()},
+            existing_note_id=existing_id
+        )
+        
+        # Reuse stored artifacts for unchanged stages
+        if existing_note:
+            for stage in plan.stages_to_skip:
+                if stage == "summary":
+                    result["summary"] = existing_note.get("summary")
+                elif stage == "keypoints":
+                    result["keypoints"] = [point["content"] for point in existing_note.get("keypoints", [])]
+                elif stage == "glossary":
+                    result["glossary"] = existing_note.get("glossary", {})
+                elif stage == "questions":
+                    result["questions"] = [
+                        {key: question.get(key) for key in ("question", "answer", "type", "difficulty")}
+                        for question in existing_note.get("questions", [])
+                    ]
+                elif stage == "visualization" and stored["visualization"].get("artifact"):
+                    result["visualization"] = stored["visualization"]["artifact"]
+        
+        if existing_id is not None:
+            logger.info(
+                f"Re-import of note {existing_id}: running {plan.stages_to_run}, "
+                f"reusing {plan.stages_to_skip}"
+            )
+        
+        return plan
+        
+    finally:
+        if owns_db:
+            db_manager.close()
+
+
+def process_input(
+    args: argparse.Namespace,
+    config: Dict[str, Any],
+    db_manager: Optional[DatabaseManager] = None
+) -> Dict[str, Any]:
     """
     Process input based on command line arguments.
     
     Args:
         args (argparse.Namespace): Command line arguments
         config (Dict[str, Any]): Configuration dictionary
+        db_manager (DatabaseManager, optional): Open database manager to reuse,
+            e.g. by a long-running ingest worker
         
     Returns:
         Dict[str, Any]: Processed data
@@ -427,8 +708,43 @@ def process_input(args: argparse.Namespace, config: Dict[str, Any]) -> Dict[str,
             save_audio=False
         )
     
+    # Decide which stages must run for a re-imported source
+    plan = None
+    if "text" in result:
+        plan = _plan_incremental_processing(args, config, result, db_manager=db_manager)
+        
+        # Check new notes against earlier imports of the same material
+        duplicate_action = getattr(args, "on_duplicate", None) or config.get("NEAR_DUPLICATE_ACTION", "link")
+        if plan.existing_note_id is None and duplicate_action != "ignore":
+            duplicates = _find_near_duplicates(config, result["text"], db_manager=db_manager)
+            if duplicates:
+                best = duplicates[0]
+                logger.info(
+                    f"Input is a near-duplicate of note {best['id']} "
+                    f"('{best['title']}', Jaccard {best['jaccard']:.2f})"
+                )
+                result["near_duplicates"] = duplicates
+                
+                if duplicate_action == "skip":
+                    result["duplicate_of"] = best["id"]
+                    return result
+                
+                if duplicate_action == "merge":
+                    plan = _plan_incremental_processing(
+                        args, config, result, existing_note_id=best["id"], db_manager=db_manager
+                    )
+        
+        result["reprocessing"] = plan.to_dict()
+        result["fingerprints"] = plan.fingerprints
+        
+        if getattr(args, "dry_run", False):
+            return result
+    
+    def should_run(stage: str) -> bool:
+        return plan is None or plan.should_run(stage)
+    
     # Apply processing steps based on arguments
-    if args.summarize and "text" in result:
+    if args.summarize and "text" in result and should_run("summary"):
         # Get language parameters
         source_language = args.source_language
         target_language = args.target_language
@@ -455,7 +771,7 @@ def process_input(args: argparse.Namespace, config: Dict[str, Any]) -> Dict[str,
         else:
             result["summary"] = summary_result
     
-    if args.keypoints and "text" in result:
+    if args.keypoints and "text" in result and should_run("keypoints"):
         result["keypoints"] = extract_keypoints(
             result["text"],
             model=config.get("LLM_MODEL", "gpt-4"),
@@ -463,14 +779,14 @@ def process_input(args: argparse.Namespace, config: Dict[str, Any]) -> Dict[str,
             title=result.get("title")
         )
     
-    if args.glossary and "text" in result:
+    if args.glossary and "text" in result and should_run("glossary"):
         result["glossary"] = extract_glossary(
             result["text"],
             model=config.get("LLM_MODEL", "gpt-4"),
             title=result.get("title")
         )
     
-    if args.questions and "text" in result:
+    if args.questions and "text" in result and should_run("questions"):
         result["questions"] = generate_questions(
             result["text"],
             model=config.get("LLM_MODEL", "gpt-4"),
@@ -503,67 +819,8 @@ def process_input(args: argparse.Namespace, config: Dict[str, Any]) -> Dict[str,
             model=config.get("LLM_MODEL", "gpt-4")
         )
     
-    # Find related topics
-    if "text" in result:
-        logger.info("Finding related topics")
-        
-        # Get database path from config
-        db_path = config.get("DATABASE_PATH", "../data/pansophy.db")
-        # Convert relative path to absolute path
-        if not os.path.isabs(db_path):
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            db_path = os.path.abspath(os.path.join(current_dir, db_path))
-        
-        # Create database manager
-        db_manager = DatabaseManager(db_path)
-        
-        try:
-            # Get all notes for comparison
-            all_notes = db_manager.search_notes(limit=100)  # Limit to 100 notes for performance
-            
-            if all_notes:
-                # Create a dictionary of note texts for topic_linker
-                note_db = {
-                    note["id"]: {
-                        "title": note["title"],
-                        "text": note.get("text", ""),
-                        "summary": note.get("summary", "")
-                    }
-                    for note in all_notes
-                }
-                
-                # Find related topics
-                embedding_model = config.get("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
-                threshold = config.get("SIMILARITY_THRESHOLD", 0.75)
-                max_results = config.get("MAX_RELATED_TOPICS", 5)
-                
-                related_topics = find_related_topics(
-                    result["text"],
-                    note_db,
-                    max_results=max_results,
-                    threshold=threshold,
-                    embedding_model=embedding_model
-                )
-                
-                # Add related topics to result
-                if related_topics:
-                    result["related_topics"] = related_topics
-                    
-                    # If this is a new note being saved, add the relationships to the database
-                    if "id" in result:
-                        note_id = result["id"]
-                        related_notes = [
-                            (int(topic["id"]), topic["similarity"])
-                            for topic in related_topics
-                        ]
-                        db_manager.add_related_notes(note_id, related_notes)
-            
-        finally:
-            # Close database connection
-            db_manager.close()
-    
     # Generate visualization
-    if args.visualize and "text" in result:
+    if args.visualize and "text" in result and should_run("visualization"):
         logger.info(f"Generating visualization: {args.visualize}")
         
         # Get LLM model from config
@@ -664,61 +921,210 @@ def process_input(args: argparse.Namespace, config: Dict[str, Any]) -> Dict[str,
     return result
 
 
-def handle_process_command(args: argparse.Namespace, config: Dict[str, Any]) -> None:
+def _link_related_notes(
+    config: Dict[str, Any],
+    db_manager: DatabaseManager,
+    embedder: Embedder,
+    note_id: int,
+    result: Dict[str, Any]
+) -> None:
     """
-    Handle the 'process' command.
+    Link a note to its nearest neighbours over all notes and add them to the result.
+    
+    If the stored links were computed with another embedding model, all links
+    are rebuilt in the background instead.
     
     Args:
-        args (argparse.Namespace): Command line arguments
         config (Dict[str, Any]): Configuration dictionary
+        db_manager (DatabaseManager): Database manager
+        embedder (Embedder): Embedder that stored the note's embedding
+        note_id (int): ID of the note
+        result (Dict[str, Any]): Result to add 'related_topics' to
     """
     logger = logging.getLogger("ai_note_system.main")
     
-    # Process input
-    result = process_input(args, config)
+    linker = NoteLinker(
+        db_manager,
+        embedder.model_name,
+        top_k=config.get("MAX_RELATED_TOPICS", 5),
+        threshold=config.get("SIMILARITY_THRESHOLD", 0.75)
+    )
     
-    # Save to database if not already saved
-    if "id" not in result and config.get("SAVE_TO_DATABASE", True):
-        # Get database path from config
-        db_path = config.get("DATABASE_PATH", "../data/pansophy.db")
-        # Convert relative path to absolute path
-        if not os.path.isabs(db_path):
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            db_path = os.path.abspath(os.path.join(current_dir, db_path))
+    if linker.needs_rebuild():
+        logger.info(f"Embedding model changed to {embedder.model_name}; rebuilding note links in the background")
+        start_background_rebuild(db_manager, embedder.model_name, linker.top_k, linker.threshold, embedder)
+        return
+    
+    embedding = embedder.get_note_embedding(note_id)
+    if embedding is None:
+        return
+    
+    neighbours = linker.link_note(note_id, embedding)
+    if neighbours:
+        titles = {note["id"]: note["title"] for note in db_manager.get_graph_notes([n for n, _ in neighbours])}
+        result["related_topics"] = [
+            {"id": related_id, "title": titles.get(related_id, ""), "similarity": similarity}
+            for related_id, similarity in neighbours
+        ]
+
+
+def _save_processed_note(
+    args: argparse.Namespace,
+    config: Dict[str, Any],
+    result: Dict[str, Any],
+    reprocessing: Optional[Dict[str, Any]],
+    fingerprints: Dict[str, str],
+    db_manager: Optional[DatabaseManager] = None,
+    embedder: Optional[Embedder] = None
+) -> Any:
+    """
+    Save a processed result as a new note or update the note it re-imports.
+    
+    Also stores the embedding, near-duplicate index entry, stage fingerprints
+    and related topics of the note.
+    
+    Args:
+        args (argparse.Namespace): Command line arguments
+        config (Dict[str, Any]): Configuration dictionary
+        result (Dict[str, Any]): Result of process_input
+        reprocessing (Dict[str, Any], optional): Reprocessing plan of the result
+        fingerprints (Dict[str, str]): Stage fingerprints of the result
+        db_manager (DatabaseManager, optional): Open database manager to reuse
+        embedder (Embedder, optional): Loaded embedder to reuse
         
-        # Create database manager
+    Returns:
+        Tuple[int, bool]: Note ID and whether an existing note was updated
+    """
+    logger = logging.getLogger("ai_note_system.main")
+    db_path = _get_db_path(config)
+    
+    owns_db = db_manager is None
+    if owns_db:
         db_manager = DatabaseManager(db_path)
-        
-        try:
-            # Add timestamp if not present
-            if "timestamp" not in result:
-                result["timestamp"] = datetime.now().isoformat()
+    
+    try:
+        # Add timestamp if not present
+        if "timestamp" not in result:
+            result["timestamp"] = datetime.now().isoformat()
+        
+        # Add source type if not present
+        if "source_type" not in result:
+            result["source_type"] = args.type
+        
+        existing_id = reprocessing.get("existing_note_id") if reprocessing else None
+        
+        if existing_id is not None:
+            # Update the existing note in place with the recomputed fields only
+            stages = reprocessing["stages"]
+            update_data = {
+                field: result[field]
+                for field in ("title", "text", "source_type", "path")
+                if field in result
+            }
+            existing_tags = db_manager.get_note_tags(existing_id)
+            update_data["tags"] = existing_tags + [tag for tag in result.get("tags", []) if tag not in existing_tags]
+            for stage in ("summary", "keypoints", "glossary", "questions"):
+                if stage in result and stages.get(stage, {}).get("run", True):
+                    update_data[stage] = result[stage]
             
-            # Add source type if not present
-            if "source_type" not in result:
-                result["source_type"] = args.type
+            db_manager.update_note(existing_id, update_data)
+            note_id = existing_id
             
+            logger.info(f"Updated existing note in database with ID: {note_id}")
+        else:
             # Save to database
             note_id = db_manager.create_note(result)
             
-            # Update result with note ID
-            result["id"] = note_id
-            
             logger.info(f"Saved note to database with ID: {note_id}")
-            print(f"Saved note to database with ID: {note_id}")
-            
-            # Find and save related topics
-            if "text" in result and "related_topics" in result:
-                related_notes = [
-                    (int(topic["id"]), topic["similarity"])
-                    for topic in result["related_topics"]
-                ]
-                db_manager.add_related_notes(note_id, related_notes)
-                logger.info(f"Added {len(related_notes)} related topics to note {note_id}")
-            
-        finally:
-            # Close database connection
+        
+        # Update result with note ID
+        result["id"] = note_id
+        
+        # Refresh the embedding only when the text or embedding model changed
+        if "embedding" in fingerprints and reprocessing["stages"]["embedding"]["run"]:
+            try:
+                if embedder is None:
+                    embedder = Embedder(db_path, model_name=config.get("EMBEDDING_MODEL", "all-MiniLM-L6-v2"))
+                if embedder.store_note_embedding(note_id, result["text"]):
+                    _link_related_notes(config, db_manager, embedder, note_id, result)
+                    result["clusters"] = TopicClusterer(db_manager, embedder.model_name).assign_note(
+                        note_id, embedder.get_note_embedding(note_id)
+                    )
+                else:
+                    fingerprints.pop("embedding")
+            except Exception as e:
+                logger.warning(f"Could not store embedding for note {note_id}: {e}")
+                fingerprints.pop("embedding")
+        
+        # Index the note for near-duplicate detection and link any near-duplicates
+        detector = _get_near_duplicate_detector(db_manager, config)
+        duplicates = [d for d in result.get("near_duplicates", []) if d["id"] != note_id]
+        if duplicates and reprocessing and reprocessing.get("existing_note_id") is None:
+            db_manager.add_related_notes(
+                note_id, [(d["id"], d["jaccard"]) for d in duplicates], link_type="near_duplicate"
+            )
+            for duplicate in duplicates:
+                db_manager.add_related_notes(
+                    duplicate["id"], [(note_id, duplicate["jaccard"])], link_type="near_duplicate"
+                )
+            logger.info(f"Linked note {note_id} to {len(duplicates)} near-duplicate notes")
+        detector.index_note(note_id, detector.compute_signature(result["text"]))
+        
+        # Record fingerprints of the artifacts that are now current
+        current = {
+            stage: fingerprint
+            for stage, fingerprint in fingerprints.items()
+            if stage in (TEXT_STAGE, "embedding") or result.get(stage)
+        }
+        artifacts = {"visualization": result["visualization"]} if "visualization" in current else {}
+        db_manager.save_note_fingerprints(note_id, current, artifacts)
+        
+        return note_id, existing_id is not None
+        
+    finally:
+        # Close database connection
+        if owns_db:
             db_manager.close()
+
+
+def handle_process_command(args: argparse.Namespace, config: Dict[str, Any]) -> None:
+    """
+    Handle the 'process' command.
+    
+    Args:
+        args (argparse.Namespace): Command line arguments
+        config (Dict[str, Any]): Configuration dictionary
+    """
+    logger = logging.getLogger("ai_note_system.main")
+    
+    # Process input
+    result = process_input(args, config)
+    
+    reprocessing = result.get("reprocessing")
+    fingerprints = result.pop("fingerprints", {})
+    
+    # Near-duplicates skipped at ingest are not saved or processed
+    if "duplicate_of" in result:
+        print(f"Skipped: near-duplicate of note {result['duplicate_of']}")
+        if args.output == "json":
+            print(json.dumps(result, indent=2))
+        return
+    
+    # Only report the plan on a dry run
+    if getattr(args, "dry_run", False):
+        if reprocessing:
+            print(format_plan_report(reprocessing))
+        else:
+            print("No text extracted; nothing would run")
+        return
+    
+    # Save to database if not already saved
+    if "id" not in result and config.get("SAVE_TO_DATABASE", True):
+        note_id, updated = _save_processed_note(args, config, result, reprocessing, fingerprints)
+        if updated:
+            print(f"Updated existing note in database with ID: {note_id}")
+        else:
+            print(f"Saved note to database with ID: {note_id}")
     
     # Handle output based on format
     if args.output == "json":
@@ -846,6 +1252,227 @@ def handle_process_command(args: argparse.Namespace, config: Dict[str, Any]) ->
             print(f"Failed to export to Anki: {anki_result.get('error')}")
 
 
+def _create_ingest_resources(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Create the long-lived resources of an ingest worker.
+    
+    Args:
+        config (Dict[str, Any]): Configuration dictionary
+        
+    Returns:
+        Dict[str, Any]: Database manager and, if notes are embedded, a loaded embedder
+    """
+    logger = logging.getLogger("ai_note_system.main")
+    db_path = _get_db_path(config)
+    
+    resources = {"db_manager": DatabaseManager(db_path)}
+    
+    if config.get("AUTO_EMBED_NOTES", True):
+        try:
+            resources["embedder"] = Embedder(db_path, model_name=config.get("EMBEDDING_MODEL", "all-MiniLM-L6-v2"))
+        except Exception as e:
+            logger.warning(f"Embedding model unavailable, notes will be ingested without embeddings: {e}")
+    
+    return resources
+
+
+def _ingest_file(
+    job: Dict[str, Any],
+    resources: Dict[str, Any],
+    config: Dict[str, Any],
+    process_args: List[str]
+) -> int:
+    """
+    Run the process pipeline on a queued file and save the note.
+    
+    Args:
+        job (Dict[str, Any]): Ingest job with 'path' and 'input_type'
+        resources (Dict[str, Any]): Worker resources from _create_ingest_resources
+        config (Dict[str, Any]): Configuration dictionary
+        process_args (List[str]): Extra 'process' command options
+        
+    Returns:
+        int: ID of the note created or updated
+    """
+    input_type = job["input_type"]
+    input_value = job["path"]
+    title = None
+    
+    if input_type == "text":
+        # Text files are passed as content, titled after the file and identified by its path
+        with open(job["path"], "r", encoding="utf-8") as f:
+            input_value = f.read()
+        title = os.path.splitext(os.path.basename(job["path"]))[0].replace("_", " ").strip()
+    
+    argv = ["process", f"--input={input_value}", "--type", input_type] + list(process_args)
+    if title and "--title" not in process_args:
+        argv += ["--title", title]
+    args = setup_argparse().parse_args(argv)
+    if input_type == "text":
+        args.source_path = job["path"]
+    
+    db_manager = resources["db_manager"]
+    result = process_input(args, config, db_manager=db_manager)
+    
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    if "text" not in result or not result["text"].strip():
+        raise RuntimeError("No text extracted")
+    
+    fingerprints = result.pop("fingerprints", {})
+    if "duplicate_of" in result:
+        return result["duplicate_of"]
+    
+    note_id, _ = _save_processed_note(
+        args,
+        config,
+        result,
+        result.get("reprocessing"),
+        fingerprints,
+        db_manager=db_manager,
+        embedder=resources.get("embedder")
+    )
+    return note_id
+
+
+def handle_daemon_command(args: argparse.Namespace, config: Dict[str, Any]) -> None:
+    """
+    Handle the 'daemon' command.
+    
+    Args:
+        args (argparse.Namespace): Command line arguments
+        config (Dict[str, Any]): Configuration dictionary
+    """
+    logger = logging.getLogger("ai_note_system.main")
+    
+    queue = IngestQueue(
+        _get_db_path(config),
+        max_attempts=config.get("INGEST_MAX_ATTEMPTS", 3),
+        retry_delay=config.get("INGEST_RETRY_DELAY", 30)
+    )
+    
+    if args.daemon_command == "start":
+        directories = args.watch or config.get("INGEST_WATCH_DIRS", [])
+        if not directories:
+            print("No directories to watch. Use --watch or set INGEST_WATCH_DIRS in the config.")
+            return
+        
+        process_args = args.process_args
+        if process_args is None:
+            process_args = config.get("INGEST_PROCESS_ARGS", ["--summarize", "--keypoints"])
+        
+        daemon = IngestDaemon(
+            queue,
+            process_file=lambda job, resources: _ingest_file(job, resources, config, process_args),
+            resource_factory=lambda: _create_ingest_resources(config),
+            directories=directories,
+            num_workers=args.workers or config.get("INGEST_WORKERS", 2),
+            poll_interval=config.get("INGEST_POLL_INTERVAL", 5),
+            settle_time=config.get("INGEST_SETTLE_TIME", 2),
+            use_native_watch=not args.poll
+        )
+        
+        print(f"Watching {', '.join(directories)} (press Ctrl+C to stop)")
+        daemon.run_forever()
+        
+        stats = daemon.get_stats()
+        logger.info(f"Ingest daemon stats: {stats}")
+        print(
+            f"Processed {stats['processed']} files, {stats['failed']} failed attempts, "
+            f"{stats['dead_lettered']} dead-lettered"
+        )
+    
+    elif args.daemon_command == "status":
+        status = queue.get_status()
+        counts = status["counts"]
+        
+        print("Ingest queue:")
+        for state in ("pending", "processing", "done", "dead"):
+            print(f"  {state:<11} {counts.get(state, 0)}")
+        if status["oldest_pending"]:
+            print(f"Oldest pending job queued at {status['oldest_pending']}")
+        
+        dead_jobs = queue.list_jobs(status="dead", limit=args.limit)
+        if dead_jobs:
+            print("\nDead-lettered jobs:")
+            for job in dead_jobs:
+                print(f"  [{job['id']}] {job['path']} ({job['attempts']} attempts): {job['last_error']}")
+    
+    elif args.daemon_command == "retry":
+        count = queue.retry_dead(args.id)
+        print(f"Requeued {count} dead-lettered jobs")
+    
+    else:
+        print("Please specify a daemon command: start, status or retry")
+    
+    queue.close()
+
+
+def handle_cluster_command(args: argparse.Namespace, config: Dict[str, Any]) -> None:
+    """
+    Handle the 'cluster' command.
+    
+    Args:
+        args (argparse.Namespace): Command line arguments
+        config (Dict[str, Any]): Configuration dictionary
+    """
+    db_manager = DatabaseManager(_get_db_path(config))
+    clusterer = TopicClusterer(db_manager, model_name=config.get("EMBEDDING_MODEL", "all-MiniLM-L6-v2"))
+    
+    try:
+        if args.cluster_command == "rebuild":
+            if args.method in (GRAPH, "all"):
+                count = clusterer.cluster_graph()
+                print(f"Grouped notes into {count} graph clusters")
+            if args.method in (EMBEDDING, "all"):
+                count = clusterer.cluster_embeddings(k=args.k)
+                print(f"Grouped notes into {count} embedding clusters")
+        
+        elif args.cluster_command == "show":
+            clusters = clusterer.get_clusters(args.method)
+            if not clusters:
+                print(f"No {args.method} clusters. Run 'cluster rebuild' first.")
+                return
+            
+            print(f"{len(clusters)} {args.method} clusters:")
+            for cluster in clusters[:args.limit]:
+                tags = f" ({', '.join(cluster['tags'])})" if cluster["tags"] else ""
+                print(f"  [{cluster['cluster_id']}] {cluster['size']} notes{tags}")
+        
+        else:
+            print("Please specify a cluster command: rebuild or show")
+    
+    finally:
+        db_manager.close()
+
+
+def handle_duplicates_command(args: argparse.Namespace, config: Dict[str, Any]) -> None:
+    """
+    Handle the 'duplicates' command.
+    
+    Args:
+        args (argparse.Namespace): Command line arguments
+        config (Dict[str, Any]): Configuration dictionary
+    """
+    db_manager = DatabaseManager(_get_db_path(config))
+    
+    try:
+        if args.duplicates_command == "rebuild":
+            detector = NearDuplicateDetector(
+                db_manager,
+                threshold=config.get("NEAR_DUPLICATE_THRESHOLD", 0.8),
+                num_perm=config.get("MINHASH_NUM_PERM", 128)
+            )
+            count = detector.rebuild_index()
+            print(f"Indexed {count} notes for near-duplicate detection")
+        
+        else:
+            print("Please specify a duplicates command: rebuild")
+    
+    finally:
+        db_manager.close()
+
+
 def handle_export_command(args: argparse.Namespace, config: Dict[str, Any]) -> None:
     """
     Handle the 'export' command.
@@ -1201,7 +1828,7 @@ def handle_graph_command(args: argparse.Namespace, config: Dict[str, Any]) -> No
         print(f"Generating knowledge graph with {args.layout} layout")
         if args.tags:
             print(f"Filtering by tags: {', '.join(args.tags)}")
-        print(f"Maximum nodes: {args.max_nodes}")
+        print(f"Maximum nodes: {args.max_nodes or 'all'}")
         print(f"Similarity threshold: {args.threshold}")
         print(f"Output format: {args.format}")
         print(f"Output path: {output_path}")
@@ -1216,6 +1843,11 @@ def handle_graph_command(args: argparse.Namespace, config: Dict[str, Any]) -> No
                 tags=args.tags
             )
             
+            if args.clusters:
+                graph_data["clusters"] = db_manager.get_note_clusters(
+                    args.clusters, [node["id"] for node in graph_data["nodes"]]
+                )
+            
             # Generate HTML knowledge graph
             result = generate_html_knowledge_graph(
                 graph_data,
@@ -1429,18 +2061,20 @@ def handle_reminders_command(args: argparse.Namespace, config: Dict[str, Any]) -
         # Get database manager
         db_manager = get_db_manager(config)
         
-        # Start the scheduler
+        # Run the scheduler until interrupted
+        print("Reminder scheduler running. Press Ctrl+C to stop.")
         result = start_reminder_scheduler(
             db_manager=db_manager,
-            config=config
+            config=config,
+            block=True
         )
         
         if result:
-            logger.info("Reminder scheduler started")
-            print("Reminder scheduler started")
+            logger.info("Reminder scheduler stopped")
+            print("Reminder scheduler stopped")
         else:
-            logger.error("Failed to start reminder scheduler")
-            print("Failed to start reminder scheduler")
+            logger.error("Failed to run reminder scheduler")
+            print("Failed to run reminder scheduler")
     
     elif args.reminders_command == "stop-scheduler":
         # Stop the reminder scheduler
@@ -2797,6 +3431,12 @@ def main() -> None:
             handle_citation_command(args, config)
         elif args.command == "motivation":
             handle_motivation_command(args, config)
+        elif args.command == "daemon":
+            handle_daemon_command(args, config)
+        elif args.command == "cluster":
+            handle_cluster_command(args, config)
+        elif args.command == "duplicates":
+            handle_duplicates_command(args, config)
         else:
             parser.print_help()
     finally:
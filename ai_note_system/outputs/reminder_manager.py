@@ -8,34 +8,56 @@ import logging
 import json
 import time
 import threading
-import schedule
-from typing import Dict, Any, List, Optional, Union, Callable
+import importlib.util
+from typing import Dict, Any, List, Optional, Union, Callable, Tuple
 from datetime import datetime, timedelta
 from pathlib import Path
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
+from .reminder_scheduler import ReminderQueue, NotificationSenderPool, reminder_key
+
 # Setup logging
 logger = logging.getLogger("ai_note_system.outputs.reminder_manager")
 
 class ReminderManager:
     """
     Manager for scheduling and sending reminders.
+    
+    The scheduler loads the scheduled reminders once into a due-time queue and
+    sleeps until the earliest one is due. Reminders scheduled or updated through
+    any manager using the same storage in this process wake it up; changes made
+    by other processes are picked up by reload_reminders().
     """
     
-    def __init__(self, db_manager=None, config: Optional[Dict[str, Any]] = None):
+    # Managers whose scheduler is running, woken when a reminder is saved
+    _running_managers: List["ReminderManager"] = []
+    _running_lock = threading.Lock()
+    
+    def __init__(self, db_manager=None, config: Optional[Dict[str, Any]] = None, data_dir: Optional[str] = None):
         """
         Initialize the reminder manager.
         
         Args:
             db_manager: Database manager instance
             config (Dict[str, Any], optional): Configuration dictionary
+            data_dir (str, optional): Directory of file-based reminder data
         """
         self.db_manager = db_manager
         self.config = config or {}
+        self.data_dir = data_dir or self.get_default_data_dir()
         self.scheduler_thread = None
         self.scheduler_running = False
+        self.sender_pool = None
+        
+        # Due-time queue, reminders being sent and their results, guarded by the condition
+        self._queue = ReminderQueue()
+        self._condition = threading.Condition()
+        self._reload_requested = False
+        self._in_flight = set()
+        self._finished: List[Tuple[Dict[str, Any], Dict[str, bool]]] = []
+        
         self.notification_handlers = {
             "email": self.send_email_notification,
             "desktop": self.send_desktop_notification,
@@ -92,13 +114,9 @@ class ReminderManager:
         if metadata:
             reminder_data["metadata"] = metadata
         
-        # Save reminder data
+        # Save reminder data; running schedulers pick it up
         self.save_reminder(reminder_data)
         
-        # Schedule the reminder if the scheduler is running
-        if self.scheduler_running:
-            self._schedule_single_reminder(reminder_data)
-        
         return reminder_data
     
     def save_reminder(self, reminder_data: Dict[str, Any]) -> bool:
@@ -113,10 +131,15 @@ class ReminderManager:
         """
         # If database manager is available, use it
         if self.db_manager:
-            return self.save_reminder_to_db(reminder_data)
+            saved = self.save_reminder_to_db(reminder_data)
+        else:
+            # Otherwise, use a simple file-based approach
+            saved = self.save_reminder_to_file(reminder_data)
         
-        # Otherwise, use a simple file-based approach
-        return self.save_reminder_to_file(reminder_data)
+        if saved:
+            self._notify_schedulers(reminder_data)
+        
+        return saved
     
     def save_reminder_to_db(self, reminder_data: Dict[str, Any]) -> bool:
         """
@@ -129,8 +152,8 @@ class ReminderManager:
             bool: True if successful, False otherwise
         """
         try:
-            # This is a placeholder for database integration
-            # In a real implementation, this would update the database
+            if not self.db_manager.save_reminders([reminder_data]):
+                return False
             
             logger.debug(f"Reminder data saved to database")
             return True
@@ -178,22 +201,28 @@ class ReminderManager:
         Returns:
             str: File path
         """
-        # Get the path to the data directory
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        project_dir = os.path.dirname(os.path.dirname(current_dir))
-        data_dir = os.path.join(project_dir, "data", "reminders")
-        
         # Create a file name based on item type and ID
         file_name = f"{item_type}_{item_id}.json"
         
-        return os.path.join(data_dir, file_name)
+        return os.path.join(self.data_dir, file_name)
+    
+    def get_default_data_dir(self) -> str:
+        """
+        Get the default directory of file-based reminder data.
+        
+        Returns:
+            str: Directory path
+        """
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        project_dir = os.path.dirname(os.path.dirname(current_dir))
+        return os.path.join(project_dir, "data", "reminders")
     
     def get_reminders(
         self,
         item_id: Optional[str] = None,
         item_type: Optional[str] = None,
         status: Optional[str] = None,
-        limit: int = 100
+        limit: Optional[int] = 100
     ) -> List[Dict[str, Any]]:
         """
         Get reminders based on filters.
@@ -202,7 +231,7 @@ class ReminderManager:
             item_id (str, optional): Filter by item ID
             item_type (str, optional): Filter by item type
             status (str, optional): Filter by status
-            limit (int): Maximum number of reminders to return
+            limit (int, optional): Maximum number of reminders to return, or None for all
             
         Returns:
             List[Dict[str, Any]]: List of reminders
@@ -219,7 +248,7 @@ class ReminderManager:
         item_id: Optional[str] = None,
         item_type: Optional[str] = None,
         status: Optional[str] = None,
-        limit: int = 100
+        limit: Optional[int] = 100
     ) -> List[Dict[str, Any]]:
         """
         Get reminders from the database.
@@ -228,17 +257,13 @@ class ReminderManager:
             item_id (str, optional): Filter by item ID
             item_type (str, optional): Filter by item type
             status (str, optional): Filter by status
-            limit (int): Maximum number of reminders to return
+            limit (int, optional): Maximum number of reminders to return, or None for all
             
         Returns:
             List[Dict[str, Any]]: List of reminders
         """
         try:
-            # This is a placeholder for database integration
-            # In a real implementation, this would query the database
-            
-            # For now, return an empty list
-            return []
+            return self.db_manager.get_reminders(item_id, item_type, status, limit)
             
         except Exception as e:
             logger.error(f"Error getting reminders from database: {str(e)}")
@@ -249,7 +274,7 @@ class ReminderManager:
         item_id: Optional[str] = None,
         item_type: Optional[str] = None,
         status: Optional[str] = None,
-        limit: int = 100
+        limit: Optional[int] = 100
     ) -> List[Dict[str, Any]]:
         """
         Get reminders from files.
@@ -258,23 +283,20 @@ class ReminderManager:
             item_id (str, optional): Filter by item ID
             item_type (str, optional): Filter by item type
             status (str, optional): Filter by status
-            limit (int): Maximum number of reminders to return
+            limit (int, optional): Maximum number of reminders to return, or None for all
             
         Returns:
             List[Dict[str, Any]]: List of reminders
         """
         try:
-            # Get the path to the data directory
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            project_dir = os.path.dirname(os.path.dirname(current_dir))
-            data_dir = os.path.join(project_dir, "data", "reminders")
+            data_dir = self.data_dir
             
             # Ensure directory exists
             if not os.path.exists(data_dir):
                 return []
             
             # Get all reminder data files
-            files = os.listdir(data_dir)
+            files = [f for f in os.listdir(data_dir) if f.endswith(".json")]
             
             # Filter by item type if specified
             if item_type:
@@ -299,19 +321,15 @@ class ReminderManager:
                         continue
                     
                     reminders.append(data)
-                    
-                    # Stop if we've reached the limit
-                    if len(reminders) >= limit:
-                        break
                 
                 except Exception as e:
                     logger.error(f"Error loading reminder data from {file_path}: {str(e)}")
                     continue
             
-            # Sort by reminder time
+            # Sort by reminder time before applying the limit
             reminders.sort(key=lambda x: x.get("reminder_time", "2099-12-31T00:00:00"))
             
-            return reminders
+            return reminders if limit is None else reminders[:limit]
             
         except Exception as e:
             logger.error(f"Error getting reminders from files: {str(e)}")
@@ -375,14 +393,26 @@ class ReminderManager:
             return True
         
         try:
+            # Senders for due reminders
+            self.sender_pool = NotificationSenderPool(
+                num_workers=self.config.get("REMINDER_SENDER_WORKERS", 4),
+                max_pending=self.config.get("REMINDER_MAX_PENDING", 1000),
+                max_attempts=self.config.get("REMINDER_MAX_ATTEMPTS", 3),
+                retry_delay=self.config.get("REMINDER_RETRY_DELAY", 5)
+            )
+            self.sender_pool.start()
+            
             # Create a new thread for the scheduler
-            self.scheduler_thread = threading.Thread(target=self._run_scheduler, daemon=True)
+            self.scheduler_thread = threading.Thread(target=self._run_scheduler, name="reminder-scheduler", daemon=True)
             self.scheduler_running = True
             self.scheduler_thread.start()
             
+            with self._running_lock:
+                self._running_managers.append(self)
+            
             logger.info("Reminder scheduler started")
             return True
-            
+        
         except Exception as e:
             logger.error(f"Error starting scheduler: {str(e)}")
             self.scheduler_running = False
@@ -400,8 +430,14 @@ class ReminderManager:
             return True
         
         try:
-            # Set the flag to stop the scheduler
-            self.scheduler_running = False
+            with self._running_lock:
+                if self in self._running_managers:
+                    self._running_managers.remove(self)
+            
+            # Set the flag to stop the scheduler and wake it up
+            with self._condition:
+                self.scheduler_running = False
+                self._condition.notify_all()
             
             # Wait for the thread to finish
             if self.scheduler_thread and self.scheduler_thread.is_alive():
@@ -409,128 +445,288 @@ class ReminderManager:
             
             logger.info("Reminder scheduler stopped")
             return True
-            
+        
         except Exception as e:
             logger.error(f"Error stopping scheduler: {str(e)}")
             return False
     
-    def _run_scheduler(self) -> None:
-        """
-        Run the scheduler loop.
+    def run_forever(self) -> bool:
         """
-        logger.info("Starting scheduler loop")
-        
-        # Schedule a job to check for due reminders every minute
-        schedule.every(1).minutes.do(self._check_due_reminders)
+        Run the scheduler until interrupted.
         
-        # Schedule existing reminders
-        self._schedule_existing_reminders()
+        Returns:
+            bool: True if the scheduler ran and stopped cleanly, False otherwise
+        """
+        if not self.start_scheduler():
+            return False
         
-        # Run the scheduler loop
-        while self.scheduler_running:
-            schedule.run_pending()
-            time.sleep(1)
+        try:
+            while self.scheduler_thread.is_alive():
+                self.scheduler_thread.join(timeout=1.0)
+        except KeyboardInterrupt:
+            logger.info("Interrupted, stopping reminder scheduler")
         
-        logger.info("Scheduler loop stopped")
+        return self.stop_scheduler()
     
-    def _schedule_existing_reminders(self) -> None:
+    def reload_reminders(self) -> None:
+        """
+        Ask the running scheduler to reload scheduled reminders from storage,
+        e.g. after another process changed them.
         """
-        Schedule existing reminders.
+        with self._condition:
+            self._reload_requested = True
+            self._condition.notify()
+    
+    def get_pending_count(self) -> int:
         """
-        # Get all scheduled reminders
-        reminders = self.get_reminders(status="scheduled")
+        Get the number of reminders waiting in the scheduler's queue.
         
-        # Schedule each reminder
-        for reminder in reminders:
-            self._schedule_single_reminder(reminder)
+        Returns:
+            int: Number of queued reminders
+        """
+        with self._condition:
+            return len(self._queue)
+    
+    def _storage_key(self) -> str:
+        if self.db_manager:
+            return os.path.abspath(self.db_manager.db_path)
+        return os.path.abspath(self.data_dir)
     
-    def _schedule_single_reminder(self, reminder: Dict[str, Any]) -> None:
+    def _notify_schedulers(self, reminder: Dict[str, Any]) -> None:
         """
-        Schedule a single reminder.
+        Wake the running schedulers that share this manager's storage.
         
         Args:
-            reminder (Dict[str, Any]): Reminder data
+            reminder (Dict[str, Any]): Saved reminder data
         """
-        try:
-            # Get reminder time
-            reminder_time = datetime.fromisoformat(reminder["reminder_time"])
-            
-            # Skip if the reminder time is in the past
-            if reminder_time < datetime.now():
-                logger.warning(f"Reminder time is in the past: {reminder_time}")
+        with self._running_lock:
+            managers = [m for m in self._running_managers if m._storage_key() == self._storage_key()]
+        
+        for manager in managers:
+            manager._on_reminder_saved(reminder)
+    
+    def _on_reminder_saved(self, reminder: Dict[str, Any]) -> None:
+        with self._condition:
+            try:
+                if reminder.get("status") == "scheduled":
+                    self._queue.push(reminder)
+                else:
+                    self._queue.remove(reminder_key(reminder))
+            except (KeyError, ValueError) as e:
+                logger.error(f"Error queueing reminder: {str(e)}")
                 return
             
-            # Schedule the reminder
-            schedule.every().day.at(reminder_time.strftime("%H:%M")).do(
-                self._send_reminder,
-                reminder=reminder
-            ).tag(f"{reminder['item_type']}_{reminder['item_id']}")
-            
-            logger.debug(f"Scheduled reminder for {reminder['item_type']} {reminder['item_id']} at {reminder_time}")
-            
-        except Exception as e:
-            logger.error(f"Error scheduling reminder: {str(e)}")
+            self._condition.notify()
     
-    def _check_due_reminders(self) -> None:
+    def _run_scheduler(self) -> None:
         """
-        Check for due reminders and send them.
+        Run the scheduler loop.
+        
+        Sleeps on the condition until the earliest reminder is due, a reminder
+        is saved, or the scheduler is stopped, so an idle scheduler uses no CPU
+        however many reminders are pending.
         """
+        logger.info("Starting scheduler loop")
+        
+        # The database connection belongs to the thread that created it
+        db_manager = type(self.db_manager)(self.db_manager.db_path) if self.db_manager else None
+        
         try:
-            # Get current time
-            now = datetime.now()
+            self._load_reminders(db_manager)
+            
+            while True:
+                with self._condition:
+                    while self.scheduler_running and not self._finished and not self._reload_requested:
+                        next_due = self._queue.next_due()
+                        
+                        if next_due is not None and next_due <= time.time():
+                            break
+                        
+                        self._condition.wait(None if next_due is None else next_due - time.time())
+                    
+                    if not self.scheduler_running:
+                        break
+                    
+                    reload_requested = self._reload_requested
+                    self._reload_requested = False
+                    
+                    finished = self._finished
+                    self._finished = []
+                    
+                    # Dispatch in bounded batches so saved results are written between them
+                    due = [] if reload_requested else self._queue.pop_due(
+                        time.time(), limit=self.config.get("REMINDER_MAX_PENDING", 1000)
+                    )
+                    self._in_flight.update(reminder_key(reminder) for reminder in due)
+                
+                if finished:
+                    self._save_results(finished, db_manager)
+                
+                if reload_requested:
+                    self._load_reminders(db_manager)
+                
+                for reminder in due:
+                    try:
+                        self._dispatch_reminder(reminder)
+                    except Exception as e:
+                        # One bad reminder must not stop the others
+                        logger.error(f"Error dispatching reminder for {reminder_key(reminder)}: {str(e)}")
+                        self._finish_channel(reminder, {}, 0, None, False)
+        
+        except Exception as e:
+            logger.error(f"Error in scheduler loop: {str(e)}")
+        
+        finally:
+            # Let the senders finish what was dispatched and record the results
+            self.sender_pool.stop()
             
-            # Get all scheduled reminders
-            reminders = self.get_reminders(status="scheduled")
+            with self._condition:
+                finished = self._finished
+                self._finished = []
             
-            # Check each reminder
+            if finished:
+                self._save_results(finished, db_manager)
+            
+            if db_manager:
+                db_manager.close()
+        
+        logger.info("Scheduler loop stopped")
+    
+    def _load_reminders(self, db_manager=None) -> None:
+        """
+        Load all scheduled reminders into the queue.
+        
+        Args:
+            db_manager: The scheduler thread's database manager
+        """
+        if db_manager:
+            reminders = db_manager.get_reminders(status="scheduled", limit=None)
+        else:
+            reminders = self.get_reminders_from_files(status="scheduled", limit=None)
+        
+        with self._condition:
+            self._queue = ReminderQueue()
             for reminder in reminders:
                 try:
-                    # Get reminder time
-                    reminder_time = datetime.fromisoformat(reminder["reminder_time"])
+                    # Reminders being sent are still scheduled in storage
+                    if reminder_key(reminder) in self._in_flight:
+                        continue
                     
-                    # Check if the reminder is due
-                    if reminder_time <= now:
-                        # Send the reminder
-                        self._send_reminder(reminder)
-                except Exception as e:
-                    logger.error(f"Error checking reminder: {str(e)}")
-                    continue
-            
-        except Exception as e:
-            logger.error(f"Error checking due reminders: {str(e)}")
+                    self._queue.push(reminder)
+                except (KeyError, ValueError) as e:
+                    logger.error(f"Error queueing reminder: {str(e)}")
+        
+        logger.info(f"Loaded {len(reminders)} scheduled reminders")
     
-    def _send_reminder(self, reminder: Dict[str, Any]) -> None:
+    def _dispatch_reminder(self, reminder: Dict[str, Any]) -> None:
         """
-        Send a reminder.
+        Hand a due reminder's notifications to the sender pool.
         
         Args:
             reminder (Dict[str, Any]): Reminder data
         """
-        try:
-            logger.info(f"Sending reminder for {reminder['item_type']} {reminder['item_id']}")
-            
-            # Get item details
-            item_details = self._get_item_details(reminder["item_id"], reminder["item_type"])
-            
-            # Send notifications through each channel
-            for channel in reminder["channels"]:
-                if channel in self.notification_handlers:
-                    try:
-                        self.notification_handlers[channel](reminder, item_details)
-                    except Exception as e:
-                        logger.error(f"Error sending {channel} notification: {str(e)}")
-            
-            # Update reminder status
-            self.update_reminder_status(
-                reminder["item_id"],
-                reminder["item_type"],
-                "sent",
-                {"sent_at": datetime.now().isoformat()}
+        logger.info(f"Sending reminder for {reminder['item_type']} {reminder['item_id']}")
+        
+        # Get item details
+        item_details = self._get_item_details(reminder["item_id"], reminder["item_type"])
+        
+        channels = [channel for channel in reminder.get("channels", []) if channel in self.notification_handlers]
+        if not channels:
+            logger.warning(f"No known notification channels for {reminder['item_type']} {reminder['item_id']}")
+            self._finish_channel(reminder, {}, 0, None, False)
+            return
+        
+        results: Dict[str, bool] = {}
+        for channel in channels:
+            # Retrying cannot fix a missing configuration, so don't hold a sender for it
+            missing = self._missing_configuration(channel)
+            if missing:
+                logger.error(f"Not sending {channel} reminder for {reminder['item_type']} {reminder['item_id']}: {missing}")
+                self._finish_channel(reminder, results, len(channels), channel, False)
+                continue
+            
+            handler = self.notification_handlers[channel]
+            self.sender_pool.submit(
+                f"{channel} reminder for {reminder['item_type']} {reminder['item_id']}",
+                lambda handler=handler: handler(reminder, item_details),
+                lambda success, channel=channel: self._finish_channel(reminder, results, len(channels), channel, success)
             )
+    
+    def _missing_configuration(self, channel: str) -> Optional[str]:
+        """
+        Describe what a channel is missing to send notifications, or None if it is set up.
+        
+        Args:
+            channel (str): Notification channel
             
-        except Exception as e:
-            logger.error(f"Error sending reminder: {str(e)}")
+        Returns:
+            Optional[str]: Missing settings or libraries, None if the channel can send
+        """
+        if channel == "email":
+            email_config = self.config.get("EMAIL", {})
+            required = ["SMTP_SERVER", "SMTP_USERNAME", "SMTP_PASSWORD", "FROM_EMAIL", "TO_EMAIL"]
+            missing = [key for key in required if not email_config.get(key)]
+            return f"EMAIL settings missing {', '.join(missing)}" if missing else None
+        
+        if channel in ("slack", "discord"):
+            section = channel.upper()
+            return None if self.config.get(section, {}).get("WEBHOOK_URL") else f"{section} WEBHOOK_URL not set"
+        
+        if channel == "desktop":
+            if any(importlib.util.find_spec(module) for module in ("win10toast", "pync", "notify2")):
+                return None
+            return "no desktop notification library installed"
+        
+        return None
     
+    def _finish_channel(
+        self,
+        reminder: Dict[str, Any],
+        results: Dict[str, bool],
+        channel_count: int,
+        channel: Optional[str],
+        success: bool
+    ) -> None:
+        """
+        Record a channel's outcome; once all channels are done, queue the reminder's result.
+        """
+        with self._condition:
+            if channel is not None:
+                results[channel] = success
+            
+            if len(results) == channel_count:
+                self._finished.append((reminder, results))
+                self._condition.notify()
+    
+    def _save_results(self, finished: List[Tuple[Dict[str, Any], Dict[str, bool]]], db_manager=None) -> None:
+        """
+        Mark sent reminders as sent, or failed if no channel succeeded.
+        
+        Args:
+            finished (List[Tuple[Dict[str, Any], Dict[str, bool]]]): Reminders with their channel results
+            db_manager: The scheduler thread's database manager
+        """
+        now = datetime.now().isoformat()
+        updated = []
+        
+        for reminder, results in finished:
+            reminder = dict(reminder)
+            reminder["status"] = "sent" if any(results.values()) else "failed"
+            reminder["updated_at"] = now
+            reminder["metadata"] = dict(reminder.get("metadata") or {}, sent_at=now, channels=results)
+            updated.append(reminder)
+        
+        if db_manager:
+            # One transaction for the whole batch
+            if not db_manager.save_reminders(updated):
+                logger.error(f"Error saving the status of {len(updated)} reminders")
+        else:
+            for reminder in updated:
+                self.save_reminder_to_file(reminder)
+        
+        with self._condition:
+            self._in_flight.difference_update(reminder_key(reminder) for reminder in updated)
+
     def _get_item_details(self, item_id: str, item_type: str) -> Dict[str, Any]:
         """
         Get details for an item.
@@ -863,7 +1059,7 @@ def get_reminders(
     item_id: Optional[str] = None,
     item_type: Optional[str] = None,
     status: Optional[str] = None,
-    limit: int = 100,
+    limit: Optional[int] = 100,
     db_manager=None,
     config: Optional[Dict[str, Any]] = None
 ) -> List[Dict[str, Any]]:
@@ -886,7 +1082,8 @@ def get_reminders(
 
 def start_reminder_scheduler(
     db_manager=None,
-    config: Optional[Dict[str, Any]] = None
+    config: Optional[Dict[str, Any]] = None,
+    block: bool = False
 ) -> bool:
     """
     Start the scheduler for sending reminders.
@@ -894,11 +1091,16 @@ def start_reminder_scheduler(
     Args:
         db_manager: Database manager instance
         config (Dict[str, Any], optional): Configuration dictionary
+        block (bool): Whether to run the scheduler until interrupted
         
     Returns:
         bool: True if successful, False otherwise
     """
     reminder_manager = ReminderManager(db_manager, config)
+    
+    if block:
+        return reminder_manager.run_forever()
+    
     return reminder_manager.start_scheduler()
 
 def stop_reminder_scheduler(
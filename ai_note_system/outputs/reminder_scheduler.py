@@ -0,0 +1,235 @@
+"""
+Reminder scheduling primitives for AI Note System.
+Provides the in-memory due-time queue and the bounded notification sender pool
+used by the reminder manager.
+"""
+
+import heapq
+import queue
+import logging
+import itertools
+import threading
+from typing import Dict, Any, List, Optional, Tuple, Callable
+from datetime import datetime
+
+# Setup logging
+logger = logging.getLogger("ai_note_system.outputs.reminder_scheduler")
+
+def reminder_key(reminder: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    Get the key identifying a reminder.
+
+    Args:
+        reminder (Dict[str, Any]): Reminder data
+
+    Returns:
+        Tuple[str, str]: (item_type, item_id)
+    """
+    return (reminder["item_type"], str(reminder["item_id"]))
+
+class ReminderQueue:
+    """
+    Min-heap of scheduled reminders ordered by due time.
+
+    Rescheduling or removing a reminder leaves its old heap entry in place and
+    skips it when it reaches the top, so every operation is O(log n).
+    Not thread-safe; the reminder manager guards it with its condition.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty queue.
+        """
+        self._heap: List[Tuple[float, int, Tuple[str, str], Dict[str, Any]]] = []
+        self._current: Dict[Tuple[str, str], int] = {}
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._current)
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self._current
+
+    def push(self, reminder: Dict[str, Any]) -> None:
+        """
+        Add a reminder, replacing any queued reminder for the same item.
+
+        Args:
+            reminder (Dict[str, Any]): Reminder data with an ISO reminder_time
+        """
+        key = reminder_key(reminder)
+        due = datetime.fromisoformat(reminder["reminder_time"]).timestamp()
+        sequence = next(self._counter)
+
+        self._current[key] = sequence
+        heapq.heappush(self._heap, (due, sequence, key, reminder))
+        self._compact()
+
+    def remove(self, key: Tuple[str, str]) -> bool:
+        """
+        Remove the queued reminder for an item.
+
+        Args:
+            key (Tuple[str, str]): (item_type, item_id)
+
+        Returns:
+            bool: True if a reminder was queued for the item
+        """
+        return self._current.pop(key, None) is not None
+
+    def next_due(self) -> Optional[float]:
+        """
+        Get the due time of the earliest reminder.
+
+        Returns:
+            Optional[float]: Unix timestamp, or None if the queue is empty
+        """
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Remove and return the reminders due at or before now, earliest first.
+
+        Args:
+            now (float): Unix timestamp
+            limit (int, optional): Maximum number of reminders to return
+
+        Returns:
+            List[Dict[str, Any]]: Due reminders
+        """
+        due = []
+        while self._heap and (limit is None or len(due) < limit):
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+
+            _, _, key, reminder = heapq.heappop(self._heap)
+            del self._current[key]
+            due.append(reminder)
+
+        return due
+
+    def _drop_stale(self) -> None:
+        while self._heap and self._current.get(self._heap[0][2]) != self._heap[0][1]:
+            heapq.heappop(self._heap)
+
+    def _compact(self) -> None:
+        # Rebuild when stale entries dominate, so memory stays proportional to live reminders
+        if len(self._heap) > 2 * len(self._current) + 64:
+            self._heap = [entry for entry in self._heap if self._current.get(entry[2]) == entry[1]]
+            heapq.heapify(self._heap)
+
+class NotificationSenderPool:
+    """
+    Bounded pool of threads that send notifications with retries.
+
+    Submitting blocks while max_pending jobs are waiting, so a burst of due
+    reminders cannot queue unbounded work. A job is a callable returning True
+    on success; it is retried with exponential backoff when it returns False
+    or raises.
+    """
+
+    def __init__(
+        self,
+        num_workers: int = 4,
+        max_pending: int = 1000,
+        max_attempts: int = 3,
+        retry_delay: float = 5.0
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            num_workers (int): Number of sender threads
+            max_pending (int): Maximum number of jobs waiting for a sender
+            max_attempts (int): Attempts per job before giving up
+            retry_delay (float): Seconds before the first retry; doubles per attempt
+        """
+        self.num_workers = num_workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+        self._jobs: "queue.Queue[Optional[Tuple[str, Callable[[], bool], Optional[Callable[[bool], None]]]]]" = queue.Queue(maxsize=max_pending)
+        self._stop_event = threading.Event()
+        self._workers: List[threading.Thread] = []
+
+    def start(self) -> None:
+        """
+        Start the sender threads.
+        """
+        self._stop_event.clear()
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"reminder-sender-{i + 1}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        """
+        Let the senders finish queued jobs and stop them.
+
+        Retries still waiting for their backoff are abandoned.
+
+        Args:
+            timeout (float, optional): Seconds to wait for each sender
+        """
+        self._stop_event.set()
+        for _ in self._workers:
+            self._jobs.put(None)
+
+        for worker in self._workers:
+            worker.join(timeout=timeout)
+        self._workers = []
+
+    def submit(
+        self,
+        name: str,
+        job: Callable[[], bool],
+        callback: Optional[Callable[[bool], None]] = None
+    ) -> None:
+        """
+        Queue a job, blocking while the pool is full.
+
+        Args:
+            name (str): Description of the job for logging
+            job (Callable[[], bool]): Sends the notification; returns True on success
+            callback (Callable[[bool], None], optional): Called with the final outcome
+        """
+        self._jobs.put((name, job, callback))
+
+    def _worker_loop(self) -> None:
+        while True:
+            item = self._jobs.get()
+            if item is None:
+                return
+
+            name, job, callback = item
+            success = self._run_with_retries(name, job)
+
+            if callback:
+                try:
+                    callback(success)
+                except Exception as e:
+                    logger.error(f"Error in callback for {name}: {str(e)}")
+
+    def _run_with_retries(self, name: str, job: Callable[[], bool]) -> bool:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                if job():
+                    return True
+                error = "sender reported failure"
+            except Exception as e:
+                error = str(e)
+
+            if attempt == self.max_attempts:
+                logger.error(f"Giving up on {name} after {attempt} attempts: {error}")
+                break
+
+            delay = self.retry_delay * 2 ** (attempt - 1)
+            logger.warning(f"Failed to send {name} ({error}), retrying in {delay:.0f}s")
+
+            # Wait out the backoff unless the pool is stopping
+            if self._stop_event.wait(delay):
+                break
+
+        return False
@@ -7,6 +7,7 @@ import os
 import logging
 import json
 import math
+import heapq
 from typing import Dict, Any, List, Optional, Union, Tuple
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -14,20 +15,29 @@ from pathlib import Path
 # Setup logging
 logger = logging.getLogger("ai_note_system.outputs.spaced_repetition")
 
+# Marker file listing the databases the review data files have been migrated to
+MIGRATION_MARKER = ".migrated"
+
 class SpacedRepetition:
     """
     Spaced repetition scheduler class.
     Implements the SM-2 algorithm for spaced repetition scheduling.
     """
     
-    def __init__(self, db_manager=None):
+    def __init__(self, db_manager=None, data_dir: Optional[str] = None):
         """
         Initialize the spaced repetition scheduler.
         
         Args:
             db_manager: Database manager instance
+            data_dir (str, optional): Directory of file-based review data
         """
         self.db_manager = db_manager
+        self.data_dir = data_dir or self.get_default_data_dir()
+        
+        # Move review data kept in files before the database was used
+        if self.db_manager and os.path.isdir(self.data_dir):
+            self.migrate_review_files()
     
     def schedule_review(
         self,
@@ -56,23 +66,85 @@ class SpacedRepetition:
         review_data = self.get_review_data(item_id, item_type)
         
         # Update review data based on algorithm
-        if algorithm == "SM-2":
-            updated_data = self.sm2_algorithm(review_data, quality)
-        elif algorithm == "Leitner":
-            updated_data = self.leitner_algorithm(review_data, quality)
-        else:
-            logger.warning(f"Unknown algorithm: {algorithm}, falling back to SM-2")
-            updated_data = self.sm2_algorithm(review_data, quality)
+        updated_data = self.apply_algorithm(review_data, quality, algorithm)
         
         # Add metadata if provided
         if metadata:
             updated_data.update(metadata)
         
         # Save updated review data
-        self.save_review_data(item_id, item_type, updated_data)
+        self.save_review_data(item_id, item_type, updated_data, quality)
         
         return updated_data
     
+    def grade_items(
+        self,
+        grades: List[Tuple[str, int]],
+        item_type: str = "note",
+        algorithm: str = "SM-2"
+    ) -> List[Dict[str, Any]]:
+        """
+        Schedule reviews for many items at once.
+        
+        With a database, the review data of all items is loaded with one query
+        and saved in one transaction.
+        
+        Args:
+            grades (List[Tuple[str, int]]): (item_id, quality) pairs
+            item_type (str): Type of the items (note, question, etc.)
+            algorithm (str): Spaced repetition algorithm to use
+            
+        Returns:
+            List[Dict[str, Any]]: Updated review data, in the order of grades
+        """
+        logger.info(f"Grading {len(grades)} {item_type} items")
+        
+        if not self.db_manager:
+            return [self.schedule_review(item_id, quality, item_type, algorithm) for item_id, quality in grades]
+        
+        # Load the current review data of all items
+        states = self.db_manager.get_review_states([(str(item_id), item_type) for item_id, _ in grades])
+        
+        updated = []
+        for item_id, quality in grades:
+            key = (str(item_id), item_type)
+            review_data = states.get(key) or self.get_default_review_data(str(item_id), item_type)
+            
+            # Later grades of the same item build on earlier ones
+            states[key] = self.apply_algorithm(review_data, quality, algorithm)
+            updated.append(states[key])
+        
+        # Save them in one transaction, logging every review
+        unique = {(data["item_id"], data["item_type"]): data for data in updated}
+        reviews = [
+            (item_id, item_type, max(0, min(5, quality)), data["last_reviewed"])
+            for (item_id, quality), data in zip(grades, updated)
+        ]
+        if not self.db_manager.save_review_states(list(unique.values()), reviews=reviews):
+            logger.error(f"Error saving review data for {len(unique)} {item_type} items")
+        
+        return updated
+    
+    def apply_algorithm(self, review_data: Dict[str, Any], quality: int, algorithm: str = "SM-2") -> Dict[str, Any]:
+        """
+        Update review data with a spaced repetition algorithm.
+        
+        Args:
+            review_data (Dict[str, Any]): Current review data
+            quality (int): Quality of recall (0-5)
+            algorithm (str): Spaced repetition algorithm to use
+            
+        Returns:
+            Dict[str, Any]: Updated review data
+        """
+        if algorithm == "SM-2":
+            return self.sm2_algorithm(review_data, quality)
+        elif algorithm == "Leitner":
+            return self.leitner_algorithm(review_data, quality)
+        else:
+            logger.warning(f"Unknown algorithm: {algorithm}, falling back to SM-2")
+            return self.sm2_algorithm(review_data, quality)
+    
     def get_review_data(self, item_id: str, item_type: str = "note") -> Dict[str, Any]:
         """
         Get review data for an item.
@@ -103,21 +175,10 @@ class SpacedRepetition:
             Dict[str, Any]: Review data
         """
         try:
-            # This is a placeholder for database integration
-            # In a real implementation, this would query the database
-            
-            # For now, return default values
-            return {
-                "item_id": item_id,
-                "item_type": item_type,
-                "easiness_factor": 2.5,
-                "interval": 0,
-                "repetitions": 0,
-                "review_count": 0,
-                "last_reviewed": None,
-                "next_review": datetime.now().isoformat(),
-                "box": 0  # For Leitner system
-            }
+            states = self.db_manager.get_review_states([(str(item_id), item_type)])
+            
+            # If the item has not been reviewed yet, return default values
+            return states.get((str(item_id), item_type)) or self.get_default_review_data(item_id, item_type)
             
         except Exception as e:
             logger.error(f"Error getting review data from database: {str(e)}")
@@ -173,7 +234,13 @@ class SpacedRepetition:
             "box": 0  # For Leitner system
         }
     
-    def save_review_data(self, item_id: str, item_type: str, data: Dict[str, Any]) -> bool:
+    def save_review_data(
+        self,
+        item_id: str,
+        item_type: str,
+        data: Dict[str, Any],
+        quality: Optional[int] = None
+    ) -> bool:
         """
         Save review data for an item.
         
@@ -181,18 +248,25 @@ class SpacedRepetition:
             item_id (str): ID of the item
             item_type (str): Type of item (note, question, etc.)
             data (Dict[str, Any]): Review data
+            quality (int, optional): Quality of the review that led to the data, logged with a database
             
         Returns:
             bool: True if successful, False otherwise
         """
         # If database manager is available, use it
         if self.db_manager:
-            return self.save_review_data_to_db(item_id, item_type, data)
+            return self.save_review_data_to_db(item_id, item_type, data, quality)
         
         # Otherwise, use a simple file-based approach
         return self.save_review_data_to_file(item_id, item_type, data)
     
-    def save_review_data_to_db(self, item_id: str, item_type: str, data: Dict[str, Any]) -> bool:
+    def save_review_data_to_db(
+        self,
+        item_id: str,
+        item_type: str,
+        data: Dict[str, Any],
+        quality: Optional[int] = None
+    ) -> bool:
         """
         Save review data for an item to the database.
         
@@ -200,13 +274,20 @@ class SpacedRepetition:
             item_id (str): ID of the item
             item_type (str): Type of item (note, question, etc.)
             data (Dict[str, Any]): Review data
+            quality (int, optional): Quality of the review that led to the data, added to the review log
             
         Returns:
             bool: True if successful, False otherwise
         """
         try:
-            # This is a placeholder for database integration
-            # In a real implementation, this would update the database
+            state = dict(data, item_id=str(item_id), item_type=item_type)
+            
+            reviews = None
+            if quality is not None and state.get("last_reviewed"):
+                reviews = [(str(item_id), item_type, max(0, min(5, quality)), state["last_reviewed"])]
+            
+            if not self.db_manager.save_review_states([state], reviews=reviews):
+                return False
             
             logger.debug(f"Review data for {item_type} {item_id} saved to database")
             return True
@@ -256,15 +337,76 @@ class SpacedRepetition:
         Returns:
             str: File path
         """
-        # Get the path to the data directory
+        # Create a file name based on item type and ID
+        file_name = f"{item_type}_{item_id}.json"
+        
+        return os.path.join(self.data_dir, file_name)
+    
+    def get_default_data_dir(self) -> str:
+        """
+        Get the default directory of file-based review data.
+        
+        Returns:
+            str: Directory path
+        """
         current_dir = os.path.dirname(os.path.abspath(__file__))
         project_dir = os.path.dirname(os.path.dirname(current_dir))
-        data_dir = os.path.join(project_dir, "data", "spaced_repetition")
+        return os.path.join(project_dir, "data", "spaced_repetition")
+    
+    def migrate_review_files(self) -> int:
+        """
+        Copy file-based review data into the database, once per database.
         
-        # Create a file name based on item type and ID
-        file_name = f"{item_type}_{item_id}.json"
+        An item already in the database is only replaced by a file that was
+        reviewed more recently. The files are left in place.
+        
+        Returns:
+            int: Number of files migrated
+        """
+        marker_path = os.path.join(self.data_dir, MIGRATION_MARKER)
+        db_path = os.path.abspath(self.db_manager.db_path)
         
-        return os.path.join(data_dir, file_name)
+        try:
+            migrated_to = []
+            if os.path.exists(marker_path):
+                with open(marker_path, 'r', encoding='utf-8') as f:
+                    migrated_to = json.load(f)
+                
+                if db_path in migrated_to:
+                    return 0
+            
+            states = []
+            for file in os.listdir(self.data_dir):
+                if not file.endswith(".json"):
+                    continue
+                
+                file_path = os.path.join(self.data_dir, file)
+                try:
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    
+                    if data.get("item_id") is None or not data.get("item_type") or not data.get("next_review"):
+                        logger.warning(f"Skipping incomplete review data in {file_path}")
+                        continue
+                    
+                    states.append(data)
+                
+                except Exception as e:
+                    logger.error(f"Error loading review data from {file_path}: {str(e)}")
+                    continue
+            
+            if not self.db_manager.save_review_states(states, overwrite=False):
+                return 0
+            
+            with open(marker_path, 'w', encoding='utf-8') as f:
+                json.dump(migrated_to + [db_path], f, indent=2)
+            
+            logger.info(f"Migrated {len(states)} review data files to {db_path}")
+            return len(states)
+            
+        except Exception as e:
+            logger.error(f"Error migrating review data files: {str(e)}")
+            return 0
     
     def sm2_algorithm(self, review_data: Dict[str, Any], quality: int) -> Dict[str, Any]:
         """
@@ -407,11 +549,8 @@ class SpacedRepetition:
             List[Dict[str, Any]]: List of due items
         """
         try:
-            # This is a placeholder for database integration
-            # In a real implementation, this would query the database
-            
-            # For now, return an empty list
-            return []
+            # Due items, most overdue first, from the (next_review, item_type) index
+            return self.db_manager.get_due_review_states(datetime.now().isoformat(), item_type, limit)
             
         except Exception as e:
             logger.error(f"Error getting due items from database: {str(e)}")
@@ -429,17 +568,14 @@ class SpacedRepetition:
             List[Dict[str, Any]]: List of due items
         """
         try:
-            # Get the path to the data directory
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            project_dir = os.path.dirname(os.path.dirname(current_dir))
-            data_dir = os.path.join(project_dir, "data", "spaced_repetition")
+            data_dir = self.data_dir
             
             # Ensure directory exists
             if not os.path.exists(data_dir):
                 return []
             
             # Get all review data files
-            files = os.listdir(data_dir)
+            files = [f for f in os.listdir(data_dir) if f.endswith(".json")]
             
             # Filter by item type if specified
             if item_type:
@@ -461,19 +597,13 @@ class SpacedRepetition:
                     
                     if next_review <= now:
                         due_items.append(data)
-                        
-                        # Stop if we've reached the limit
-                        if len(due_items) >= limit:
-                            break
                 
                 except Exception as e:
                     logger.error(f"Error loading review data from {file_path}: {str(e)}")
                     continue
             
-            # Sort by next review date
-            due_items.sort(key=lambda x: x.get("next_review", "2099-12-31T00:00:00"))
-            
-            return due_items
+            # Keep the most overdue items
+            return heapq.nsmallest(limit, due_items, key=lambda x: x.get("next_review", "2099-12-31T00:00:00"))
             
         except Exception as e:
             logger.error(f"Error getting due items from files: {str(e)}")
@@ -539,6 +669,27 @@ def schedule_review(
     sr = SpacedRepetition(db_manager)
     return sr.schedule_review(item_id, quality, item_type, algorithm, metadata)
 
+def grade_items(
+    grades: List[Tuple[str, int]],
+    item_type: str = "note",
+    algorithm: str = "SM-2",
+    db_manager=None
+) -> List[Dict[str, Any]]:
+    """
+    Schedule reviews for many items at once.
+    
+    Args:
+        grades (List[Tuple[str, int]]): (item_id, quality) pairs
+        item_type (str): Type of the items (note, question, etc.)
+        algorithm (str): Spaced repetition algorithm to use
+        db_manager: Database manager instance
+        
+    Returns:
+        List[Dict[str, Any]]: Updated review data, in the order of grades
+    """
+    sr = SpacedRepetition(db_manager)
+    return sr.grade_items(grades, item_type, algorithm)
+
 def get_due_items(
     item_type: Optional[str] = None,
     limit: int = 100,
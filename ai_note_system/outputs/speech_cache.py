@@ -0,0 +1,354 @@
+"""
+Speech cache module for AI Note System.
+Provides a content-addressed cache for synthesized audio segments so that
+unchanged text is never sent to a TTS engine twice.
+"""
+
+import os
+import re
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+import subprocess
+from typing import Dict, Any, List, Optional, Iterable
+
+# Setup logging
+logger = logging.getLogger("ai_note_system.outputs.speech_cache")
+
+# Sentence boundary: terminal punctuation followed by whitespace, or a blank line
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+class SpeechCache:
+    """
+    Content-addressed cache for synthesized audio.
+
+    Entries are keyed by a hash of the text, voice, rate, engine and format,
+    stored as files in a cache directory and evicted least-recently-used
+    first once the total size exceeds the configured limit. Pinned entries
+    are never evicted, so files handed out for an ongoing concatenation stay
+    on disk until they are unpinned.
+    """
+
+    def __init__(self, cache_dir: str, max_size_bytes: int = 500 * 1024 * 1024):
+        """
+        Initialize the speech cache.
+
+        Args:
+            cache_dir (str): Directory to store cached audio files
+            max_size_bytes (int): Maximum total size of the cache in bytes
+        """
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()
+
+        # key -> (path, size, last access sequence)
+        self._entries: Dict[str, List[Any]] = {}
+        # key -> number of callers holding the entry
+        self._pins: Dict[str, int] = {}
+        self._access_counter = 0
+        self._total_size = 0
+
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "bytes_saved": 0,
+            "bytes_written": 0,
+            "evictions": 0
+        }
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_existing_entries()
+
+    def _load_existing_entries(self) -> None:
+        """
+        Index audio files already present in the cache directory, oldest first.
+        """
+        files = []
+        for filename in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, filename)
+            key, _ = os.path.splitext(filename)
+            if not os.path.isfile(path) or len(key) != 64:
+                continue
+            stat = os.stat(path)
+            files.append((stat.st_mtime, key, path, stat.st_size))
+
+        for _, key, path, size in sorted(files):
+            self._access_counter += 1
+            self._entries[key] = [path, size, self._access_counter]
+            self._total_size += size
+
+        logger.debug(f"Loaded {len(self._entries)} cached audio segments ({self._total_size} bytes)")
+
+    @staticmethod
+    def make_key(text: str, voice: str, rate: float, engine: str, format: str) -> str:
+        """
+        Build the cache key for a piece of text.
+
+        Args:
+            text (str): Text to synthesize
+            voice (str): Voice ID
+            rate (float): Speech rate
+            engine (str): TTS engine name
+            format (str): Audio format
+
+        Returns:
+            str: Hex digest identifying the audio content
+        """
+        payload = json.dumps(
+            [text.strip(), voice, round(float(rate), 3), engine, format.lower()],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, pin: bool = False) -> Optional[str]:
+        """
+        Look up a cached audio file.
+
+        Args:
+            key (str): Cache key from make_key
+            pin (bool): Whether to keep the entry from being evicted until unpin is called
+
+        Returns:
+            Optional[str]: Path to the cached audio file, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and os.path.exists(entry[0]):
+                self._access_counter += 1
+                entry[2] = self._access_counter
+                self._stats["hits"] += 1
+                self._stats["bytes_saved"] += entry[1]
+                if pin:
+                    self._pins[key] = self._pins.get(key, 0) + 1
+                return entry[0]
+
+            if entry:
+                # File was removed behind our back
+                self._total_size -= entry[1]
+                del self._entries[key]
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key: str, source_path: str, format: str, pin: bool = False) -> str:
+        """
+        Store an audio file in the cache.
+
+        Args:
+            key (str): Cache key from make_key
+            source_path (str): Path to the synthesized audio file
+            format (str): Audio format, used as the file extension
+            pin (bool): Whether to keep the entry from being evicted until unpin is called
+
+        Returns:
+            str: Path to the cached copy
+        """
+        cached_path = os.path.join(self.cache_dir, f"{key}.{format.lower()}")
+
+        if os.path.abspath(source_path) != os.path.abspath(cached_path):
+            temp_path = f"{cached_path}.{threading.get_ident()}.tmp"
+            shutil.copyfile(source_path, temp_path)
+            os.replace(temp_path, cached_path)
+
+        size = os.path.getsize(cached_path)
+
+        with self._lock:
+            previous = self._entries.get(key)
+            if previous:
+                self._total_size -= previous[1]
+
+            self._access_counter += 1
+            self._entries[key] = [cached_path, size, self._access_counter]
+            self._total_size += size
+            self._stats["bytes_written"] += size
+            if pin:
+                self._pins[key] = self._pins.get(key, 0) + 1
+
+            self._evict_locked()
+
+        return cached_path
+
+    def unpin(self, keys: Iterable[str]) -> None:
+        """
+        Release entries pinned by get or put, once per pin, and evict if the cache is over its limit.
+
+        Args:
+            keys (Iterable[str]): Keys that were pinned
+        """
+        with self._lock:
+            for key in keys:
+                count = self._pins.get(key, 0) - 1
+                if count > 0:
+                    self._pins[key] = count
+                else:
+                    self._pins.pop(key, None)
+
+            self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        """
+        Remove least-recently-used unpinned entries until the cache fits its size limit.
+        Must be called with the lock held.
+        """
+        if self._total_size <= self.max_size_bytes:
+            return
+
+        for key, (path, size, _) in sorted(self._entries.items(), key=lambda item: item[1][2]):
+            if self._total_size <= self.max_size_bytes:
+                break
+            if key in self._pins:
+                continue
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Could not remove cached audio {path}: {e}")
+            self._total_size -= size
+            del self._entries[key]
+            self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        """
+        Remove every entry from the cache.
+        """
+        with self._lock:
+            for path, _, _ in self._entries.values():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._entries.clear()
+            self._total_size = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache metrics.
+
+        Returns:
+            Dict[str, Any]: Hits, misses, bytes saved/written, evictions and current size
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["size_bytes"] = self._total_size
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+            return stats
+
+def split_into_segments(text: str, max_chars: int = 400) -> List[str]:
+    """
+    Split text into sentence-level segments for synthesis.
+
+    Sentences longer than max_chars are further split on word boundaries so
+    a single segment never becomes a bottleneck for parallel synthesis.
+
+    Args:
+        text (str): Text to split
+        max_chars (int): Maximum characters per segment
+
+    Returns:
+        List[str]: Non-empty text segments in order
+    """
+    segments = []
+
+    for sentence in SENTENCE_BOUNDARY.split(text):
+        sentence = " ".join(sentence.split())
+        if not sentence:
+            continue
+
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            segments.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+
+        if sentence:
+            segments.append(sentence)
+
+    return segments
+
+def concatenate_audio(segment_paths: List[str], output_path: str, format: str) -> None:
+    """
+    Concatenate audio segments into a single file.
+
+    Uses pydub when available, then the ffmpeg concat demuxer. Without
+    either, WAV files are joined with the standard library and MP3 files by
+    byte concatenation. MP3 decoders play such a file through, but the
+    duration and seek tables in the first segment's header still describe
+    that segment only, so players may report the wrong length.
+
+    Args:
+        segment_paths (List[str]): Paths of the audio segments in order
+        output_path (str): Path to save the concatenated audio
+        format (str): Audio format (mp3, wav, ogg)
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    if len(segment_paths) == 1:
+        shutil.copyfile(segment_paths[0], output_path)
+        return
+
+    try:
+        from pydub import AudioSegment
+
+        combined = AudioSegment.empty()
+        for path in segment_paths:
+            combined += AudioSegment.from_file(path, format=format)
+        combined.export(output_path, format=format)
+        return
+
+    except ImportError:
+        logger.debug("pydub package not installed. Trying ffmpeg.")
+
+    if shutil.which("ffmpeg"):
+        try:
+            _concatenate_with_ffmpeg(segment_paths, output_path)
+            return
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.warning(f"ffmpeg could not concatenate audio segments: {e}")
+
+    if format.lower() == "wav":
+        import wave
+
+        with wave.open(output_path, "wb") as out:
+            for i, path in enumerate(segment_paths):
+                with wave.open(path, "rb") as segment:
+                    if i == 0:
+                        out.setparams(segment.getparams())
+                    out.writeframes(segment.readframes(segment.getnframes()))
+
+    elif format.lower() == "mp3":
+        logger.warning("Neither pydub nor ffmpeg is available. Joining MP3 segments byte by byte.")
+        with open(output_path, "wb") as out:
+            for path in segment_paths:
+                with open(path, "rb") as segment:
+                    shutil.copyfileobj(segment, out)
+
+    else:
+        raise ImportError(f"pydub package or ffmpeg is required to concatenate {format} audio")
+
+def _concatenate_with_ffmpeg(segment_paths: List[str], output_path: str) -> None:
+    """
+    Join audio segments without re-encoding using ffmpeg's concat demuxer.
+
+    Args:
+        segment_paths (List[str]): Paths of the audio segments in order
+        output_path (str): Path to save the concatenated audio
+    """
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as listing:
+        for path in segment_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            listing.write(f"file '{escaped}'\n")
+
+    try:
+        subprocess.run(
+            ["ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+             "-i", listing.name, "-c", "copy", output_path],
+            check=True,
+            capture_output=True
+        )
+    finally:
+        os.remove(listing.name)
@@ -7,13 +7,28 @@ import os
 import logging
 import json
 import tempfile
+import importlib.util
+import threading
+import concurrent.futures
 from typing import Dict, Any, List, Optional, Union
 from pathlib import Path
 from datetime import datetime
 
+from .speech_cache import SpeechCache, split_into_segments, concatenate_audio
+
 # Setup logging
 logger = logging.getLogger("ai_note_system.outputs.speech_generator")
 
+# pyttsx3 drives a single process-wide engine, so synthesis must be serialized
+_pyttsx3_lock = threading.Lock()
+
+# Engines tried by generate_speech_with_engine, in order, with the module each needs
+AUTO_ENGINES = [
+    ("gtts", "gtts"),
+    ("pyttsx3", "pyttsx3"),
+    ("azure", "azure.cognitiveservices.speech")
+]
+
 def generate_speech(
     content: Dict[str, Any],
     output_path: Optional[str] = None,
@@ -307,8 +322,9 @@ def generate_speech_with_pyttsx3(
         if not output_path.lower().endswith(".wav"):
             temp_wav_path = f"{os.path.splitext(output_path)[0]}.wav"
         
-        engine.save_to_file(text, temp_wav_path)
-        engine.runAndWait()
+        with _pyttsx3_lock:
+            engine.save_to_file(text, temp_wav_path)
+            engine.runAndWait()
         
         # Convert to desired format if not WAV
         if format.lower() != "wav" and not output_path.lower().endswith(".wav"):
@@ -427,6 +443,177 @@ def generate_speech_with_azure(
     except Exception as e:
         return {"success": False, "error": f"Error using Azure TTS: {str(e)}"}
 
+def synthesize_segment(
+    text: str,
+    output_path: str,
+    voice: str = "en-US-Neural2-F",
+    rate: float = 1.0,
+    format: str = "mp3",
+    engine: str = "auto"
+) -> Dict[str, Any]:
+    """
+    Synthesize a single text segment with a specific engine or the default fallback chain.
+    
+    Args:
+        text (str): Text to convert to speech
+        output_path (str): Path to save the audio file
+        voice (str): Voice ID to use for speech
+        rate (float): Speech rate (0.5 to 2.0)
+        format (str): Audio format (mp3, wav, ogg)
+        engine (str): TTS engine (auto, gtts, pyttsx3, azure)
+        
+    Returns:
+        Dict[str, Any]: Result of the speech generation
+    """
+    if engine == "gtts":
+        return generate_speech_with_gtts(text, output_path, voice, rate, format)
+    elif engine == "pyttsx3":
+        return generate_speech_with_pyttsx3(text, output_path, voice, rate, format)
+    elif engine == "azure":
+        return generate_speech_with_azure(text, output_path, voice, rate, format)
+    else:
+        return generate_speech_with_engine(text, output_path, voice, rate, format)
+
+def resolve_engine(engine: str) -> str:
+    """
+    Get the engine that synthesizes speech for an engine setting.
+    
+    For "auto" this is the first engine of the fallback chain whose package is
+    installed; it can still fall back further if that engine fails at runtime.
+    
+    Args:
+        engine (str): TTS engine (auto, gtts, pyttsx3, azure)
+        
+    Returns:
+        str: Engine name, or "auto" if no engine package is installed
+    """
+    if engine != "auto":
+        return engine
+    
+    for name, module in AUTO_ENGINES:
+        try:
+            if importlib.util.find_spec(module) is not None:
+                return name
+        except ImportError:
+            continue
+    
+    return engine
+
+def generate_speech_cached(
+    text: str,
+    output_path: str,
+    cache: SpeechCache,
+    voice: str = "en-US-Neural2-F",
+    rate: float = 1.0,
+    format: str = "mp3",
+    engine: str = "auto",
+    executor: Optional[concurrent.futures.Executor] = None
+) -> Dict[str, Any]:
+    """
+    Generate speech for text, synthesizing only sentences missing from the cache.
+    
+    The text is split into sentence-level segments. Cached segments are reused,
+    missing ones are synthesized in parallel and stored, and all segments are
+    concatenated into the output file. Editing a note therefore only re-renders
+    the sentences that changed.
+    
+    Segments are cached under the engine that synthesized them, so audio from a
+    fallback engine is never served for another one. The segments are pinned
+    in the cache until the output is written, so evictions made by parallel
+    calls cannot delete them.
+    
+    Args:
+        text (str): Text to convert to speech
+        output_path (str): Path to save the audio file
+        cache (SpeechCache): Audio cache to read from and write to
+        voice (str): Voice ID to use for speech
+        rate (float): Speech rate (0.5 to 2.0)
+        format (str): Audio format (mp3, wav, ogg)
+        engine (str): TTS engine (auto, gtts, pyttsx3, azure)
+        executor (Executor, optional): Executor used to synthesize segments in parallel
+        
+    Returns:
+        Dict[str, Any]: Result of the speech generation, including segment cache counts
+    """
+    segments = split_into_segments(text)
+    if not segments:
+        return {"success": False, "error": "No text to synthesize"}
+    
+    resolved = resolve_engine(engine)
+    keys = [SpeechCache.make_key(segment, voice, rate, resolved, format) for segment in segments]
+    segment_paths: Dict[str, str] = {}
+    missing: Dict[str, str] = {}
+    pinned: List[str] = []
+    
+    def synthesize(key: str, segment: str) -> Dict[str, Any]:
+        temp_file = tempfile.NamedTemporaryFile(suffix=f".{format}", delete=False)
+        temp_path = temp_file.name
+        temp_file.close()
+        try:
+            result = synthesize_segment(segment, temp_path, voice, rate, format, engine)
+            if result.get("success"):
+                # A fallback engine's audio is stored under its own key
+                used_key = SpeechCache.make_key(segment, voice, rate, result.get("engine", resolved), format)
+                result["cached_path"] = cache.put(used_key, result.get("output_path", temp_path), format, pin=True)
+                pinned.append(used_key)
+            return result
+        finally:
+            for path in {temp_path, f"{os.path.splitext(temp_path)[0]}.wav"}:
+                if os.path.exists(path):
+                    os.remove(path)
+    
+    try:
+        for key, segment in zip(keys, segments):
+            if key in segment_paths or key in missing:
+                continue
+            cached_path = cache.get(key, pin=True)
+            if cached_path:
+                pinned.append(key)
+                segment_paths[key] = cached_path
+            else:
+                missing[key] = segment
+        
+        if missing:
+            own_executor = executor is None
+            if own_executor:
+                executor = concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(missing)))
+            futures = {executor.submit(synthesize, key, segment): key for key, segment in missing.items()}
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    result = future.result()
+                    if not result.get("success"):
+                        return {"success": False, "error": result.get("error", "Unknown error")}
+                    segment_paths[futures[future]] = result["cached_path"]
+            finally:
+                # Drop queued segments and wait for running ones, so every pin is released below
+                for future in futures:
+                    future.cancel()
+                concurrent.futures.wait(futures)
+                if own_executor:
+                    executor.shutdown(wait=True)
+        
+        try:
+            concatenate_audio([segment_paths[key] for key in keys], output_path, format)
+        except Exception as e:
+            return {"success": False, "error": f"Error concatenating audio segments: {str(e)}"}
+    
+    finally:
+        cache.unpin(pinned)
+    
+    # Estimate duration (rough estimate: 150 words per minute)
+    word_count = len(text.split())
+    
+    return {
+        "success": True,
+        "output_path": output_path,
+        "duration": word_count / 150 * 60,
+        "format": format,
+        "text_length": len(text),
+        "segments": len(segments),
+        "segments_synthesized": len(missing),
+        "segments_cached": len(set(keys)) - len(missing)
+    }
+
 def batch_generate_speech(
     contents: List[Dict[str, Any]],
     output_dir: str,
@@ -435,7 +622,12 @@ def batch_generate_speech(
     format: str = "mp3",
     summarize: bool = True,
     max_duration_minutes: int = 15,
-    include_metadata: bool = True
+    include_metadata: bool = True,
+    engine: str = "auto",
+    use_cache: bool = True,
+    cache_dir: Optional[str] = None,
+    cache_max_size_mb: int = 500,
+    max_workers: int = 4
 ) -> Dict[str, Any]:
     """
     Generate speech for multiple notes.
@@ -449,6 +641,11 @@ def batch_generate_speech(
         summarize (bool): Whether to generate speech from summary instead of full text
         max_duration_minutes (int): Maximum duration of the audio in minutes
         include_metadata (bool): Whether to include metadata in the speech
+        engine (str): TTS engine (auto, gtts, pyttsx3, azure)
+        use_cache (bool): Whether to reuse previously synthesized sentences
+        cache_dir (str, optional): Cache directory (defaults to <output_dir>/.speech_cache)
+        cache_max_size_mb (int): Maximum size of the audio cache in megabytes
+        max_workers (int): Number of segments synthesized in parallel
         
     Returns:
         Dict[str, Any]: Result of the batch speech generation
@@ -458,39 +655,66 @@ def batch_generate_speech(
     # Ensure output directory exists
     os.makedirs(output_dir, exist_ok=True)
     
+    cache = None
+    if use_cache:
+        cache = SpeechCache(
+            cache_dir or os.path.join(output_dir, ".speech_cache"),
+            max_size_bytes=cache_max_size_mb * 1024 * 1024
+        )
+    
     # Generate speech for each note
     results = []
     
-    for i, content in enumerate(contents):
-        # Generate filename from title or index
-        title = content.get("title", f"note_{i+1}")
-        safe_title = "".join(c if c.isalnum() or c in " -_" else "_" for c in title)
-        filename = f"{safe_title}.{format}"
-        output_path = os.path.join(output_dir, filename)
-        
-        # Generate speech
-        result = generate_speech(
-            content=content,
-            output_path=output_path,
-            voice=voice,
-            rate=rate,
-            format=format,
-            summarize=summarize,
-            max_duration_minutes=max_duration_minutes,
-            include_metadata=include_metadata
-        )
-        
-        # Add note info to result
-        result["title"] = title
-        result["index"] = i + 1
-        
-        results.append(result)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for i, content in enumerate(contents):
+            # Generate filename from title or index
+            title = content.get("title", f"note_{i+1}")
+            safe_title = "".join(c if c.isalnum() or c in " -_" else "_" for c in title)
+            filename = f"{safe_title}.{format}"
+            output_path = os.path.join(output_dir, filename)
+            
+            # Generate speech
+            if cache is not None:
+                speech_text = prepare_speech_text(content, summarize, include_metadata, max_duration_minutes)
+                try:
+                    result = generate_speech_cached(
+                        text=speech_text,
+                        output_path=output_path,
+                        cache=cache,
+                        voice=voice,
+                        rate=rate,
+                        format=format,
+                        engine=engine,
+                        executor=executor
+                    )
+                except Exception as e:
+                    result = {"success": False, "error": f"Error generating speech: {str(e)}"}
+                
+                if not result["success"]:
+                    logger.error(f"Error generating speech for '{title}': {result.get('error', 'Unknown error')}")
+            else:
+                result = generate_speech(
+                    content=content,
+                    output_path=output_path,
+                    voice=voice,
+                    rate=rate,
+                    format=format,
+                    summarize=summarize,
+                    max_duration_minutes=max_duration_minutes,
+                    include_metadata=include_metadata
+                )
+            
+            # Add note info to result
+            result["title"] = title
+            result["index"] = i + 1
+            
+            results.append(result)
     
     # Count successes and failures
     successes = sum(1 for r in results if r.get("success", False))
     failures = len(results) - successes
     
-    return {
+    batch_result = {
         "success": failures == 0,
         "total": len(results),
         "successes": successes,
@@ -498,6 +722,15 @@ def batch_generate_speech(
         "results": results,
         "output_dir": output_dir
     }
+    
+    if cache is not None:
+        batch_result["cache"] = cache.get_stats()
+        logger.info(
+            f"Speech cache: {batch_result['cache']['hits']} hits, "
+            f"{batch_result['cache']['bytes_saved']} bytes saved"
+        )
+    
+    return batch_result
 
 def generate_speech_from_text(
     text: str,
@@ -591,6 +824,10 @@ def main():
     parser.add_argument("--summarize", action="store_true", help="Generate speech from summary")
     parser.add_argument("--max-duration", type=int, default=15, help="Maximum duration in minutes")
     parser.add_argument("--include-metadata", action="store_true", help="Include metadata in speech")
+    parser.add_argument("--engine", default="auto", choices=["auto", "gtts", "pyttsx3", "azure"], help="TTS engine")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the sentence-level audio cache")
+    parser.add_argument("--cache-dir", help="Directory for the audio cache")
+    parser.add_argument("--cache-size", type=int, default=500, help="Maximum audio cache size in MB")
     
     args = parser.parse_args()
     
@@ -661,7 +898,11 @@ def main():
                 format=args.format,
                 summarize=args.summarize,
                 max_duration_minutes=args.max_duration,
-                include_metadata=args.include_metadata
+                include_metadata=args.include_metadata,
+                engine=args.engine,
+                use_cache=not args.no_cache,
+                cache_dir=args.cache_dir,
+                cache_max_size_mb=args.cache_size
             )
             
             # Print result
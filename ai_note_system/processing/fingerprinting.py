@@ -0,0 +1,197 @@
+"""
+Fingerprinting module for AI Note System.
+Computes content fingerprints for extracted text and derived artifacts so that
+re-imported sources only recompute the processing stages whose inputs changed.
+"""
+
+import re
+import json
+import hashlib
+import logging
+from typing import Dict, Any, List, Optional
+
+# Setup logging
+logger = logging.getLogger("ai_note_system.processing.fingerprinting")
+
+# Fingerprint of the extracted source text; derived artifacts are fingerprinted from it
+TEXT_STAGE = "text"
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text so that whitespace-only differences do not change its fingerprint.
+
+    Args:
+        text (str): Text to normalize
+
+    Returns:
+        str: Normalized text
+    """
+    return re.sub(r"\s+", " ", text or "").strip()
+
+def fingerprint_text(text: str) -> str:
+    """
+    Compute the fingerprint of extracted text.
+
+    Args:
+        text (str): Extracted text
+
+    Returns:
+        str: SHA-256 hex digest of the normalized text
+    """
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+def fingerprint_stage(stage: str, input_fingerprint: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Compute the fingerprint of a derived artifact from its input and parameters.
+
+    A stage must be recomputed whenever its fingerprint differs from the stored
+    one, i.e. when the input text or any parameter (model, length, ...) changed.
+
+    Args:
+        stage (str): Stage name
+        input_fingerprint (str): Fingerprint of the stage input
+        params (Dict[str, Any], optional): Parameters that affect the artifact
+
+    Returns:
+        str: SHA-256 hex digest
+    """
+    payload = json.dumps(
+        {"stage": stage, "input": input_fingerprint, "params": params or {}},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ReprocessingPlan:
+    """
+    Decision for each processing stage of a (re-)imported note.
+    """
+
+    def __init__(self, existing_note_id: Optional[int] = None):
+        """
+        Initialize an empty plan.
+
+        Args:
+            existing_note_id (int, optional): ID of the note this import updates
+        """
+        self.existing_note_id = existing_note_id
+        self.fingerprints: Dict[str, str] = {}
+        self.decisions: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, stage: str, fingerprint: str, stored: Optional[str]) -> None:
+        """
+        Record the decision for a requested stage.
+
+        Args:
+            stage (str): Stage name
+            fingerprint (str): Newly computed fingerprint
+            stored (str, optional): Fingerprint stored for the existing note
+        """
+        self.fingerprints[stage] = fingerprint
+
+        if stored is None:
+            reason = "new"
+        elif stored != fingerprint:
+            reason = "changed"
+        else:
+            reason = "unchanged"
+
+        self.decisions[stage] = {"run": reason != "unchanged", "reason": reason}
+
+    def should_run(self, stage: str) -> bool:
+        """
+        Check whether a stage needs to be computed.
+
+        Stages that were not planned (e.g. not fingerprinted) always run.
+
+        Args:
+            stage (str): Stage name
+
+        Returns:
+            bool: True if the stage must run
+        """
+        decision = self.decisions.get(stage)
+        return decision is None or decision["run"]
+
+    @property
+    def stages_to_run(self) -> List[str]:
+        """Stages that will be recomputed."""
+        return [stage for stage, decision in self.decisions.items() if decision["run"]]
+
+    @property
+    def stages_to_skip(self) -> List[str]:
+        """Stages whose stored artifact is reused."""
+        return [stage for stage, decision in self.decisions.items() if not decision["run"]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the plan to a dictionary.
+
+        Returns:
+            Dict[str, Any]: Plan with existing note ID and per-stage decisions
+        """
+        return {
+            "existing_note_id": self.existing_note_id,
+            "stages": {stage: dict(decision) for stage, decision in self.decisions.items()}
+        }
+
+    def format_report(self) -> str:
+        """
+        Format the plan as a human-readable report.
+
+        Returns:
+            str: Report listing which stages would run and why
+        """
+        return format_plan_report(self.to_dict())
+
+def format_plan_report(plan: Dict[str, Any]) -> str:
+    """
+    Format a plan dictionary (see ReprocessingPlan.to_dict) as a human-readable report.
+
+    Args:
+        plan (Dict[str, Any]): Plan dictionary
+
+    Returns:
+        str: Report listing which stages would run and why
+    """
+    if plan.get("existing_note_id") is None:
+        lines = ["New note: all requested stages will run"]
+    else:
+        lines = [f"Re-import of note {plan['existing_note_id']}"]
+
+    for stage, decision in plan.get("stages", {}).items():
+        action = "run " if decision["run"] else "skip"
+        lines.append(f"  {action}  {stage:<14} ({decision['reason']})")
+
+    return "\n".join(lines)
+
+def plan_reprocessing(
+    text: str,
+    requested_stages: Dict[str, Dict[str, Any]],
+    stored_fingerprints: Optional[Dict[str, str]] = None,
+    existing_note_id: Optional[int] = None
+) -> ReprocessingPlan:
+    """
+    Decide which stages need to run for extracted text.
+
+    Args:
+        text (str): Extracted text
+        requested_stages (Dict[str, Dict[str, Any]]): Requested stages mapped to their parameters
+        stored_fingerprints (Dict[str, str], optional): Fingerprints stored for the existing note
+        existing_note_id (int, optional): ID of the existing note, if any
+
+    Returns:
+        ReprocessingPlan: Plan with a decision for the text and every requested stage
+    """
+    stored_fingerprints = stored_fingerprints or {}
+    plan = ReprocessingPlan(existing_note_id)
+
+    text_fingerprint = fingerprint_text(text)
+    plan.add(TEXT_STAGE, text_fingerprint, stored_fingerprints.get(TEXT_STAGE))
+
+    for stage, params in requested_stages.items():
+        fingerprint = fingerprint_stage(stage, text_fingerprint, params)
+        plan.add(stage, fingerprint, stored_fingerprints.get(stage))
+
+    logger.debug(f"Reprocessing plan: run {plan.stages_to_run}, skip {plan.stages_to_skip}")
+    return plan
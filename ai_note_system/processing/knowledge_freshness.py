@@ -6,10 +6,15 @@ Flags outdated notes in fast-evolving fields and suggests updated resources.
 import os
 import logging
 import json
+import warnings
 from typing import Dict, Any, List, Optional, Union, Tuple
 from datetime import datetime, timedelta
 import re
 
+import numpy as np
+
+from ..utils.periodic_task import PeriodicTask
+
 # Setup logging
 logger = logging.getLogger("ai_note_system.processing.knowledge_freshness")
 
@@ -18,16 +23,27 @@ class KnowledgeFreshness:
     Manages the freshness of knowledge in notes, flagging outdated content and suggesting updates.
     """
     
-    def __init__(self, db_manager, research_monitor=None):
+    def __init__(self, db_manager, research_monitor=None, full_refresh_interval: timedelta = timedelta(days=1)):
         """
         Initialize the knowledge freshness manager.
         
         Args:
             db_manager: Database manager instance
             research_monitor: Research monitor instance for finding updated resources
+            full_refresh_interval (timedelta): Maximum age of the scores of unchanged notes
         """
         self.db_manager = db_manager
         self.research_monitor = research_monitor
+        self.full_refresh_interval = full_refresh_interval
+        
+        self._refresh_task = PeriodicTask(
+            "freshness-refresh",
+            db_manager,
+            lambda task_db_manager: KnowledgeFreshness(
+                task_db_manager, full_refresh_interval=full_refresh_interval
+            ).refresh_freshness
+        )
+        
         self._ensure_freshness_tables()
     
     def _ensure_freshness_tables(self) -> None:
@@ -63,6 +79,20 @@ class KnowledgeFreshness:
         """
         self.db_manager.execute_query(freshness_query)
         
+        self.db_manager.execute_query("""
+        CREATE INDEX IF NOT EXISTS idx_note_freshness_outdated ON note_freshness (is_outdated, freshness_score)
+        """)
+        
+        # Create freshness_state table (last full refresh and the half-lives it used)
+        state_query = """
+        CREATE TABLE IF NOT EXISTS freshness_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            last_full_refresh TEXT NOT NULL,
+            half_life_signature TEXT NOT NULL
+        )
+        """
+        self.db_manager.execute_query(state_query)
+        
         # Create update_suggestions table
         suggestions_query = """
         CREATE TABLE IF NOT EXISTS update_suggestions (
@@ -254,195 +284,283 @@ class KnowledgeFreshness:
         half_lives = [dict(result) for result in results]
         return half_lives
     
-    def calculate_note_freshness(self, note_id: int) -> Dict[str, Any]:
+    def _resolve_half_lives(self, tags: List[str], half_lives: List[Dict[str, Any]], cache: Dict[str, List[Dict[str, Any]]]) -> Tuple[int, List[str]]:
         """
-        Calculate the freshness score for a note.
+        Find the half-life of a note from its tags.
+        
+        A tag that names a topic uses that topic; otherwise every topic containing
+        the tag, or contained in it, applies. The shortest applicable half-life wins.
         
         Args:
-            note_id (int): ID of the note
+            tags (List[str]): Tags of the note
+            half_lives (List[Dict[str, Any]]): All knowledge half-life values
+            cache (Dict[str, List[Dict[str, Any]]]): Applicable half-lives per normalized tag, filled as tags are seen
             
         Returns:
-            Dict[str, Any]: Freshness calculation result
+            Tuple[int, List[str]]: Half-life in days and the applicable topics
         """
-        # Get note
-        note_query = "SELECT * FROM notes WHERE id = ?"
-        note = self.db_manager.execute_query(note_query, (note_id,)).fetchone()
-        
-        if not note:
-            return {
-                "status": "error",
-                "message": f"Note with ID {note_id} not found"
-            }
-        
-        # Get note tags
-        tags = note.get("tags", "").split(",") if note.get("tags") else []
-        
-        # Get note creation date
-        created_at = datetime.fromisoformat(note["created_at"]) if note.get("created_at") else datetime.now()
-        
-        # Get note last updated date (if available)
-        last_updated = datetime.fromisoformat(note["updated_at"]) if note.get("updated_at") else created_at
-        
-        # Find applicable half-life values based on tags
         applicable_half_lives = []
         
         for tag in tags:
             tag = tag.strip().lower().replace(" ", "_")
-            
-            # Check for exact match
-            half_life_query = "SELECT * FROM knowledge_half_life WHERE topic = ?"
-            half_life = self.db_manager.execute_query(half_life_query, (tag,)).fetchone()
-            
-            if half_life:
-                applicable_half_lives.append(dict(half_life))
+            if not tag:
                 continue
             
-            # Check for partial matches
-            partial_query = "SELECT * FROM knowledge_half_life WHERE topic LIKE ? OR ? LIKE '%' || topic || '%'"
-            partial_matches = self.db_manager.execute_query(partial_query, (f"%{tag}%", tag)).fetchall()
+            if tag not in cache:
+                exact = [hl for hl in half_lives if hl["topic"].lower() == tag]
+                cache[tag] = exact or [
+                    hl for hl in half_lives
+                    if tag in hl["topic"].lower() or hl["topic"].lower() in tag
+                ]
             
-            for match in partial_matches:
-                applicable_half_lives.append(dict(match))
+            applicable_half_lives.extend(cache[tag])
         
         # If no applicable half-lives found, use a default value
         if not applicable_half_lives:
-            default_half_life = 365  # 1 year
-        else:
-            # Use the shortest half-life (most conservative)
-            default_half_life = min(hl["half_life_days"] for hl in applicable_half_lives)
+            return 365, []
         
-        # Calculate age in days
-        age_days = (datetime.now() - last_updated).days
+        # Use the shortest half-life (most conservative)
+        return min(hl["half_life_days"] for hl in applicable_half_lives), [hl["topic"] for hl in applicable_half_lives]
+    
+    def _compute_freshness(self, notes: List[Dict[str, Any]], half_lives: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Calculate freshness scores of many notes at once.
         
-        # Calculate freshness score using exponential decay formula
-        # freshness = 2^(-age/half_life)
-        # This gives 1.0 for fresh content and approaches 0.0 as content ages
-        freshness_score = 2 ** (-age_days / default_half_life)
+        Scores decay exponentially with the age of the note: freshness = 2^(-age/half_life),
+        1.0 for fresh content and approaching 0.0 as content ages.
         
-        # Determine if the note is outdated (freshness below 0.5)
-        is_outdated = freshness_score < 0.5
+        Args:
+            notes (List[Dict[str, Any]]): Notes with id, tags and last_updated
+            half_lives (List[Dict[str, Any]]): All knowledge half-life values
+            
+        Returns:
+            List[Dict[str, Any]]: Freshness result per note, in the order of notes
+        """
+        now = datetime.now()
+        cache: Dict[str, List[Dict[str, Any]]] = {}
         
-        # Store freshness in database
-        self._store_freshness(note_id, freshness_score, last_updated, is_outdated)
+        resolved = [self._resolve_half_lives((note["tags"] or "").split(","), half_lives, cache) for note in notes]
+        half_life_days = np.array([days for days, _ in resolved], dtype=float)
+        
+        # Age in whole days; notes without timestamps are fresh
+        timestamps = [note["last_updated"] or now.isoformat() for note in notes]
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("error")
+                last_updated = np.array(timestamps, dtype="datetime64[us]")
+            age_days = (np.datetime64(now, "us") - last_updated).astype(np.int64) // 86_400_000_000
+        except (ValueError, TypeError, UserWarning):
+            age_days = np.array([(now - datetime.fromisoformat(timestamp)).days for timestamp in timestamps], dtype=np.int64)
+        
+        freshness_scores = np.exp2(-age_days / half_life_days)
+        
+        # Notes with freshness below 0.5 are outdated
+        is_outdated = freshness_scores < 0.5
+        
+        return [
+            {
+                "note_id": note["id"],
+                "freshness_score": float(freshness_scores[i]),
+                "age_days": int(age_days[i]),
+                "half_life_days": int(half_life_days[i]),
+                "last_updated": timestamps[i],
+                "stored_last_updated": note["last_updated"],
+                "is_outdated": bool(is_outdated[i]),
+                "applicable_topics": resolved[i][1]
+            }
+            for i, note in enumerate(notes)
+        ]
+    
+    def _store_freshness(self, results: List[Dict[str, Any]]) -> None:
+        """
+        Upsert freshness information of many notes with one statement, and so in one transaction.
+        
+        Args:
+            results (List[Dict[str, Any]]): Freshness results from _compute_freshness
+        """
+        if not results:
+            return
+        
+        # The note's own timestamp is stored, so notes edited since are found by comparison
+        rows = json.dumps([
+            [result["note_id"], result["freshness_score"], result["stored_last_updated"], 1 if result["is_outdated"] else 0]
+            for result in results
+        ])
+        
+        query = """
+        INSERT INTO note_freshness (note_id, freshness_score, last_updated, is_outdated)
+        SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]'), json_extract(value, '$[2]'), json_extract(value, '$[3]')
+        FROM json_each(?)
+        WHERE 1
+        ON CONFLICT (note_id) DO UPDATE SET
+            freshness_score = excluded.freshness_score,
+            last_updated = excluded.last_updated,
+            is_outdated = excluded.is_outdated,
+            updated_at = CURRENT_TIMESTAMP
+        """
+        
+        self.db_manager.execute_query(query, (rows,))
+    
+    def refresh_freshness(self, note_ids: Optional[List[int]] = None, full: bool = False) -> Dict[str, Any]:
+        """
+        Recalculate freshness scores in one batch.
+        
+        Without note IDs, only notes that are new or were edited since their score was
+        calculated are refreshed. All notes are refreshed when full is set, when the
+        half-life values changed, or when the last full refresh is older than
+        full_refresh_interval, as scores decay with time.
+        
+        Args:
+            note_ids (List[int], optional): Refresh only these notes
+            full (bool): Refresh all notes
+            
+        Returns:
+            Dict[str, Any]: Refresh mode and numbers of refreshed and outdated notes
+        """
+        half_lives = self.get_half_lives()
+        signature = json.dumps(sorted([hl["topic"], hl["half_life_days"]] for hl in half_lives))
+        
+        state = self.db_manager.execute_query(
+            "SELECT last_full_refresh, half_life_signature FROM freshness_state WHERE id = 1"
+        ).fetchone()
+        
+        if note_ids is not None:
+            mode = "notes"
+        elif (
+            full or not state or state["half_life_signature"] != signature or
+            datetime.now() - datetime.fromisoformat(state["last_full_refresh"]) >= self.full_refresh_interval
+        ):
+            mode = "full"
+        else:
+            mode = "incremental"
+        
+        # Load the notes to refresh
+        select = "SELECT n.id, n.tags, COALESCE(n.updated_at, n.created_at) AS last_updated FROM notes n"
+        
+        if mode == "notes":
+            notes = []
+            for i in range(0, len(note_ids), 500):
+                chunk = note_ids[i:i + 500]
+                notes.extend(self.db_manager.execute_query(
+                    f"{select} WHERE n.id IN ({', '.join('?' * len(chunk))})", chunk
+                ).fetchall())
+        elif mode == "incremental":
+            notes = self.db_manager.execute_query(f"""
+            {select}
+            LEFT JOIN note_freshness nf ON nf.note_id = n.id
+            WHERE nf.note_id IS NULL OR nf.last_updated IS NOT COALESCE(n.updated_at, n.created_at)
+            """).fetchall()
+        else:
+            notes = self.db_manager.execute_query(select).fetchall()
+        
+        results = self._compute_freshness(notes, half_lives)
+        self._store_freshness(results)
+        
+        if mode == "full":
+            # Forget deleted notes and remember the run
+            self.db_manager.execute_query("DELETE FROM note_freshness WHERE note_id NOT IN (SELECT id FROM notes)")
+            self.db_manager.execute_query("""
+            INSERT OR REPLACE INTO freshness_state (id, last_full_refresh, half_life_signature)
+            VALUES (1, ?, ?)
+            """, (datetime.now().isoformat(), signature))
+        
+        outdated = sum(1 for result in results if result["is_outdated"])
+        logger.info(f"Refreshed freshness of {len(results)} notes ({mode}), {outdated} outdated")
         
         return {
             "status": "success",
-            "note_id": note_id,
-            "freshness_score": freshness_score,
-            "age_days": age_days,
-            "half_life_days": default_half_life,
-            "last_updated": last_updated.isoformat(),
-            "is_outdated": is_outdated,
-            "applicable_topics": [hl["topic"] for hl in applicable_half_lives]
+            "mode": mode,
+            "refreshed": len(results),
+            "outdated": outdated,
+            "results": results
         }
     
-    def _store_freshness(self, note_id: int, freshness_score: float, last_updated: datetime, is_outdated: bool) -> None:
+    def start_refresh_scheduler(self, interval_seconds: float = 3600) -> bool:
+        """
+        Refresh freshness scores periodically in a background thread.
+        
+        Each run is incremental, with a full refresh once per full_refresh_interval.
+        
+        Args:
+            interval_seconds (float): Seconds between runs
+            
+        Returns:
+            bool: True if the scheduler was started, False if it is already running
+        """
+        if not self._refresh_task.start(interval_seconds):
+            return False
+        
+        logger.info(f"Freshness refresh scheduler started, every {interval_seconds} seconds")
+        return True
+    
+    def stop_refresh_scheduler(self) -> None:
+        """
+        Stop the background refresh thread, waiting for a running refresh to finish.
+        """
+        self._refresh_task.stop()
+    
+    def calculate_note_freshness(self, note_id: int) -> Dict[str, Any]:
         """
-        Store freshness information for a note.
+        Calculate the freshness score for a note.
         
         Args:
             note_id (int): ID of the note
-            freshness_score (float): Freshness score (0.0 to 1.0)
-            last_updated (datetime): When the note was last updated
-            is_outdated (bool): Whether the note is considered outdated
+            
+        Returns:
+            Dict[str, Any]: Freshness calculation result
         """
-        # Check if freshness record already exists
-        check_query = "SELECT id FROM note_freshness WHERE note_id = ?"
-        existing = self.db_manager.execute_query(check_query, (note_id,)).fetchone()
+        results = self.refresh_freshness(note_ids=[note_id])["results"]
         
-        if existing:
-            # Update existing record
-            update_query = """
-            UPDATE note_freshness
-            SET freshness_score = ?, last_updated = ?, is_outdated = ?, updated_at = CURRENT_TIMESTAMP
-            WHERE note_id = ?
-            """
-            
-            self.db_manager.execute_query(update_query, (
-                freshness_score,
-                last_updated.isoformat(),
-                1 if is_outdated else 0,
-                note_id
-            ))
-        else:
-            # Insert new record
-            insert_query = """
-            INSERT INTO note_freshness (note_id, freshness_score, last_updated, is_outdated)
-            VALUES (?, ?, ?, ?)
-            """
-            
-            self.db_manager.execute_query(insert_query, (
-                note_id,
-                freshness_score,
-                last_updated.isoformat(),
-                1 if is_outdated else 0
-            ))
+        if not results:
+            return {
+                "status": "error",
+                "message": f"Note with ID {note_id} not found"
+            }
+        
+        result = dict(results[0], status="success")
+        result.pop("stored_last_updated")
+        return result
     
     def check_outdated_notes(self, topic: Optional[str] = None) -> Dict[str, Any]:
         """
         Check for outdated notes.
         
+        Notes that are new or were edited since their last check are scored first, in one batch.
+        
         Args:
             topic (str, optional): Filter by topic
             
         Returns:
             Dict[str, Any]: List of outdated notes
         """
-        # Build query
+        refresh = self.refresh_freshness()
+        
+        # Read outdated notes through the outdated index
+        query = """
+        SELECT n.id, n.title, n.tags, n.created_at, n.updated_at,
+               nf.freshness_score, nf.last_updated, nf.is_outdated
+        FROM note_freshness nf
+        JOIN notes n ON n.id = nf.note_id
+        WHERE nf.is_outdated = 1
+        """
+        params: Tuple = ()
+        
         if topic:
-            query = """
-            SELECT n.id, n.title, n.tags, n.created_at, n.updated_at, 
-                   nf.freshness_score, nf.last_updated, nf.is_outdated
-            FROM notes n
-            LEFT JOIN note_freshness nf ON n.id = nf.note_id
-            WHERE n.tags LIKE ? OR n.title LIKE ?
-            ORDER BY nf.freshness_score ASC
-            """
-            
+            query += " AND (n.tags LIKE ? OR n.title LIKE ?)"
             search_term = f"%{topic}%"
-            notes = self.db_manager.execute_query(query, (search_term, search_term)).fetchall()
-        else:
-            query = """
-            SELECT n.id, n.title, n.tags, n.created_at, n.updated_at, 
-                   nf.freshness_score, nf.last_updated, nf.is_outdated
-            FROM notes n
-            LEFT JOIN note_freshness nf ON n.id = nf.note_id
-            ORDER BY nf.freshness_score ASC
-            """
-            
-            notes = self.db_manager.execute_query(query).fetchall()
+            params = (search_term, search_term)
         
-        # Process notes
-        outdated_notes = []
-        unchecked_notes = []
+        query += " ORDER BY nf.freshness_score ASC"
         
-        for note in notes:
-            note_dict = dict(note)
-            
-            # If freshness hasn't been calculated yet, calculate it now
-            if note_dict.get("freshness_score") is None:
-                freshness_result = self.calculate_note_freshness(note_dict["id"])
-                
-                if freshness_result["status"] == "success":
-                    note_dict["freshness_score"] = freshness_result["freshness_score"]
-                    note_dict["is_outdated"] = freshness_result["is_outdated"]
-                    
-                    if freshness_result["is_outdated"]:
-                        outdated_notes.append(note_dict)
-                    
-                else:
-                    unchecked_notes.append(note_dict)
-            
-            # If note is already marked as outdated, add to outdated list
-            elif note_dict.get("is_outdated"):
-                outdated_notes.append(note_dict)
+        outdated_notes = [dict(note) for note in self.db_manager.execute_query(query, params).fetchall()]
         
         return {
             "status": "success",
             "outdated_notes": outdated_notes,
-            "unchecked_notes": unchecked_notes,
+            "unchecked_notes": [],
             "total_outdated": len(outdated_notes),
-            "total_unchecked": len(unchecked_notes)
+            "total_unchecked": 0,
+            "refreshed": refresh["refreshed"]
         }
     
     def suggest_updates(self, note_id: int) -> Dict[str, Any]:
@@ -716,42 +834,33 @@ class KnowledgeFreshness:
         Returns:
             Dict[str, Any]: Freshness report
         """
-        # Get all notes with freshness data
-        query = """
-        SELECT n.id, n.title, n.tags, n.created_at, n.updated_at, 
-               nf.freshness_score, nf.last_updated, nf.is_outdated
-        FROM notes n
-        LEFT JOIN note_freshness nf ON n.id = nf.note_id
-        ORDER BY nf.freshness_score ASC
-        """
-        
-        notes = self.db_manager.execute_query(query).fetchall()
-        
-        # Process notes
-        total_notes = len(notes)
-        notes_with_freshness = 0
-        outdated_notes = 0
-        freshness_scores = []
-        
-        for note in notes:
-            if note["freshness_score"] is not None:
-                notes_with_freshness += 1
-                freshness_scores.append(note["freshness_score"])
-                
-                if note["is_outdated"]:
-                    outdated_notes += 1
-        
-        # Calculate statistics
-        avg_freshness = sum(freshness_scores) / len(freshness_scores) if freshness_scores else 0
+        # Read the stored scores; refresh_freshness keeps them up to date
+        totals = self.db_manager.execute_query("""
+        SELECT (SELECT COUNT(*) FROM notes) AS total_notes,
+               COUNT(*) AS notes_with_freshness,
+               TOTAL(nf.is_outdated) AS outdated_notes,
+               AVG(nf.freshness_score) AS avg_freshness
+        FROM note_freshness nf
+        JOIN notes n ON n.id = nf.note_id
+        """).fetchone()
+        
+        total_notes = totals["total_notes"]
+        notes_with_freshness = totals["notes_with_freshness"]
+        outdated_notes = int(totals["outdated_notes"])
+        avg_freshness = totals["avg_freshness"] or 0
+        
+        notes = self.db_manager.execute_query("""
+        SELECT n.tags, nf.freshness_score, nf.is_outdated
+        FROM note_freshness nf
+        JOIN notes n ON n.id = nf.note_id
+        WHERE n.tags IS NOT NULL AND n.tags != ''
+        """).fetchall()
         
         # Group by tags
         tags_freshness = {}
         
         for note in notes:
-            if note["freshness_score"] is None:
-                continue
-                
-            tags = note.get("tags", "").split(",") if note.get("tags") else []
+            tags = note["tags"].split(",")
             
             for tag in tags:
                 tag = tag.strip()
@@ -883,6 +992,20 @@ def check_outdated_notes(db_manager, topic: Optional[str] = None) -> Dict[str, A
     freshness = KnowledgeFreshness(db_manager)
     return freshness.check_outdated_notes(topic)
 
+def refresh_freshness(db_manager, full: bool = False) -> Dict[str, Any]:
+    """
+    Recalculate the freshness scores of new and edited notes, or of all notes.
+    
+    Args:
+        db_manager: Database manager instance
+        full (bool): Refresh all notes
+        
+    Returns:
+        Dict[str, Any]: Refresh mode and numbers of refreshed and outdated notes
+    """
+    freshness = KnowledgeFreshness(db_manager)
+    return freshness.refresh_freshness(full=full)
+
 def suggest_updates(db_manager, note_id: int) -> Dict[str, Any]:
     """
     Suggest updates for an outdated note.
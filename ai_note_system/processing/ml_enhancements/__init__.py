@@ -4,5 +4,5 @@ Contains advanced AI/ML features to enhance the note-taking system.
 """
 
 from .content_gap_filler import identify_content_gaps, fill_content_gaps
-from .mastery_estimator import estimate_mastery
+from .mastery_estimator import estimate_mastery, estimate_mastery_batch, MasteryEstimator
 from .quiz_adaptive_trainer import generate_adaptive_quiz
\ No newline at end of file
@@ -4,13 +4,17 @@ Estimates user mastery of topics based on review history and quiz performance.
 """
 
 import os
+import time
 import logging
 import json
 import math
+import warnings
 from typing import Dict, Any, List, Optional, Union, Tuple
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import numpy as np
+
 # Setup logging
 logger = logging.getLogger("ai_note_system.processing.ml_enhancements.mastery_estimator")
 
@@ -116,11 +120,8 @@ def get_review_history_from_db(
         List[Dict[str, Any]]: Review history
     """
     try:
-        # This is a placeholder for database integration
-        # In a real implementation, this would query the database
-        
-        # For now, return an empty list
-        return []
+        rows = db_manager.get_review_log([(str(item_id), item_type)])
+        return [{"quality": row["quality"], "timestamp": row["reviewed_at"]} for row in rows]
         
     except Exception as e:
         logger.error(f"Error getting review history from database: {str(e)}")
@@ -196,11 +197,17 @@ def get_quiz_results_from_db(
         List[Dict[str, Any]]: Quiz results
     """
     try:
-        # This is a placeholder for database integration
-        # In a real implementation, this would query the database
-        
-        # For now, return an empty list
-        return []
+        rows = db_manager.get_quiz_results([(str(item_id), item_type)])
+        return [
+            {
+                "quiz_id": row["quiz_id"],
+                "score": row["score"],
+                "difficulty": row["difficulty"],
+                "topic": row["topic"],
+                "timestamp": row["taken_at"]
+            }
+            for row in rows
+        ]
         
     except Exception as e:
         logger.error(f"Error getting quiz results from database: {str(e)}")
@@ -267,29 +274,26 @@ def get_spaced_repetition_data_from_db(
     """
     Get spaced repetition data for an item from the database.
     
+    Items scheduled with the Leitner system are told apart by a box above 0;
+    the box is left out of the data of other items.
+    
     Args:
         item_id (str): ID of the item
         item_type (str): Type of item (note, topic, etc.)
         db_manager: Database manager instance
         
     Returns:
-        Dict[str, Any]: Spaced repetition data
+        Dict[str, Any]: Spaced repetition data, empty if the item was never scheduled
     """
     try:
-        # This is a placeholder for database integration
-        # In a real implementation, this would query the database
+        state = db_manager.get_review_states([(str(item_id), item_type)]).get((str(item_id), item_type))
+        if not state:
+            return {}
         
-        # For now, return default values
-        return {
-            "item_id": item_id,
-            "item_type": item_type,
-            "easiness_factor": 2.5,
-            "interval": 0,
-            "repetitions": 0,
-            "review_count": 0,
-            "last_reviewed": None,
-            "next_review": datetime.now().isoformat()
-        }
+        if not state.get("box"):
+            state.pop("box", None)
+        
+        return state
         
     except Exception as e:
         logger.error(f"Error getting spaced repetition data from database: {str(e)}")
@@ -744,4 +748,363 @@ def generate_recommendations(
         topic = strengths[0]["topic"]  # Top strength
         recommendations.append(f"Leverage your strength in {topic} to help understand related topics.")
     
-    return recommendations
\ No newline at end of file
+    return recommendations
+
+# Difficulty weights of quiz results
+DIFFICULTY_WEIGHTS = {"easy": 0.5, "medium": 1.0, "hard": 1.5}
+
+def _days_ago(timestamps: List[Optional[str]], now: datetime) -> np.ndarray:
+    """
+    Get the whole days elapsed since many ISO timestamps.
+    
+    Args:
+        timestamps (List[Optional[str]]): ISO timestamps
+        now (datetime): Current time
+    
+    Returns:
+        np.ndarray: Days ago per timestamp, NaN where a timestamp is missing or invalid
+    """
+    days = np.full(len(timestamps), np.nan)
+    if not timestamps:
+        return days
+    
+    try:
+        # Parse all timestamps at once; timezones and invalid strings take the slow path
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            parsed = np.array([timestamp or None for timestamp in timestamps], dtype="datetime64[us]")
+        
+        valid = ~np.isnat(parsed)
+        elapsed = (np.datetime64(now, "us") - parsed[valid]).astype(np.int64)
+        days[valid] = elapsed // 86_400_000_000
+    
+    except (ValueError, TypeError, UserWarning):
+        for i, timestamp in enumerate(timestamps):
+            if timestamp:
+                try:
+                    days[i] = (now - datetime.fromisoformat(timestamp)).days
+                except (ValueError, TypeError):
+                    pass
+    
+    return days
+
+class MasteryEstimator:
+    """
+    Batch mastery estimator.
+    
+    Loads the review log, quiz results and spaced repetition state of many items
+    with a few bulk queries into columnar arrays and computes the same scores as
+    estimate_mastery for all of them at once. With a database, reports are cached
+    until a review or quiz result is recorded, or for at most max_age seconds.
+    """
+    
+    def __init__(self, db_manager=None, max_age: float = 3600):
+        """
+        Initialize the estimator.
+        
+        Args:
+            db_manager: Database manager instance (files are read per item without one)
+            max_age (float): Seconds after which cached reports are recomputed, as recency weights age
+        """
+        self.db_manager = db_manager
+        self.max_age = max_age
+        
+        self.signature: Optional[Tuple] = None
+        self.computed_at = 0.0
+        self.reports: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.complete = False
+    
+    def invalidate(self) -> None:
+        """
+        Drop all cached reports.
+        """
+        self.reports = {}
+        self.complete = False
+        self.signature = None
+    
+    def _validate_cache(self) -> None:
+        if not self.db_manager:
+            self.invalidate()
+            return
+        
+        signature = self.db_manager.get_learning_signature()
+        if signature != self.signature or time.time() - self.computed_at > self.max_age:
+            self.invalidate()
+            self.signature = signature
+            self.computed_at = time.time()
+    
+    def estimate(self, item_ids: Optional[List[str]] = None, item_type: str = "note") -> Dict[str, Dict[str, Any]]:
+        """
+        Estimate mastery for many items.
+        
+        Args:
+            item_ids (List[str], optional): IDs of the items, or None for every item with
+                a review, quiz result or spaced repetition state (database only)
+            item_type (str): Type of the items (note, topic, etc.)
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: Mastery report per item ID
+        """
+        self._validate_cache()
+        
+        if item_ids is None:
+            if not self.db_manager:
+                logger.error("Database manager is required to estimate mastery of all items")
+                return {}
+            
+            # One pass over the whole corpus covers every item type
+            if not self.complete:
+                self.reports = self._compute(None)
+                self.complete = True
+            
+            return {key[0]: report for key, report in self.reports.items() if key[1] == item_type}
+        
+        keys = [(str(item_id), item_type) for item_id in item_ids]
+        missing = [key for key in dict.fromkeys(keys) if key not in self.reports]
+        if missing:
+            self.reports.update(self._compute(missing))
+        
+        return {key[0]: self.reports[key] for key in keys}
+    
+    def _load(self, keys: Optional[List[Tuple[str, str]]]) -> Tuple[List[Tuple[str, str]], List, List, List]:
+        """
+        Load the history of items as row tuples.
+        
+        Args:
+            keys (List[Tuple[str, str]], optional): (item_id, item_type) pairs, or None for all items
+        
+        Returns:
+            Tuple: Item keys, (key, quality, timestamp) reviews, (key, score, difficulty, topic, timestamp)
+                quiz results and (key, easiness_factor, repetitions, interval, box, last_reviewed) states
+        """
+        if not self.db_manager:
+            reviews, quizzes, states = [], [], []
+            for key in keys:
+                for review in get_review_history_from_file(*key):
+                    reviews.append((key, review.get("quality", 0), review.get("timestamp")))
+                
+                for result in get_quiz_results_from_file(*key):
+                    quizzes.append((
+                        key,
+                        result.get("score", 0.0),
+                        result.get("difficulty", "medium"),
+                        result.get("topic", "general"),
+                        result.get("timestamp")
+                    ))
+                
+                state = get_spaced_repetition_data_from_file(*key)
+                if state:
+                    states.append((
+                        key,
+                        state.get("easiness_factor", 2.5),
+                        state.get("repetitions", 0),
+                        state.get("interval", 0),
+                        state.get("box", 0) if "box" in state else None,
+                        state.get("last_reviewed")
+                    ))
+            
+            return keys, reviews, quizzes, states
+        
+        reviews = [((row["item_id"], row["item_type"]), row["quality"], row["reviewed_at"]) for row in self.db_manager.get_review_log(keys)]
+        quizzes = [
+            ((row["item_id"], row["item_type"]), row["score"], row["difficulty"], row["topic"], row["taken_at"])
+            for row in self.db_manager.get_quiz_results(keys)
+        ]
+        states = [
+            (key, state["easiness_factor"], state["repetitions"], state["interval"], state["box"] or None, state["last_reviewed"])
+            for key, state in self.db_manager.get_review_states(keys).items()
+        ]
+        
+        if keys is None:
+            keys = sorted({row[0] for rows in (reviews, quizzes, states) for row in rows})
+        
+        return keys, reviews, quizzes, states
+    
+    def _compute(self, keys: Optional[List[Tuple[str, str]]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """
+        Compute mastery reports for items, vectorized across items.
+        
+        Args:
+            keys (List[Tuple[str, str]], optional): (item_id, item_type) pairs, or None for all items
+        
+        Returns:
+            Dict[Tuple[str, str], Dict[str, Any]]: Mastery report per (item_id, item_type)
+        """
+        now = datetime.now()
+        keys, reviews, quizzes, states = self._load(keys)
+        
+        index = {key: i for i, key in enumerate(keys)}
+        n = len(keys)
+        
+        # Reviews: recency-weighted mean quality
+        review_idx = np.array([index[row[0]] for row in reviews], dtype=np.int64)
+        quality = np.array([row[1] for row in reviews], dtype=float)
+        review_days = _days_ago([row[2] for row in reviews], now)
+        
+        review_weight = np.where(np.isnan(review_days), 1.0, np.maximum(0.1, 1.0 - review_days / 365))
+        review_count = np.bincount(review_idx, minlength=n)
+        review_total = np.bincount(review_idx, weights=review_weight, minlength=n)
+        review_score = np.divide(
+            np.bincount(review_idx, weights=quality / 5.0 * review_weight, minlength=n), review_total,
+            out=np.zeros(n), where=review_total > 0
+        )
+        
+        # Quiz results: recency- and difficulty-weighted mean score
+        quiz_idx = np.array([index[row[0]] for row in quizzes], dtype=np.int64)
+        quiz_score = np.array([row[1] for row in quizzes], dtype=float)
+        difficulty_weight = np.array([DIFFICULTY_WEIGHTS.get(row[2], 1.0) for row in quizzes], dtype=float)
+        quiz_days = _days_ago([row[4] for row in quizzes], now)
+        
+        quiz_weight = np.where(np.isnan(quiz_days), 1.0, np.maximum(0.1, 1.0 - quiz_days / 365)) * difficulty_weight
+        quiz_count = np.bincount(quiz_idx, minlength=n)
+        quiz_total = np.bincount(quiz_idx, weights=quiz_weight, minlength=n)
+        quiz_mastery = np.divide(
+            np.bincount(quiz_idx, weights=quiz_score * quiz_weight, minlength=n), quiz_total,
+            out=np.zeros(n), where=quiz_total > 0
+        )
+        
+        # Spaced repetition state: Leitner box, or normalized SM-2 values
+        has_sr = np.zeros(n, dtype=bool)
+        easiness = np.full(n, 2.5)
+        repetitions = np.zeros(n)
+        interval = np.zeros(n)
+        box = np.full(n, np.nan)
+        
+        sr_idx = np.array([index[row[0]] for row in states], dtype=np.int64)
+        has_sr[sr_idx] = True
+        easiness[sr_idx] = [row[1] for row in states]
+        repetitions[sr_idx] = [row[2] for row in states]
+        interval[sr_idx] = [row[3] for row in states]
+        box[sr_idx] = [np.nan if row[4] is None else row[4] for row in states]
+        sr_days = _days_ago([row[5] for row in states], now)
+        
+        sm2_score = (
+            np.clip((easiness - 1.3) / 1.2, 0.0, 1.0) +
+            np.minimum(1.0, repetitions / 10) +
+            np.minimum(1.0, interval / 365)
+        ) / 3
+        sr_score = np.where(np.isnan(box), sm2_score, np.minimum(1.0, box / 5))
+        sr_score[~has_sr] = 0.0
+        
+        # Combine scores with the weights of the available data
+        sr_weight = np.where(has_sr, 0.4, 0.0)
+        quiz_part = np.where(quiz_count > 0, 0.4, 0.0)
+        review_part = np.where(review_count > 0, 0.2, 0.0)
+        total_weight = sr_weight + quiz_part + review_part
+        
+        safe_total = np.where(total_weight > 0, total_weight, 1.0)
+        mastery = np.where(
+            total_weight > 0,
+            sr_weight / safe_total * sr_score + quiz_part / safe_total * quiz_mastery + review_part / safe_total * review_score,
+            0.0
+        )
+        
+        # Confidence from the amount and recency of data
+        count_confidence = np.minimum(1.0, (review_count + quiz_count + has_sr) / 10)
+        
+        recency = np.zeros(n)
+        recency_count = np.zeros(n)
+        for idx, days in ((review_idx, review_days), (quiz_idx, quiz_days), (sr_idx, sr_days)):
+            valid = ~np.isnan(days)
+            recency += np.bincount(idx[valid], weights=np.maximum(0.0, 1.0 - days[valid] / 365), minlength=n)
+            recency_count += np.bincount(idx[valid], minlength=n)
+        
+        recency = np.divide(recency, recency_count, out=recency, where=recency_count > 0)
+        confidence = (count_confidence + recency) / 2
+        
+        strengths, weaknesses = self._topic_scores(n, quiz_idx, quizzes)
+        
+        timestamp = now.isoformat()
+        reports = {}
+        for i, (item_id, item_type) in enumerate(keys):
+            score = float(mastery[i])
+            reports[(item_id, item_type)] = {
+                "item_id": item_id,
+                "item_type": item_type,
+                "mastery_score": score,
+                "confidence": float(confidence[i]),
+                "strengths": strengths[i],
+                "weaknesses": weaknesses[i],
+                "recommendations": generate_recommendations(score, strengths[i], weaknesses[i]),
+                "timestamp": timestamp
+            }
+        
+        logger.info(f"Estimated mastery for {n} items from {len(reviews)} reviews and {len(quizzes)} quiz results")
+        return reports
+    
+    @staticmethod
+    def _topic_scores(n: int, quiz_idx: np.ndarray, quizzes: List) -> Tuple[List[List[Dict[str, Any]]], List[List[Dict[str, Any]]]]:
+        """
+        Find the strengths and weaknesses of each item from its mean quiz score per topic.
+        
+        Args:
+            n (int): Number of items
+            quiz_idx (np.ndarray): Item index of each quiz result
+            quizzes (List): Quiz result rows
+        
+        Returns:
+            Tuple: Strengths and weaknesses per item index
+        """
+        strengths = [[] for _ in range(n)]
+        weaknesses = [[] for _ in range(n)]
+        if not quizzes:
+            return strengths, weaknesses
+        
+        topics: Dict[str, int] = {}
+        topic_codes = np.array([topics.setdefault(row[3], len(topics)) for row in quizzes], dtype=np.int64)
+        names = list(topics)
+        
+        # One group per (item, topic), in order of first appearance within the item
+        groups, first, inverse = np.unique(quiz_idx * len(topics) + topic_codes, return_index=True, return_inverse=True)
+        counts = np.bincount(inverse)
+        means = np.bincount(inverse, weights=np.array([row[1] for row in quizzes], dtype=float)) / counts
+        
+        for g in np.lexsort((first, groups // len(topics))):
+            i = int(groups[g] // len(topics))
+            entry = {
+                "topic": names[groups[g] % len(topics)],
+                "score": float(means[g]),
+                "confidence": min(1.0, float(counts[g]) / 5)
+            }
+            if entry["score"] >= 0.8:
+                strengths[i].append(entry)
+            elif entry["score"] <= 0.6:
+                weaknesses[i].append(entry)
+        
+        for i in range(n):
+            strengths[i].sort(key=lambda x: x["score"], reverse=True)
+            weaknesses[i].sort(key=lambda x: x["score"])
+        
+        return strengths, weaknesses
+
+# Batch estimators per database
+_estimator_cache: Dict[str, MasteryEstimator] = {}
+
+def estimate_mastery_batch(
+    item_ids: Optional[List[str]] = None,
+    item_type: str = "note",
+    db_manager=None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Estimate mastery for many items at once, reusing cached reports until new reviews are recorded.
+    
+    Args:
+        item_ids (List[str], optional): IDs of the items, or None for every item with data (database only)
+        item_type (str): Type of the items (note, topic, etc.)
+        db_manager: Database manager instance
+    
+    Returns:
+        Dict[str, Dict[str, Any]]: Mastery report per item ID
+    """
+    if not db_manager:
+        return MasteryEstimator().estimate(item_ids, item_type)
+    
+    cache_key = os.path.abspath(db_manager.db_path)
+    estimator = _estimator_cache.get(cache_key)
+    if estimator is None:
+        estimator = _estimator_cache[cache_key] = MasteryEstimator(db_manager)
+    
+    # The connection of the calling thread
+    estimator.db_manager = db_manager
+    
+    return estimator.estimate(item_ids, item_type)
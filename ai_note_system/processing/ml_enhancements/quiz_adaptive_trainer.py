@@ -419,8 +419,25 @@ def save_quiz_results_to_db(
         Dict[str, Any]: Result of the save operation
     """
     try:
-        # This is a placeholder for database integration
-        # In a real implementation, this would update the database
+        # Record one result per topic, as read by the mastery estimator
+        analysis = analyze_quiz_results(results)
+        timestamp = results.get("timestamp", datetime.now().isoformat())
+        
+        rows = [
+            {
+                "item_id": item_id,
+                "item_type": results.get("item_type", "note"),
+                "quiz_id": quiz_id,
+                "score": counts["score"],
+                "difficulty": results.get("difficulty", "medium"),
+                "topic": topic,
+                "timestamp": timestamp
+            }
+            for topic, counts in analysis["topic_scores"].items()
+        ]
+        
+        if not db_manager.save_quiz_results(rows):
+            return {"success": False, "error": "Error saving quiz results to database"}
         
         logger.debug(f"Quiz results for item {item_id}, quiz {quiz_id} saved to database")
         return {"success": True}
@@ -0,0 +1,305 @@
+"""
+Near-duplicate detection module for AI Note System.
+Detects notes that were already ingested from a slightly different source
+(another PDF export, a re-generated transcript, ...) using MinHash signatures
+and an LSH bucket index stored in the database.
+"""
+
+import re
+import hashlib
+import logging
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+import numpy as np
+
+# Setup logging
+logger = logging.getLogger("ai_note_system.processing.near_duplicate")
+
+# SplitMix64 finalizer constants; each permutation mixes the shingle hash
+# XORed with its own seed, relying on wrap-around uint64 arithmetic
+_MIX_MULTIPLIER_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_MULTIPLIER_2 = np.uint64(0x94D049BB133111EB)
+_EMPTY_HASH = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+DEFAULT_NUM_PERM = 128
+DEFAULT_SHINGLE_SIZE = 3
+DEFAULT_THRESHOLD = 0.8
+
+def shingle_text(text: str, shingle_size: int = DEFAULT_SHINGLE_SIZE) -> Set[str]:
+    """
+    Split text into overlapping word shingles.
+
+    Text is lower-cased and stripped of punctuation first, so formatting
+    differences between exports do not affect the shingles.
+
+    Args:
+        text (str): Text to shingle
+        shingle_size (int): Number of words per shingle
+
+    Returns:
+        Set[str]: Set of shingles
+    """
+    words = re.findall(r"\w+", (text or "").lower())
+    if len(words) < shingle_size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+
+def optimal_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    Choose the LSH band layout for a Jaccard threshold.
+
+    Picks the (bands, rows) split of the signature whose S-curve midpoint
+    (1 / bands) ** (1 / rows) is closest to the threshold without exceeding it,
+    so that true near-duplicates are rarely missed.
+
+    Args:
+        num_perm (int): Signature length
+        threshold (float): Jaccard similarity threshold
+
+    Returns:
+        Tuple[int, int]: Number of bands and rows per band
+    """
+    best = (num_perm, 1)
+    best_distance = float("inf")
+
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        midpoint = (1.0 / bands) ** (1.0 / rows)
+        if midpoint <= threshold and threshold - midpoint < best_distance:
+            best = (bands, rows)
+            best_distance = threshold - midpoint
+
+    return best
+
+class MinHasher:
+    """
+    Computes MinHash signatures of text.
+    """
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, shingle_size: int = DEFAULT_SHINGLE_SIZE, seed: int = 1):
+        """
+        Initialize the MinHasher.
+
+        Args:
+            num_perm (int): Number of hash permutations (signature length)
+            shingle_size (int): Number of words per shingle
+            seed (int): Seed for the permutation coefficients; must stay fixed
+                for stored signatures to remain comparable
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+
+        generator = np.random.RandomState(seed)
+        self._seeds = generator.randint(0, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        Compute the MinHash signature of text.
+
+        Args:
+            text (str): Text to hash
+
+        Returns:
+            np.ndarray: Signature of num_perm uint64 values
+        """
+        shingles = shingle_text(text, self.shingle_size)
+        if not shingles:
+            return np.full(self.num_perm, _EMPTY_HASH, dtype=np.uint64)
+
+        hashes = np.fromiter(
+            (
+                int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+                for shingle in shingles
+            ),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+
+        # (num_shingles, num_perm) permuted hashes, minimum per permutation
+        with np.errstate(over="ignore"):
+            mixed = hashes[:, None] ^ self._seeds[None, :]
+            mixed = (mixed ^ (mixed >> np.uint64(30))) * _MIX_MULTIPLIER_1
+            mixed = (mixed ^ (mixed >> np.uint64(27))) * _MIX_MULTIPLIER_2
+            mixed ^= mixed >> np.uint64(31)
+        return mixed.min(axis=0)
+
+def estimate_jaccard(signature1: np.ndarray, signature2: np.ndarray) -> float:
+    """
+    Estimate the Jaccard similarity of two texts from their signatures.
+
+    Args:
+        signature1 (np.ndarray): First signature
+        signature2 (np.ndarray): Second signature
+
+    Returns:
+        float: Estimated Jaccard similarity (0-1)
+    """
+    if len(signature1) != len(signature2):
+        return 0.0
+    return float(np.mean(signature1 == signature2))
+
+def band_keys(signature: np.ndarray, bands: int, rows: int) -> List[int]:
+    """
+    Hash each band of a signature into an LSH bucket key.
+
+    The band index is part of the key, so keys from different bands never collide.
+
+    Args:
+        signature (np.ndarray): MinHash signature
+        bands (int): Number of bands
+        rows (int): Rows per band
+
+    Returns:
+        List[int]: One signed 63-bit bucket key per band
+    """
+    keys = []
+    for band in range(bands):
+        digest = hashlib.blake2b(
+            band.to_bytes(2, "little") + signature[band * rows:(band + 1) * rows].tobytes(),
+            digest_size=8
+        ).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+class NearDuplicateDetector:
+    """
+    Finds near-duplicate notes through the LSH bucket index in the database.
+
+    Candidate lookup is one indexed query over the note's band keys, so it
+    does not scan the whole corpus; candidates are then confirmed with the
+    estimated Jaccard similarity of their signatures.
+    """
+
+    def __init__(
+        self,
+        db_manager,
+        threshold: float = DEFAULT_THRESHOLD,
+        num_perm: int = DEFAULT_NUM_PERM,
+        shingle_size: int = DEFAULT_SHINGLE_SIZE
+    ):
+        """
+        Initialize the detector.
+
+        Args:
+            db_manager: DatabaseManager instance
+            threshold (float): Jaccard similarity above which notes are near-duplicates
+            num_perm (int): Signature length
+            shingle_size (int): Number of words per shingle
+        """
+        self.db_manager = db_manager
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+        self.bands, self.rows = optimal_bands(num_perm, threshold)
+
+    @property
+    def params(self) -> Dict[str, int]:
+        """
+        Parameters stored signatures and bucket keys depend on.
+        """
+        return {
+            "num_perm": self.hasher.num_perm,
+            "shingle_size": self.hasher.shingle_size,
+            "bands": self.bands,
+            "band_rows": self.rows
+        }
+
+    def compute_signature(self, text: str) -> np.ndarray:
+        """
+        Compute the MinHash signature of text.
+
+        Args:
+            text (str): Text to hash
+
+        Returns:
+            np.ndarray: Signature
+        """
+        return self.hasher.signature(text)
+
+    def find_near_duplicates(
+        self,
+        signature: np.ndarray,
+        exclude_note_id: Optional[int] = None,
+        limit: int = 5
+    ) -> List[Dict[str, Any]]:
+        """
+        Find stored notes whose estimated Jaccard similarity is above the threshold.
+
+        Args:
+            signature (np.ndarray): Signature of the incoming text
+            exclude_note_id (int, optional): Note to leave out (e.g. the note itself)
+            limit (int): Maximum number of results
+
+        Returns:
+            List[Dict[str, Any]]: Matches with 'id', 'title' and 'jaccard', most similar first
+        """
+        candidates = self.db_manager.find_lsh_candidates(band_keys(signature, self.bands, self.rows))
+        candidates = [note_id for note_id in candidates if note_id != exclude_note_id]
+        if not candidates:
+            return []
+
+        matches = []
+        for note_id, stored in self.db_manager.get_note_minhashes(candidates).items():
+            jaccard = estimate_jaccard(signature, np.frombuffer(stored["signature"], dtype=np.uint64))
+            if jaccard >= self.threshold:
+                matches.append({"id": note_id, "title": stored["title"], "jaccard": jaccard})
+
+        matches.sort(key=lambda match: match["jaccard"], reverse=True)
+        return matches[:limit]
+
+    def index_note(self, note_id: int, signature: np.ndarray) -> bool:
+        """
+        Store a note's signature and LSH bucket keys.
+
+        Args:
+            note_id (int): ID of the note
+            signature (np.ndarray): Signature of the note text
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        return self.db_manager.save_note_minhash(
+            note_id,
+            signature.astype(np.uint64).tobytes(),
+            band_keys(signature, self.bands, self.rows)
+        )
+
+    def rebuild_index(self) -> int:
+        """
+        Replace the stored signatures and bucket keys of all notes and record the parameters used.
+
+        Returns:
+            int: Number of notes indexed
+        """
+        self.db_manager.clear_note_minhashes()
+
+        count = 0
+        for note_id, text in self.db_manager.iter_note_texts():
+            if self.index_note(note_id, self.compute_signature(text)):
+                count += 1
+
+        # Recorded last, so an interrupted rebuild is redone on next use
+        self.db_manager.set_minhash_params(self.params)
+
+        logger.info(f"Indexed MinHash signatures for {count} notes")
+        return count
+
+    def ensure_index(self) -> int:
+        """
+        Rebuild the index unless it was built with this detector's parameters.
+
+        Covers notes stored before near-duplicate detection existed, and a changed
+        signature length, shingle size or threshold, whose band layout would never
+        match the stored bucket keys.
+
+        Returns:
+            int: Number of notes indexed, 0 if the index was already up to date
+        """
+        stored = self.db_manager.get_minhash_params()
+        if stored == self.params:
+            return 0
+
+        if stored is not None:
+            logger.info(f"MinHash parameters changed from {stored} to {self.params}, rebuilding the index")
+        return self.rebuild_index()
@@ -0,0 +1,240 @@
+"""
+Note linker module for AI Note System.
+Maintains the related_notes links incrementally: each stored note is compared
+against the full embedding index and linked to its nearest neighbours.
+"""
+
+import os
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..embeddings.vector_index import VectorIndex
+
+# Setup logging
+logger = logging.getLogger("ai_note_system.processing.note_linker")
+
+DEFAULT_TOP_K = 5
+DEFAULT_THRESHOLD = 0.75
+
+# Vector indexes by (absolute database path, model name)
+_indexes: Dict[Tuple[str, str], VectorIndex] = {}
+_indexes_lock = threading.Lock()
+
+# Background rebuilds by absolute database path
+_rebuilds: Dict[str, threading.Thread] = {}
+
+def _on_database_change(db_path: str, kind: str, note_ids: List[int]) -> None:
+    if kind != "deleted":
+        return
+    db_path = os.path.abspath(db_path)
+    for (path, _), index in list(_indexes.items()):
+        if path == db_path:
+            for note_id in note_ids:
+                index.remove(note_id)
+
+class NoteLinker:
+    """
+    Links notes to their nearest neighbours by embedding similarity.
+
+    The embeddings of a model are held in a shared in-memory VectorIndex that
+    is loaded once per process and updated as notes are linked, so linking a
+    new note costs one matrix-vector product instead of re-embedding a sample
+    of recent notes.
+    """
+
+    def __init__(
+        self,
+        db_manager,
+        model_name: str,
+        top_k: int = DEFAULT_TOP_K,
+        threshold: float = DEFAULT_THRESHOLD
+    ):
+        """
+        Initialize the linker.
+
+        Args:
+            db_manager: DatabaseManager instance
+            model_name (str): Embedding model whose vectors are compared
+            top_k (int): Number of neighbours linked to each note
+            threshold (float): Minimum cosine similarity of a link
+        """
+        self.db_manager = db_manager
+        self.model_name = model_name
+        self.top_k = top_k
+        self.threshold = threshold
+
+        type(db_manager).add_change_listener(_on_database_change)
+
+    def get_index(self, including: Optional[int] = None) -> VectorIndex:
+        """
+        Get the shared vector index for this database and model, loading it if
+        needed or if embeddings were added by another process.
+
+        Args:
+            including (int, optional): Note whose stored embedding is about to be
+                added to the index by the caller
+
+        Returns:
+            VectorIndex: Index of note embeddings
+        """
+        key = (os.path.abspath(self.db_manager.db_path), self.model_name)
+
+        with _indexes_lock:
+            index = _indexes.get(key)
+            expected = None if index is None else len(index) + (including is not None and including not in index)
+            if expected is None or expected != self.db_manager.count_note_embeddings(self.model_name):
+                index = self._load_index()
+                _indexes[key] = index
+
+        return index
+
+    def _load_index(self) -> VectorIndex:
+        note_ids, blobs = self.db_manager.get_note_embeddings(self.model_name)
+        index = VectorIndex(initial_capacity=max(1024, len(note_ids)))
+
+        if note_ids:
+            matrix = np.stack([np.frombuffer(blob, dtype=np.float32) for blob in blobs])
+            index.add_many(note_ids, matrix)
+
+        logger.info(f"Loaded {len(note_ids)} note embeddings for {self.model_name}")
+        return index
+
+    def find_neighbours(self, note_id: int, embedding: List[float]) -> List[Tuple[int, float]]:
+        """
+        Find a note's nearest neighbours over all indexed notes.
+
+        Args:
+            note_id (int): ID of the note
+            embedding (List[float]): Embedding of the note
+
+        Returns:
+            List[Tuple[int, float]]: (note_id, similarity) pairs, most similar first
+        """
+        return self.get_index().search(embedding, k=self.top_k, threshold=self.threshold, exclude=[note_id])
+
+    def link_note(self, note_id: int, embedding: List[float]) -> List[Tuple[int, float]]:
+        """
+        Index a note's embedding and replace its links with its current nearest neighbours.
+
+        Writes the links in both directions and prunes stale links in one transaction.
+
+        Args:
+            note_id (int): ID of the note
+            embedding (List[float]): Embedding of the note
+
+        Returns:
+            List[Tuple[int, float]]: The neighbours linked, most similar first
+        """
+        index = self.get_index(including=note_id)
+        index.add(note_id, embedding)
+
+        neighbours = index.search(embedding, k=self.top_k, threshold=self.threshold, exclude=[note_id])
+        if not self.db_manager.replace_note_links(note_id, neighbours, max_links=self.top_k):
+            return []
+
+        if self.db_manager.get_links_model() is None:
+            self.db_manager.set_links_model(self.model_name)
+
+        logger.info(f"Linked note {note_id} to {len(neighbours)} related notes")
+        return neighbours
+
+    def needs_rebuild(self) -> bool:
+        """
+        Check whether the stored links were computed with a different embedding model.
+
+        Returns:
+            bool: True if the links should be rebuilt
+        """
+        stored = self.db_manager.get_links_model()
+        return stored is not None and stored != self.model_name
+
+    def rebuild_links(self, embedder=None) -> int:
+        """
+        Recompute the links of every note from the current model's embeddings.
+
+        Notes without an embedding for the model are embedded first when an
+        embedder is given. Similarities are computed in blocks of one matrix
+        product each and all links are replaced in one transaction.
+
+        Args:
+            embedder (Embedder, optional): Embedder for the model, used to fill in missing embeddings
+
+        Returns:
+            int: Number of notes relinked
+        """
+        if embedder is not None:
+            missing = self.db_manager.get_notes_missing_embeddings(self.model_name)
+            for note_id, text in missing:
+                embedder.store_note_embedding(note_id, text)
+            if missing:
+                logger.info(f"Embedded {len(missing)} notes with {self.model_name}")
+
+        key = (os.path.abspath(self.db_manager.db_path), self.model_name)
+        with _indexes_lock:
+            index = self._load_index()
+            _indexes[key] = index
+
+        note_ids = index.ids.tolist()
+        neighbours = index.search_many(
+            index.matrix,
+            k=self.top_k,
+            threshold=self.threshold,
+            exclude_self=True,
+            query_ids=note_ids
+        )
+
+        if not self.db_manager.replace_all_links(dict(zip(note_ids, neighbours)), self.model_name):
+            return 0
+
+        logger.info(f"Rebuilt links for {len(note_ids)} notes with {self.model_name}")
+        return len(note_ids)
+
+def start_background_rebuild(
+    db_manager,
+    model_name: str,
+    top_k: int = DEFAULT_TOP_K,
+    threshold: float = DEFAULT_THRESHOLD,
+    embedder=None
+) -> Optional[threading.Thread]:
+    """
+    Rebuild all links in a background thread, unless a rebuild is already running.
+
+    The thread opens its own connection to the database of db_manager. It is
+    not a daemon thread, so a short-lived process waits for the rebuild to
+    finish before exiting.
+
+    Args:
+        db_manager: DatabaseManager instance for the database to rebuild
+        model_name (str): Embedding model to rebuild the links with
+        top_k (int): Number of neighbours linked to each note
+        threshold (float): Minimum cosine similarity of a link
+        embedder (Embedder, optional): Embedder for the model, used to fill in missing embeddings
+
+    Returns:
+        Optional[threading.Thread]: The rebuild thread, or None if one was already running
+    """
+    db_manager_class = type(db_manager)
+    db_path = os.path.abspath(db_manager.db_path)
+
+    def run():
+        thread_db_manager = db_manager_class(db_path)
+        try:
+            NoteLinker(thread_db_manager, model_name, top_k=top_k, threshold=threshold).rebuild_links(embedder)
+        except Exception as e:
+            logger.error(f"Error rebuilding note links: {e}")
+        finally:
+            thread_db_manager.close()
+
+    with _indexes_lock:
+        running = _rebuilds.get(db_path)
+        if running is not None and running.is_alive():
+            return None
+        thread = threading.Thread(target=run, name="note-link-rebuild")
+        _rebuilds[db_path] = thread
+        thread.start()
+
+    logger.info(f"Started background rebuild of note links with {model_name}")
+    return thread
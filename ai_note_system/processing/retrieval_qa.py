@@ -199,7 +199,6 @@ def ask_question(
             knowledge_graph_data = query_knowledge_graph(
                 db_manager=db_manager,
                 query=query,
-                max_nodes=max_results * 3,  # Use more nodes for knowledge graph
                 similarity_threshold=threshold,
                 tags=filter_tags
             )
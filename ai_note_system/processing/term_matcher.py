@@ -0,0 +1,211 @@
+"""
+Term matcher module for AI Note System.
+Finds many glossary terms in text in one pass with an Aho-Corasick automaton.
+"""
+
+import logging
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+from collections import deque
+
+# Setup logging
+logger = logging.getLogger("ai_note_system.processing.term_matcher")
+
+def _fold(text: str) -> Tuple[str, Optional[List[int]]]:
+    """
+    Case-fold text, keeping track of where each folded character came from.
+
+    Args:
+        text (str): Text to fold
+
+    Returns:
+        Tuple[str, Optional[List[int]]]: Folded text and, if folding changed its
+            length, the index in text of each folded character
+    """
+    if text.isascii():
+        return text.lower(), None
+
+    folded = []
+    offsets = []
+    for i, char in enumerate(text):
+        char = char.casefold()
+        folded.append(char)
+        offsets.extend([i] * len(char))
+
+    folded = "".join(folded)
+    return folded, (offsets if len(folded) != len(text) else None)
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+class TermMatcher:
+    """
+    Aho-Corasick automaton over a set of terms.
+
+    Matching is case-insensitive (Unicode case folding) and only reports
+    occurrences that are not part of a longer word. Overlapping occurrences of
+    different terms are all reported, e.g. both "neural network" and "network".
+    """
+
+    def __init__(self, terms: Iterable[Tuple[int, str]]):
+        """
+        Build the automaton.
+
+        Args:
+            terms (Iterable[Tuple[int, str]]): (term_id, term) pairs
+        """
+        # Trie transitions, failure links and (length, term IDs) outputs per state
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, List[int]]]] = [[]]
+        self.term_count = 0
+
+        for term_id, term in terms:
+            folded = _fold(term.strip())[0]
+            if folded:
+                self._add(folded, term_id)
+                self.term_count += 1
+
+        self._build_failure_links()
+
+    def __len__(self) -> int:
+        return self.term_count
+
+    def _add(self, folded: str, term_id: int) -> None:
+        state = 0
+        for char in folded:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+
+        # Terms differing only in case end in the same state
+        for length, term_ids in self._output[state]:
+            if length == len(folded):
+                term_ids.append(term_id)
+                return
+        self._output[state].append((len(folded), [term_id]))
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+
+                # Inherit the matches ending at the fallback state
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find(self, text: str) -> List[Tuple[int, int, int]]:
+        """
+        Find all term occurrences in text.
+
+        Args:
+            text (str): Text to search
+
+        Returns:
+            List[Tuple[int, int, int]]: (term_id, start, end) character offsets in text,
+                ordered by start
+        """
+        if not text or not self.term_count:
+            return []
+
+        folded, offsets = _fold(text)
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+
+        matches = []
+        state = 0
+        for i, char in enumerate(folded):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            if not output[state]:
+                continue
+
+            for length, term_ids in output[state]:
+                start = i - length + 1
+                end = i + 1
+
+                if offsets is not None:
+                    # Skip matches that start or end inside an expanded character
+                    if start > 0 and offsets[start - 1] == offsets[start]:
+                        continue
+                    if end < len(offsets) and offsets[end] == offsets[i]:
+                        continue
+                    start = offsets[start]
+                    end = offsets[i] + 1
+
+                # Whole words only
+                if start > 0 and _is_word_char(text[start - 1]) and _is_word_char(text[start]):
+                    continue
+                if end < len(text) and _is_word_char(text[end]) and _is_word_char(text[end - 1]):
+                    continue
+
+                for term_id in term_ids:
+                    matches.append((term_id, start, end))
+
+        matches.sort(key=lambda match: (match[1], match[2]))
+        return matches
+
+    def find_references(
+        self,
+        note_id: int,
+        text: str,
+        context_chars: int = 50
+    ) -> List[Tuple[int, int, str, str]]:
+        """
+        Find term occurrences as glossary reference rows.
+
+        Args:
+            note_id (int): ID of the note the text belongs to
+            text (str): Note text
+            context_chars (int): Characters of context on each side of a match
+
+        Returns:
+            List[Tuple[int, int, str, str]]: (term_id, note_id, context, location) rows
+        """
+        rows = []
+        for term_id, start, end in self.find(text):
+            context = text[max(0, start - context_chars):min(len(text), end + context_chars)]
+            rows.append((term_id, note_id, context, f"position:{start}"))
+        return rows
+
+# Matcher of the current worker process during a bulk rescan
+_worker_matcher: Optional[TermMatcher] = None
+
+def init_worker(terms: List[Tuple[int, str]]) -> None:
+    """
+    Build the matcher of a rescan worker process.
+
+    Args:
+        terms (List[Tuple[int, str]]): (term_id, term) pairs
+    """
+    global _worker_matcher
+    _worker_matcher = TermMatcher(terms)
+
+def match_notes(notes: List[Tuple[int, str]]) -> List[Tuple[int, int, str, str]]:
+    """
+    Find term references in a batch of notes in a rescan worker process.
+
+    Args:
+        notes (List[Tuple[int, str]]): (note_id, text) pairs
+
+    Returns:
+        List[Tuple[int, int, str, str]]: (term_id, note_id, context, location) rows
+    """
+    rows = []
+    for note_id, text in notes:
+        rows.extend(_worker_matcher.find_references(note_id, text or ""))
+    return rows
@@ -0,0 +1,402 @@
+"""
+Topic clustering module for AI Note System.
+Groups notes into topic clusters by community detection over the related-notes
+graph and by mini-batch k-means over note embeddings, keeping the stored
+assignments up to date as notes arrive.
+"""
+
+import logging
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+# Setup logging
+logger = logging.getLogger("ai_note_system.processing.topic_clustering")
+
+# Clustering methods
+GRAPH = "graph"
+EMBEDDING = "embedding"
+METHODS = (GRAPH, EMBEDDING)
+
+def label_propagation(
+    node_count: int,
+    src: np.ndarray,
+    dst: np.ndarray,
+    weights: Optional[np.ndarray] = None,
+    max_iterations: int = 50,
+    seed: int = 0
+) -> np.ndarray:
+    """
+    Detect communities with weighted label propagation.
+
+    Every node repeatedly adopts the label carrying the most edge weight among
+    its neighbours. Each round scores all (node, label) pairs with one sort of a
+    combined key, and a random half of the nodes is updated per round so labels
+    do not oscillate.
+
+    Args:
+        node_count (int): Number of nodes
+        src (np.ndarray): Source node index of each edge
+        dst (np.ndarray): Target node index of each edge
+        weights (np.ndarray, optional): Edge weights (default 1)
+        max_iterations (int): Maximum number of rounds
+        seed (int): Random seed for tie-breaking
+
+    Returns:
+        np.ndarray: Community of each node, numbered from 0
+    """
+    labels = np.arange(node_count, dtype=np.int64)
+    if node_count == 0 or len(src) == 0:
+        return labels
+
+    rng = np.random.default_rng(seed)
+    weights = np.ones(len(src)) if weights is None else np.asarray(weights, dtype=np.float64)
+    nodes = np.concatenate([src, dst]).astype(np.int64)
+    neighbours = np.concatenate([dst, src]).astype(np.int64)
+    weights = np.concatenate([weights, weights])
+
+    for _ in range(max_iterations):
+        # Total weight of each (node, neighbour label) pair, via one sort of a combined key
+        keys = nodes * node_count + labels[neighbours]
+        order = np.argsort(keys)
+        keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        scores = np.add.reduceat(weights[order], starts) + rng.random(len(starts)) * 1e-9
+        pair_nodes, pair_labels = np.divmod(keys[starts], node_count)
+
+        # Best label per node: the first pair reaching the node's maximum score
+        node_starts = np.flatnonzero(np.r_[True, pair_nodes[1:] != pair_nodes[:-1]])
+        maxima = np.maximum.reduceat(scores, node_starts)
+        best = np.flatnonzero(scores == np.repeat(maxima, np.diff(np.r_[node_starts, len(scores)])))
+        best = best[np.r_[True, pair_nodes[best][1:] != pair_nodes[best][:-1]]]
+        best_nodes, best_labels = pair_nodes[best], pair_labels[best]
+
+        changed = best_labels != labels[best_nodes]
+        if not changed.any():
+            break
+
+        update = changed & (rng.random(len(best_nodes)) < 0.5)
+        labels[best_nodes[update]] = best_labels[update]
+
+    return np.unique(labels, return_inverse=True)[1].astype(np.int64)
+
+class MiniBatchKMeans:
+    """
+    Spherical mini-batch k-means.
+
+    Vectors and centroids are L2-normalized, so assignment is a matrix product
+    followed by an argmax. Centroids move towards each mini-batch with a
+    per-centroid learning rate of 1 / (number of vectors seen), which also
+    makes single-vector updates for newly arriving notes consistent with the
+    batch fit.
+    """
+
+    def __init__(
+        self,
+        k: int,
+        batch_size: int = 1024,
+        iterations: int = 100,
+        seed: int = 0,
+        centroids: Optional[np.ndarray] = None,
+        counts: Optional[np.ndarray] = None
+    ):
+        """
+        Initialize the model.
+
+        Args:
+            k (int): Number of clusters
+            batch_size (int): Vectors per mini-batch
+            iterations (int): Mini-batches used by fit
+            seed (int): Random seed
+            centroids (np.ndarray, optional): Centroids of a previously fitted model
+            counts (np.ndarray, optional): Vectors seen per centroid of a previously fitted model
+        """
+        self.k = k
+        self.batch_size = batch_size
+        self.iterations = iterations
+        self.rng = np.random.default_rng(seed)
+        self.centroids = None if centroids is None else np.asarray(centroids, dtype=np.float32)
+        self.counts = np.zeros(k, dtype=np.float64) if counts is None else np.asarray(counts, dtype=np.float64)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    def _init_centroids(self, vectors: np.ndarray) -> None:
+        # k-means++ seeding on a sample
+        sample = vectors[self.rng.choice(len(vectors), min(len(vectors), max(10 * self.k, 2048)), replace=False)]
+        centroids = [sample[self.rng.integers(len(sample))]]
+        distance = 1.0 - sample @ centroids[0]
+
+        for _ in range(1, self.k):
+            weights = np.maximum(distance, 0) ** 2
+            total = weights.sum()
+            choice = self.rng.choice(len(sample), p=weights / total) if total > 0 else self.rng.integers(len(sample))
+            centroids.append(sample[choice])
+            distance = np.minimum(distance, 1.0 - sample @ sample[choice])
+
+        self.centroids = np.stack(centroids).astype(np.float32)
+
+    def predict(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Assign vectors to their nearest centroids.
+
+        Args:
+            vectors (np.ndarray): Matrix with one vector per row
+
+        Returns:
+            np.ndarray: Cluster of each vector
+        """
+        vectors = self._normalize(np.atleast_2d(vectors))
+        labels = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), 8192):
+            labels[start:start + 8192] = np.argmax(vectors[start:start + 8192] @ self.centroids.T, axis=1)
+        return labels
+
+    def _update(self, vectors: np.ndarray, labels: np.ndarray) -> None:
+        batch_counts = np.bincount(labels, minlength=self.k).astype(np.float64)
+        one_hot = np.zeros((len(labels), self.k), dtype=np.float32)
+        one_hot[np.arange(len(labels)), labels] = 1.0
+        sums = one_hot.T @ vectors
+
+        self.counts += batch_counts
+        moved = batch_counts > 0
+        rate = (batch_counts[moved] / self.counts[moved])[:, None]
+        means = sums[moved] / batch_counts[moved][:, None]
+        self.centroids[moved] = self._normalize((1.0 - rate) * self.centroids[moved] + rate * means)
+
+    def fit(self, vectors: np.ndarray) -> "MiniBatchKMeans":
+        """
+        Fit centroids from scratch.
+
+        Args:
+            vectors (np.ndarray): Matrix with one vector per row
+
+        Returns:
+            MiniBatchKMeans: The fitted model
+        """
+        vectors = self._normalize(np.atleast_2d(vectors))
+        self.k = min(self.k, len(vectors))
+        self.counts = np.zeros(self.k, dtype=np.float64)
+        self._init_centroids(vectors)
+
+        for _ in range(self.iterations):
+            batch = vectors[self.rng.choice(len(vectors), min(self.batch_size, len(vectors)), replace=False)]
+            labels = np.argmax(batch @ self.centroids.T, axis=1)
+            self._update(batch, labels)
+
+        return self
+
+    def partial_fit(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Assign new vectors and move their centroids towards them.
+
+        Args:
+            vectors (np.ndarray): Matrix with one vector per row
+
+        Returns:
+            np.ndarray: Cluster of each vector
+        """
+        vectors = self._normalize(np.atleast_2d(vectors))
+        labels = np.argmax(vectors @ self.centroids.T, axis=1)
+        self._update(vectors, labels)
+        return labels
+
+def default_cluster_count(note_count: int) -> int:
+    """
+    Number of embedding clusters for a collection: about sqrt(n / 2), between 2 and 256.
+
+    Args:
+        note_count (int): Number of notes
+
+    Returns:
+        int: Number of clusters
+    """
+    return int(min(256, max(2, round(np.sqrt(note_count / 2)))))
+
+class TopicClusterer:
+    """
+    Maintains the topic clusters stored in the database.
+
+    Full clusterings are computed with cluster_graph and cluster_embeddings.
+    New notes are then assigned incrementally: to the graph cluster of their
+    strongest related notes, and to the nearest k-means centroid, which moves
+    towards them. Run a full clustering again to pick up drift.
+    """
+
+    def __init__(self, db_manager, model_name: Optional[str] = None):
+        """
+        Initialize the clusterer.
+
+        Args:
+            db_manager: DatabaseManager instance
+            model_name (str, optional): Embedding model used for embedding clusters
+        """
+        self.db_manager = db_manager
+        self.model_name = model_name
+
+    def cluster_graph(self, seed: int = 0) -> int:
+        """
+        Cluster all notes by label propagation over the related-notes graph.
+
+        Args:
+            seed (int): Random seed
+
+        Returns:
+            int: Number of clusters
+        """
+        note_ids = self.db_manager.get_note_ids()
+        index = {note_id: i for i, note_id in enumerate(note_ids)}
+
+        relationships = [
+            (index[source], index[target], similarity)
+            for source, target, similarity in self.db_manager.get_relationships()
+            if source in index and target in index
+        ]
+        edges = np.asarray(relationships, dtype=np.float64).reshape(-1, 3)
+
+        labels = label_propagation(
+            len(note_ids),
+            edges[:, 0].astype(np.int64),
+            edges[:, 1].astype(np.int64),
+            edges[:, 2],
+            seed=seed
+        )
+
+        if not self.db_manager.replace_note_clusters(GRAPH, dict(zip(note_ids, labels.tolist()))):
+            return 0
+
+        cluster_count = int(labels.max()) + 1 if len(labels) else 0
+        logger.info(f"Clustered {len(note_ids)} notes into {cluster_count} graph clusters")
+        return cluster_count
+
+    def cluster_embeddings(
+        self,
+        k: Optional[int] = None,
+        batch_size: int = 1024,
+        iterations: int = 100,
+        seed: int = 0
+    ) -> int:
+        """
+        Cluster all notes by mini-batch k-means over their embeddings.
+
+        Args:
+            k (int, optional): Number of clusters (default: default_cluster_count)
+            batch_size (int): Vectors per mini-batch
+            iterations (int): Number of mini-batches
+            seed (int): Random seed
+
+        Returns:
+            int: Number of clusters
+        """
+        if self.model_name is None:
+            raise ValueError("An embedding model name is required for embedding clusters")
+
+        note_ids, blobs = self.db_manager.get_note_embeddings(self.model_name)
+        if not note_ids:
+            return 0
+
+        vectors = np.stack([np.frombuffer(blob, dtype=np.float32) for blob in blobs])
+        model = MiniBatchKMeans(
+            k or default_cluster_count(len(note_ids)),
+            batch_size=batch_size,
+            iterations=iterations,
+            seed=seed
+        ).fit(vectors)
+        labels = model.predict(vectors)
+
+        if not self.db_manager.replace_note_clusters(EMBEDDING, dict(zip(note_ids, labels.tolist())), self._model_record(model)):
+            return 0
+
+        logger.info(f"Clustered {len(note_ids)} notes into {model.k} embedding clusters")
+        return model.k
+
+    def _model_record(self, model: MiniBatchKMeans) -> Dict[str, Any]:
+        return {
+            "model_name": self.model_name,
+            "dimensions": model.centroids.shape[1],
+            "centroids": model.centroids.astype(np.float32).tobytes(),
+            "counts": model.counts.astype(np.float64).tobytes()
+        }
+
+    def load_model(self) -> Optional[MiniBatchKMeans]:
+        """
+        Load the stored k-means model, if it was fitted with this clusterer's embedding model.
+
+        Returns:
+            Optional[MiniBatchKMeans]: The model, or None
+        """
+        record = self.db_manager.get_cluster_model(EMBEDDING)
+        if record is None or record["model_name"] != self.model_name:
+            return None
+
+        centroids = np.frombuffer(record["centroids"], dtype=np.float32).reshape(-1, record["dimensions"]).copy()
+        counts = np.frombuffer(record["counts"], dtype=np.float64).copy()
+        return MiniBatchKMeans(len(centroids), centroids=centroids, counts=counts)
+
+    def assign_graph(self, note_id: int) -> int:
+        """
+        Assign a note to the graph cluster of its strongest related notes, or to a new cluster.
+
+        Args:
+            note_id (int): ID of the note
+
+        Returns:
+            int: Cluster ID
+        """
+        cluster_id = self.db_manager.get_neighbour_cluster(GRAPH, note_id)
+        if cluster_id is None:
+            cluster_id = self.db_manager.next_cluster_id(GRAPH)
+
+        self.db_manager.set_note_cluster(GRAPH, note_id, cluster_id)
+        return cluster_id
+
+    def assign_embedding(self, note_id: int, embedding: List[float]) -> Optional[int]:
+        """
+        Assign a note to its nearest embedding cluster and move the centroid towards it.
+
+        Args:
+            note_id (int): ID of the note
+            embedding (List[float]): Embedding of the note
+
+        Returns:
+            Optional[int]: Cluster ID, or None if no k-means model exists for the embedding model
+        """
+        model = self.load_model()
+        if model is None:
+            return None
+
+        cluster_id = int(model.partial_fit(np.asarray(embedding, dtype=np.float32))[0])
+        self.db_manager.set_note_cluster(EMBEDDING, note_id, cluster_id, self._model_record(model))
+        return cluster_id
+
+    def assign_note(self, note_id: int, embedding: Optional[List[float]] = None) -> Dict[str, Optional[int]]:
+        """
+        Incrementally assign a new or updated note to its clusters.
+
+        Args:
+            note_id (int): ID of the note
+            embedding (List[float], optional): Embedding of the note
+
+        Returns:
+            Dict[str, Optional[int]]: Cluster ID per method
+        """
+        clusters = {GRAPH: self.assign_graph(note_id)}
+        if embedding is not None and self.model_name is not None:
+            clusters[EMBEDDING] = self.assign_embedding(note_id, embedding)
+        return clusters
+
+    def get_clusters(self, method: str = GRAPH, top_tags: int = 3) -> List[Dict[str, Any]]:
+        """
+        Get the stored clusters of a method with their sizes and most common tags.
+
+        Args:
+            method (str): Clustering method ("graph" or "embedding")
+            top_tags (int): Number of tags reported per cluster
+
+        Returns:
+            List[Dict[str, Any]]: Clusters (cluster_id, size, tags), largest first
+        """
+        return self.db_manager.get_cluster_summaries(method, top_tags)
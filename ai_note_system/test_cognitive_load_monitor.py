@@ -10,6 +10,7 @@ import sqlite3
 from datetime import datetime, timedelta
 
 from ai_note_system.tracking.cognitive_load_monitor import CognitiveLoadMonitor
+from ai_note_system.tracking.event_sink import close_event_sinks
 from ai_note_system.database.db_manager import DatabaseManager
 
 class MockWebcamMonitor:
@@ -53,6 +54,8 @@ class TestCognitiveLoadMonitor(unittest.TestCase):
     
     def tearDown(self):
         """Clean up test environment."""
+        # The sink is shared by every tracker of the database, so it is closed through the registry
+        close_event_sinks()
         self.db_manager.conn.close()
         os.close(self.temp_db_fd)
         os.unlink(self.temp_db_path)
@@ -84,6 +87,7 @@ class TestCognitiveLoadMonitor(unittest.TestCase):
         self.assertIn("recommendations", result)
         
         # Check that data was saved to database
+        self.monitor.event_sink.flush()
         self.db_manager.cursor.execute('''
         SELECT * FROM cognitive_load_data WHERE user_id = ?
         ''', ("test_user",))
@@ -110,6 +114,7 @@ class TestCognitiveLoadMonitor(unittest.TestCase):
         self.assertGreater(len(recommendations), 0)
         
         # Check that recommendations were saved to database
+        self.monitor.event_sink.flush()
         self.db_manager.cursor.execute('''
         SELECT COUNT(*) as count FROM cognitive_load_recommendations
         ''')
@@ -0,0 +1,120 @@
+"""
+Unit tests for the conversation memory module.
+"""
+
+import unittest
+
+from ai_note_system.agents.conversation_memory import ConversationMemory, SUMMARY_PREFIX, RECALL_PREFIX
+from ai_note_system.agents.learning_agent import LearningAgent
+
+class FakeLLM:
+    """Counts a token per word and records the summaries it is asked for."""
+
+    def __init__(self):
+        self.summary_prompts = []
+        self.chats = []
+
+    def count_tokens(self, text):
+        return len(text.split())
+
+    def generate_text(self, prompt, **kwargs):
+        self.summary_prompts.append(prompt)
+        return f"summary {len(self.summary_prompts)}"
+
+    def generate_chat_response(self, messages, **kwargs):
+        self.chats.append(messages)
+        return "reply " * 10
+
+def embed(text):
+    keywords = [float(keyword in text.lower()) for keyword in ["mitochondria", "integral", "loop"]]
+    return keywords + [float(not any(keywords))]
+
+def turn(i, words=20):
+    return {"role": "user" if i % 2 == 0 else "assistant", "content": f"turn{i} " + "word " * words}
+
+class TestConversationMemory(unittest.TestCase):
+    """Test cases for token-budgeted prompts."""
+
+    def setUp(self):
+        self.llm = FakeLLM()
+        self.system = {"role": "system", "content": "You are a tutor."}
+
+    def test_prompt_stays_within_budget(self):
+        """Test that long conversations are summarized and recent turns kept verbatim."""
+        memory = ConversationMemory(self.llm, token_budget=200, min_recent_turns=2)
+        history = [self.system]
+
+        for i in range(40):
+            history.append(turn(i))
+            messages = memory.build(history)
+            self.assertLessEqual(memory.last_usage["prompt_tokens"], 200)
+            self.assertEqual(messages[0], self.system)
+            self.assertEqual(messages[-1], history[-1])
+
+        usage = memory.last_usage
+        self.assertEqual(usage["turns"], 41)
+        self.assertGreater(usage["history_tokens"], 4 * usage["prompt_tokens"])
+        self.assertTrue(messages[1]["content"].startswith(SUMMARY_PREFIX))
+
+        # Summaries are updated every few turns, from the previous summary and the new turns only
+        self.assertLess(len(self.llm.summary_prompts), 20)
+        self.assertIn("summary 1", self.llm.summary_prompts[1])
+        self.assertNotIn("turn0 ", self.llm.summary_prompts[1])
+        self.assertEqual(usage["summarized_turns"] + len(messages) - 2, 40)
+
+    def test_short_conversations_unchanged(self):
+        """Test that history within the budget is sent as it is."""
+        memory = ConversationMemory(self.llm, token_budget=1000)
+        history = [self.system, turn(0), turn(1)]
+
+        self.assertEqual(memory.build(history), history)
+        self.assertEqual(self.llm.summary_prompts, [])
+        self.assertEqual(memory.last_usage["prompt_tokens"], memory.last_usage["history_tokens"])
+
+    def test_recall_of_relevant_folded_turns(self):
+        """Test that summarized turns come back verbatim when relevant to the query."""
+        memory = ConversationMemory(self.llm, token_budget=300, min_recent_turns=2, embed=embed)
+        history = [self.system, {"role": "user", "content": "What do mitochondria do?"}]
+        history += [turn(i) for i in range(1, 30)]
+
+        messages = memory.build(history, query="Tell me more about mitochondria")
+        recall = [message for message in messages if message["content"].startswith(RECALL_PREFIX)]
+        self.assertEqual(len(recall), 1)
+        self.assertIn("user: What do mitochondria do?", recall[0]["content"])
+        self.assertEqual(memory.last_usage["recalled_turns"], 1)
+
+        memory.build(history, query="How does a for loop work?")
+        self.assertEqual(memory.last_usage["recalled_turns"], 0)
+
+    def test_reset_when_history_cleared(self):
+        """Test that a shorter history starts a fresh summary."""
+        memory = ConversationMemory(self.llm, token_budget=100, min_recent_turns=2)
+        memory.build([self.system] + [turn(i) for i in range(20)])
+        self.assertTrue(memory.summary)
+
+        history = [self.system, turn(0)]
+        self.assertEqual(memory.build(history), history)
+        self.assertEqual(memory.summary, "")
+
+class TestLearningAgentMemory(unittest.TestCase):
+    """Test cases for the learning agent's budgeted session memory."""
+
+    def test_process_message_sends_budgeted_history(self):
+        """Test that the full session is kept while the prompt stays bounded."""
+        llm = FakeLLM()
+        agent = LearningAgent(llm_interface=llm, config={"MEMORY_TOKEN_BUDGET": 600, "MEMORY_RECENT_TURNS": 2})
+
+        for i in range(30):
+            agent.process_message(f"question {i} " + "word " * 15)
+
+        self.assertEqual(len(agent.session_memory), 62)
+        self.assertLess(len(llm.chats[-1]), 30)
+        self.assertEqual(llm.chats[-1][0]["role"], "system")
+        self.assertLessEqual(agent.conversation_memory.last_usage["prompt_tokens"], 600)
+
+        agent.clear_session_memory()
+        agent.process_message("new question")
+        self.assertEqual(len(llm.chats[-1]), 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+"""
+Unit tests for the voice agent's conversation memory.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from ai_note_system.tests.query_database import QueryDatabase
+from ai_note_system.agents import voice_agent
+from ai_note_system.agents.voice_agent import VoiceAgent
+
+class FakeEmbedder:
+    """Embeds texts by keyword and counts the texts embedded."""
+
+    KEYWORDS = ["photosynthesis", "derivative", "recursion"]
+
+    def __init__(self):
+        self.model_name = "fake"
+        self.embedded = []
+        self.search_notes_by_embedding = MagicMock(return_value=[])
+
+    def generate_embedding(self, text):
+        self.embedded.append(text)
+        return [float(keyword in text.lower()) + 0.01 for keyword in self.KEYWORDS]
+
+class TestConversationMemory(unittest.TestCase):
+    """Test cases for the message embedding index."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db = QueryDatabase(os.path.join(self.temp_dir, "test.db"))
+        self.embedder = FakeEmbedder()
+        self.agent = VoiceAgent(self.db, llm_interface=MagicMock(), embedder=self.embedder)
+
+    def tearDown(self):
+        voice_agent._message_indexes.clear()
+        self.db.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_messages_indexed_apart_from_notes(self):
+        """Test that added messages are searchable without touching the notes index."""
+        conversation = self.agent.start_conversation(1, "Biology")
+        message = self.agent.add_message(conversation, "user", "How does photosynthesis work?")
+        self.agent.add_message(conversation, "user", "Explain recursion with an example")
+        self.agent.add_message(conversation, "user", "ok")
+
+        # The system message and the short message are not embedded
+        self.assertEqual(len(self.embedder.embedded), 2)
+
+        results = self.agent.search_conversation_history("photosynthesis in plants", limit=1)
+        self.assertEqual([result["message_id"] for result in results], [message])
+        self.assertEqual(results[0]["conversation_title"], "Biology")
+        self.assertAlmostEqual(results[0]["similarity"], 1.0, places=2)
+        self.embedder.search_notes_by_embedding.assert_not_called()
+
+    def test_search_filters(self):
+        """Test that user, conversation and time filters restrict the candidates."""
+        first = self.agent.start_conversation(1, "First")
+        mine = self.agent.add_message(first, "user", "What is a derivative?")
+        second = self.agent.start_conversation(2, "Second")
+        theirs = self.agent.add_message(second, "user", "Derivative of x squared")
+
+        ids = lambda results: [result["message_id"] for result in results]
+        self.assertEqual(sorted(ids(self.agent.search_conversation_history("derivative"))), [mine, theirs])
+        self.assertEqual(ids(self.agent.search_conversation_history("derivative", user_id=2)), [theirs])
+        self.assertEqual(ids(self.agent.search_conversation_history("derivative", conversation_id=first)), [mine])
+        self.assertEqual(self.agent.search_conversation_history("derivative", user_id=3), [])
+
+        timestamp = self.db.conn.execute("SELECT timestamp FROM voice_messages WHERE id = ?", (theirs,)).fetchone()[0]
+        self.assertEqual(ids(self.agent.search_conversation_history("derivative", start=timestamp)), [theirs])
+        self.assertEqual(ids(self.agent.search_conversation_history("derivative", end=timestamp)), [mine])
+
+    def test_index_syncs_and_backfills(self):
+        """Test that a fresh index loads stored embeddings and old messages can be embedded."""
+        conversation = self.agent.start_conversation(1)
+        message = self.agent.add_message(conversation, "user", "Recursion calls itself")
+
+        # Messages stored before the index existed have no embedding yet
+        self.db.conn.execute("DELETE FROM voice_message_embeddings")
+        self.db.conn.commit()
+        voice_agent._message_indexes.clear()
+        self.assertEqual(self.agent.search_conversation_history("recursion"), [])
+
+        self.assertEqual(self.agent.index_conversation_history(), 1)
+        self.assertEqual(self.agent.index_conversation_history(), 0)
+
+        voice_agent._message_indexes.clear()
+        other = VoiceAgent(self.db, llm_interface=MagicMock(), embedder=FakeEmbedder())
+        self.assertEqual(len(other.get_message_index()), 1)
+        self.assertEqual([result["message_id"] for result in other.search_conversation_history("recursion")], [message])
+
+    def test_index_picks_up_backfilled_embeddings(self):
+        """Test that a live index loads embeddings stored below its highest message ID."""
+        conversation = self.agent.start_conversation(1)
+        old = self.agent.add_message(conversation, "user", "Recursion calls itself")
+        self.agent.add_message(conversation, "user", "Derivatives measure change")
+        self.assertEqual(len(self.agent.get_message_index()), 2)
+
+        # A live index that has loaded the newer message only
+        embedding = self.db.conn.execute(
+            "SELECT embedding FROM voice_message_embeddings WHERE message_id = ?", (old,)
+        ).fetchone()[0]
+        self.db.conn.execute("DELETE FROM voice_message_embeddings WHERE message_id = ?", (old,))
+        self.db.conn.commit()
+        voice_agent._message_indexes.clear()
+        self.assertEqual(len(self.agent.get_message_index()), 1)
+
+        # Another process backfills the older message
+        self.db.conn.execute(
+            "INSERT INTO voice_message_embeddings (message_id, model_name, embedding) VALUES (?, ?, ?)",
+            (old, self.embedder.model_name, embedding)
+        )
+        self.db.conn.commit()
+
+        self.assertEqual(len(self.agent.get_message_index()), 2)
+        self.assertEqual(self.agent.search_conversation_history("recursion")[0]["message_id"], old)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Benchmark for batch mastery estimation.
+
+Times estimating mastery of every item with the batch estimator, cold and
+cached, compared with estimate_mastery item by item.
+
+Usage:
+    python -m ai_note_system.tests.benchmarks.bench_mastery_estimator --items 10000
+"""
+
+import os
+import time
+import random
+import argparse
+import tempfile
+import logging
+from datetime import datetime, timedelta
+
+from ai_note_system.database.db_manager import DatabaseManager, init_db
+from ai_note_system.processing.ml_enhancements.mastery_estimator import MasteryEstimator, estimate_mastery
+
+def populate(db_manager: DatabaseManager, item_count: int, rng: random.Random) -> None:
+    now = datetime.now()
+    states, reviews, quizzes = [], [], []
+
+    for i in range(item_count):
+        last_reviewed = None
+        for _ in range(rng.randint(0, 8)):
+            last_reviewed = (now - timedelta(days=rng.uniform(0, 500))).isoformat()
+            reviews.append((str(i), "note", rng.randint(0, 5), last_reviewed))
+
+        states.append({
+            "item_id": str(i),
+            "item_type": "note",
+            "easiness_factor": rng.uniform(1.3, 3.0),
+            "interval": rng.randint(0, 400),
+            "repetitions": rng.randint(0, 12),
+            "last_reviewed": last_reviewed,
+            "next_review": now.isoformat()
+        })
+
+        for _ in range(rng.randint(0, 4)):
+            quizzes.append({
+                "item_id": str(i),
+                "score": rng.random(),
+                "difficulty": rng.choice(["easy", "medium", "hard"]),
+                "topic": rng.choice(["algebra", "geometry", "calculus"]),
+                "timestamp": (now - timedelta(days=rng.uniform(0, 500))).isoformat()
+            })
+
+    db_manager.save_review_states(states, reviews=reviews)
+    db_manager.save_quiz_results(quizzes)
+
+def run(item_count: int, single_sample: int = 500) -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "bench.db")
+        init_db(db_path)
+
+        with DatabaseManager(db_path) as db_manager:
+            populate(db_manager, item_count, random.Random(0))
+            estimator = MasteryEstimator(db_manager)
+
+            start = time.perf_counter()
+            reports = estimator.estimate()
+            cold_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            estimator.estimate()
+            cached_time = time.perf_counter() - start
+
+            # Item by item, timed on a sample and extrapolated
+            start = time.perf_counter()
+            for item_id in list(reports)[:single_sample]:
+                estimate_mastery(item_id, db_manager=db_manager)
+            single_time = (time.perf_counter() - start) * len(reports) / min(single_sample, len(reports))
+
+    print(
+        f"{len(reports):>7} items: batch {cold_time:6.2f}s, cached {cached_time * 1000:6.1f} ms, "
+        f"item by item ~{single_time:6.2f}s"
+    )
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Benchmark batch mastery estimation")
+    parser.add_argument("--items", type=int, nargs="+", default=[1000, 10000], help="Numbers of items")
+    args = parser.parse_args()
+
+    for count in args.items:
+        run(count)
@@ -0,0 +1,79 @@
+"""
+Benchmark for the reminder scheduler.
+
+Stores many future reminders, starts the scheduler and measures load time,
+CPU used while idle, and the latency of a newly scheduled reminder.
+
+Usage:
+    python -m ai_note_system.tests.benchmarks.bench_reminder_scheduler --sizes 100000
+"""
+
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+from ai_note_system.database.db_manager import DatabaseManager, init_db
+from ai_note_system.outputs.reminder_manager import ReminderManager
+
+def run(reminder_count: int, idle_seconds: float) -> None:
+    temp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(temp_dir, "benchmark.db")
+        init_db(db_path)
+        db_manager = DatabaseManager(db_path)
+
+        now = datetime.now()
+        db_manager.save_reminders([
+            {
+                "item_id": str(i),
+                "item_type": "note",
+                "reminder_time": (now + timedelta(days=1, seconds=i)).isoformat(),
+                "channels": ["benchmark"],
+                "status": "scheduled"
+            }
+            for i in range(reminder_count)
+        ])
+
+        sent = threading.Event()
+        manager = ReminderManager(db_manager)
+        manager.notification_handlers = {"benchmark": lambda reminder, item_details: sent.set() or True}
+
+        start = time.perf_counter()
+        manager.start_scheduler()
+        while manager.get_pending_count() < reminder_count:
+            time.sleep(0.01)
+        load_time = time.perf_counter() - start
+
+        cpu_start = time.process_time()
+        time.sleep(idle_seconds)
+        idle_cpu = time.process_time() - cpu_start
+
+        start = time.perf_counter()
+        manager.schedule_reminder("new", "note", datetime.now(), ["benchmark"])
+        sent.wait(5)
+        latency = time.perf_counter() - start
+
+        manager.stop_scheduler()
+        db_manager.close()
+
+        print(
+            f"{reminder_count:>7} reminders: "
+            f"load {load_time:6.2f}s, "
+            f"idle CPU {idle_cpu * 1000:6.1f} ms over {idle_seconds:.0f}s, "
+            f"new reminder sent after {latency * 1000:6.1f} ms"
+        )
+    finally:
+        shutil.rmtree(temp_dir)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the reminder scheduler")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="Numbers of pending reminders")
+    parser.add_argument("--idle", type=float, default=5, help="Seconds to measure idle CPU")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.idle)
@@ -0,0 +1,96 @@
+"""
+Benchmark for the note revision store.
+
+Tracks many edits of a long note and compares the stored size with full old and
+new values per change, then times reconstructing random and latest revisions.
+
+Usage:
+    python -m ai_note_system.tests.benchmarks.bench_revision_store --edits 10000 --lines 300
+"""
+
+import os
+import time
+import random
+import logging
+import argparse
+import tempfile
+
+from ai_note_system.collaboration.collaboration_manager import CollaborationManager
+from ai_note_system.tests.query_database import QueryDatabase
+
+def make_line(rng: random.Random) -> str:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return " ".join("".join(rng.choice(letters) for _ in range(rng.randint(2, 9))) for _ in range(rng.randint(5, 15)))
+
+def edit(lines: list, rng: random.Random) -> None:
+    choice = rng.random()
+    index = rng.randrange(len(lines))
+
+    if choice < 0.6:
+        # Change one word
+        words = lines[index].split(" ")
+        words[rng.randrange(len(words))] = make_line(rng).split(" ")[0]
+        lines[index] = " ".join(words)
+    elif choice < 0.85:
+        lines.insert(index, make_line(rng))
+    elif len(lines) > 1:
+        del lines[index]
+
+def run(edit_count: int, line_count: int, reads: int = 200) -> None:
+    rng = random.Random(0)
+    lines = [make_line(rng) for _ in range(line_count)]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = QueryDatabase(os.path.join(temp_dir, "bench.db"))
+        db.execute_query("INSERT INTO users (username) VALUES ('owner')")
+        db.execute_query("INSERT INTO notes (user_id, title, text) VALUES (1, 'Note', ?)", ("\n".join(lines),))
+        manager = CollaborationManager(db)
+
+        full_size = 0
+        values = ["\n".join(lines)]
+
+        start = time.perf_counter()
+        for _ in range(edit_count):
+            edit(lines, rng)
+            values.append("\n".join(lines))
+            manager.track_note_change(1, 1, "modify", "text", values[-2], values[-1])
+            full_size += len(values[-2]) + len(values[-1])
+        write_time = time.perf_counter() - start
+
+        stored_size = manager.revisions.get_storage_size()
+
+        # Fresh store, so reads are not served from memory
+        reader = CollaborationManager(db).revisions
+        start = time.perf_counter()
+        for revision in rng.sample(range(edit_count + 1), min(reads, edit_count + 1)):
+            assert reader.get_revision(1, "text", revision) == values[revision]
+        random_time = (time.perf_counter() - start) / min(reads, edit_count + 1)
+
+        start = time.perf_counter()
+        reader.get_revision(1, "text")
+        latest_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        changes = manager.get_note_changes(1, 1)
+        history_time = time.perf_counter() - start
+
+        db.close()
+
+    print(
+        f"{edit_count:>6} edits of a {len(values[-1]) // 1024:>3} KB note: "
+        f"stored {stored_size / 2 ** 20:6.1f} MB vs {full_size / 2 ** 20:7.1f} MB full values, "
+        f"write {write_time * 1000 / edit_count:5.2f} ms/edit, "
+        f"read random {random_time * 1000:5.2f} ms, latest {latest_time * 1000:5.2f} ms, "
+        f"full history ({len(changes)} changes) {history_time:5.2f}s"
+    )
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Benchmark the note revision store")
+    parser.add_argument("--edits", type=int, nargs="+", default=[1000, 10000], help="Numbers of edits")
+    parser.add_argument("--lines", type=int, default=300, help="Lines in the note")
+    args = parser.parse_args()
+
+    for count in args.edits:
+        run(count, args.lines)
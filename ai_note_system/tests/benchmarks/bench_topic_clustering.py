@@ -0,0 +1,117 @@
+"""
+Benchmark for the topic clustering module.
+
+Builds a synthetic database with planted topics and times full graph and
+embedding clustering and incremental assignment of new notes.
+
+Usage:
+    python -m ai_note_system.tests.benchmarks.bench_topic_clustering --sizes 10000 100000
+"""
+
+import os
+import time
+import shutil
+import argparse
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+from ai_note_system.database.db_manager import DatabaseManager, init_db
+from ai_note_system.processing.topic_clustering import TopicClusterer, GRAPH, EMBEDDING
+
+MODEL_NAME = "benchmark-model"
+
+def build_database(db_path: str, note_count: int, dimensions: int, links_per_note: int = 5, seed: int = 0) -> np.ndarray:
+    """Create notes with embeddings and related-note links around planted topics."""
+    rng = np.random.default_rng(seed)
+    topic_count = max(2, int(np.sqrt(note_count / 2)))
+    topics = rng.integers(0, topic_count, note_count)
+    centres = rng.normal(size=(topic_count, dimensions)).astype(np.float32)
+    vectors = centres[topics] + rng.normal(scale=0.5, size=(note_count, dimensions)).astype(np.float32)
+
+    init_db(db_path)
+    db_manager = DatabaseManager(db_path)
+    now = datetime.now().isoformat()
+
+    db_manager.cursor.execute('''
+    CREATE TABLE IF NOT EXISTS note_embeddings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        note_id INTEGER NOT NULL,
+        model_name TEXT NOT NULL,
+        embedding BLOB NOT NULL,
+        created_at TEXT NOT NULL,
+        UNIQUE (note_id, model_name)
+    )
+    ''')
+    db_manager.cursor.executemany(
+        "INSERT INTO notes (id, title, text, timestamp, source_type) VALUES (?, ?, ?, ?, 'text')",
+        [(i + 1, f"Note {i}", f"Note {i}", now) for i in range(note_count)]
+    )
+    db_manager.cursor.executemany(
+        "INSERT INTO note_embeddings (note_id, model_name, embedding, created_at) VALUES (?, ?, ?, ?)",
+        [(i + 1, MODEL_NAME, vectors[i].tobytes(), now) for i in range(note_count)]
+    )
+
+    # Links mostly within the planted topic
+    order = np.argsort(topics)
+    groups = np.split(order, np.flatnonzero(np.diff(topics[order])) + 1)
+    members = {int(topics[group[0]]): group for group in groups}
+    links = []
+    for i in range(note_count):
+        group = members[int(topics[i])]
+        for j in rng.choice(group, min(links_per_note, len(group)), replace=False):
+            if rng.random() < 0.1:
+                j = rng.integers(note_count)
+            if j != i:
+                links.append((i + 1, int(j) + 1, float(rng.uniform(0.75, 1.0))))
+    db_manager.cursor.executemany(
+        "INSERT OR REPLACE INTO related_notes (note_id, related_note_id, similarity) VALUES (?, ?, ?)", links
+    )
+    db_manager.conn.commit()
+    db_manager.close()
+
+    return vectors
+
+def run(note_count: int, dimensions: int, incremental: int = 200) -> None:
+    temp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(temp_dir, "benchmark.db")
+        vectors = build_database(db_path, note_count, dimensions)
+
+        db_manager = DatabaseManager(db_path)
+        clusterer = TopicClusterer(db_manager, MODEL_NAME)
+
+        start = time.perf_counter()
+        graph_clusters = clusterer.cluster_graph()
+        graph_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        embedding_clusters = clusterer.cluster_embeddings()
+        embedding_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(incremental):
+            clusterer.assign_note(i + 1, vectors[i])
+        incremental_time = (time.perf_counter() - start) / incremental
+
+        print(
+            f"{note_count:>7} notes: "
+            f"graph {graph_time:6.2f}s ({graph_clusters} clusters), "
+            f"k-means {embedding_time:6.2f}s ({embedding_clusters} clusters), "
+            f"incremental {incremental_time * 1000:6.2f} ms/note"
+        )
+        print(f"          stored: {len(db_manager.get_note_clusters(GRAPH))} graph, {len(db_manager.get_note_clusters(EMBEDDING))} embedding assignments")
+
+        db_manager.close()
+    finally:
+        shutil.rmtree(temp_dir)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark topic clustering")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="Numbers of notes")
+    parser.add_argument("--dimensions", type=int, default=384, help="Embedding dimensions")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.dimensions)
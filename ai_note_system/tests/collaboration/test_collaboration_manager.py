@@ -0,0 +1,82 @@
+"""
+Unit tests for change tracking in the collaboration manager.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from ai_note_system.collaboration.collaboration_manager import CollaborationManager
+from ai_note_system.collaboration.revision_store import apply_delta, make_delta
+from ai_note_system.tests.query_database import QueryDatabase
+
+class TestRevisionStore(unittest.TestCase):
+    """Test cases for delta-compressed note changes."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db = QueryDatabase(os.path.join(self.temp_dir, "test.db"))
+        self.db.execute_query("INSERT INTO users (username) VALUES ('owner'), ('editor'), ('stranger')")
+        self.db.execute_query("INSERT INTO notes (user_id, title, text) VALUES (1, 'Note', 'first line')")
+
+        self.manager = CollaborationManager(self.db, snapshot_interval=4)
+        workspace_id = self.manager.create_workspace("Team", "", 1)
+        self.manager.add_member(workspace_id, 2)
+        self.manager.share_note(workspace_id, 1, 1)
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_delta_round_trip(self):
+        """Test that diffs reproduce the new text at line and word level."""
+        old = "alpha beta gamma\nsecond line\n\nlast"
+        for new in ["alpha BETA gamma\nsecond line\n\nlast", "", "new\n" + old + "\nmore", old]:
+            self.assertEqual(apply_delta(old, make_delta(old, new)), new)
+
+        delta = make_delta(old, "alpha beta delta\nsecond line\n\nlast")
+        self.assertEqual(delta, [11, -5, "delta", 18])
+
+    def test_revisions_reconstructed_from_snapshots_and_diffs(self):
+        """Test that every tracked value is reconstructed and diffs are stored between snapshots."""
+        values = ["first line"]
+        for i in range(10):
+            values.append(values[-1] + f"\nline {i} by editor")
+            self.manager.track_note_change(1, 2, "modify", "text", values[-2], values[-1])
+
+        changes = self.manager.get_note_changes(1, 1)
+        self.assertEqual([change["new_value"] for change in reversed(changes)], values[1:])
+        self.assertEqual([change["old_value"] for change in reversed(changes)], values[:-1])
+
+        rows = self.db.execute_query("SELECT is_snapshot FROM note_revisions ORDER BY revision").fetchall()
+        self.assertEqual([row["is_snapshot"] for row in rows], [1, 0, 0, 0, 1, 0, 0, 0, 1, 0, 0])
+
+        # A new manager reads the stored history
+        other = CollaborationManager(self.db)
+        self.assertEqual(other.revisions.get_revision(1, "text", 7), values[7])
+        self.assertIsNone(other.revisions.get_revision(1, "text", 11))
+
+    def test_access_checks_and_merge(self):
+        """Test that access is checked once per request and that merges apply the latest values."""
+        with self.assertRaises(ValueError):
+            self.manager.track_note_change(1, 3, "modify", "title", "Note", "Hijacked")
+
+        self.manager.track_note_change(1, 2, "modify", "title", "Note", "Draft")
+        self.manager.track_note_change(1, 2, "modify", "title", "Draft", "Final")
+
+        queries = []
+        execute_query = self.db.execute_query
+        self.db.execute_query = lambda query, params=(): queries.append(query) or execute_query(query, params)
+        self.manager.track_note_change(1, 2, "modify", "text", "first line", "first line\nsecond")
+        self.assertFalse(any("shared_notes" in query for query in queries))
+        self.db.execute_query = execute_query
+
+        self.assertTrue(self.manager.merge_changes(1, 1, 2))
+        self.assertEqual(self.db.execute_query("SELECT title, text FROM notes").fetchone()[:], ("Final", "first line\nsecond"))
+
+        merges = [change for change in self.manager.get_note_changes(1, 1) if change["change_type"] == "merge"]
+        self.assertEqual(sorted(change["new_value"] for change in merges), ["Final", "first line\nsecond"])
+
+if __name__ == "__main__":
+    unittest.main()
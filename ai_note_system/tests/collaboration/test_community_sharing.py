@@ -0,0 +1,233 @@
+"""
+Unit tests for the community sharing module.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+
+from ai_note_system.tests.query_database import QueryDatabase
+from ai_note_system.collaboration import community_sharing
+from ai_note_system.collaboration.community_sharing import CommunitySharing, TREND_HALF_LIFE
+
+class TestTrendingContent(unittest.TestCase):
+    """Test cases for time-decayed trend scores."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db = QueryDatabase(os.path.join(self.temp_dir, "test.db"))
+
+        with patch("ai_note_system.collaboration.community_sharing.get_llm_interface"):
+            self.sharing = CommunitySharing(self.db, trending_ttl=0)
+
+    def tearDown(self):
+        community_sharing._trending_cache.clear()
+        self.db.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _share(self, title):
+        return self.sharing.share_content(1, "note", None, title, anonymized=False)
+
+    def _age_scores(self, half_lives):
+        # Moving the epoch forward is the same as all events having happened earlier
+        self.db.conn.execute("UPDATE trend_state SET epoch = epoch - ?", (half_lives * TREND_HALF_LIFE,))
+        self.db.conn.commit()
+
+    def test_recent_activity_outranks_decayed_activity(self):
+        """Test that upvotes and views raise scores that then decay with time."""
+        old = self._share("Old")
+        for user_id in range(1, 5):
+            self.assertTrue(self.sharing.upvote_content(user_id, old))
+        self.assertFalse(self.sharing.upvote_content(1, old))
+
+        self.assertEqual([item["id"] for item in self.sharing.get_trending_content()][0], old)
+        self.assertAlmostEqual(self.sharing.get_trending_content()[0]["trend_score"], 13.0, places=3)
+
+        # Two half-lives later, the old content is worth a quarter as much
+        self._age_scores(2)
+        new = self._share("New")
+        self.sharing.get_shared_content(new)
+        self.sharing.get_shared_content(new)
+        self.sharing.get_shared_content(new)
+
+        trending = self.sharing.get_trending_content()
+        self.assertEqual([item["id"] for item in trending], [new, old])
+        self.assertAlmostEqual(trending[1]["trend_score"], 13.0 / 4, places=3)
+
+    def test_compaction_keeps_order_and_drops_stale_scores(self):
+        """Test that rebasing keeps scores and resets those that decayed away."""
+        first = self._share("First")
+        second = self._share("Second")
+        self.sharing.upvote_content(1, second)
+
+        scores = [item["trend_score"] for item in self.sharing.get_trending_content()]
+        self.sharing.compact_trend_scores()
+        self.assertEqual([round(item["trend_score"], 6) for item in self.sharing.get_trending_content()],
+                         [round(score, 6) for score in scores])
+
+        self._age_scores(20)
+        self.assertEqual(self.sharing.compact_trend_scores()["shared_content"], 2)
+        self.assertEqual([item["trend_score"] for item in self.sharing.get_trending_content()], [0.0, 0.0])
+        self.assertEqual([item["id"] for item in self.sharing.get_trending_content()], [second, first])
+
+        # Scores that were already zero are not counted again
+        self.assertEqual(self.sharing.compact_trend_scores()["shared_content"], 0)
+
+    def test_increment_holds_write_lock_with_epoch(self):
+        """Test that the epoch read for an increment is locked until the score is written."""
+        content_id = self._share("Locked")
+        cursor = self.db.conn.cursor()
+        self.sharing._trend_increment(cursor, "shared_content", 1.0)
+        self.assertTrue(self.db.conn.in_transaction)
+
+        # A compactor on another connection cannot rebase until the score is committed
+        other = sqlite3.connect(self.db.db_path, timeout=0)
+        try:
+            with self.assertRaises(sqlite3.OperationalError):
+                CommunitySharing._begin_write(other.cursor())
+            self.db.conn.commit()
+            CommunitySharing._begin_write(other.cursor())
+            other.rollback()
+        finally:
+            other.close()
+
+        self.sharing.upvote_content(1, content_id)
+        self.assertFalse(self.db.conn.in_transaction)
+
+    def test_trending_cached_and_indexed(self):
+        """Test that trending is served from the cache within the TTL and reads the index."""
+        self.sharing.trending_ttl = 60
+        content_id = self._share("Cached")
+        self.assertEqual(self.sharing.get_trending_content()[0]["upvotes"], 0)
+
+        self.sharing.upvote_content(1, content_id)
+        self.assertEqual(self.sharing.get_trending_content()[0]["upvotes"], 0)
+        self.assertEqual(self.sharing.get_trending_content(limit=5)[0]["upvotes"], 1)
+
+        plan = " ".join(str(tuple(row)) for row in self.db.conn.execute('''
+        EXPLAIN QUERY PLAN SELECT id FROM shared_content WHERE permission = 'public'
+        ORDER BY trend_score DESC, created_at DESC LIMIT 10
+        '''))
+        self.assertIn("idx_shared_content_trend", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+class FakeEmbedder:
+    """Embeds texts by keyword and counts the texts embedded."""
+
+    model = "fake"
+    KEYWORDS = ["python", "biology", "history"]
+
+    def __init__(self):
+        self.embedded = []
+
+    def get_embeddings(self, texts):
+        self.embedded.extend(texts)
+        return [[float(keyword in text.lower()) + 0.01 for keyword in self.KEYWORDS] for text in texts]
+
+class TestRecommendations(unittest.TestCase):
+    """Test cases for embedding-based recommendations."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db = QueryDatabase(os.path.join(self.temp_dir, "test.db"))
+        self.db.conn.execute('''
+        CREATE TABLE note_embeddings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            note_id INTEGER NOT NULL,
+            model_name TEXT NOT NULL,
+            embedding BLOB NOT NULL,
+            created_at TEXT NOT NULL,
+            UNIQUE (note_id, model_name)
+        )
+        ''')
+
+        self.embedder = FakeEmbedder()
+        with patch("ai_note_system.collaboration.community_sharing.get_llm_interface"):
+            self.sharing = CommunitySharing(self.db, embedding_interface=self.embedder)
+
+        self.content = {
+            topic: self.sharing.share_content(9, "note", None, f"{topic.title()} notes", anonymized=False)
+            for topic in ["python", "biology", "history"]
+        }
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _add_note(self, user_id, text):
+        now = datetime.now().isoformat()
+        note_id = self.db.execute_query(
+            "INSERT INTO notes (user_id, title, text, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (user_id, text, text, now, now)
+        ).lastrowid
+        embedding = np.asarray(self.embedder.get_embeddings([text])[0], dtype=np.float32)
+        self.db.execute_query(
+            "INSERT OR REPLACE INTO note_embeddings (note_id, model_name, embedding, created_at) VALUES (?, 'fake', ?, '')",
+            (note_id, embedding.tobytes())
+        )
+        return note_id
+
+    def test_recommends_nearest_content(self):
+        """Test that recommendations follow notes and leave out upvoted content."""
+        self.assertEqual(len(self.sharing.get_recommended_content(1)), 3)
+
+        self._add_note(1, "Python decorators")
+        self._add_note(1, "Python generators")
+        results = self.sharing.get_recommended_content(1, limit=2)
+        self.assertEqual(results[0]["id"], self.content["python"])
+        self.assertGreater(results[0]["relevance"], results[1]["relevance"])
+
+        self.sharing.upvote_content(1, self.content["python"])
+        ids = [result["id"] for result in self.sharing.get_recommended_content(1)]
+        self.assertNotIn(self.content["python"], ids)
+        self.assertEqual(len(ids), 2)
+
+        # Content is embedded once
+        self.assertEqual(len([text for text in self.embedder.embedded if text.endswith("notes")]), 3)
+
+    def test_interest_vector_incremental(self):
+        """Test that the interest centroid adds new notes and is rebuilt for re-embedded ones."""
+        recommendations = self.sharing.recommendations
+        note_id = self._add_note(1, "History of Rome")
+        self._add_note(1, "Biology of cells")
+
+        expected = np.mean([recommendations.get_content_index().normalize(v)
+                            for v in self.embedder.get_embeddings(["history", "biology"])], axis=0)
+        np.testing.assert_allclose(recommendations.get_interest_vector(1), expected, rtol=1e-5)
+
+        # Re-embedding a note replaces its row, so the sum is rebuilt
+        self.db.execute_query("UPDATE notes SET text = 'Biology' WHERE id = ?", (note_id,))
+        embedding = np.asarray(self.embedder.get_embeddings(["biology"])[0], dtype=np.float32)
+        self.db.execute_query(
+            "INSERT OR REPLACE INTO note_embeddings (note_id, model_name, embedding, created_at) VALUES (?, 'fake', ?, '')",
+            (note_id, embedding.tobytes())
+        )
+        vector = recommendations.get_interest_vector(1)
+        self.assertEqual(int(np.argmax(vector)), 1)
+        np.testing.assert_allclose(vector, recommendations.get_content_index().normalize(embedding), rtol=1e-5)
+
+    def test_precomputed_recommendations(self):
+        """Test that precomputed recommendations are served and refreshed after upvotes."""
+        self._add_note(1, "Biology of cells")
+        self._add_note(2, "History of Rome")
+
+        recommendations = self.sharing.recommendations
+        self.assertEqual(recommendations.precompute(), 2)
+
+        with patch.object(recommendations, "get_interest_vector") as get_interest_vector:
+            self.assertEqual(self.sharing.get_recommended_content(2, limit=1)[0]["id"], self.content["history"])
+            get_interest_vector.assert_not_called()
+
+        self.sharing.upvote_content(2, self.content["history"])
+        results = self.sharing.get_recommended_content(2, limit=3)
+        self.assertEqual(len(results), 2)
+        self.assertNotIn(self.content["history"], [result["id"] for result in results])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,213 @@
+"""
+Unit tests for the ingest daemon module.
+"""
+
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from ai_note_system.inputs.ingest_daemon import (
+    IngestQueue,
+    IngestDaemon,
+    DirectoryWatcher,
+    get_input_type
+)
+
+# main.py imports its modules relative to the ai_note_system directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+try:
+    import main
+    MAIN_AVAILABLE = True
+except ImportError:
+    MAIN_AVAILABLE = False
+
+class TestIngestQueue(unittest.TestCase):
+    """Test cases for the durable ingest queue."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.queue = IngestQueue(os.path.join(self.temp_dir, "queue.db"), max_attempts=2, retry_delay=0)
+
+    def tearDown(self):
+        self.queue.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_enqueue_skips_known_versions(self):
+        """Test that the same file version is only queued once."""
+        job_id = self.queue.enqueue("/notes/a.pdf", "hash1", "pdf")
+        self.assertIsNotNone(job_id)
+        self.assertIsNone(self.queue.enqueue("/notes/a.pdf", "hash1", "pdf"))
+
+        # A newer version replaces the pending job
+        self.assertEqual(self.queue.enqueue("/notes/a.pdf", "hash2", "pdf"), job_id)
+        self.assertEqual(self.queue.get_status()["counts"]["pending"], 1)
+
+    def test_claim_complete(self):
+        """Test claiming and completing a job."""
+        job_id = self.queue.enqueue("/notes/a.pdf", "hash1", "pdf")
+
+        job = self.queue.claim("worker-1")
+        self.assertEqual(job["id"], job_id)
+        self.assertEqual(job["attempts"], 1)
+        self.assertIsNone(self.queue.claim("worker-2"))
+
+        self.queue.complete(job_id, note_id=7)
+        counts = self.queue.get_status()["counts"]
+        self.assertEqual(counts["done"], 1)
+        self.assertEqual(counts["pending"], 0)
+
+    def test_retry_and_dead_letter(self):
+        """Test that failing jobs are retried and then dead-lettered."""
+        job_id = self.queue.enqueue("/notes/a.pdf", "hash1", "pdf")
+
+        self.queue.claim("worker-1")
+        self.assertEqual(self.queue.fail(job_id, "boom"), "pending")
+
+        self.queue.claim("worker-1")
+        self.assertEqual(self.queue.fail(job_id, "boom"), "dead")
+        self.assertIsNone(self.queue.claim("worker-1"))
+
+        dead = self.queue.list_jobs(status="dead")
+        self.assertEqual(dead[0]["last_error"], "boom")
+
+        self.assertEqual(self.queue.retry_dead(), 1)
+        self.assertEqual(self.queue.claim("worker-1")["attempts"], 1)
+
+    def test_recover_stale(self):
+        """Test that jobs interrupted mid-processing are requeued."""
+        self.queue.enqueue("/notes/a.pdf", "hash1", "pdf")
+        self.queue.claim("worker-1")
+
+        self.assertEqual(self.queue.recover_stale(), 1)
+        self.assertIsNotNone(self.queue.claim("worker-1"))
+
+class TestIngestDaemon(unittest.TestCase):
+    """Test cases for the watcher and worker pool."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.watch_dir = os.path.join(self.temp_dir, "inbox")
+        os.makedirs(self.watch_dir)
+        self.queue = IngestQueue(os.path.join(self.temp_dir, "queue.db"), max_attempts=1)
+
+    def tearDown(self):
+        self.queue.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, name, content):
+        path = os.path.join(self.watch_dir, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_input_types(self):
+        """Test mapping of file extensions to input types."""
+        self.assertEqual(get_input_type("lecture.PDF"), "pdf")
+        self.assertEqual(get_input_type("slide.png"), "image")
+        self.assertEqual(get_input_type("talk.mp3"), "speech")
+        self.assertIsNone(get_input_type("archive.zip"))
+
+    def test_polling_watcher_reports_settled_files(self):
+        """Test that the polling watcher reports new files once."""
+        reported = []
+        self._write("notes.txt", "hello")
+        self._write("ignored.zip", "binary")
+
+        watcher = DirectoryWatcher([self.watch_dir], reported.append, poll_interval=0.05, settle_time=0.1, use_native=False)
+        watcher.start()
+        try:
+            deadline = time.time() + 5
+            while not reported and time.time() < deadline:
+                time.sleep(0.05)
+            time.sleep(0.3)
+        finally:
+            watcher.stop()
+
+        self.assertEqual(reported, [os.path.join(self.watch_dir, "notes.txt")])
+
+    def test_workers_reuse_resources_and_dead_letter(self):
+        """Test end-to-end processing with warm per-worker resources."""
+        self._write("good.txt", "good")
+        self._write("bad.txt", "bad")
+
+        created = []
+
+        def resource_factory():
+            created.append(1)
+            return {}
+
+        def process_file(job, resources):
+            if job["path"].endswith("bad.txt"):
+                raise ValueError("unreadable")
+            return 1
+
+        daemon = IngestDaemon(
+            self.queue,
+            process_file,
+            resource_factory=resource_factory,
+            directories=[self.watch_dir],
+            num_workers=2,
+            poll_interval=0.05,
+            settle_time=0.1,
+            use_native_watch=False
+        )
+        daemon.start()
+        try:
+            deadline = time.time() + 5
+            while time.time() < deadline:
+                stats = daemon.get_stats()
+                if stats["processed"] + stats["dead_lettered"] >= 2:
+                    break
+                time.sleep(0.05)
+        finally:
+            daemon.stop()
+
+        stats = daemon.get_stats()
+        self.assertEqual(stats["processed"], 1)
+        self.assertEqual(stats["dead_lettered"], 1)
+        self.assertEqual(len(created), 2)
+        self.assertEqual(self.queue.get_status()["counts"]["dead"], 1)
+
+    @unittest.skipUnless(MAIN_AVAILABLE, "The process pipeline cannot be imported")
+    def test_edited_text_file_updates_its_note(self):
+        """Test that a changed version of a text file updates the note imported from it."""
+        db_path = os.path.join(self.temp_dir, "notes.db")
+        main.init_db(db_path)
+        config = {"DATABASE_PATH": db_path, "AUTO_EMBED_NOTES": False}
+
+        daemon = IngestDaemon(
+            self.queue,
+            lambda job, resources: main._ingest_file(job, resources, config, []),
+            resource_factory=lambda: main._create_ingest_resources(config),
+            directories=[self.watch_dir],
+            num_workers=1,
+            poll_interval=0.05,
+            settle_time=0.1,
+            use_native_watch=False
+        )
+        texts = [
+            "Photosynthesis converts light into chemical energy.",
+            "Photosynthesis converts light into chemical energy in chloroplasts."
+        ]
+
+        daemon.start()
+        try:
+            for expected, text in enumerate(texts, 1):
+                self._write("biology.txt", text)
+                deadline = time.time() + 10
+                while daemon.get_stats()["processed"] < expected and time.time() < deadline:
+                    time.sleep(0.05)
+        finally:
+            daemon.stop()
+
+        self.assertEqual(daemon.get_stats()["processed"], 2)
+        with sqlite3.connect(db_path) as conn:
+            rows = conn.execute("SELECT text, path FROM notes").fetchall()
+        self.assertEqual(rows, [(texts[-1], os.path.join(self.watch_dir, "biology.txt"))])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,193 @@
+"""
+Unit tests for the OCR service module.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from ai_note_system.inputs import ocr_service
+from ai_note_system.inputs.ocr_input import batch_process_images
+from ai_note_system.inputs.ocr_service import OCRService, otsu_thresholds, preprocess_batch, deskew
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
+class FakeEngine:
+    """Reads the first pixel of an image as its text and counts the images read."""
+
+    reads = 0
+
+    def __init__(self, engine, lang):
+        self.engine = engine.lower()
+        self.lang = lang
+
+    def read(self, image):
+        FakeEngine.reads += 1
+        return f"pixel {int(image.flat[0])}"
+
+def fake_load_image(image_path, target_dpi=None):
+    with open(image_path, "rb") as f:
+        value = int(f.read().split(b" ")[1])
+    return np.full((4, 4), value, dtype=np.uint8)
+
+def brute_force_otsu(image):
+    pixels = image.ravel().astype(np.float64)
+    best, best_threshold = -1.0, 0
+    for threshold in range(256):
+        background, foreground = pixels[pixels <= threshold], pixels[pixels > threshold]
+        if not len(background) or not len(foreground):
+            continue
+        between = len(background) * len(foreground) * (background.mean() - foreground.mean()) ** 2
+        if between > best + 1e-6:
+            best, best_threshold = between, threshold
+    return best_threshold
+
+class TestPreprocessing(unittest.TestCase):
+    """Test cases for vectorized binarization and deskewing."""
+
+    def test_otsu_matches_brute_force(self):
+        """Test that batched thresholds match a per-image search."""
+        rng = np.random.default_rng(5)
+        dark = rng.normal(60, 15, size=(3, 32, 32))
+        light = rng.normal(190, 20, size=(3, 32, 32))
+        mask = rng.random((3, 32, 32)) < np.array([0.2, 0.5, 0.8])[:, None, None]
+        images = np.clip(np.where(mask, dark, light), 0, 255).astype(np.uint8)
+
+        thresholds = otsu_thresholds(images)
+        self.assertEqual(thresholds.tolist(), [brute_force_otsu(image) for image in images])
+
+    def test_two_level_image_split(self):
+        """Test that a two-level image is split between its levels."""
+        image = np.full((1, 10, 10), 200, dtype=np.uint8)
+        image[0, :5] = 50
+        threshold = otsu_thresholds(image)[0]
+        self.assertTrue(50 <= threshold < 200)
+
+    def test_preprocess_batch_keeps_order_across_shapes(self):
+        """Test that images of different shapes are binarized and returned in input order."""
+        images = [
+            np.array([[10, 240], [10, 240]], dtype=np.uint8),
+            np.array([[240, 10, 10]], dtype=np.uint8),
+            np.array([[240, 240], [10, 10]], dtype=np.uint8)
+        ]
+
+        processed = preprocess_batch(images, deskew_images=False)
+        self.assertEqual([image.tolist() for image in processed], [
+            [[0, 255], [0, 255]],
+            [[255, 0, 0]],
+            [[255, 255], [0, 0]]
+        ])
+        self.assertIs(preprocess_batch(images, binarize=False, deskew_images=False)[1], images[1])
+
+    @unittest.skipUnless(CV2_AVAILABLE, "OpenCV is not installed")
+    def test_deskew_levels_rotated_text(self):
+        """Test that a slanted block of text is rotated back to horizontal."""
+        image = np.full((200, 300), 255, dtype=np.uint8)
+        image[90:110, 50:250] = 0
+        matrix = cv2.getRotationMatrix2D((150, 100), 8, 1.0)
+        rotated = cv2.warpAffine(image, matrix, (300, 200), borderValue=255)
+
+        def height(img):
+            rows = np.where((img < 128).any(axis=1))[0]
+            return rows[-1] - rows[0]
+
+        self.assertLess(height(deskew(rotated)), height(rotated) - 10)
+        self.assertIs(deskew(image), image)
+
+    def test_deskew_leaves_sparse_images(self):
+        """Test that images with too few dark pixels are returned unchanged."""
+        image = np.full((20, 20), 255, dtype=np.uint8)
+        image[5, 5] = 0
+        self.assertIs(deskew(image), image)
+
+class TestOCRService(unittest.TestCase):
+    """Test cases for chunked batches, caching and engine errors."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.temp_dir, "cache")
+        FakeEngine.reads = 0
+        ocr_service._worker_engine = None
+
+    def tearDown(self):
+        ocr_service._worker_engine = None
+        shutil.rmtree(self.temp_dir)
+
+    def _images(self, values):
+        paths = []
+        for i, value in enumerate(values):
+            path = os.path.join(self.temp_dir, f"image{i}.png")
+            with open(path, "wb") as f:
+                f.write(f"image {value}".encode("utf-8"))
+            paths.append(path)
+        return paths
+
+    @patch.object(ocr_service, "load_image", fake_load_image)
+    @patch.object(ocr_service, "_OCREngine", FakeEngine)
+    def test_chunked_batches_cached_and_deduplicated(self):
+        """Test that images are OCR'd in chunks, identical images once, and cached for later batches."""
+        paths = self._images([1, 2, 3, 4, 1])
+        missing = os.path.join(self.temp_dir, "missing.png")
+
+        with OCRService(cache_dir=self.cache_dir, max_workers=1, chunk_size=2, preprocess=False) as service:
+            with patch.object(ocr_service, "_ocr_chunk", wraps=ocr_service._ocr_chunk) as ocr_chunk:
+                results = service.extract_batch(paths + [missing])
+
+            self.assertEqual([len(call.args[0]) for call in ocr_chunk.call_args_list], [2, 2])
+            self.assertEqual([result.get("text") for result in results[:5]],
+                             ["pixel 1", "pixel 2", "pixel 3", "pixel 4", "pixel 1"])
+            self.assertEqual([result["image_path"] for result in results], paths + [missing])
+            self.assertIn("not found", results[5]["error"])
+            self.assertEqual(FakeEngine.reads, 4)
+
+            results = service.extract_batch(paths)
+            self.assertTrue(all(result["cached"] for result in results))
+            self.assertEqual(FakeEngine.reads, 4)
+            self.assertEqual(service.stats, {"cache_hits": 5, "cache_misses": 4})
+
+    def test_engine_setup_errors_become_image_errors(self):
+        """Test that a missing OCR package fails each image instead of the batch."""
+        paths = self._images([1, 2, 3])
+
+        with patch.object(ocr_service, "_OCREngine", side_effect=ImportError("No module named 'pytesseract'")):
+            with OCRService(cache_dir=self.cache_dir, max_workers=1, chunk_size=2) as service:
+                results = service.extract_batch(paths)
+                self.assertEqual(service.extract_text(paths[0]), "")
+
+        self.assertEqual([result["image_path"] for result in results], paths)
+        for result in results:
+            self.assertTrue(result["error"].startswith("Failed to extract text from image"))
+            self.assertIn("pytesseract", result["error"])
+
+    def test_batch_process_images_reports_each_image(self):
+        """Test that directory imports report engine errors per image, as before batching."""
+        self._images([1, 2])
+
+        with patch.object(ocr_service, "_OCREngine", side_effect=ImportError("No module named 'pytesseract'")):
+            results = batch_process_images(self.temp_dir, cache_dir=self.cache_dir, max_workers=1)
+
+        self.assertEqual(len(results), 2)
+        for result in results:
+            self.assertTrue(result["error"].startswith("Failed to extract text from image"))
+
+    def test_unknown_engine_in_worker_pool(self):
+        """Test that an engine failing in the pool initializer does not break the pool."""
+        paths = self._images([1, 2, 3, 4])
+
+        with OCRService(engine="bogus", cache_dir=self.cache_dir, max_workers=2, chunk_size=2) as service:
+            results = service.extract_batch(paths)
+
+        self.assertEqual([result["image_path"] for result in results], paths)
+        for result in results:
+            self.assertIn("Unsupported OCR engine: bogus", result["error"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+Unit tests for the reminder manager and its scheduler.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+from ai_note_system.database.db_manager import DatabaseManager, init_db
+from ai_note_system.outputs.reminder_manager import ReminderManager
+from ai_note_system.outputs.reminder_scheduler import ReminderQueue, NotificationSenderPool
+
+def _reminder(item_id, seconds):
+    return {
+        "item_id": item_id,
+        "item_type": "note",
+        "reminder_time": (datetime.now() + timedelta(seconds=seconds)).isoformat(),
+        "channels": ["test"],
+        "status": "scheduled"
+    }
+
+class TestReminderQueue(unittest.TestCase):
+    """Test cases for the due-time queue."""
+
+    def test_orders_replaces_and_removes(self):
+        """Test that reminders pop by due time and stale entries are skipped."""
+        queue = ReminderQueue()
+        queue.push(_reminder("a", -30))
+        queue.push(_reminder("b", -20))
+        queue.push(_reminder("c", -10))
+
+        # Rescheduling moves a reminder; removing drops it
+        queue.push(_reminder("a", 60))
+        queue.remove(("note", "b"))
+
+        now = datetime.now().timestamp()
+        self.assertEqual([r["item_id"] for r in queue.pop_due(now)], ["c"])
+        self.assertEqual(len(queue), 1)
+        self.assertGreater(queue.next_due(), now)
+
+class TestNotificationSenderPool(unittest.TestCase):
+    """Test cases for the bounded sender pool."""
+
+    def test_retries_until_success(self):
+        """Test that a failing job is retried and the final outcome reported."""
+        pool = NotificationSenderPool(num_workers=2, max_pending=4, max_attempts=3, retry_delay=0.01)
+        pool.start()
+
+        attempts = []
+        outcomes = []
+        done = threading.Event()
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise ConnectionError("unreachable")
+            return True
+
+        pool.submit("flaky", flaky, lambda success: (outcomes.append(success), done.set()))
+        self.assertTrue(done.wait(5))
+        pool.stop()
+
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(outcomes, [True])
+
+class TestReminderScheduler(unittest.TestCase):
+    """Test cases for the event-driven scheduler."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test.db")
+        init_db(self.db_path)
+        self.db_manager = DatabaseManager(self.db_path)
+
+        self.sent = []
+        self.all_sent = threading.Event()
+        self.manager = ReminderManager(self.db_manager, {"REMINDER_RETRY_DELAY": 0.01})
+        self.manager.notification_handlers = {"test": self._send}
+
+    def tearDown(self):
+        self.manager.stop_scheduler()
+        self.db_manager.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _send(self, reminder, item_details):
+        self.sent.append(reminder["item_id"])
+        if len(self.sent) == 2:
+            self.all_sent.set()
+        return True
+
+    def test_sends_each_reminder_once(self):
+        """Test that overdue and newly scheduled reminders are sent once and marked sent."""
+        self.db_manager.save_reminders([_reminder("overdue", -60), _reminder("later", 3600)])
+        self.manager.start_scheduler()
+
+        # A reminder scheduled while the scheduler sleeps wakes it up
+        self.manager.schedule_reminder("soon", "note", datetime.now() + timedelta(seconds=0.2), ["test"])
+        self.assertTrue(self.all_sent.wait(5))
+        self.manager.stop_scheduler()
+
+        self.assertEqual(sorted(self.sent), ["overdue", "soon"])
+        self.assertEqual(
+            [r["item_id"] for r in self.db_manager.get_reminders(status="sent")],
+            ["overdue", "soon"]
+        )
+        self.assertEqual(self.db_manager.get_reminders(status="sent")[0]["metadata"]["channels"], {"test": True})
+        self.assertEqual([r["item_id"] for r in self.db_manager.get_reminders(status="scheduled")], ["later"])
+
+    def test_bad_reminder_does_not_stop_scheduler(self):
+        """Test that a reminder failing to dispatch is marked failed and the others are still sent."""
+        get_item_details = self.manager._get_item_details
+
+        def item_details(item_id, item_type):
+            if item_id == "broken":
+                raise ValueError("bad item")
+            return get_item_details(item_id, item_type)
+
+        self.manager._get_item_details = item_details
+        self.db_manager.save_reminders([_reminder("broken", -60), _reminder("first", -30)])
+        self.manager.start_scheduler()
+
+        self.manager.schedule_reminder("second", "note", datetime.now() + timedelta(seconds=0.2), ["test"])
+        self.assertTrue(self.all_sent.wait(5))
+        self.manager.stop_scheduler()
+
+        self.assertEqual(sorted(self.sent), ["first", "second"])
+        self.assertEqual([r["item_id"] for r in self.db_manager.get_reminders(status="failed")], ["broken"])
+
+    def test_unconfigured_channel_is_not_retried(self):
+        """Test that a channel without configuration fails at once without calling its handler."""
+        email = MagicMock(return_value=False)
+        self.manager.config["REMINDER_RETRY_DELAY"] = 60
+        self.manager.notification_handlers["email"] = email
+        reminder = dict(_reminder("unconfigured", -60), channels=["email", "test"])
+        self.db_manager.save_reminders([reminder, _reminder("other", -30)])
+
+        self.manager.start_scheduler()
+        self.assertTrue(self.all_sent.wait(5))
+        self.manager.stop_scheduler()
+
+        email.assert_not_called()
+        sent = {r["item_id"]: r for r in self.db_manager.get_reminders(status="sent")}
+        self.assertEqual(sent["unconfigured"]["metadata"]["channels"], {"email": False, "test": True})
+
+if __name__ == "__main__":
+    unittest.main()
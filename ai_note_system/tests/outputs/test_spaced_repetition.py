@@ -0,0 +1,102 @@
+"""
+Unit tests for the spaced repetition module.
+"""
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from ai_note_system.database.db_manager import DatabaseManager, init_db
+from ai_note_system.outputs.spaced_repetition import SpacedRepetition
+
+def _days_ago(days):
+    return (datetime.now() - timedelta(days=days)).isoformat()
+
+class TestSpacedRepetition(unittest.TestCase):
+    """Test cases for the database-backed review queue."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.temp_dir, "spaced_repetition")
+        self.db_path = os.path.join(self.temp_dir, "test.db")
+        init_db(self.db_path)
+        self.db_manager = DatabaseManager(self.db_path)
+
+    def tearDown(self):
+        self.db_manager.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _write_file(self, item_id, next_review, last_reviewed=None):
+        os.makedirs(self.data_dir, exist_ok=True)
+        data = {
+            "item_id": item_id,
+            "item_type": "note",
+            "easiness_factor": 2.5,
+            "interval": 1,
+            "repetitions": 1,
+            "review_count": 1,
+            "last_reviewed": last_reviewed,
+            "next_review": next_review,
+            "box": 0,
+            "source": "file"
+        }
+        with open(os.path.join(self.data_dir, f"note_{item_id}.json"), "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    def test_schedule_and_due_items(self):
+        """Test that reviews are stored and due items come back most overdue first."""
+        sr = SpacedRepetition(self.db_manager, self.data_dir)
+        self.db_manager.save_review_states([
+            {"item_id": str(i), "item_type": "note", "next_review": _days_ago(i)} for i in range(1, 6)
+        ] + [{"item_id": "9", "item_type": "question", "next_review": _days_ago(10)}])
+
+        due = sr.get_due_items("note", limit=3)
+        self.assertEqual([item["item_id"] for item in due], ["5", "4", "3"])
+
+        updated = sr.schedule_review("5", 5, metadata={"deck": "physics"})
+        self.assertEqual(updated["repetitions"], 1)
+        self.assertEqual(sr.get_review_data("5")["deck"], "physics")
+        self.assertEqual([item["item_id"] for item in sr.get_due_items(limit=2)], ["9", "4"])
+
+    def test_grade_items_in_bulk(self):
+        """Test that repeated grades of one item in a batch build on each other."""
+        sr = SpacedRepetition(self.db_manager, self.data_dir)
+        updated = sr.grade_items([("1", 5), ("2", 1), ("1", 5)])
+
+        self.assertEqual([data["repetitions"] for data in updated], [1, 0, 2])
+        self.assertEqual(sr.get_review_data("1")["interval"], 6)
+        self.assertEqual(sr.get_review_data("2")["interval"], 1)
+
+        leitner = sr.grade_items([("3", 4)], item_type="question", algorithm="Leitner")
+        self.assertEqual(leitner[0]["box"], 1)
+
+    def test_migrates_files_once(self):
+        """Test that file-based review data is copied without overwriting newer reviews."""
+        self._write_file(1, _days_ago(2), last_reviewed=_days_ago(3))
+        self._write_file(2, _days_ago(1), last_reviewed=_days_ago(30))
+        self.db_manager.save_review_states([
+            {"item_id": "2", "item_type": "note", "last_reviewed": _days_ago(1), "next_review": _days_ago(-5)}
+        ])
+
+        sr = SpacedRepetition(self.db_manager, self.data_dir)
+        self.assertEqual(sr.get_review_data("1")["source"], "file")
+        self.assertNotIn("source", sr.get_review_data("2"))
+
+        # The marker prevents a second migration into the same database
+        self._write_file(3, _days_ago(1))
+        self.assertEqual(sr.migrate_review_files(), 0)
+        self.assertEqual(sr.get_review_data("3")["review_count"], 0)
+
+    def test_file_due_items_sorted_before_limit(self):
+        """Test that the file fallback returns the most overdue items."""
+        for i in range(1, 6):
+            self._write_file(i, _days_ago(i))
+
+        due = SpacedRepetition(data_dir=self.data_dir).get_due_items(limit=2)
+        self.assertEqual([item["item_id"] for item in due], [5, 4])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+"""
+Unit tests for the speech cache module.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from ai_note_system.outputs.speech_cache import SpeechCache, split_into_segments
+from ai_note_system.outputs.speech_generator import batch_generate_speech
+
+def fake_synthesize(text, output_path, voice, rate, format, engine, used_engine="gtts"):
+    """Write the segment text as fake MP3 bytes."""
+    with open(output_path, "wb") as f:
+        f.write(text.encode("utf-8"))
+    return {"success": True, "engine": used_engine, "output_path": output_path}
+
+class TestSpeechCache(unittest.TestCase):
+    """Test cases for the speech cache module."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.temp_dir, "cache")
+
+    def tearDown(self):
+        """Clean up test environment."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _write(self, name, data):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_key_depends_on_all_parameters(self):
+        """Test that every synthesis parameter changes the cache key."""
+        base = SpeechCache.make_key("Hello.", "en", 1.0, "gtts", "mp3")
+        self.assertEqual(base, SpeechCache.make_key("Hello.", "en", 1.0, "gtts", "mp3"))
+        self.assertNotEqual(base, SpeechCache.make_key("Hello!", "en", 1.0, "gtts", "mp3"))
+        self.assertNotEqual(base, SpeechCache.make_key("Hello.", "fr", 1.0, "gtts", "mp3"))
+        self.assertNotEqual(base, SpeechCache.make_key("Hello.", "en", 1.5, "gtts", "mp3"))
+        self.assertNotEqual(base, SpeechCache.make_key("Hello.", "en", 1.0, "azure", "mp3"))
+        self.assertNotEqual(base, SpeechCache.make_key("Hello.", "en", 1.0, "gtts", "wav"))
+
+    def test_hits_and_bytes_saved(self):
+        """Test that cache hits are counted with the bytes they saved."""
+        cache = SpeechCache(self.cache_dir)
+        key = SpeechCache.make_key("Hello.", "en", 1.0, "gtts", "mp3")
+
+        self.assertIsNone(cache.get(key))
+        cache.put(key, self._write("a.mp3", b"x" * 10), "mp3")
+        self.assertIsNotNone(cache.get(key))
+
+        stats = cache.get_stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["bytes_saved"], 10)
+
+    def test_eviction_removes_least_recently_used(self):
+        """Test that eviction keeps the cache under its size limit."""
+        cache = SpeechCache(self.cache_dir, max_size_bytes=25)
+        keys = [SpeechCache.make_key(str(i), "en", 1.0, "gtts", "mp3") for i in range(3)]
+
+        cache.put(keys[0], self._write("0.mp3", b"x" * 10), "mp3")
+        cache.put(keys[1], self._write("1.mp3", b"x" * 10), "mp3")
+        cache.get(keys[0])
+        cache.put(keys[2], self._write("2.mp3", b"x" * 10), "mp3")
+
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNotNone(cache.get(keys[2]))
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+
+    def test_pinned_entries_are_not_evicted(self):
+        """Test that pinned entries outlive evictions until they are unpinned."""
+        cache = SpeechCache(self.cache_dir, max_size_bytes=15)
+        keys = [SpeechCache.make_key(str(i), "en", 1.0, "gtts", "mp3") for i in range(2)]
+
+        cache.put(keys[0], self._write("0.mp3", b"x" * 10), "mp3")
+        path = cache.get(keys[0], pin=True)
+        cache.put(keys[1], self._write("1.mp3", b"x" * 10), "mp3", pin=True)
+
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(cache.get_stats()["evictions"], 0)
+
+        cache.unpin(keys)
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(cache.get_stats()["size_bytes"], 10)
+
+    def test_existing_entries_are_reloaded(self):
+        """Test that a new cache instance sees files written by a previous one."""
+        key = SpeechCache.make_key("Hello.", "en", 1.0, "gtts", "mp3")
+        SpeechCache(self.cache_dir).put(key, self._write("a.mp3", b"abc"), "mp3")
+
+        self.assertIsNotNone(SpeechCache(self.cache_dir).get(key))
+
+    def test_split_into_segments(self):
+        """Test sentence-level segmentation."""
+        segments = split_into_segments("First one. Second one!\n\nThird   one?")
+        self.assertEqual(segments, ["First one.", "Second one!", "Third one?"])
+
+        long_segments = split_into_segments("word " * 200, max_chars=50)
+        self.assertTrue(all(len(s) <= 50 for s in long_segments))
+
+    @patch("ai_note_system.outputs.speech_generator.resolve_engine", return_value="gtts")
+    @patch("ai_note_system.outputs.speech_generator.synthesize_segment", side_effect=fake_synthesize)
+    def test_batch_only_renders_changed_sentences(self, mock_synthesize, mock_resolve):
+        """Test that re-running a batch only synthesizes new sentences."""
+        output_dir = os.path.join(self.temp_dir, "audio")
+        note = {"title": "Note", "text": "Alpha is first. Beta is second."}
+
+        first = batch_generate_speech([note], output_dir, summarize=False, include_metadata=False)
+        self.assertTrue(first["success"])
+        first_calls = mock_synthesize.call_count
+
+        second = batch_generate_speech([note], output_dir, summarize=False, include_metadata=False)
+        self.assertEqual(mock_synthesize.call_count, first_calls)
+        self.assertEqual(second["results"][0]["segments_synthesized"], 0)
+        self.assertGreater(second["cache"]["bytes_saved"], 0)
+
+        edited = {"title": "Note", "text": "Alpha is first. Gamma is new."}
+        third = batch_generate_speech([edited], output_dir, summarize=False, include_metadata=False)
+        self.assertEqual(third["results"][0]["segments_synthesized"], 1)
+
+        with open(os.path.join(output_dir, "Note.mp3"), "rb") as f:
+            self.assertIn(b"Gamma is new.", f.read())
+
+    @patch("ai_note_system.outputs.speech_generator.resolve_engine", return_value="gtts")
+    def test_fallback_audio_cached_under_its_engine(self, mock_resolve):
+        """Test that audio from a fallback engine is not served for the preferred one."""
+        output_dir = os.path.join(self.temp_dir, "audio")
+        note = {"title": "Note", "text": "Alpha is first."}
+
+        def fallback(*args):
+            return fake_synthesize(*args, used_engine="pyttsx3")
+
+        with patch("ai_note_system.outputs.speech_generator.synthesize_segment", side_effect=fallback):
+            first = batch_generate_speech([note], output_dir, summarize=False, include_metadata=False)
+        synthesized = first["results"][0]["segments_synthesized"]
+        self.assertGreater(synthesized, 0)
+
+        with patch("ai_note_system.outputs.speech_generator.synthesize_segment", side_effect=fake_synthesize) as mock_synthesize:
+            second = batch_generate_speech([note], output_dir, summarize=False, include_metadata=False)
+        self.assertEqual(mock_synthesize.call_count, synthesized)
+        self.assertEqual(second["results"][0]["segments_synthesized"], synthesized)
+        self.assertEqual(second["cache"]["entries"], 2 * synthesized)
+
+if __name__ == "__main__":
+    unittest.main()
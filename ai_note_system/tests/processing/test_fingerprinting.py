@@ -0,0 +1,97 @@
+"""
+Unit tests for the fingerprinting module.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from ai_note_system.processing.fingerprinting import (
+    fingerprint_text,
+    fingerprint_stage,
+    plan_reprocessing,
+    format_plan_report
+)
+from ai_note_system.database.db_manager import DatabaseManager, init_db
+
+class TestFingerprinting(unittest.TestCase):
+    """Test cases for the fingerprinting module."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.text = "Neural networks learn representations.\n\nBackpropagation computes gradients."
+        self.stages = {
+            "summary": {"model": "gpt-4", "max_length": 500},
+            "keypoints": {"model": "gpt-4", "max_points": 10}
+        }
+
+    def test_fingerprint_ignores_whitespace(self):
+        """Test that whitespace-only edits keep the same fingerprint."""
+        reformatted = "  Neural networks   learn representations. Backpropagation computes gradients. "
+        self.assertEqual(fingerprint_text(self.text), fingerprint_text(reformatted))
+        self.assertNotEqual(fingerprint_text(self.text), fingerprint_text(self.text + " More."))
+
+    def test_stage_fingerprint_depends_on_params(self):
+        """Test that changing a stage parameter changes its fingerprint."""
+        text_fp = fingerprint_text(self.text)
+        self.assertNotEqual(
+            fingerprint_stage("summary", text_fp, {"model": "gpt-4"}),
+            fingerprint_stage("summary", text_fp, {"model": "gpt-3.5-turbo"})
+        )
+
+    def test_new_note_runs_everything(self):
+        """Test that a first import runs every requested stage."""
+        plan = plan_reprocessing(self.text, self.stages)
+        self.assertEqual(set(plan.stages_to_run), {"text", "summary", "keypoints"})
+        self.assertIn("New note", format_plan_report(plan.to_dict()))
+
+    def test_unchanged_reimport_skips_everything(self):
+        """Test that re-importing identical text skips all stages."""
+        first = plan_reprocessing(self.text, self.stages)
+        second = plan_reprocessing(self.text, self.stages, first.fingerprints, existing_note_id=1)
+        self.assertEqual(second.stages_to_run, [])
+        self.assertFalse(second.should_run("summary"))
+
+    def test_changed_parameter_reruns_only_that_stage(self):
+        """Test that a changed parameter only reruns the affected stage."""
+        first = plan_reprocessing(self.text, self.stages)
+        stages = dict(self.stages, keypoints={"model": "gpt-4", "max_points": 5})
+        second = plan_reprocessing(self.text, stages, first.fingerprints, existing_note_id=1)
+        self.assertEqual(second.stages_to_run, ["keypoints"])
+        self.assertEqual(second.decisions["keypoints"]["reason"], "changed")
+
+class TestFingerprintStorage(unittest.TestCase):
+    """Test cases for fingerprint storage in the database."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.temp_dir = tempfile.mkdtemp()
+        db_path = os.path.join(self.temp_dir, "test.db")
+        init_db(db_path)
+        self.db = DatabaseManager(db_path)
+
+    def tearDown(self):
+        """Clean up test environment."""
+        self.db.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_save_and_find_fingerprints(self):
+        """Test storing fingerprints and finding notes by source and text."""
+        note_id = self.db.create_note({"title": "Lecture", "text": "Some text", "path": "/slides/lecture.pdf"})
+        self.db.save_note_fingerprints(
+            note_id,
+            {"text": "abc", "visualization": "def"},
+            {"visualization": {"type": "mindmap", "code": "mindmap"}}
+        )
+
+        self.assertEqual(self.db.find_note_by_source("/slides/lecture.pdf"), note_id)
+        self.assertEqual(self.db.find_note_by_fingerprint("text", "abc"), note_id)
+        self.assertIsNone(self.db.find_note_by_fingerprint("text", "xyz"))
+
+        stored = self.db.get_note_fingerprints(note_id)
+        self.assertEqual(stored["text"]["fingerprint"], "abc")
+        self.assertEqual(stored["visualization"]["artifact"]["type"], "mindmap")
+
+if __name__ == "__main__":
+    unittest.main()
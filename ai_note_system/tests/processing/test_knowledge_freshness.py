@@ -0,0 +1,100 @@
+"""
+Unit tests for the knowledge freshness module.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+
+from ai_note_system.processing.knowledge_freshness import KnowledgeFreshness
+from ai_note_system.tests.query_database import QueryDatabase
+
+def _days_ago(days):
+    return (datetime.now() - timedelta(days=days)).isoformat()
+
+class TestKnowledgeFreshness(unittest.TestCase):
+    """Test cases for batch freshness scoring."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db = QueryDatabase(os.path.join(self.temp_dir, "test.db"))
+        self.freshness = KnowledgeFreshness(self.db)
+
+        for title, tags, age in [
+            ("LLMs", "generative_ai", 180),
+            ("Proofs", "Mathematics, history", 180),
+            ("Untagged", None, 365),
+            ("Fresh", "deep learning", 10),
+        ]:
+            self.db.execute_query(
+                "INSERT INTO notes (title, tags, created_at) VALUES (?, ?, ?)", (title, tags, _days_ago(age))
+            )
+
+    def tearDown(self):
+        self.freshness.stop_refresh_scheduler()
+        self.db.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _scores(self):
+        rows = self.db.execute_query("SELECT note_id, freshness_score FROM note_freshness ORDER BY note_id").fetchall()
+        return [row["freshness_score"] for row in rows]
+
+    def test_refresh_scores_all_notes(self):
+        """Test that the batch scores decay with the shortest applicable half-life."""
+        result = self.freshness.refresh_freshness()
+        self.assertEqual((result["mode"], result["refreshed"], result["outdated"]), ("full", 4, 1))
+
+        expected = [2 ** (-180 / 90), 2 ** (-180 / 3650), 2 ** (-365 / 365), 2 ** (-10 / 180)]
+        for score, expected_score in zip(self._scores(), expected):
+            self.assertAlmostEqual(score, expected_score)
+
+        single = self.freshness.calculate_note_freshness(4)
+        self.assertEqual((single["half_life_days"], single["applicable_topics"]), (180, ["deep_learning"]))
+        self.assertEqual(self.freshness.calculate_note_freshness(99)["status"], "error")
+
+    def test_incremental_refresh(self):
+        """Test that only new and edited notes are rescored until the half-lives change."""
+        self.freshness.refresh_freshness()
+        self.assertEqual(self.freshness.refresh_freshness()["refreshed"], 0)
+
+        self.db.execute_query("UPDATE notes SET updated_at = ? WHERE id = 1", (datetime.now().isoformat(),))
+        self.db.execute_query("INSERT INTO notes (title, tags) VALUES ('New', 'blockchain')")
+        self.db.execute_query("DELETE FROM notes WHERE id = 3")
+
+        result = self.freshness.refresh_freshness()
+        self.assertEqual((result["mode"], result["refreshed"], result["outdated"]), ("incremental", 2, 0))
+
+        self.freshness.set_half_life("generative_ai", 30)
+        result = self.freshness.refresh_freshness()
+        self.assertEqual((result["mode"], result["refreshed"]), ("full", 4))
+        self.assertEqual(len(self._scores()), 4)
+
+    def test_outdated_notes_and_report(self):
+        """Test that outdated notes and the report are read from the stored scores."""
+        outdated = self.freshness.check_outdated_notes()
+        self.assertEqual([note["title"] for note in outdated["outdated_notes"]], ["LLMs"])
+        self.assertEqual(self.freshness.check_outdated_notes(topic="math")["total_outdated"], 0)
+
+        report = self.freshness.generate_freshness_report()["report"]
+        self.assertEqual((report["total_notes"], report["notes_with_freshness"], report["outdated_notes"]), (4, 4, 1))
+        self.assertEqual(report["tags_freshness"]["generative_ai"]["outdated"], 1)
+        self.assertAlmostEqual(report["avg_freshness"], sum(self._scores()) / 4)
+
+    def test_refresh_scheduler(self):
+        """Test that the scheduler refreshes scores in the background with its own connection."""
+        self.assertTrue(self.freshness.start_refresh_scheduler(interval_seconds=60))
+        self.assertFalse(self.freshness.start_refresh_scheduler(interval_seconds=60))
+
+        for _ in range(100):
+            if len(self._scores()) == 4:
+                break
+            time.sleep(0.05)
+
+        self.freshness.stop_refresh_scheduler()
+        self.assertEqual(len(self._scores()), 4)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Unit tests for the batch mastery estimator.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from ai_note_system.database.db_manager import DatabaseManager, init_db
+from ai_note_system.outputs.spaced_repetition import SpacedRepetition
+from ai_note_system.processing.ml_enhancements import mastery_estimator
+from ai_note_system.processing.ml_enhancements.mastery_estimator import MasteryEstimator, estimate_mastery
+
+def _days_ago(days):
+    return (datetime.now() - timedelta(days=days)).isoformat()
+
+class TestMasteryEstimator(unittest.TestCase):
+    """Test cases for vectorized mastery estimation."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test.db")
+        init_db(self.db_path)
+        self.db_manager = DatabaseManager(self.db_path)
+        self.scheduler = SpacedRepetition(self.db_manager, data_dir=os.path.join(self.temp_dir, "sr"))
+
+        # Reviews with the SM-2 algorithm and the Leitner system, and an item with quizzes only
+        self.scheduler.grade_items([("1", 5), ("2", 2), ("1", 4)])
+        self.scheduler.grade_items([("3", 4), ("3", 5)], algorithm="leitner")
+        self.db_manager.conn.execute("UPDATE review_log SET reviewed_at = ? WHERE item_id = '2'", (_days_ago(400),))
+        self.db_manager.conn.commit()
+
+        self.db_manager.save_quiz_results([
+            {"item_id": "1", "score": 0.9, "difficulty": "hard", "topic": "algebra", "timestamp": _days_ago(30)},
+            {"item_id": "1", "score": 0.4, "topic": "geometry", "timestamp": _days_ago(2)},
+            {"item_id": "1", "score": 0.7, "difficulty": "easy", "topic": "algebra"},
+            {"item_id": "4", "score": 0.5, "topic": "calculus", "timestamp": "not a date"},
+        ])
+
+    def tearDown(self):
+        mastery_estimator._estimator_cache.clear()
+        self.db_manager.close()
+        shutil.rmtree(self.temp_dir)
+
+    def assertReportsEqual(self, batch, single):
+        self.assertAlmostEqual(batch["mastery_score"], single["mastery_score"])
+        self.assertAlmostEqual(batch["confidence"], single["confidence"])
+        for key in ("strengths", "weaknesses", "recommendations"):
+            self.assertEqual(batch[key], single[key])
+
+    def test_batch_matches_single_item_estimates(self):
+        """Test that the vectorized scores equal those of estimate_mastery."""
+        reports = MasteryEstimator(self.db_manager).estimate()
+        self.assertEqual(sorted(reports), ["1", "2", "3", "4"])
+
+        for item_id, report in reports.items():
+            self.assertReportsEqual(report, estimate_mastery(item_id, db_manager=self.db_manager))
+
+        # Items without any data get the default report
+        report = MasteryEstimator(self.db_manager).estimate(["5"])["5"]
+        self.assertEqual((report["mastery_score"], report["confidence"]), (0.0, 0.0))
+
+    def test_cache_invalidated_by_new_reviews(self):
+        """Test that cached reports are reused until a review or quiz result is recorded."""
+        reports = mastery_estimator.estimate_mastery_batch(["1", "2"], db_manager=self.db_manager)
+        self.assertIs(mastery_estimator.estimate_mastery_batch(["2"], db_manager=self.db_manager)["2"], reports["2"])
+
+        self.scheduler.schedule_review("2", 5)
+        updated = mastery_estimator.estimate_mastery_batch(["2"], db_manager=self.db_manager)["2"]
+        self.assertGreater(updated["mastery_score"], reports["2"]["mastery_score"])
+        self.assertReportsEqual(updated, estimate_mastery("2", db_manager=self.db_manager))
+
+        self.db_manager.save_quiz_results([{"item_id": "2", "score": 1.0}])
+        self.assertIsNot(mastery_estimator.estimate_mastery_batch(["2"], db_manager=self.db_manager)["2"], updated)
+
+if __name__ == "__main__":
+    unittest.main()
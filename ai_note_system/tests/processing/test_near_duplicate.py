@@ -0,0 +1,112 @@
+"""
+Unit tests for the near-duplicate detection module.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from ai_note_system.processing.near_duplicate import (
+    MinHasher,
+    NearDuplicateDetector,
+    estimate_jaccard,
+    optimal_bands,
+    shingle_text
+)
+from ai_note_system.database.db_manager import DatabaseManager, init_db
+
+LECTURE = (
+    "Gradient descent is an iterative optimization algorithm for finding a local minimum "
+    "of a differentiable function. The idea is to take repeated steps in the opposite "
+    "direction of the gradient of the function at the current point, because this is the "
+    "direction of steepest descent. Stochastic gradient descent estimates the gradient "
+    "from a randomly selected subset of the data, which makes each step cheaper. "
+    "The learning rate controls the size of every step and must be tuned carefully."
+)
+
+class TestMinHash(unittest.TestCase):
+    """Test cases for MinHash signatures."""
+
+    def test_shingles_ignore_formatting(self):
+        """Test that case and punctuation do not change the shingles."""
+        self.assertEqual(shingle_text("Hello, World! Again"), shingle_text("hello world again"))
+
+    def test_similar_texts_have_similar_signatures(self):
+        """Test that signature agreement tracks Jaccard similarity."""
+        hasher = MinHasher()
+        export = LECTURE.replace("The learning rate", "Page 2. The learning rate")
+        other = "Photosynthesis converts light energy into chemical energy stored in glucose."
+
+        self.assertGreater(estimate_jaccard(hasher.signature(LECTURE), hasher.signature(export)), 0.8)
+        self.assertLess(estimate_jaccard(hasher.signature(LECTURE), hasher.signature(other)), 0.2)
+
+    def test_optimal_bands(self):
+        """Test that the band layout covers the signature with a midpoint below the threshold."""
+        bands, rows = optimal_bands(128, 0.8)
+        self.assertEqual(bands * rows, 128)
+        self.assertLessEqual((1.0 / bands) ** (1.0 / rows), 0.8)
+
+class TestNearDuplicateDetector(unittest.TestCase):
+    """Test cases for the LSH-backed detector."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.temp_dir = tempfile.mkdtemp()
+        db_path = os.path.join(self.temp_dir, "test.db")
+        init_db(db_path)
+        self.db = DatabaseManager(db_path)
+        self.detector = NearDuplicateDetector(self.db, threshold=0.7)
+
+    def tearDown(self):
+        """Clean up test environment."""
+        self.db.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_detects_reexport_of_same_lecture(self):
+        """Test that a slightly different export of a note is detected."""
+        note_id = self.db.create_note({"title": "Gradient descent", "text": LECTURE})
+        other_id = self.db.create_note({"title": "Biology", "text": "Cells divide by mitosis and meiosis."})
+        self.assertEqual(self.detector.rebuild_index(), 2)
+
+        export = LECTURE.replace("cheaper.", "cheaper (see slide 4).")
+        matches = self.detector.find_near_duplicates(self.detector.compute_signature(export))
+
+        self.assertEqual([match["id"] for match in matches], [note_id])
+        self.assertNotIn(other_id, [match["id"] for match in matches])
+
+        # A note never matches itself when excluded
+        self.assertEqual(
+            self.detector.find_near_duplicates(self.detector.compute_signature(LECTURE), exclude_note_id=note_id),
+            []
+        )
+
+    def test_ensure_index_builds_missing_index(self):
+        """Test that notes stored before indexing are indexed on first use, once."""
+        note_id = self.db.create_note({"title": "Gradient descent", "text": LECTURE})
+        self.assertEqual(self.detector.find_near_duplicates(self.detector.compute_signature(LECTURE)), [])
+
+        self.assertEqual(self.detector.ensure_index(), 1)
+        matches = self.detector.find_near_duplicates(self.detector.compute_signature(LECTURE))
+        self.assertEqual([match["id"] for match in matches], [note_id])
+
+        self.db.create_note({"title": "Biology", "text": "Cells divide by mitosis and meiosis."})
+        self.assertEqual(self.detector.ensure_index(), 0)
+
+    def test_ensure_index_rebuilds_on_changed_parameters(self):
+        """Test that a new threshold or signature length rebuilds the stored index."""
+        note_id = self.db.create_note({"title": "Gradient descent", "text": LECTURE})
+        self.detector.ensure_index()
+
+        export = LECTURE.replace("cheaper.", "cheaper (see slide 4).")
+        for detector in (NearDuplicateDetector(self.db, threshold=0.8), NearDuplicateDetector(self.db, num_perm=64, threshold=0.8)):
+            self.assertNotEqual(detector.params, self.db.get_minhash_params())
+            self.assertEqual(detector.ensure_index(), 1)
+            self.assertEqual(self.db.get_minhash_params(), detector.params)
+
+            matches = detector.find_near_duplicates(detector.compute_signature(export))
+            self.assertEqual([match["id"] for match in matches], [note_id])
+            self.assertEqual(detector.ensure_index(), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+"""
+Unit tests for the vector index and the incremental note linker.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import numpy as np
+
+from ai_note_system.database.db_manager import DatabaseManager, init_db
+from ai_note_system.embeddings.vector_index import VectorIndex
+from ai_note_system.processing.note_linker import NoteLinker
+
+class TestVectorIndex(unittest.TestCase):
+    """Test cases for the in-memory vector index."""
+
+    def test_search_and_remove(self):
+        """Test top-k search, exclusion and swap removal."""
+        index = VectorIndex(initial_capacity=1)
+        index.add_many([1, 2, 3], [[1, 0], [0.9, 0.1], [0, 1]])
+
+        results = index.search([1, 0], k=2)
+        self.assertEqual([item_id for item_id, _ in results], [1, 2])
+        self.assertAlmostEqual(results[0][1], 1.0, places=5)
+
+        self.assertEqual(index.search([1, 0], k=3, threshold=0.5, exclude=[1])[0][0], 2)
+        self.assertEqual(index.search([1, 0], k=3, allowed=[3]), [(3, 0.0)])
+
+        self.assertTrue(index.remove(1))
+        self.assertFalse(index.remove(1))
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.search([1, 0], k=1)[0][0], 2)
+        np.testing.assert_allclose(index.get(3), [0, 1])
+
+    def test_search_many_excludes_self(self):
+        """Test batched search leaves out each query's own ID."""
+        index = VectorIndex()
+        index.add_many([1, 2, 3], [[1, 0], [0.9, 0.1], [0, 1]])
+
+        results = index.search_many(index.matrix, k=1, exclude_self=True, query_ids=index.ids.tolist())
+        self.assertEqual([row[0][0] for row in results], [2, 1, 2])
+
+class TestNoteLinker(unittest.TestCase):
+    """Test cases for embedding-based note linking."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test.db")
+        init_db(self.db_path)
+        self.db_manager = DatabaseManager(self.db_path)
+        self.db_manager.conn.execute('''
+        CREATE TABLE IF NOT EXISTS note_embeddings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            note_id INTEGER NOT NULL,
+            model_name TEXT NOT NULL,
+            embedding BLOB NOT NULL,
+            created_at TEXT NOT NULL,
+            UNIQUE (note_id, model_name)
+        )
+        ''')
+
+    def tearDown(self):
+        self.db_manager.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _create(self, title, embedding, model="model-a"):
+        note_id = self.db_manager.create_note({"title": title, "text": title, "source_type": "text"})
+        self._store(note_id, embedding, model)
+        return note_id
+
+    def _store(self, note_id, embedding, model):
+        self.db_manager.conn.execute(
+            "INSERT OR REPLACE INTO note_embeddings (note_id, model_name, embedding, created_at) VALUES (?, ?, ?, '')",
+            (note_id, model, np.asarray(embedding, dtype=np.float32).tobytes())
+        )
+        self.db_manager.conn.commit()
+
+    def _links(self):
+        cursor = self.db_manager.conn.execute("SELECT note_id, related_note_id FROM related_notes")
+        return {(row[0], row[1]) for row in cursor.fetchall()}
+
+    def test_link_note_writes_both_directions_and_prunes(self):
+        """Test that links are symmetric and each note keeps at most top_k links."""
+        linker = NoteLinker(self.db_manager, "model-a", top_k=1, threshold=0.5)
+
+        a = self._create("A", [1, 0, 0])
+        linker.link_note(a, [1, 0, 0])
+        b = self._create("B", [0.8, 0.2, 0])
+        self.assertEqual([n for n, _ in linker.link_note(b, [0.8, 0.2, 0])], [a])
+        self.assertEqual(self._links(), {(a, b), (b, a)})
+
+        # C is closer to A than B is, so A's link to B is pruned
+        c = self._create("C", [0.99, 0.01, 0])
+        self.assertEqual([n for n, _ in linker.link_note(c, [0.99, 0.01, 0])], [a])
+        self.assertIn((a, c), self._links())
+        self.assertIn((c, a), self._links())
+        self.assertNotIn((a, b), self._links())
+        self.assertEqual(self.db_manager.get_links_model(), "model-a")
+
+    def test_relinking_keeps_other_link_types(self):
+        """Test that near-duplicate and manual links survive relinking and pruning."""
+        linker = NoteLinker(self.db_manager, "model-a", top_k=1, threshold=0.5)
+
+        a = self._create("A", [1, 0, 0])
+        b = self._create("B", [0, 1, 0])
+        c = self._create("C", [0, 0, 1])
+        self.db_manager.add_related_notes(a, [(b, 0.95)], link_type="near_duplicate")
+        self.db_manager.add_related_notes(b, [(a, 0.95)], link_type="near_duplicate")
+        self.db_manager.add_related_notes(c, [(a, 0.2)])
+
+        # D is the nearest neighbour of A, and A's only similarity link
+        d = self._create("D", [0.9, 0.1, 0])
+        linker.link_note(d, [0.9, 0.1, 0])
+        e = self._create("E", [0.95, 0.05, 0])
+        linker.link_note(e, [0.95, 0.05, 0])
+        linker.link_note(a, [1, 0, 0])
+
+        self.assertTrue({(a, b), (b, a), (c, a), (a, e), (e, a)} <= self._links())
+        self.assertNotIn((a, d), self._links())
+
+        # A similarity link never overwrites a link of another type
+        self.db_manager.add_related_notes(a, [(e, 0.5)], link_type="manual")
+        linker.link_note(e, [0.95, 0.05, 0])
+        row = self.db_manager.conn.execute(
+            "SELECT similarity, link_type FROM related_notes WHERE note_id = ? AND related_note_id = ?", (a, e)
+        ).fetchone()
+        self.assertEqual(tuple(row), (0.5, "manual"))
+
+    def test_link_type_added_to_existing_table(self):
+        """Test that init_db tags the links of a database created before link types."""
+        db_path = os.path.join(self.temp_dir, "old.db")
+        with sqlite3.connect(db_path) as conn:
+            conn.execute(
+                "CREATE TABLE related_notes (note_id INTEGER, related_note_id INTEGER, similarity REAL, "
+                "PRIMARY KEY (note_id, related_note_id))"
+            )
+            conn.execute("INSERT INTO related_notes VALUES (1, 2, 0.9)")
+
+        init_db(db_path)
+        with sqlite3.connect(db_path) as conn:
+            self.assertEqual(conn.execute("SELECT link_type FROM related_notes").fetchone()[0], "similarity")
+
+    def test_rebuild_on_model_change(self):
+        """Test that all links are recomputed for a new embedding model."""
+        a = self._create("A", [1, 0])
+        b = self._create("B", [0, 1])
+        c = self._create("C", [0.9, 0.1])
+        NoteLinker(self.db_manager, "model-a", top_k=1, threshold=0.5).link_note(a, [1, 0])
+
+        # Under model-b, A is similar to B instead of C
+        self._store(a, [1, 0], "model-b")
+        self._store(b, [0.95, 0.05], "model-b")
+        self._store(c, [0, 1], "model-b")
+
+        linker = NoteLinker(self.db_manager, "model-b", top_k=1, threshold=0.5)
+        self.assertTrue(linker.needs_rebuild())
+        self.assertEqual(linker.rebuild_links(), 3)
+
+        self.assertEqual(self._links(), {(a, b), (b, a)})
+        self.assertFalse(linker.needs_rebuild())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+"""
+Unit tests for the term matcher module.
+"""
+
+import unittest
+
+from ai_note_system.processing.term_matcher import TermMatcher
+
+class TestTermMatcher(unittest.TestCase):
+    """Test cases for Aho-Corasick term matching."""
+
+    def setUp(self):
+        self.matcher = TermMatcher([
+            (1, "neural network"),
+            (2, "network"),
+            (3, "Net"),
+            (4, "C++"),
+            (5, "straße")
+        ])
+
+    def _found(self, text):
+        return [(term_id, text[start:end]) for term_id, start, end in self.matcher.find(text)]
+
+    def test_overlapping_terms_and_case(self):
+        """Test that nested terms are all found regardless of case."""
+        self.assertEqual(
+            self._found("A Neural Network is a NETWORK."),
+            [(1, "Neural Network"), (2, "Network"), (2, "NETWORK")]
+        )
+
+    def test_whole_words_only(self):
+        """Test that terms inside longer words are not matched."""
+        self.assertEqual(self._found("Networking on the internet"), [])
+        self.assertEqual(self._found("net, C++ and C+++"), [(3, "net"), (4, "C++"), (4, "C++")])
+
+    def test_case_folding_keeps_offsets(self):
+        """Test that matches after expanding characters map back to the original text."""
+        self.assertEqual(self._found("Die STRASSE, die Straße und ein net"), [(5, "STRASSE"), (5, "Straße"), (3, "net")])
+
+    def test_reference_rows(self):
+        """Test that reference rows carry context and position."""
+        rows = self.matcher.find_references(7, "x" * 60 + " net", context_chars=5)
+        self.assertEqual(rows, [(3, 7, "xxxx net", "position:61")])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+"""
+Unit tests for the topic clustering module.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from ai_note_system.database.db_manager import DatabaseManager, init_db
+from ai_note_system.processing.topic_clustering import (
+    MiniBatchKMeans,
+    TopicClusterer,
+    GRAPH,
+    EMBEDDING
+)
+
+class TestMiniBatchKMeans(unittest.TestCase):
+    """Test cases for spherical mini-batch k-means."""
+
+    def test_separates_directions(self):
+        """Test that vectors around distinct directions get distinct clusters."""
+        rng = np.random.default_rng(0)
+        centres = np.eye(3, dtype=np.float32)
+        vectors = np.concatenate([centre + rng.normal(scale=0.05, size=(50, 3)) for centre in centres])
+
+        model = MiniBatchKMeans(3, batch_size=32, iterations=50).fit(vectors)
+        labels = model.predict(vectors)
+
+        self.assertEqual(len(set(labels[:50].tolist())), 1)
+        self.assertEqual(len(set(labels.tolist())), 3)
+
+        # A new vector is assigned and pulls its centroid
+        before = model.counts.sum()
+        label = model.partial_fit(np.array([[0, 0, 1]], dtype=np.float32))[0]
+        self.assertEqual(label, labels[100])
+        self.assertEqual(model.counts.sum(), before + 1)
+
+class TestTopicClusterer(unittest.TestCase):
+    """Test cases for stored, incrementally updated clusters."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test.db")
+        init_db(self.db_path)
+        self.db_manager = DatabaseManager(self.db_path)
+        self.db_manager.conn.execute('''
+        CREATE TABLE IF NOT EXISTS note_embeddings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            note_id INTEGER NOT NULL,
+            model_name TEXT NOT NULL,
+            embedding BLOB NOT NULL,
+            created_at TEXT NOT NULL,
+            UNIQUE (note_id, model_name)
+        )
+        ''')
+        self.clusterer = TopicClusterer(self.db_manager, "model-a")
+
+    def tearDown(self):
+        self.db_manager.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _create(self, title, tags, embedding):
+        note_id = self.db_manager.create_note({"title": title, "text": title, "source_type": "text", "tags": tags})
+        self.db_manager.conn.execute(
+            "INSERT INTO note_embeddings (note_id, model_name, embedding, created_at) VALUES (?, 'model-a', ?, '')",
+            (note_id, np.asarray(embedding, dtype=np.float32).tobytes())
+        )
+        self.db_manager.conn.commit()
+        return note_id
+
+    def _create_topics(self):
+        physics = [self._create(f"Physics {i}", ["physics"], [1, 0.1 * i, 0]) for i in range(4)]
+        biology = [self._create(f"Biology {i}", ["biology"], [0, 0.1 * i, 1]) for i in range(4)]
+        for group in (physics, biology):
+            for i, note_id in enumerate(group):
+                self.db_manager.add_related_notes(note_id, [(other, 0.9) for other in group[i + 1:]])
+        self.db_manager.add_related_notes(physics[0], [(biology[0], 0.1)])
+        self.db_manager.conn.commit()
+        return physics, biology
+
+    def test_graph_clusters_and_incremental_assignment(self):
+        """Test graph clustering and assignment of a new note to its neighbours' cluster."""
+        physics, biology = self._create_topics()
+        self.assertEqual(self.clusterer.cluster_graph(), 2)
+
+        clusters = self.db_manager.get_note_clusters(GRAPH)
+        self.assertEqual(len({clusters[note_id] for note_id in physics}), 1)
+        self.assertNotEqual(clusters[physics[0]], clusters[biology[0]])
+
+        new_note = self._create("Quantum", ["physics"], [1, 0, 0.1])
+        self.db_manager.add_related_notes(new_note, [(physics[1], 0.8), (biology[2], 0.3)])
+        self.db_manager.conn.commit()
+        self.assertEqual(self.clusterer.assign_graph(new_note), clusters[physics[0]])
+
+        lonely = self._create("Cooking", ["food"], [0, 1, 0])
+        self.assertEqual(self.clusterer.assign_graph(lonely), 2)
+
+        summaries = self.clusterer.get_clusters(GRAPH)
+        self.assertEqual(summaries[0]["size"], 5)
+        self.assertEqual(summaries[0]["tags"], ["physics"])
+
+    def test_embedding_clusters_and_incremental_assignment(self):
+        """Test k-means clustering and incremental centroid updates."""
+        physics, biology = self._create_topics()
+        self.assertEqual(self.clusterer.cluster_embeddings(k=2), 2)
+
+        clusters = self.db_manager.get_note_clusters(EMBEDDING)
+        self.assertEqual(len({clusters[note_id] for note_id in biology}), 1)
+        self.assertNotEqual(clusters[physics[0]], clusters[biology[0]])
+
+        counts = self.clusterer.load_model().counts.sum()
+        new_note = self._create("Genetics", ["biology"], [0, 0, 1])
+        self.assertEqual(self.clusterer.assign_note(new_note, [0, 0, 1])[EMBEDDING], clusters[biology[0]])
+        self.assertEqual(self.clusterer.load_model().counts.sum(), counts + 1)
+
+        # A model fitted with another embedding model is not reused
+        self.assertIsNone(TopicClusterer(self.db_manager, "model-b").assign_embedding(new_note, [0, 0, 1]))
+
+if __name__ == "__main__":
+    unittest.main()
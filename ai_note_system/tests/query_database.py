@@ -0,0 +1,40 @@
+"""
+SQLite database with the execute_query and get_connection interfaces used by the
+collaboration, tracking, freshness and whiteboard modules, for their tests and benchmarks.
+"""
+
+import sqlite3
+
+class QueryDatabase:
+    """SQLite database that commits after every query and returns rows by column name."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS notes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            title TEXT NOT NULL,
+            text TEXT,
+            tags TEXT,
+            created_at TEXT,
+            updated_at TEXT
+        );
+        ''')
+
+    def execute_query(self, query, params=()):
+        cursor = self.conn.execute(query, params)
+        self.conn.commit()
+        return cursor
+
+    def get_connection(self):
+        return self.conn
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,123 @@
+"""
+Unit tests for the distraction tracker's event-driven detection.
+"""
+
+import time
+import unittest
+from unittest.mock import patch
+
+from ai_note_system.tracking.distraction_tracker import DistractionTracker
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+class TestDistractionDetection(unittest.TestCase):
+    """Test cases for deadline-driven inactivity and intervention detection."""
+
+    def setUp(self):
+        self.print_patch = patch("builtins.print")
+        self.print_patch.start()
+        self.trackers = []
+
+    def tearDown(self):
+        for tracker in self.trackers:
+            if tracker.tracking_active:
+                tracker.stop_tracking()
+        self.print_patch.stop()
+
+    def _tracker(self, **config):
+        config.setdefault("inactivity_threshold", 60)
+        config.setdefault("intervention_frequency", 60)
+        tracker = DistractionTracker("user", config=config)
+        self.trackers.append(tracker)
+        return tracker
+
+    def _types(self, tracker):
+        return [intervention["type"] for intervention in tracker.interventions]
+
+    def test_inactivity_recorded_once_when_activity_resumes(self):
+        """Test that the loop flags inactivity at its deadline and activity records one period."""
+        tracker = self._tracker(inactivity_threshold=0.1)
+        tracker.start_tracking()
+        tracker.record_activity("editor")
+
+        self.assertTrue(wait_for(lambda: tracker._inactive))
+        self.assertEqual(tracker.inactivity_periods, [])
+
+        time.sleep(0.2)
+        tracker.record_activity("editor")
+        self.assertFalse(tracker._inactive)
+        self.assertEqual(len(tracker.inactivity_periods), 1)
+        self.assertGreaterEqual(tracker.inactivity_periods[0]["end_time"], tracker.inactivity_periods[0]["start_time"])
+
+        # The deadline moved with the activity, so nothing more is recorded right away
+        tracker.record_activity("editor")
+        self.assertEqual(len(tracker.inactivity_periods), 1)
+
+    def test_steady_activity_never_inactive(self):
+        """Test that activity keeps moving the deadline, without spurious inactivity periods."""
+        tracker = self._tracker(inactivity_threshold=0.2)
+        tracker.start_tracking()
+
+        end = time.monotonic() + 0.6
+        while time.monotonic() < end:
+            tracker.record_activity("editor")
+            time.sleep(0.002)
+
+        self.assertEqual(tracker.inactivity_periods, [])
+        self.assertFalse(tracker._inactive)
+
+    def test_stop_records_running_inactivity(self):
+        """Test that stopping records an inactivity period that has not ended yet."""
+        tracker = self._tracker(inactivity_threshold=0.05)
+        tracker.start_tracking()
+        self.assertTrue(wait_for(lambda: tracker._inactive))
+
+        tracker.stop_tracking()
+        self.assertIsNone(tracker.tracking_thread)
+        self.assertEqual(len(tracker.inactivity_periods), 1)
+
+        tracker.start_tracking()
+        tracker.stop_tracking()
+        self.assertEqual(len(tracker.inactivity_periods), 1)
+
+    def test_regular_interventions_when_due(self):
+        """Test that regular interventions follow the intervention frequency."""
+        tracker = self._tracker(intervention_frequency=0.1 / 60)
+        tracker.start_tracking()
+
+        self.assertTrue(wait_for(lambda: len(tracker.interventions) >= 2))
+        tracker.stop_tracking()
+
+        count = len(tracker.interventions)
+        self.assertEqual(set(self._types(tracker)), {"regular"})
+        time.sleep(0.25)
+        self.assertEqual(len(tracker.interventions), count)
+
+    def test_frequent_switching_triggers_once_per_crossing(self):
+        """Test that switching intervenes when it reaches the threshold, not on every switch above it."""
+        tracker = self._tracker(switch_threshold=3)
+
+        # Switches are only acted on while tracking
+        for app in ["a", "b", "a", "b"]:
+            tracker.record_activity(app)
+        self.assertEqual(tracker.interventions, [])
+
+        tracker.switch_buffer.clear()
+        tracker.start_tracking()
+        for app in ["a", "b", "a", "b", "a", "b"]:
+            tracker.record_activity(app)
+        self.assertEqual(self._types(tracker), ["frequent_switching"])
+
+        # Once the window drops below the threshold, the next crossing intervenes again
+        tracker.switch_buffer.clear()
+        for app in ["a", "b", "a", "b"]:
+            tracker.record_activity(app)
+        self.assertEqual(self._types(tracker), ["frequent_switching"] * 2)
+        self.assertEqual(len(tracker.app_switches), 4)
+
+if __name__ == "__main__":
+    unittest.main()
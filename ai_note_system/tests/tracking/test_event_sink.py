@@ -0,0 +1,124 @@
+"""
+Unit tests for the event sink module.
+"""
+
+import os
+import time
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from ai_note_system.tracking.event_sink import EventSink, get_event_sink, close_event_sinks
+
+INSERT = "INSERT INTO events (id, value) VALUES (?, ?)"
+
+class TestEventSink(unittest.TestCase):
+    """Test cases for batched event writes."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test.db")
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, value TEXT NOT NULL)")
+        self.sinks = []
+
+    def tearDown(self):
+        for sink in self.sinks:
+            sink.close()
+        close_event_sinks()
+        shutil.rmtree(self.temp_dir)
+
+    def _sink(self, **kwargs):
+        sink = EventSink(self.db_path, **kwargs)
+        self.sinks.append(sink)
+        return sink
+
+    def _rows(self):
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute("SELECT id, value FROM events ORDER BY id").fetchall()
+
+    def _wait_for(self, condition, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return condition()
+
+    def test_full_batch_written_without_flush(self):
+        """Test that a full batch is written at once and a partial one waits for the interval."""
+        sink = self._sink(batch_size=3, flush_interval=60)
+
+        sink.emit(INSERT, (1, "a"))
+        sink.emit(INSERT, (2, "b"))
+        time.sleep(0.1)
+        self.assertEqual(self._rows(), [])
+
+        sink.emit(INSERT, (3, "c"))
+        self.assertTrue(self._wait_for(lambda: sink.written == 3))
+        self.assertEqual(len(self._rows()), 3)
+
+    def test_interval_writes_partial_batch(self):
+        """Test that queued events are written once the flush interval passes."""
+        sink = self._sink(batch_size=100, flush_interval=0.05)
+        sink.emit(INSERT, (1, "a"))
+        self.assertTrue(self._wait_for(lambda: sink.written == 1))
+
+    def test_flush_waits_for_queued_events(self):
+        """Test that flush returns once everything emitted before it is written."""
+        sink = self._sink(batch_size=1000, flush_interval=60)
+        for i in range(50):
+            sink.emit(INSERT, (i, str(i)))
+
+        self.assertTrue(sink.flush(timeout=5))
+        self.assertEqual(len(self._rows()), 50)
+        self.assertTrue(sink.flush(timeout=5))
+
+    def test_bad_event_dropped_alone(self):
+        """Test that a failing batch is retried one event at a time, dropping only the bad ones."""
+        sink = self._sink(batch_size=1000, flush_interval=60)
+        sink.emit(INSERT, (1, "a"))
+        sink.emit(INSERT, (1, "duplicate"))
+        sink.emit(INSERT, (2, None))
+        sink.emit("INSERT INTO missing (id) VALUES (?)", (3,))
+        sink.emit(INSERT, (4, "d"))
+        sink.flush(timeout=5)
+
+        self.assertEqual(self._rows(), [(1, "a"), (4, "d")])
+        self.assertEqual((sink.written, sink.dropped), (2, 3))
+
+    def test_close_drains_queue(self):
+        """Test that closing writes every queued event and later emits are refused."""
+        sink = self._sink(batch_size=1000, flush_interval=60)
+        for i in range(20):
+            sink.emit(INSERT, (i, str(i)))
+
+        sink.close(timeout=5)
+        self.assertEqual(len(self._rows()), 20)
+        self.assertTrue(sink.flush())
+        with self.assertRaises(RuntimeError):
+            sink.emit(INSERT, (99, "late"))
+
+    def test_shared_sink_per_database(self):
+        """Test that trackers of a database share one sink until the sinks are closed."""
+        sink = get_event_sink(self.db_path)
+        self.assertIs(get_event_sink(os.path.join(self.temp_dir, ".", "test.db")), sink)
+
+        sink.emit(INSERT, (1, "a"))
+        close_event_sinks()
+        self.assertTrue(sink.closed)
+        self.assertEqual(len(self._rows()), 1)
+
+        self.assertIsNot(get_event_sink(self.db_path), sink)
+
+    def test_closed_shared_sink_hands_off(self):
+        """Test that a tracker still holding a closed shared sink writes through the current one."""
+        held = get_event_sink(self.db_path)
+        close_event_sinks()
+
+        held.emit(INSERT, (1, "a"))
+        self.assertTrue(held.flush(timeout=5))
+        self.assertEqual(self._rows(), [(1, "a")])
+        self.assertEqual(get_event_sink(self.db_path).written, 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+Unit tests for the signal buffer module.
+"""
+
+import unittest
+
+import numpy as np
+
+from ai_note_system.tracking.signal_buffer import SignalBuffer
+
+class TestSignalBuffer(unittest.TestCase):
+    """Test cases for the ring buffer and its window statistics."""
+
+    def test_wraparound_keeps_latest_samples_in_order(self):
+        """Test that a full buffer overwrites the oldest samples and reads oldest first."""
+        buffer = SignalBuffer(["speed", "errors"], capacity=4, window=1000)
+        for i in range(10):
+            buffer.append(i, i * 10, timestamp=float(i))
+
+        self.assertEqual(len(buffer), 4)
+        self.assertEqual(buffer.times().tolist(), [6.0, 7.0, 8.0, 9.0])
+        self.assertEqual(buffer.values("speed").tolist(), [6, 7, 8, 9])
+        self.assertEqual(buffer.values("errors").tolist(), [60, 70, 80, 90])
+
+        # Samples pushed out of the buffer leave the window statistics too
+        self.assertEqual(buffer.window_count(), 4)
+        self.assertAlmostEqual(buffer.window_mean("speed"), 7.5)
+        self.assertAlmostEqual(buffer.window_variance("speed"), np.var([6, 7, 8, 9]))
+
+    def test_partially_filled_buffer(self):
+        """Test reads before the buffer is full."""
+        buffer = SignalBuffer(["speed"], capacity=8, window=1000)
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(buffer.times().tolist(), [])
+        self.assertEqual(buffer.window_mean("speed"), 0.0)
+        self.assertEqual(buffer.window_variance("speed"), 0.0)
+
+        buffer.append(3, timestamp=1.0)
+        buffer.append(5, timestamp=2.0)
+        self.assertEqual(buffer.values("speed").tolist(), [3, 5])
+        self.assertAlmostEqual(buffer.window_mean("speed"), 4.0)
+        self.assertAlmostEqual(buffer.window_variance("speed"), 1.0)
+
+    def test_window_expiry(self):
+        """Test that samples older than the window stop counting but stay readable."""
+        buffer = SignalBuffer(["speed"], capacity=100, window=10)
+        for i, value in enumerate([1, 2, 3, 4, 100]):
+            buffer.append(value, timestamp=float(i * 5))
+
+        # At t=20 the window is [10, 20]
+        self.assertEqual(buffer.window_count(), 3)
+        self.assertAlmostEqual(buffer.window_mean("speed"), (3 + 4 + 100) / 3)
+        self.assertAlmostEqual(buffer.window_variance("speed"), np.var([3, 4, 100]))
+
+        self.assertEqual(buffer.window_count(now=29.0), 1)
+        self.assertAlmostEqual(buffer.window_mean("speed"), 100.0)
+        self.assertEqual(buffer.window_variance("speed"), 0.0)
+
+        self.assertEqual(buffer.window_count(now=31.0), 0)
+        self.assertEqual(buffer.window_mean("speed", now=31.0), 0.0)
+        self.assertEqual(len(buffer), 5)
+
+        buffer.append(7, timestamp=40.0)
+        self.assertEqual(buffer.window_count(), 1)
+        self.assertAlmostEqual(buffer.window_mean("speed"), 7.0)
+
+    def test_running_sums_match_recomputation(self):
+        """Test that running statistics match the window recomputed from scratch."""
+        rng = np.random.default_rng(3)
+        buffer = SignalBuffer(["value"], capacity=64, window=30)
+        times, values = [], []
+
+        for step in range(1000):
+            timestamp, value = step * 0.5, float(rng.normal(50, 10))
+            buffer.append(value, timestamp=timestamp)
+            times.append(timestamp)
+            values.append(value)
+
+            if step % 97 == 0:
+                window = [v for t, v in zip(times[-64:], values[-64:]) if t >= timestamp - 30]
+                self.assertEqual(buffer.window_count(), len(window))
+                self.assertAlmostEqual(buffer.window_mean("value"), np.mean(window), places=6)
+                self.assertAlmostEqual(buffer.window_variance("value"), np.var(window), places=4)
+
+    def test_clear(self):
+        """Test that clearing empties the buffer and its statistics."""
+        buffer = SignalBuffer(["speed"], capacity=4)
+        buffer.append(1, timestamp=1.0)
+        buffer.clear()
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(buffer.window_count(), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+"""
+Unit tests for the time series module.
+"""
+
+import os
+import math
+import time
+import random
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from ai_note_system.tracking.event_sink import close_event_sinks
+from ai_note_system.tracking.time_series import TimeSeriesStore, TimeSeriesSource, correlation
+
+HOUR = 3600
+DAY = 86400
+
+SOURCE = TimeSeriesSource(
+    name="measurements",
+    table="measurements",
+    time_column="ts",
+    entity_column="user_id",
+    metrics=(("score", "score"), ("events", None)),
+    label_column="kind"
+)
+
+class TestTimeSeriesStore(unittest.TestCase):
+    """Test cases for mirroring, retention and range summaries."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test.db")
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("CREATE TABLE measurements (ts REAL, user_id INTEGER, score REAL, kind TEXT)")
+        self.stores = []
+        self.now = time.time()
+        self.random = random.Random(7)
+
+    def tearDown(self):
+        for store in self.stores:
+            store._conn.close()
+        close_event_sinks()
+        self.conn.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _store(self, retention=None):
+        store = TimeSeriesStore(self.db_path, retention=retention)
+        store.register_source(SOURCE)
+        self.stores.append(store)
+        return store
+
+    def _insert(self, rows):
+        self.conn.executemany("INSERT INTO measurements VALUES (?, ?, ?, ?)", rows)
+        self.conn.commit()
+
+    def _random_rows(self, count, age):
+        rows = [
+            (self.now - self.random.uniform(0, age), 1, round(self.random.uniform(0, 100), 2), self.random.choice(["a", "b"]))
+            for _ in range(count)
+        ]
+        self._insert(rows)
+        return rows
+
+    def assertSummary(self, summary, values):
+        self.assertEqual(summary["count"], len(values))
+        if values:
+            self.assertAlmostEqual(summary["sum"], sum(values), places=6)
+            self.assertEqual((summary["min"], summary["max"]), (min(values), max(values)))
+        else:
+            self.assertIsNone(summary["mean"])
+
+    def test_sync_watermark(self):
+        """Test that only rows added since the last sync are mirrored, across store instances."""
+        store = self._store()
+        self._random_rows(10, HOUR)
+        self.assertEqual(store.sync(), 20)
+        self.assertEqual(store.sync(), 0)
+
+        self._insert([(self.now, 1, None, "a")])
+        self.assertEqual(store.sync(), 1)
+        self.assertEqual(self._store().sync(), 0)
+
+        summary = store.summarize("events", self.now - DAY, self.now + 1)
+        self.assertEqual(summary["count"], 11)
+        self.assertEqual(store.summarize("score", self.now - DAY, self.now + 1)["count"], 10)
+
+    def test_summarize_matches_points_within_raw_retention(self):
+        """Test that ranges with partial buckets at both edges are answered exactly."""
+        store = self._store()
+        rows = self._random_rows(500, 3 * DAY)
+        store.sync()
+
+        for _ in range(30):
+            start, end = sorted(self.now - self.random.uniform(0, 3.5 * DAY) for _ in range(2))
+            expected = [score for ts, _, score, _ in rows if start <= ts < end]
+            self.assertSummary(store.summarize("score", start, end, entity=1), expected)
+
+            by_label = store.summarize("score", start, end, by_label=True)
+            for label in ["a", "b"]:
+                values = [score for ts, _, score, kind in rows if start <= ts < end and kind == label]
+                self.assertSummary(by_label.get(label, {"count": 0, "mean": None}), values)
+
+        self.assertEqual(store.summarize("score", self.now - DAY, self.now, entity=2)["count"], 0)
+
+    def test_summarize_expired_ranges_counts_whole_buckets(self):
+        """Test that ranges whose finer data expired are answered from whole coarser buckets."""
+        store = self._store({"raw": DAY, "minute": 2 * DAY, "hour": 10 * DAY})
+        rows = self._random_rows(800, 8 * DAY)
+        store.sync()
+
+        for _ in range(20):
+            start = self.now - self.random.uniform(3 * DAY, 8 * DAY)
+            end = start + self.random.uniform(HOUR, 2 * DAY)
+            end = min(end, self.now - 2 * DAY - 2 * HOUR)
+            if end <= start:
+                continue
+
+            first = math.floor(start / HOUR) * HOUR
+            expected = [score for ts, _, score, _ in rows if first <= math.floor(ts / HOUR) * HOUR < end]
+            self.assertSummary(store.summarize("score", start, end), expected)
+
+        # Minute buckets are kept for two days, so recent ranges stay exact at minute edges
+        start, end = self.now - 1.5 * DAY + 30, self.now - 1.2 * DAY + 90
+        first, last = math.floor(start / 60) * 60, math.ceil(end / 60) * 60
+        expected = [score for ts, _, score, _ in rows if first <= ts < last]
+        summary = store.summarize("score", start, end)
+        self.assertLessEqual(summary["count"], len(expected))
+        self.assertGreaterEqual(summary["count"], len([ts for ts, _, _, _ in rows if start <= ts < end]))
+
+    def test_retention_drops_partitions_and_buckets(self):
+        """Test that expired raw partitions are dropped and old rollup buckets deleted."""
+        store = self._store()
+        self._insert([(self.now - 3 * DAY, 1, 1.0, "a"), (self.now, 1, 2.0, "a")])
+        store.sync()
+
+        partitions = store._get_partitions()
+        self.assertEqual(len(partitions), 2)
+
+        store.apply_retention(self.now + 5 * DAY)
+        self.assertEqual(store._get_partitions(), partitions[1:])
+
+        rollup_rows = lambda level: store._conn.execute(f"SELECT COUNT(*) FROM ts_rollup_{level}").fetchone()[0]
+        store.apply_retention(self.now + 40 * DAY)
+        self.assertEqual(store._get_partitions(), [])
+        self.assertEqual(rollup_rows("minute"), 0)
+        self.assertGreater(rollup_rows("hour"), 0)
+        self.assertGreater(rollup_rows("day"), 0)
+
+        # Day rollups are kept forever
+        store.apply_retention(self.now + 1000 * DAY)
+        self.assertEqual(rollup_rows("hour"), 0)
+        self.assertEqual(rollup_rows("day"), 4)
+
+    def test_aligned_means(self):
+        """Test that only buckets where every metric has points are aligned."""
+        store = self._store()
+        self._insert([(self.now - 2 * HOUR, 1, 10.0, "a"), (self.now - 2 * HOUR, 1, 30.0, "a"), (self.now, 1, None, "a")])
+        store.sync()
+
+        buckets, means = store.aligned_means(["score", "events"], self.now - DAY, self.now + 1, resolution="hour")
+        self.assertEqual(len(buckets), 1)
+        self.assertEqual(means.tolist(), [[20.0], [1.0]])
+
+    def test_correlation(self):
+        """Test Pearson correlation, including constant and mismatched series."""
+        self.assertAlmostEqual(correlation([1, 2, 3], [2, 4, 6]), 1.0)
+        self.assertAlmostEqual(correlation([1, 2, 3], [3, 2, 1]), -1.0)
+        self.assertEqual(correlation([1, 1, 1], [1, 2, 3]), 0.0)
+        self.assertEqual(correlation([1, 2], [1, 2, 3]), 0.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+"""
+Unit tests for the knowledge graph engine.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from ai_note_system.database.db_manager import DatabaseManager, init_db
+from ai_note_system.visualization.graph_engine import get_graph_engine
+from ai_note_system.visualization.knowledge_graph_gen import (
+    extract_graph_data_from_db,
+    generate_reasoning_paths,
+    query_knowledge_graph
+)
+
+class TestGraphEngine(unittest.TestCase):
+    """Test cases for the cached graph engine."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test.db")
+        init_db(self.db_path)
+        self.db_manager = DatabaseManager(self.db_path)
+
+        self.basics = self._create("Linear Algebra Basics", "2024-01-01T10:00:00", ["basic"], ["matrices"])
+        self.calculus = self._create("Calculus Fundamentals", "2024-01-02T10:00:00", ["fundamental"], ["gradients"])
+        self.backprop = self._create("Backpropagation", "2024-01-03T10:00:00", ["advanced"], ["gradients", "matrices"])
+        self.cnn = self._create("CNN Backpropagation", "2024-01-04T10:00:00", ["expert"], ["convolutions"])
+
+        self.db_manager.add_related_notes(self.basics, [(self.backprop, 0.9)])
+        self.db_manager.add_related_notes(self.calculus, [(self.backprop, 0.8)])
+        self.db_manager.add_related_notes(self.backprop, [(self.cnn, 0.7)])
+        self.db_manager.conn.commit()
+
+    def tearDown(self):
+        self.db_manager.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _create(self, title, timestamp, tags, keypoints):
+        return self.db_manager.create_note({
+            "title": title,
+            "text": f"{title} text",
+            "timestamp": timestamp,
+            "source_type": "text",
+            "tags": tags,
+            "keypoints": keypoints
+        })
+
+    def test_extract_graph_data(self):
+        """Test node, edge and relationship type extraction."""
+        graph_data = extract_graph_data_from_db(self.db_manager, similarity_threshold=0.5, include_reasoning=True)
+
+        self.assertEqual([node["id"] for node in graph_data["nodes"]], [self.cnn, self.backprop, self.calculus, self.basics])
+        types = {(edge["source"], edge["target"]): edge["relationship_type"] for edge in graph_data["edges"]}
+        self.assertEqual(types[(self.basics, self.backprop)], "prerequisite")
+        self.assertEqual(types[(self.backprop, self.cnn)], "precedes")
+
+        path_types = sorted(path["path_type"] for path in graph_data["reasoning_paths"])
+        self.assertEqual(path_types, ["causal", "causal", "prerequisite", "prerequisite"])
+
+        limited = extract_graph_data_from_db(self.db_manager, max_nodes=2, similarity_threshold=0.75)
+        self.assertEqual(len(limited["nodes"]), 2)
+        self.assertEqual(limited["edges"], [])
+
+    def test_reasoning_paths_match_engine(self):
+        """Test that the standalone reasoning path generator agrees with the engine."""
+        graph_data = extract_graph_data_from_db(self.db_manager, include_reasoning=True)
+        self.assertEqual(
+            generate_reasoning_paths(graph_data["nodes"], graph_data["edges"]),
+            graph_data["reasoning_paths"]
+        )
+
+    def test_incremental_invalidation(self):
+        """Test that writes are picked up without a full reload."""
+        engine = get_graph_engine(self.db_manager)
+        version = engine.version
+
+        new_note = self._create("Optimizers", "2024-01-05T10:00:00", [], ["gradients"])
+        self.db_manager.add_related_notes(new_note, [(self.backprop, 0.95)])
+
+        engine = get_graph_engine(self.db_manager)
+        self.assertGreater(engine.version, version)
+        self.assertIsNotNone(engine.get_node(new_note))
+        self.assertIn(self.backprop, [engine.nodes[engine.edge_dst[e]]["id"] for e in engine.out_edges(engine.index[new_note])])
+
+        self.db_manager.delete_note(new_note)
+        engine = get_graph_engine(self.db_manager)
+        self.assertIsNone(engine.get_node(new_note))
+        self.assertEqual(engine.edge_count, 3)
+
+    def test_external_writes_reload(self):
+        """Test that writes made outside the database manager are picked up."""
+        engine = get_graph_engine(self.db_manager)
+        version = engine.version
+
+        with sqlite3.connect(self.db_path) as conn:
+            note_id = conn.execute(
+                "INSERT INTO notes (title, text, timestamp, source_type) VALUES ('Optimizers', '', '2024-01-05T10:00:00', 'text')"
+            ).lastrowid
+            conn.execute("INSERT INTO related_notes (note_id, related_note_id, similarity) VALUES (?, ?, 0.95)", (note_id, self.backprop))
+
+        engine = get_graph_engine(self.db_manager)
+        self.assertGreater(engine.version, version)
+        self.assertIsNotNone(engine.get_node(note_id))
+        self.assertEqual(engine.edge_count, 4)
+
+        # Unchanged tables are served from the cache
+        version = engine.version
+        self.assertEqual(get_graph_engine(self.db_manager).version, version)
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("UPDATE related_notes SET similarity = 0.5 WHERE note_id = ?", (note_id,))
+        engine = get_graph_engine(self.db_manager)
+        self.assertEqual(engine.edge_weight[engine.out_edges(engine.index[note_id])[0]], 0.5)
+
+    def test_paths(self):
+        """Test BFS shortest paths and transitive prerequisites."""
+        engine = get_graph_engine(self.db_manager)
+
+        self.assertEqual(engine.shortest_path(self.basics, self.cnn), [self.basics, self.backprop, self.cnn])
+        self.assertEqual(engine.shortest_path(self.cnn, self.basics, directed=True), None)
+
+        chain = engine.prerequisite_chain(self.backprop)
+        self.assertEqual(sorted(step["id"] for step in chain), sorted([self.basics, self.calculus]))
+
+    def test_query_knowledge_graph(self):
+        """Test prerequisite queries against the engine."""
+        result = query_knowledge_graph(self.db_manager, "prerequisites for backpropagation")
+        prerequisites = {match["prerequisite"] for match in result["matches"]}
+        self.assertEqual(prerequisites, {"Linear Algebra Basics", "Calculus Fundamentals"})
+
+if __name__ == "__main__":
+    unittest.main()
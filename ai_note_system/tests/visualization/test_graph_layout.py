@@ -0,0 +1,112 @@
+"""
+Unit tests for the knowledge graph layout stage.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from ai_note_system.visualization import graph_layout
+from ai_note_system.visualization.graph_layout import (
+    label_propagation,
+    compute_layout,
+    layout_graph_data,
+    summarize_communities
+)
+from ai_note_system.visualization.knowledge_graph_gen import (
+    generate_dot_code_from_graph_data,
+    generate_html_knowledge_graph
+)
+
+def _two_cliques():
+    """Two 5-node cliques joined by a single edge."""
+    edges = []
+    for offset in (0, 5):
+        for i in range(5):
+            for j in range(i + 1, 5):
+                edges.append((offset + i, offset + j))
+    edges.append((4, 5))
+    return edges
+
+class TestGraphLayout(unittest.TestCase):
+    """Test cases for community detection and layout."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        graph_layout._layout_cache.clear()
+
+        edges = _two_cliques()
+        self.graph_data = {
+            "nodes": [
+                {
+                    "id": i + 1,
+                    "title": f"Note {i}",
+                    "summary": "",
+                    "tags": ["left" if i < 5 else "right"],
+                    "date": "2024-01-01",
+                    "source_type": "text"
+                }
+                for i in range(10)
+            ],
+            "edges": [{"source": s + 1, "target": t + 1, "similarity": 0.8} for s, t in edges],
+            "graph_version": ("test.db", 1)
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_label_propagation_finds_cliques(self):
+        """Test that each clique becomes one community."""
+        edges = np.array(_two_cliques())
+        communities = label_propagation(10, edges[:, 0], edges[:, 1])
+
+        self.assertEqual(len(set(communities[:5].tolist())), 1)
+        self.assertEqual(len(set(communities[5:].tolist())), 1)
+        self.assertNotEqual(communities[0], communities[9])
+
+    def test_layout_keeps_communities_together(self):
+        """Test that connected notes are placed closer than unconnected ones."""
+        edges = np.array(_two_cliques())
+        positions, communities = compute_layout(10, edges[:, 0], edges[:, 1])
+
+        self.assertEqual(positions.shape, (10, 2))
+        within = np.linalg.norm(positions[0] - positions[1])
+        across = np.linalg.norm(positions[0] - positions[9])
+        self.assertLess(within, across)
+
+    def test_layout_cached_per_version(self):
+        """Test that an unchanged graph reuses its layout."""
+        layout_graph_data(self.graph_data)
+        self.assertEqual(self.graph_data["community_count"], 2)
+
+        with patch.object(graph_layout, "compute_layout") as compute:
+            layout_graph_data(self.graph_data)
+            compute.assert_not_called()
+
+        super_nodes, super_edges = summarize_communities(self.graph_data)
+        self.assertEqual(sorted(node["label"] for node in super_nodes), ["left", "right"])
+        self.assertEqual(super_edges[0]["count"], 1)
+
+    def test_outputs_use_precomputed_positions(self):
+        """Test that DOT pins positions and HTML embeds per-community detail."""
+        layout_graph_data(self.graph_data)
+
+        dot_code = generate_dot_code_from_graph_data(self.graph_data, "Test", layout="fdp")
+        self.assertIn('layout="neato"', dot_code)
+        self.assertIn("!\"", dot_code)
+
+        output_path = os.path.join(self.temp_dir, "graph.html")
+        result = generate_html_knowledge_graph(self.graph_data, output_path)
+        self.assertEqual(result["community_count"], 2)
+
+        with open(output_path, encoding="utf-8") as f:
+            html = f.read()
+        self.assertIn('id="community-0"', html)
+        self.assertIn('id="community-1"', html)
+
+if __name__ == "__main__":
+    unittest.main()
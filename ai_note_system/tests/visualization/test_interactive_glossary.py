@@ -0,0 +1,113 @@
+"""
+Unit tests for the interactive glossary module.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+from ai_note_system.database.db_manager import DatabaseManager, init_db
+from ai_note_system.visualization import interactive_glossary
+from ai_note_system.visualization.interactive_glossary import InteractiveGlossary
+
+class FakeEmbedder:
+    """Embeds texts by keyword and counts the texts embedded."""
+
+    KEYWORDS = ["network", "gradient", "derivative"]
+
+    def __init__(self):
+        self.embedded = []
+
+    def get_embeddings(self, texts):
+        if isinstance(texts, str):
+            return self.get_embeddings([texts])[0]
+        self.embedded.extend(texts)
+        return [[float(keyword in text.lower()) + 0.01 for keyword in self.KEYWORDS] for text in texts]
+
+class TestInteractiveGlossary(unittest.TestCase):
+    """Test cases for glossary scanning and search."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "test.db")
+        init_db(self.db_path)
+        self.db_manager = DatabaseManager(self.db_path)
+
+        with patch("ai_note_system.visualization.interactive_glossary.get_llm_interface"), \
+                patch("ai_note_system.visualization.interactive_glossary.get_embedding_interface", return_value=MagicMock()):
+            self.glossary = InteractiveGlossary(self.db_manager)
+
+        self.glossary.add_term("neural network", "A network of neurons.", category="ml")
+        self.glossary.add_term("gradient", "Direction of steepest ascent.", category="math")
+
+    def tearDown(self):
+        self.db_manager.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _create_note(self, text):
+        return self.db_manager.create_note({"title": "Note", "text": text, "source_type": "text"})
+
+    def _references(self, note_id):
+        return self.db_manager.conn.execute(
+            "SELECT term_id, location FROM term_references WHERE note_id = ? ORDER BY id", (note_id,)
+        ).fetchall()
+
+    def test_scan_adds_references_once(self):
+        """Test that scanning finds terms and rescanning replaces the references."""
+        note_id = self._create_note("A Neural Network follows the gradient. The gradient shrinks.")
+
+        terms = self.glossary.scan_note_for_terms(note_id)
+        self.assertEqual([term["term"] for term in terms], ["neural network", "gradient"])
+        self.assertEqual(len(terms[1]["references"]), 2)
+
+        self.glossary.scan_note_for_terms(note_id)
+        self.assertEqual(len(self._references(note_id)), 3)
+
+    def test_matcher_rebuilt_when_terms_change(self):
+        """Test that a new term is found without rebuilding for unchanged glossaries."""
+        matcher = self.glossary.get_term_matcher()
+        self.assertIs(self.glossary.get_term_matcher(), matcher)
+
+        self.glossary.add_term("backpropagation", "Computing gradients layer by layer.")
+        note_id = self._create_note("Backpropagation computes the gradient.")
+        self.assertEqual(len(self.glossary.scan_note_for_terms(note_id)), 2)
+
+    def test_rescan_all_notes_in_processes(self):
+        """Test that a rescan across worker processes matches an in-process scan."""
+        note_ids = [self._create_note(f"Note {i} about a neural network and its gradient.") for i in range(5)]
+
+        stats = self.glossary.rescan_all_notes(workers=2, batch_size=2)
+        self.assertEqual(stats, {"notes": 5, "references": 10})
+        self.assertEqual(len(self._references(note_ids[4])), 2)
+
+    def test_semantic_search_embeds_only_changed_terms(self):
+        """Test that term embeddings are persisted and refreshed only when their text changes."""
+        embedder = FakeEmbedder()
+        self.glossary.embedder = embedder
+
+        results = self.glossary.search_terms("gradient descent", semantic_search=True)
+        self.assertEqual([term["term"] for term in results], ["gradient"])
+        self.assertEqual(len(embedder.embedded), 3)
+
+        # Unchanged terms are not embedded again, changed and new ones are
+        term_id = results[0]["id"]
+        self.glossary.update_term(term_id, importance=3)
+        self.glossary.search_terms("gradient", semantic_search=True)
+        self.assertEqual(len(embedder.embedded), 4)
+
+        self.glossary.update_term(term_id, definition="The vector of partial derivatives.")
+        self.glossary.add_term("derivative", "Rate of change.", category="math")
+        results = self.glossary.search_terms("derivative", category="math", semantic_search=True)
+        self.assertEqual(sorted(term["term"] for term in results), ["derivative", "gradient"])
+        self.assertEqual(len(embedder.embedded), 7)
+        self.assertEqual(self.glossary.search_terms("derivative", category="ml", semantic_search=True), [])
+
+        # A new process loads the stored embeddings instead of embedding again
+        interactive_glossary._embedding_cache.clear()
+        self.assertEqual(len(self.glossary.search_terms("derivative", semantic_search=True)), 2)
+        self.assertEqual(embedder.embedded[-2:], ["derivative", "derivative"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Unit tests for the whiteboard module.
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from ai_note_system.tests.query_database import QueryDatabase
+from ai_note_system.visualization.whiteboard import Whiteboard
+
+class TestWhiteboardOperations(unittest.TestCase):
+    """Test cases for batched whiteboard operations and incremental sync."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db = QueryDatabase(os.path.join(self.temp_dir, "test.db"))
+
+        with patch("ai_note_system.visualization.whiteboard.get_llm_interface"):
+            self.whiteboard = Whiteboard(self.db, coalesce_window=60)
+
+        self.board_id = self.whiteboard.create_whiteboard(1, "Board")
+
+    def tearDown(self):
+        self.whiteboard.flush_operations()
+        self.db.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_batch_applied_as_one_version(self):
+        """Test that a batch is written under one version with updates merged into the add."""
+        result = self.whiteboard.apply_operations(self.board_id, [
+            {"seq": 1, "op": "add", "id": "a", "type": "text", "position": (0, 0)},
+            {"seq": 2, "op": "add", "id": "b", "type": "text", "position": (5, 5)},
+            {"seq": 3, "op": "update", "id": "a", "position": (1, 1)},
+            {"seq": 4, "op": "update", "id": "a", "properties": {"label": "A"}},
+            {"seq": 5, "op": "link", "source_id": "a", "target_id": "b"},
+            {"seq": 6, "op": "update", "id": "missing", "position": (1, 1)},
+        ], client_id="c1")
+
+        self.assertEqual(result["version"], 1)
+        self.assertEqual(result["last_seq"], 6)
+        self.assertEqual([r["status"] for r in result["results"]],
+                         ["applied", "applied", "coalesced", "coalesced", "applied", "rejected"])
+
+        elements = {e["id"]: e for e in self.whiteboard.get_whiteboard_elements(self.board_id)}
+        self.assertEqual(elements["a"]["position"], (1, 1))
+        self.assertEqual(elements["a"]["properties"], {"label": "A"})
+        self.assertEqual(len(self.whiteboard.get_whiteboard_links(self.board_id)), 1)
+
+        # Resending the batch changes nothing
+        result = self.whiteboard.apply_operations(self.board_id, [
+            {"seq": 5, "op": "link", "source_id": "a", "target_id": "b"},
+        ], client_id="c1")
+        self.assertEqual(result["results"][0]["status"], "duplicate")
+        self.assertEqual(result["version"], 1)
+
+    def test_position_updates_coalesced(self):
+        """Test that rapid position updates are held back and written once."""
+        element_id = self.whiteboard.add_element(self.board_id, "shape", (0, 0))
+
+        for seq in range(1, 101):
+            result = self.whiteboard.apply_operations(
+                self.board_id, [{"seq": seq, "op": "update", "id": element_id, "position": (seq, seq)}], "c1"
+            )
+            self.assertEqual(result["results"][0]["status"], "queued")
+
+        self.assertEqual(result["pending"], 1)
+        self.assertEqual(result["version"], 1)
+
+        # Reading writes the held-back position first
+        elements = self.whiteboard.get_whiteboard_elements(self.board_id)
+        self.assertEqual(elements[0]["position"], (100, 100))
+        self.assertEqual(self.whiteboard.get_whiteboard(self.board_id)["version"], 2)
+
+        result = self.whiteboard.apply_operations(
+            self.board_id, [{"seq": 100, "op": "update", "id": element_id, "position": (0, 0)}], "c1"
+        )
+        self.assertEqual(result["results"][0]["status"], "duplicate")
+
+    def test_held_back_updates_written_after_window(self):
+        """Test that queued positions are written by the timer and only then acknowledged."""
+        self.whiteboard.coalesce_window = 0.05
+        element_id = self.whiteboard.add_element(self.board_id, "shape", (0, 0))
+        self.whiteboard.apply_operations(self.board_id, [{"seq": 1, "op": "update", "id": element_id, "position": (1, 1)}], "c1")
+        self.whiteboard.flush_operations()
+
+        for seq in range(2, 5):
+            result = self.whiteboard.apply_operations(
+                self.board_id, [{"seq": seq, "op": "update", "id": element_id, "position": (seq, seq)}], "c1"
+            )
+            self.assertEqual(result["results"][0]["status"], "queued")
+            self.assertEqual(result["last_seq"], 1)
+
+        # No later batch or read arrives, the timer writes the last position on its own
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            row = self.db.conn.execute(
+                "SELECT position_x FROM whiteboard_elements WHERE id = ?", (element_id,)
+            ).fetchone()
+            if row[0] == 4:
+                break
+            time.sleep(0.01)
+
+        self.assertEqual(row[0], 4)
+        self.assertEqual(self.whiteboard._get_client_seq(self.board_id, "c1"), 4)
+        self.assertEqual(self.whiteboard.get_whiteboard(self.board_id)["version"], 3)
+
+    def test_sync_since_version(self):
+        """Test that incremental sync returns changed and deleted items only."""
+        first = self.whiteboard.add_element(self.board_id, "text", (0, 0))
+        second = self.whiteboard.add_element(self.board_id, "text", (1, 1))
+        link_id = self.whiteboard.add_link(self.board_id, first, second)
+        version = self.whiteboard.get_whiteboard(self.board_id)["version"]
+
+        self.assertEqual(self.whiteboard.get_whiteboard_elements(self.board_id, since_version=version), [])
+
+        self.assertTrue(self.whiteboard.update_element(second, properties={"label": "B"}))
+        self.assertTrue(self.whiteboard.delete_element(first))
+
+        changed = self.whiteboard.get_whiteboard_elements(self.board_id, since_version=version)
+        self.assertEqual({(e["id"], e.get("deleted", False)) for e in changed}, {(second, False), (first, True)})
+
+        links = self.whiteboard.get_whiteboard_links(self.board_id, since_version=version)
+        self.assertEqual(links, [{"id": link_id, "deleted": True, "version": version + 2}])
+        self.assertFalse(self.whiteboard.delete_element(first))
+
+if __name__ == "__main__":
+    unittest.main()
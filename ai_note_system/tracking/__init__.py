@@ -1,7 +1,9 @@
 """
 Tracking module for AI Note System.
-Handles tracking study sessions, note reviews, and mastery estimates.
+Handles tracking study sessions, note reviews, and learning signals.
 """
 
-from .study_tracker import StudyTracker, StudySession
-from .mastery_tracker import MasteryTracker, MasteryEstimate
\ No newline at end of file
+from .event_sink import EventSink, get_event_sink, close_event_sinks
+from .time_series import TimeSeriesStore, TimeSeriesSource, get_time_series
+from .signal_buffer import SignalBuffer
+from .study_tracker import StudyTracker, StudySession
\ No newline at end of file
@@ -9,15 +9,36 @@ import json
 from typing import Dict, Any, List, Optional, Union, Tuple
 from datetime import datetime, timedelta
 import time
-import statistics
-import math
 import re
 
+import numpy as np
+
 # Setup logging
 logger = logging.getLogger("ai_note_system.tracking.cognitive_load_monitor")
 
 # Import required modules
 from ..database.db_manager import DatabaseManager
+from .event_sink import get_event_sink
+from .time_series import TimeSeriesSource, correlation_matrix, get_time_series
+from .signal_buffer import SignalBuffer
+
+# Keyboard samples kept per session and the window their features are computed over, in seconds
+KEYBOARD_BUFFER_SIZE = 4096
+KEYBOARD_WINDOW = 300.0
+
+# Readings mirrored into the time series for pattern analysis
+COGNITIVE_FIELDS = ("cognitive_load", "stress_level", "fatigue_level", "focus_level")
+COGNITIVE_LOAD_SOURCE = TimeSeriesSource(
+    name="cognitive_load_data",
+    table="cognitive_load_data",
+    time_column="timestamp",
+    entity_column="user_id",
+    metrics=tuple((f"cognitive.{field}", field) for field in COGNITIVE_FIELDS)
+)
+
+# Time of day of every hour: morning 5-11, afternoon 12-16, evening 17-21, night 22-4
+TIMES_OF_DAY = ("morning", "afternoon", "evening", "night")
+TIME_OF_DAY_BY_HOUR = np.array([3] * 5 + [0] * 7 + [1] * 5 + [2] * 5 + [3] * 2)
 
 class CognitiveLoadMonitor:
     """
@@ -50,12 +71,11 @@ class CognitiveLoadMonitor:
         os.makedirs(self.data_dir, exist_ok=True)
         
         # Initialize keyboard monitoring data
-        self.keyboard_data = {
-            "typing_speed": [],
-            "error_rate": [],
-            "pause_frequency": [],
-            "timestamp": []
-        }
+        self.keyboard_data = SignalBuffer(
+            ("typing_speed", "error_rate", "pause_frequency"),
+            capacity=KEYBOARD_BUFFER_SIZE,
+            window=KEYBOARD_WINDOW
+        )
         
         # Initialize webcam monitoring if enabled
         self.webcam_monitor = None
@@ -71,8 +91,17 @@ class CognitiveLoadMonitor:
         logger.info(f"Initialized Cognitive Load Monitor for user {user_id}")
         
         # Initialize database tables if needed
+        self.event_sink = None
+        self.time_series = None
         if self.db_manager:
             self._init_database()
+            
+            # Readings are written in batches by the shared writer thread
+            self.event_sink = get_event_sink(self.db_manager.db_path)
+            
+            # Patterns are analyzed on rollups of the readings
+            self.time_series = get_time_series(self.db_manager.db_path)
+            self.time_series.register_source(COGNITIVE_LOAD_SOURCE)
     
     def _init_database(self) -> None:
         """
@@ -124,12 +153,7 @@ class CognitiveLoadMonitor:
             session_id (str, optional): ID for the current study session
         """
         # Reset keyboard data
-        self.keyboard_data = {
-            "typing_speed": [],
-            "error_rate": [],
-            "pause_frequency": [],
-            "timestamp": []
-        }
+        self.keyboard_data.clear()
         
         self.session_id = session_id or f"session_{int(time.time())}"
         
@@ -140,6 +164,24 @@ class CognitiveLoadMonitor:
         # For example, using pynput or pyHook libraries
         # This would track keystrokes, timing, and corrections
     
+    def record_keyboard_sample(
+        self,
+        typing_speed: float,
+        error_rate: float,
+        pause_frequency: float,
+        timestamp: Optional[float] = None
+    ) -> None:
+        """
+        Record a sample of keyboard usage measured by the keyboard hook.
+        
+        Args:
+            typing_speed (float): Typing speed in words per minute
+            error_rate (float): Share of keystrokes that were corrections
+            pause_frequency (float): Pauses per minute
+            timestamp (float, optional): Monotonic time of the sample, now if not given
+        """
+        self.keyboard_data.append(typing_speed, error_rate, pause_frequency, timestamp=timestamp)
+    
     def stop_keyboard_monitoring(self) -> Dict[str, Any]:
         """
         Stop monitoring keyboard usage patterns and analyze the data.
@@ -174,15 +216,18 @@ class CognitiveLoadMonitor:
         Returns:
             Dict[str, Any]: Analysis results
         """
-        # In a real implementation, this would analyze actual keyboard data
-        # Here we'll simulate some analysis based on typical patterns
-        
-        # Simulate some keyboard metrics
-        # In a real implementation, these would be calculated from actual data
-        avg_typing_speed = 50  # words per minute
-        typing_speed_variance = 10
-        avg_error_rate = 0.05  # 5% errors
-        avg_pause_frequency = 2  # pauses per minute
+        if self.keyboard_data.window_count():
+            # Features of the samples in the window ending at the latest one
+            avg_typing_speed = self.keyboard_data.window_mean("typing_speed")
+            typing_speed_variance = self.keyboard_data.window_variance("typing_speed")
+            avg_error_rate = self.keyboard_data.window_mean("error_rate")
+            avg_pause_frequency = self.keyboard_data.window_mean("pause_frequency")
+        else:
+            # Typical patterns when no samples were recorded
+            avg_typing_speed = 50  # words per minute
+            typing_speed_variance = 10
+            avg_error_rate = 0.05  # 5% errors
+            avg_pause_frequency = 2  # pauses per minute
         
         # Estimate cognitive load based on these metrics
         # Higher variance in typing speed, higher error rate, and more pauses
@@ -362,9 +407,9 @@ class CognitiveLoadMonitor:
         data_source: str,
         session_id: str,
         notes: Optional[str] = None
-    ) -> int:
+    ) -> None:
         """
-        Save cognitive load data to database.
+        Queue cognitive load data to be written to the database.
         
         Args:
             cognitive_load (float): Cognitive load level
@@ -374,37 +419,23 @@ class CognitiveLoadMonitor:
             data_source (str): Source of the data (keyboard, webcam, self_report)
             session_id (str): ID of the current session
             notes (str, optional): Additional notes
-            
-        Returns:
-            int: ID of the saved record
         """
-        try:
-            self.db_manager.cursor.execute('''
-            INSERT INTO cognitive_load_data (
-                user_id, timestamp, cognitive_load, stress_level,
-                fatigue_level, focus_level, data_source, session_id, notes
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                self.user_id,
-                datetime.now().isoformat(),
-                cognitive_load,
-                stress_level,
-                fatigue_level,
-                focus_level,
-                data_source,
-                session_id,
-                notes
-            ))
-            
-            self.db_manager.conn.commit()
-            record_id = self.db_manager.cursor.lastrowid
-            
-            logger.debug(f"Saved cognitive load data with ID {record_id}")
-            return record_id
-            
-        except Exception as e:
-            logger.error(f"Error saving cognitive load data: {e}")
-            return -1
+        self.event_sink.emit('''
+        INSERT INTO cognitive_load_data (
+            user_id, timestamp, cognitive_load, stress_level,
+            fatigue_level, focus_level, data_source, session_id, notes
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            self.user_id,
+            datetime.now().isoformat(),
+            cognitive_load,
+            stress_level,
+            fatigue_level,
+            focus_level,
+            data_source,
+            session_id,
+            notes
+        ))
     
     def _save_to_file(self, data: Dict[str, Any]) -> str:
         """
@@ -529,43 +560,29 @@ class CognitiveLoadMonitor:
         recommendation: str,
         cognitive_load: float,
         stress_level: float
-    ) -> int:
+    ) -> None:
         """
-        Save a recommendation to the database.
+        Queue a recommendation to be written to the database.
         
         Args:
             recommendation_type (str): Type of recommendation
             recommendation (str): The recommendation text
             cognitive_load (float): Current cognitive load
             stress_level (float): Current stress level
-            
-        Returns:
-            int: ID of the saved recommendation
         """
-        try:
-            self.db_manager.cursor.execute('''
-            INSERT INTO cognitive_load_recommendations (
-                user_id, timestamp, recommendation_type, recommendation,
-                cognitive_load, stress_level
-            ) VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                self.user_id,
-                datetime.now().isoformat(),
-                recommendation_type,
-                recommendation,
-                cognitive_load,
-                stress_level
-            ))
-            
-            self.db_manager.conn.commit()
-            rec_id = self.db_manager.cursor.lastrowid
-            
-            logger.debug(f"Saved recommendation with ID {rec_id}")
-            return rec_id
-            
-        except Exception as e:
-            logger.error(f"Error saving recommendation: {e}")
-            return -1
+        self.event_sink.emit('''
+        INSERT INTO cognitive_load_recommendations (
+            user_id, timestamp, recommendation_type, recommendation,
+            cognitive_load, stress_level
+        ) VALUES (?, ?, ?, ?, ?, ?)
+        ''', (
+            self.user_id,
+            datetime.now().isoformat(),
+            recommendation_type,
+            recommendation,
+            cognitive_load,
+            stress_level
+        ))
     
     def get_cognitive_load_history(
         self,
@@ -586,6 +603,9 @@ class CognitiveLoadMonitor:
             logger.warning("Database manager is required to get cognitive load history")
             return []
         
+        # Include readings still waiting in the event sink
+        self.event_sink.flush()
+        
         try:
             # Calculate cutoff date
             cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
@@ -636,6 +656,9 @@ class CognitiveLoadMonitor:
             logger.warning("Database manager is required to get recommendations history")
             return []
         
+        # Include readings still waiting in the event sink
+        self.event_sink.flush()
+        
         try:
             # Calculate cutoff date
             cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
@@ -677,163 +700,84 @@ class CognitiveLoadMonitor:
         Returns:
             Dict[str, Any]: Analysis results
         """
-        # Get cognitive load history
-        history = self.get_cognitive_load_history(days=days)
+        if self.time_series:
+            end = datetime.now()
+            start = end - timedelta(days=days)
+            
+            # Mirror new readings into the rollups
+            self.time_series.sync()
+            
+            summaries = {
+                field: self.time_series.summarize(f"cognitive.{field}", start, end, entity=self.user_id)
+                for field in COGNITIVE_FIELDS
+            }
         
-        if not history:
+        if not self.time_series or not summaries["cognitive_load"]["count"]:
             return {
                 "error": "No cognitive load data available for analysis",
                 "user_id": self.user_id,
                 "days_analyzed": days
             }
         
-        # Extract data for analysis
-        cognitive_loads = []
-        stress_levels = []
-        fatigue_levels = []
-        focus_levels = []
-        timestamps = []
-        
-        for entry in history:
-            cognitive_loads.append(entry.get("cognitive_load", 0))
-            stress_levels.append(entry.get("stress_level", 0))
-            fatigue_levels.append(entry.get("fatigue_level", 0))
-            focus_levels.append(entry.get("focus_level", 0))
-            timestamps.append(entry.get("timestamp", ""))
-        
-        # Calculate statistics
-        avg_cognitive_load = statistics.mean(cognitive_loads) if cognitive_loads else 0
-        avg_stress_level = statistics.mean(stress_levels) if stress_levels else 0
-        avg_fatigue_level = statistics.mean(fatigue_levels) if fatigue_levels else 0
-        avg_focus_level = statistics.mean(focus_levels) if focus_levels else 0
-        
         # Analyze time-of-day patterns
-        time_patterns = self._analyze_time_patterns(history)
+        time_patterns = self._analyze_time_patterns(start, end)
         
-        # Analyze correlations
-        correlations = {
-            "stress_cognitive_load": self._calculate_correlation(stress_levels, cognitive_loads),
-            "fatigue_cognitive_load": self._calculate_correlation(fatigue_levels, cognitive_loads),
-            "focus_cognitive_load": self._calculate_correlation(focus_levels, cognitive_loads)
-        }
+        # Correlate per-minute means, which pair up the levels of each reading
+        _, means = self.time_series.aligned_means(
+            [f"cognitive.{field}" for field in COGNITIVE_FIELDS], start, end, step=60, entity=self.user_id
+        )
+        correlations = correlation_matrix(means)
         
         return {
             "user_id": self.user_id,
             "days_analyzed": days,
-            "data_points": len(history),
-            "averages": {
-                "cognitive_load": avg_cognitive_load,
-                "stress_level": avg_stress_level,
-                "fatigue_level": avg_fatigue_level,
-                "focus_level": avg_focus_level
-            },
+            "data_points": summaries["cognitive_load"]["count"],
+            "averages": {field: summaries[field]["mean"] or 0 for field in COGNITIVE_FIELDS},
             "time_patterns": time_patterns,
-            "correlations": correlations,
+            "correlations": {
+                "stress_cognitive_load": float(correlations[1, 0]),
+                "fatigue_cognitive_load": float(correlations[2, 0]),
+                "focus_cognitive_load": float(correlations[3, 0])
+            },
             "analysis_timestamp": datetime.now().isoformat()
         }
     
-    def _analyze_time_patterns(self, history: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _analyze_time_patterns(self, start: datetime, end: datetime) -> Dict[str, Any]:
         """
         Analyze time-of-day patterns in cognitive load data.
         
         Args:
-            history (List[Dict[str, Any]]): Cognitive load history
+            start (datetime): Start of the analyzed period
+            end (datetime): End of the analyzed period
             
         Returns:
             Dict[str, Any]: Time pattern analysis
         """
-        # Group data by time of day
-        morning = []  # 5:00 - 11:59
-        afternoon = []  # 12:00 - 16:59
-        evening = []  # 17:00 - 21:59
-        night = []  # 22:00 - 4:59
-        
-        for entry in history:
-            try:
-                dt = datetime.fromisoformat(entry.get("timestamp", ""))
-                hour = dt.hour
-                
-                if 5 <= hour < 12:
-                    morning.append(entry.get("cognitive_load", 0))
-                elif 12 <= hour < 17:
-                    afternoon.append(entry.get("cognitive_load", 0))
-                elif 17 <= hour < 22:
-                    evening.append(entry.get("cognitive_load", 0))
-                else:
-                    night.append(entry.get("cognitive_load", 0))
-                
-            except (ValueError, TypeError):
-                continue
-        
-        # Calculate averages
-        avg_morning = statistics.mean(morning) if morning else 0
-        avg_afternoon = statistics.mean(afternoon) if afternoon else 0
-        avg_evening = statistics.mean(evening) if evening else 0
-        avg_night = statistics.mean(night) if night else 0
-        
-        # Determine optimal time
-        times = [
-            ("morning", avg_morning, len(morning)),
-            ("afternoon", avg_afternoon, len(afternoon)),
-            ("evening", avg_evening, len(evening)),
-            ("night", avg_night, len(night))
-        ]
+        hourly = self.time_series.buckets(
+            "cognitive.cognitive_load", start, end, resolution="hour", entity=self.user_id
+        )
         
-        # Sort by cognitive load (lower is better) and then by sample size (higher is better)
-        times.sort(key=lambda x: (x[1], -x[2]))
+        # Group hourly rollups by local time of day
+        hours = np.array([datetime.fromtimestamp(bucket).hour for bucket in hourly["bucket"]], dtype=int)
+        time_of_day = TIME_OF_DAY_BY_HOUR[hours]
         
-        optimal_time = times[0][0] if times else "unknown"
+        samples = np.bincount(time_of_day, weights=hourly["count"], minlength=len(TIMES_OF_DAY))
+        totals = np.bincount(time_of_day, weights=hourly["sum"], minlength=len(TIMES_OF_DAY))
+        averages = np.divide(totals, samples, out=np.zeros(len(TIMES_OF_DAY)), where=samples > 0)
         
-        return {
-            "morning": {
-                "average_cognitive_load": avg_morning,
-                "samples": len(morning)
-            },
-            "afternoon": {
-                "average_cognitive_load": avg_afternoon,
-                "samples": len(afternoon)
-            },
-            "evening": {
-                "average_cognitive_load": avg_evening,
-                "samples": len(evening)
-            },
-            "night": {
-                "average_cognitive_load": avg_night,
-                "samples": len(night)
-            },
-            "optimal_time": optimal_time
+        patterns = {
+            name: {
+                "average_cognitive_load": float(averages[index]),
+                "samples": int(samples[index])
+            }
+            for index, name in enumerate(TIMES_OF_DAY)
         }
-    
-    def _calculate_correlation(self, x: List[float], y: List[float]) -> float:
-        """
-        Calculate Pearson correlation coefficient between two lists.
         
-        Args:
-            x (List[float]): First list of values
-            y (List[float]): Second list of values
-            
-        Returns:
-            float: Correlation coefficient
-        """
-        if len(x) != len(y) or len(x) < 2:
-            return 0.0
-        
-        n = len(x)
-        
-        # Calculate means
-        mean_x = sum(x) / n
-        mean_y = sum(y) / n
-        
-        # Calculate covariance and variances
-        cov = sum((x[i] - mean_x) * (y[i] - mean_y) for i in range(n))
-        var_x = sum((val - mean_x) ** 2 for val in x)
-        var_y = sum((val - mean_y) ** 2 for val in y)
-        
-        # Calculate correlation
-        if var_x == 0 or var_y == 0:
-            return 0.0
+        # Sort by cognitive load (lower is better) and then by sample size (higher is better)
+        times = sorted(TIMES_OF_DAY, key=lambda name: (patterns[name]["average_cognitive_load"], -patterns[name]["samples"]))
+        patterns["optimal_time"] = times[0]
         
-        return cov / (math.sqrt(var_x) * math.sqrt(var_y))
+        return patterns
 
 
 def main():
@@ -12,11 +12,51 @@ from datetime import datetime, timedelta
 import threading
 import sqlite3
 
+import numpy as np
+
 # Setup logging
 logger = logging.getLogger("ai_note_system.tracking.distraction_tracker")
 
 # Import database manager
 from ..database.db_manager import DatabaseManager
+from .event_sink import get_event_sink
+from .time_series import TimeSeriesSource, get_time_series
+from .signal_buffer import SignalBuffer
+
+# Distraction events mirrored into the time series for weekly reports
+DISTRACTION_SOURCES = (
+    TimeSeriesSource(
+        name="app_switches",
+        table="app_switches",
+        time_column="timestamp",
+        entity_column="user_id",
+        metrics=(("distraction.app_switch", None),),
+        label_column="to_app"
+    ),
+    TimeSeriesSource(
+        name="app_switches.from_app",
+        table="app_switches",
+        time_column="timestamp",
+        entity_column="user_id",
+        metrics=(("distraction.app_switch_from", None),),
+        label_column="from_app"
+    ),
+    TimeSeriesSource(
+        name="inactivity_periods",
+        table="inactivity_periods",
+        time_column="start_time",
+        entity_column="user_id",
+        metrics=(("distraction.inactivity", "duration"),)
+    ),
+    TimeSeriesSource(
+        name="interventions",
+        table="interventions",
+        time_column="timestamp",
+        entity_column="user_id",
+        metrics=(("distraction.intervention", None),),
+        label_column="type"
+    )
+)
 
 class DistractionTracker:
     """
@@ -45,19 +85,41 @@ class DistractionTracker:
         self.inactivity_threshold = self.config.get("inactivity_threshold", 180)  # seconds
         self.switch_threshold = self.config.get("switch_threshold", 5)  # switches per minute
         self.intervention_frequency = self.config.get("intervention_frequency", 15)  # minutes
+        self.switch_buffer_size = self.config.get("switch_buffer_size", 4096)  # switches kept in memory
         
         # Initialize tracking state
         self.tracking_active = False
         self.tracking_thread = None
         self.last_activity_time = time.time()
+        self.last_intervention_time = time.time()
         self.current_app = None
-        self.app_switches = []
+        
+        # Detection state, guarded by the condition the tracking thread waits on
+        self._condition = threading.Condition()
+        self._inactive = False
+        self._switching_detected = False
         self.inactivity_periods = []
         self.interventions = []
         
+        # Recent app switches as monotonic times and interned app ids; the window counts switches per minute
+        self.switch_buffer = SignalBuffer(("from_app", "to_app"), capacity=self.switch_buffer_size, window=60.0)
+        self._app_ids: Dict[str, int] = {}
+        self._app_names: List[str] = []
+        self._clock_offset = time.time() - time.monotonic()
+        
         # Initialize database if needed
+        self.event_sink = None
+        self.time_series = None
         if self.db_manager:
             self._init_database()
+            
+            # Tracking events are written in batches by the shared writer thread
+            self.event_sink = get_event_sink(self.db_manager.db_path)
+            
+            # Reports are built from rollups of the events
+            self.time_series = get_time_series(self.db_manager.db_path)
+            for source in DISTRACTION_SOURCES:
+                self.time_series.register_source(source)
         
         logger.info(f"Initialized Distraction Tracker for user {user_id}")
     
@@ -129,6 +191,7 @@ class DistractionTracker:
         
         self.tracking_active = True
         self.last_activity_time = time.time()
+        self.last_intervention_time = self.last_activity_time
         
         # Start tracking thread
         self.tracking_thread = threading.Thread(target=self._tracking_loop)
@@ -145,45 +208,62 @@ class DistractionTracker:
             logger.warning("Distraction tracking is not active")
             return
         
-        self.tracking_active = False
+        with self._condition:
+            self.tracking_active = False
+            self._condition.notify_all()
+            
+            inactive = self._inactive
+            self._inactive = False
         
         # Wait for tracking thread to finish
         if self.tracking_thread:
             self.tracking_thread.join(timeout=1.0)
             self.tracking_thread = None
         
+        # Record the inactivity period still running
+        if inactive:
+            self._handle_inactivity()
+        
+        if self.event_sink:
+            self.event_sink.flush()
+        
         logger.info("Stopped distraction tracking")
     
     def _tracking_loop(self):
         """
         Main tracking loop that runs in a separate thread.
-        """
-        last_intervention_time = time.time()
         
-        while self.tracking_active:
-            try:
-                # Get current time
-                current_time = time.time()
+        The thread sleeps until the inactivity or intervention deadline, whichever comes
+        first. Activity only moves the inactivity deadline later, so it never needs to wake
+        the thread, which on waking at a stale deadline just waits for the new one.
+        """
+        while True:
+            with self._condition:
+                if not self.tracking_active:
+                    return
                 
-                # Check for inactivity
-                if current_time - self.last_activity_time > self.inactivity_threshold:
-                    self._handle_inactivity()
+                current_time = time.time()
+                inactivity_due = None if self._inactive else self.last_activity_time + self.inactivity_threshold
+                intervention_due = self.last_intervention_time + self.intervention_frequency * 60
                 
-                # Check for frequent app switching
-                if self._check_frequent_switching():
-                    self._handle_frequent_switching()
+                next_due = intervention_due if inactivity_due is None else min(inactivity_due, intervention_due)
+                if next_due > current_time:
+                    self._condition.wait(next_due - current_time)
+                    continue
                 
+                if inactivity_due is not None and current_time >= inactivity_due:
+                    # Recorded with its full length once activity resumes
+                    self._inactive = True
+                    logger.debug(f"No activity for {self.inactivity_threshold} seconds")
+            
+            try:
                 # Check if it's time for an intervention
-                if current_time - last_intervention_time > self.intervention_frequency * 60:
+                if current_time >= intervention_due:
+                    self.last_intervention_time = current_time
                     self._provide_intervention()
-                    last_intervention_time = current_time
-                
-                # Sleep for a short time
-                time.sleep(1.0)
                 
             except Exception as e:
                 logger.error(f"Error in tracking loop: {e}")
-                time.sleep(5.0)  # Sleep longer on error
     
     def record_activity(self, app_name: str):
         """
@@ -194,67 +274,104 @@ class DistractionTracker:
         """
         current_time = time.time()
         
-        # Update last activity time
-        self.last_activity_time = current_time
+        # Update last activity time, which moves the inactivity deadline, together with the
+        # inactive flag, so the tracking thread never sees the flag cleared at the old deadline
+        with self._condition:
+            inactive = self._inactive
+            inactive_since = self.last_activity_time
+            self._inactive = False
+            self.last_activity_time = current_time
+        
+        # Record the inactivity period this activity ends
+        if inactive:
+            self._handle_inactivity(inactive_since, current_time)
         
         # Check if app has changed
         if self.current_app and app_name != self.current_app:
             # Record app switch
-            switch = {
-                "timestamp": datetime.now().isoformat(),
-                "from_app": self.current_app,
-                "to_app": app_name,
-                "duration": 0  # Will be updated on next switch
-            }
-            
-            # Update duration of previous switch if available
-            if self.app_switches:
-                prev_switch = self.app_switches[-1]
-                prev_time = datetime.fromisoformat(prev_switch["timestamp"])
-                curr_time = datetime.fromisoformat(switch["timestamp"])
-                duration = int((curr_time - prev_time).total_seconds())
-                prev_switch["duration"] = duration
+            self.switch_buffer.append(self._intern_app(self.current_app), self._intern_app(app_name))
             
-            self.app_switches.append(switch)
+            # Intervene once each time switching reaches the threshold
+            if self.tracking_active:
+                frequent = self._check_frequent_switching()
+                if frequent and not self._switching_detected:
+                    self._handle_frequent_switching()
+                self._switching_detected = frequent
             
             # Save to database if available
             if self.db_manager:
-                self._save_app_switch(switch)
+                self._save_app_switch({
+                    "timestamp": datetime.now().isoformat(),
+                    "from_app": self.current_app,
+                    "to_app": app_name,
+                    "duration": 0
+                })
         
         # Update current app
         self.current_app = app_name
     
+    def _intern_app(self, app_name: str) -> int:
+        """
+        Get the ID of an application name, assigning the next one to new names.
+        """
+        app_id = self._app_ids.get(app_name)
+        if app_id is None:
+            app_id = self._app_ids[app_name] = len(self._app_names)
+            self._app_names.append(app_name)
+        return app_id
+    
+    @property
+    def app_switches(self) -> List[Dict[str, Any]]:
+        """
+        App switches kept in memory, oldest first.
+        
+        Returns:
+            List[Dict[str, Any]]: App switches, with the seconds until the next switch as duration
+        """
+        times = self.switch_buffer.times()
+        from_apps = self.switch_buffer.values("from_app").astype(int)
+        to_apps = self.switch_buffer.values("to_app").astype(int)
+        durations = np.diff(times, append=times[-1:]).astype(int)
+        
+        return [
+            {
+                "timestamp": datetime.fromtimestamp(timestamp + self._clock_offset).isoformat(),
+                "from_app": self._app_names[from_app],
+                "to_app": self._app_names[to_app],
+                "duration": int(duration)
+            }
+            for timestamp, from_app, to_app, duration in zip(times, from_apps, to_apps, durations)
+        ]
+    
     def _save_app_switch(self, switch: Dict[str, Any]):
         """
-        Save app switch to database.
+        Queue app switch to be written to the database.
         
         Args:
             switch (Dict[str, Any]): App switch data
         """
-        try:
-            self.db_manager.cursor.execute('''
-            INSERT INTO app_switches (
-                user_id, timestamp, from_app, to_app, duration
-            ) VALUES (?, ?, ?, ?, ?)
-            ''', (
-                self.user_id,
-                switch["timestamp"],
-                switch["from_app"],
-                switch["to_app"],
-                switch["duration"]
-            ))
-            
-            self.db_manager.conn.commit()
-            
-        except sqlite3.Error as e:
-            logger.error(f"Error saving app switch: {e}")
+        self.event_sink.emit('''
+        INSERT INTO app_switches (
+            user_id, timestamp, from_app, to_app, duration
+        ) VALUES (?, ?, ?, ?, ?)
+        ''', (
+            self.user_id,
+            switch["timestamp"],
+            switch["from_app"],
+            switch["to_app"],
+            switch["duration"]
+        ))
     
-    def _handle_inactivity(self):
+    def _handle_inactivity(self, start_time: Optional[float] = None, end_time: Optional[float] = None):
         """
         Handle detected inactivity.
+        
+        Args:
+            start_time (float, optional): Time of the last activity, the recorded one if not given
+            end_time (float, optional): Time the inactivity ended, now if not given
         """
-        current_time = datetime.now()
-        last_activity_time = datetime.fromtimestamp(self.last_activity_time)
+        current_time = datetime.fromtimestamp(time.time() if end_time is None else end_time)
+        last_activity_time = datetime.fromtimestamp(self.last_activity_time if start_time is None else start_time)
         
         # Create inactivity period
         inactivity = {
@@ -273,27 +390,21 @@ class DistractionTracker:
     
     def _save_inactivity(self, inactivity: Dict[str, Any]):
         """
-        Save inactivity period to database.
+        Queue inactivity period to be written to the database.
         
         Args:
             inactivity (Dict[str, Any]): Inactivity period data
         """
-        try:
-            self.db_manager.cursor.execute('''
-            INSERT INTO inactivity_periods (
-                user_id, start_time, end_time, duration
-            ) VALUES (?, ?, ?, ?)
-            ''', (
-                self.user_id,
-                inactivity["start_time"],
-                inactivity["end_time"],
-                inactivity["duration"]
-            ))
-            
-            self.db_manager.conn.commit()
-            
-        except sqlite3.Error as e:
-            logger.error(f"Error saving inactivity period: {e}")
+        self.event_sink.emit('''
+        INSERT INTO inactivity_periods (
+            user_id, start_time, end_time, duration
+        ) VALUES (?, ?, ?, ?)
+        ''', (
+            self.user_id,
+            inactivity["start_time"],
+            inactivity["end_time"],
+            inactivity["duration"]
+        ))
     
     def _check_frequent_switching(self) -> bool:
         """
@@ -302,15 +413,8 @@ class DistractionTracker:
         Returns:
             bool: True if frequent switching is detected, False otherwise
         """
-        # Get switches in the last minute
-        one_minute_ago = datetime.now() - timedelta(minutes=1)
-        recent_switches = [
-            switch for switch in self.app_switches
-            if datetime.fromisoformat(switch["timestamp"]) > one_minute_ago
-        ]
-        
-        # Check if number of switches exceeds threshold
-        return len(recent_switches) >= self.switch_threshold
+        # Check if number of switches in the last minute exceeds threshold
+        return self.switch_buffer.window_count(time.monotonic()) >= self.switch_threshold
     
     def _handle_frequent_switching(self):
         """
@@ -331,7 +435,7 @@ class DistractionTracker:
             # Check recent distraction patterns
             if self._check_frequent_switching():
                 intervention_type = "frequent_switching"
-            elif self.inactivity_periods and time.time() - self.last_activity_time > self.inactivity_threshold:
+            elif self._inactive:
                 intervention_type = "inactivity"
             else:
                 intervention_type = "regular"
@@ -393,28 +497,22 @@ class DistractionTracker:
     
     def _save_intervention(self, intervention: Dict[str, Any]):
         """
-        Save intervention to database.
+        Queue intervention to be written to the database.
         
         Args:
             intervention (Dict[str, Any]): Intervention data
         """
-        try:
-            self.db_manager.cursor.execute('''
-            INSERT INTO interventions (
-                user_id, timestamp, type, message, response
-            ) VALUES (?, ?, ?, ?, ?)
-            ''', (
-                self.user_id,
-                intervention["timestamp"],
-                intervention["type"],
-                intervention["message"],
-                intervention["response"]
-            ))
-            
-            self.db_manager.conn.commit()
-            
-        except sqlite3.Error as e:
-            logger.error(f"Error saving intervention: {e}")
+        self.event_sink.emit('''
+        INSERT INTO interventions (
+            user_id, timestamp, type, message, response
+        ) VALUES (?, ?, ?, ?, ?)
+        ''', (
+            self.user_id,
+            intervention["timestamp"],
+            intervention["type"],
+            intervention["message"],
+            intervention["response"]
+        ))
     
     def record_intervention_response(self, intervention_id: int, response: str):
         """
@@ -432,17 +530,11 @@ class DistractionTracker:
         
         # Update intervention in database if available
         if self.db_manager:
-            try:
-                self.db_manager.cursor.execute('''
-                UPDATE interventions
-                SET response = ?
-                WHERE id = ? AND user_id = ?
-                ''', (response, intervention_id, self.user_id))
-                
-                self.db_manager.conn.commit()
-                
-            except sqlite3.Error as e:
-                logger.error(f"Error updating intervention response: {e}")
+            self.event_sink.emit('''
+            UPDATE interventions
+            SET response = ?
+            WHERE id = ? AND user_id = ?
+            ''', (response, intervention_id, self.user_id))
     
     def generate_weekly_report(self) -> Dict[str, Any]:
         """
@@ -455,38 +547,23 @@ class DistractionTracker:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=7)
         
-        # Get distraction data for the week
-        app_switches = self._get_app_switches(start_date, end_date)
-        inactivity_periods = self._get_inactivity_periods(start_date, end_date)
-        interventions = self._get_interventions(start_date, end_date)
-        
         # Calculate metrics
-        total_switches = len(app_switches)
-        total_inactivity_minutes = sum(period.get("duration", 0) for period in inactivity_periods) / 60
-        avg_switches_per_hour = total_switches / (168 / 7)  # Assuming 7 hours of tracking per day
+        if self.time_series:
+            metrics = self._get_rollup_metrics(start_date, end_date)
+        else:
+            metrics = self._get_memory_metrics(start_date, end_date)
         
-        # Calculate most switched apps
-        app_switch_counts = {}
-        for switch in app_switches:
-            from_app = switch.get("from_app")
-            to_app = switch.get("to_app")
-            
-            if from_app:
-                app_switch_counts[from_app] = app_switch_counts.get(from_app, 0) + 1
-            if to_app:
-                app_switch_counts[to_app] = app_switch_counts.get(to_app, 0) + 1
+        total_switches = metrics["total_switches"]
+        total_inactivity_minutes = metrics["total_inactivity_seconds"] / 60
+        avg_switches_per_hour = total_switches / (168 / 7)  # Assuming 7 hours of tracking per day
         
         most_switched_apps = sorted(
-            [{"app": app, "count": count} for app, count in app_switch_counts.items()],
+            [{"app": app, "count": count} for app, count in metrics["app_switch_counts"].items()],
             key=lambda x: x["count"],
             reverse=True
         )[:5]
-        
-        # Calculate distraction patterns by hour
-        hourly_patterns = {}
-        for switch in app_switches:
-            hour = datetime.fromisoformat(switch.get("timestamp", "")).hour
-            hourly_patterns[hour] = hourly_patterns.get(hour, 0) + 1
+        hourly_patterns = metrics["hourly_patterns"]
+        interventions_by_type = metrics["interventions_by_type"]
         
         # Create report
         report = {
@@ -499,14 +576,13 @@ class DistractionTracker:
                 "total_inactivity_minutes": total_inactivity_minutes,
                 "avg_switches_per_hour": avg_switches_per_hour,
                 "most_switched_apps": most_switched_apps,
-                "hourly_patterns": [{"hour": hour, "switches": count} for hour, count in hourly_patterns.items()]
+                "hourly_patterns": hourly_patterns
             },
             "interventions": {
-                "total_interventions": len(interventions),
+                "total_interventions": sum(interventions_by_type.values()),
                 "by_type": {
-                    "frequent_switching": len([i for i in interventions if i.get("type") == "frequent_switching"]),
-                    "inactivity": len([i for i in interventions if i.get("type") == "inactivity"]),
-                    "regular": len([i for i in interventions if i.get("type") == "regular"])
+                    intervention_type: interventions_by_type.get(intervention_type, 0)
+                    for intervention_type in ("frequent_switching", "inactivity", "regular")
                 }
             },
             "recommendations": self._generate_recommendations(
@@ -520,6 +596,97 @@ class DistractionTracker:
         
         return report
     
+    def _get_rollup_metrics(self, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+        """
+        Get distraction metrics within a date range from the time series rollups.
+        
+        Args:
+            start_date (datetime): Start date
+            end_date (datetime): End date
+            
+        Returns:
+            Dict[str, Any]: Distraction metrics
+        """
+        self.time_series.sync()
+        
+        def counts_by_label(metric: str) -> Dict[str, int]:
+            summaries = self.time_series.summarize(metric, start_date, end_date, entity=self.user_id, by_label=True)
+            return {label: summary["count"] for label, summary in summaries.items()}
+        
+        switches_to = counts_by_label("distraction.app_switch")
+        
+        # Count apps on both ends of a switch
+        app_switch_counts = {}
+        for counts in (switches_to, counts_by_label("distraction.app_switch_from")):
+            for app, count in counts.items():
+                if app:
+                    app_switch_counts[app] = app_switch_counts.get(app, 0) + count
+        
+        # Switches per local hour of day from the hourly rollups
+        hourly = self.time_series.buckets(
+            "distraction.app_switch", start_date, end_date, resolution="hour", entity=self.user_id
+        )
+        hours = np.array([datetime.fromtimestamp(bucket).hour for bucket in hourly["bucket"]], dtype=int)
+        switches_by_hour = np.bincount(hours, weights=hourly["count"], minlength=24)
+        
+        inactivity = self.time_series.summarize("distraction.inactivity", start_date, end_date, entity=self.user_id)
+        
+        return {
+            "total_switches": sum(switches_to.values()),
+            "total_inactivity_seconds": inactivity["sum"],
+            "app_switch_counts": app_switch_counts,
+            "hourly_patterns": [
+                {"hour": int(hour), "switches": int(switches_by_hour[hour])}
+                for hour in np.flatnonzero(switches_by_hour)
+            ],
+            "interventions_by_type": counts_by_label("distraction.intervention")
+        }
+    
+    def _get_memory_metrics(self, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+        """
+        Get distraction metrics within a date range from the events tracked in memory.
+        
+        Args:
+            start_date (datetime): Start date
+            end_date (datetime): End date
+            
+        Returns:
+            Dict[str, Any]: Distraction metrics
+        """
+        app_switches = self._get_app_switches(start_date, end_date)
+        inactivity_periods = self._get_inactivity_periods(start_date, end_date)
+        interventions = self._get_interventions(start_date, end_date)
+        
+        # Calculate most switched apps
+        app_switch_counts = {}
+        for switch in app_switches:
+            from_app = switch.get("from_app")
+            to_app = switch.get("to_app")
+            
+            if from_app:
+                app_switch_counts[from_app] = app_switch_counts.get(from_app, 0) + 1
+            if to_app:
+                app_switch_counts[to_app] = app_switch_counts.get(to_app, 0) + 1
+        
+        # Calculate distraction patterns by hour
+        hourly_patterns = {}
+        for switch in app_switches:
+            hour = datetime.fromisoformat(switch.get("timestamp", "")).hour
+            hourly_patterns[hour] = hourly_patterns.get(hour, 0) + 1
+        
+        interventions_by_type = {}
+        for intervention in interventions:
+            intervention_type = intervention.get("type")
+            interventions_by_type[intervention_type] = interventions_by_type.get(intervention_type, 0) + 1
+        
+        return {
+            "total_switches": len(app_switches),
+            "total_inactivity_seconds": sum(period.get("duration", 0) for period in inactivity_periods),
+            "app_switch_counts": app_switch_counts,
+            "hourly_patterns": [{"hour": hour, "switches": count} for hour, count in hourly_patterns.items()],
+            "interventions_by_type": interventions_by_type
+        }
+    
     def _get_app_switches(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
         """
         Get app switches within a date range.
@@ -532,6 +699,8 @@ class DistractionTracker:
             List[Dict[str, Any]]: App switches
         """
         if self.db_manager:
+            self.event_sink.flush()
+            
             try:
                 self.db_manager.cursor.execute('''
                 SELECT * FROM app_switches
@@ -563,6 +732,8 @@ class DistractionTracker:
             List[Dict[str, Any]]: Inactivity periods
         """
         if self.db_manager:
+            self.event_sink.flush()
+            
             try:
                 self.db_manager.cursor.execute('''
                 SELECT * FROM inactivity_periods
@@ -594,6 +765,8 @@ class DistractionTracker:
             List[Dict[str, Any]]: Interventions
         """
         if self.db_manager:
+            self.event_sink.flush()
+            
             try:
                 self.db_manager.cursor.execute('''
                 SELECT * FROM interventions
@@ -0,0 +1,234 @@
+"""
+Event sink module for AI Note System.
+Writes tracking events in batched transactions from a single writer thread.
+"""
+
+import os
+import time
+import queue
+import atexit
+import logging
+import sqlite3
+import threading
+from itertools import groupby
+from typing import Any, Dict, List, Sequence, Tuple, Optional
+
+# Setup logging
+logger = logging.getLogger("ai_note_system.tracking.event_sink")
+
+# Queue item telling the writer to write what it has and stop
+_STOP = object()
+
+class _FlushMarker:
+    """
+    Queue item set once every event queued before it is written.
+    """
+    
+    def __init__(self):
+        self.done = threading.Event()
+
+class EventSink:
+    """
+    Queues tracking events from any thread and writes them from one writer thread.
+    
+    Events are (query, params) pairs put on a SimpleQueue, so producers never wait on
+    the database or on each other. The writer has its own connection and writes the
+    queued events in one transaction, with one executemany per run of events sharing
+    a query, once batch_size events are waiting or flush_interval seconds after the
+    first of them arrived. Closing the sink writes everything queued before it.
+    
+    A shared sink from get_event_sink that was closed by close_event_sinks hands
+    later events to the database's current shared sink, so trackers holding on
+    to it keep working.
+    """
+    
+    def __init__(self, db_path: str, batch_size: int = 500, flush_interval: float = 1.0):
+        """
+        Initialize the event sink and start its writer thread.
+        
+        Args:
+            db_path (str): Path to the SQLite database file
+            batch_size (int): Number of queued events that triggers a write
+            flush_interval (float): Seconds an event may wait before it is written
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        
+        self.written = 0
+        self.dropped = 0
+        self.closed = False
+        self.shared = False
+        
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="event-sink", daemon=True)
+        self._thread.start()
+    
+    def emit(self, query: str, params: Sequence[Any] = ()) -> None:
+        """
+        Queue an event to be written.
+        
+        Args:
+            query (str): INSERT or UPDATE statement of the event
+            params (Sequence[Any]): Parameters of the statement
+        """
+        if self.closed:
+            if self.shared:
+                get_event_sink(self.db_path).emit(query, params)
+                return
+            raise RuntimeError("Cannot emit tracking events to a closed event sink")
+        
+        self._queue.put((query, tuple(params)))
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every event queued before the call is written.
+        
+        Args:
+            timeout (float, optional): Maximum seconds to wait
+        
+        Returns:
+            bool: True if the events were written within the timeout
+        """
+        if self.closed and self.shared:
+            with _sinks_lock:
+                current = _sinks.get(self.db_path)
+            # Events handed off after closing went to the current shared sink
+            if current is not None and current is not self:
+                return current.flush(timeout)
+        
+        if self.closed or not self._thread.is_alive():
+            return True
+        
+        marker = _FlushMarker()
+        self._queue.put(marker)
+        return marker.done.wait(timeout)
+    
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Write all queued events and stop the writer thread.
+        
+        Args:
+            timeout (float, optional): Maximum seconds to wait for the writer
+        """
+        if self.closed:
+            return
+        
+        self.closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+    
+    def _run(self) -> None:
+        # SQLite connections belong to the thread that opened them
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        
+        events: List[Tuple[str, Tuple[Any, ...]]] = []
+        markers: List[_FlushMarker] = []
+        deadline = None
+        stopping = False
+        
+        try:
+            while not stopping:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+                
+                if item is _STOP:
+                    stopping = True
+                    
+                    # Events emitted while the sink was closing are still written
+                    while True:
+                        try:
+                            item = self._queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if isinstance(item, _FlushMarker):
+                            markers.append(item)
+                        elif item is not _STOP:
+                            events.append(item)
+                elif isinstance(item, _FlushMarker):
+                    markers.append(item)
+                elif item is not None:
+                    events.append(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+                    if len(events) < self.batch_size:
+                        continue
+                
+                self._write(conn, events)
+                events = []
+                deadline = None
+                
+                for marker in markers:
+                    marker.done.set()
+                markers = []
+        finally:
+            conn.close()
+    
+    def _write(self, conn: sqlite3.Connection, events: List[Tuple[str, Tuple[Any, ...]]]) -> None:
+        """
+        Write events in one transaction, falling back to one transaction per event on errors.
+        """
+        if not events:
+            return
+        
+        try:
+            for query, group in groupby(events, key=lambda event: event[0]):
+                conn.executemany(query, [params for _, params in group])
+            conn.commit()
+            self.written += len(events)
+            return
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Error writing {len(events)} tracking events, retrying one by one: {e}")
+        
+        # One bad event should not drop the rest of the batch
+        for query, params in events:
+            try:
+                conn.execute(query, params)
+                conn.commit()
+                self.written += 1
+            except sqlite3.Error as e:
+                conn.rollback()
+                self.dropped += 1
+                logger.error(f"Dropped tracking event: {e}")
+
+# Event sinks by absolute database path
+_sinks: Dict[str, EventSink] = {}
+_sinks_lock = threading.Lock()
+
+def get_event_sink(db_path: str) -> EventSink:
+    """
+    Get the shared event sink of a database, starting it if needed.
+    
+    Args:
+        db_path (str): Path to the SQLite database file
+    
+    Returns:
+        EventSink: Event sink writing to the database
+    """
+    path = os.path.abspath(db_path)
+    
+    with _sinks_lock:
+        sink = _sinks.get(path)
+        if sink is None or sink.closed:
+            sink = _sinks[path] = EventSink(path)
+            sink.shared = True
+        return sink
+
+def close_event_sinks() -> None:
+    """
+    Write all queued tracking events and stop the shared event sinks.
+    """
+    with _sinks_lock:
+        sinks = list(_sinks.values())
+        _sinks.clear()
+    
+    for sink in sinks:
+        sink.close()
+
+# Nothing queued is lost when the process exits
+atexit.register(close_event_sinks)
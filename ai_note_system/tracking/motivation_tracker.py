@@ -17,12 +17,38 @@ import json
 import logging
 import datetime
 from typing import Dict, Any, List, Optional, Tuple, Union
-from datetime import datetime, timedelta
-import statistics
-import math
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
 
 # Import database module
 from ..database.db_manager import DatabaseManager
+from .time_series import TimeSeriesSource, correlation, get_time_series
+
+# Motivation and performance entries mirrored into the time series; their timestamps are UTC
+MOTIVATION_SOURCE = TimeSeriesSource(
+    name="motivation_tracking",
+    table="motivation_tracking",
+    time_column="timestamp",
+    entity_column="user_id",
+    metrics=(
+        ("motivation.level", "level"),
+        ("motivation.energy_level", "energy_level"),
+        ("motivation.focus_level", "focus_level"),
+        ("motivation.stress_level", "stress_level"),
+        ("motivation.sleep_hours", "sleep_hours")
+    ),
+    utc=True
+)
+PERFORMANCE_SOURCE = TimeSeriesSource(
+    name="performance_tracking",
+    table="performance_tracking",
+    time_column="timestamp",
+    entity_column="user_id",
+    metrics=(("performance.score", "score"),),
+    label_column="activity_type",
+    utc=True
+)
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -41,6 +67,11 @@ class MotivationTracker:
         """
         self.db_manager = db_manager
         self._ensure_motivation_table()
+        
+        # Daily and weekly patterns are analyzed on rollups of the entries
+        self.time_series = get_time_series(self.db_manager.db_path)
+        self.time_series.register_source(MOTIVATION_SOURCE)
+        self.time_series.register_source(PERFORMANCE_SOURCE)
     
     def _ensure_motivation_table(self) -> None:
         """
@@ -284,44 +315,23 @@ class MotivationTracker:
         Returns:
             Dictionary with correlation statistics
         """
-        # Get motivation and performance data
-        motivation_data = self.get_motivation_history(period_days)
-        performance_data = self.get_performance_history(period_days)
-        
-        # Group performance data by day
-        performance_by_day = {}
-        for entry in performance_data:
-            timestamp = entry['timestamp']
-            day = timestamp.split(' ')[0]  # Extract date part
-            
-            if day not in performance_by_day:
-                performance_by_day[day] = []
-            
-            performance_by_day[day].append(entry['score'])
+        end = datetime.now()
+        start = end - timedelta(days=period_days)
         
-        # Group motivation data by day
-        motivation_by_day = {}
-        for entry in motivation_data:
-            timestamp = entry['timestamp']
-            day = timestamp.split(' ')[0]  # Extract date part
-            
-            if day not in motivation_by_day:
-                motivation_by_day[day] = []
-            
-            motivation_by_day[day].append(entry['level'])
-        
-        # Calculate average motivation and performance for each day
-        daily_averages = []
-        for day in set(list(motivation_by_day.keys()) + list(performance_by_day.keys())):
-            if day in motivation_by_day and day in performance_by_day:
-                avg_motivation = sum(motivation_by_day[day]) / len(motivation_by_day[day])
-                avg_performance = sum(performance_by_day[day]) / len(performance_by_day[day])
-                
-                daily_averages.append({
-                    'day': day,
-                    'motivation': avg_motivation,
-                    'performance': avg_performance
-                })
+        # Average motivation and performance of the days having both
+        self.time_series.sync()
+        days, (motivation_values, performance_values) = self.time_series.aligned_means(
+            ["motivation.level", "performance.score"], start, end, resolution="day"
+        )
+        
+        daily_averages = [
+            {
+                'day': datetime.fromtimestamp(day, timezone.utc).strftime('%Y-%m-%d'),
+                'motivation': float(motivation),
+                'performance': float(performance)
+            }
+            for day, motivation, performance in zip(days, motivation_values, performance_values)
+        ]
         
         # Calculate correlation
         if len(daily_averages) < 2:
@@ -331,62 +341,26 @@ class MotivationTracker:
                 'message': "Not enough data to calculate correlation"
             }
         
-        # Extract motivation and performance values
-        motivation_values = [entry['motivation'] for entry in daily_averages]
-        performance_values = [entry['performance'] for entry in daily_averages]
-        
-        # Calculate Pearson correlation coefficient
-        correlation = self._calculate_correlation(motivation_values, performance_values)
-        
         # Calculate additional statistics
         stats = {
-            'correlation': correlation,
+            'correlation': correlation(motivation_values, performance_values),
             'daily_averages': daily_averages,
             'motivation_stats': {
-                'mean': statistics.mean(motivation_values) if motivation_values else None,
-                'median': statistics.median(motivation_values) if motivation_values else None,
-                'min': min(motivation_values) if motivation_values else None,
-                'max': max(motivation_values) if motivation_values else None
+                'mean': float(np.mean(motivation_values)),
+                'median': float(np.median(motivation_values)),
+                'min': float(np.min(motivation_values)),
+                'max': float(np.max(motivation_values))
             },
             'performance_stats': {
-                'mean': statistics.mean(performance_values) if performance_values else None,
-                'median': statistics.median(performance_values) if performance_values else None,
-                'min': min(performance_values) if performance_values else None,
-                'max': max(performance_values) if performance_values else None
+                'mean': float(np.mean(performance_values)),
+                'median': float(np.median(performance_values)),
+                'min': float(np.min(performance_values)),
+                'max': float(np.max(performance_values))
             }
         }
         
         return stats
     
-    def _calculate_correlation(self, x: List[float], y: List[float]) -> float:
-        """
-        Calculate Pearson correlation coefficient between two lists.
-        
-        Args:
-            x: First list of values
-            y: Second list of values
-        
-        Returns:
-            float: Correlation coefficient
-        """
-        n = len(x)
-        
-        # Calculate means
-        mean_x = sum(x) / n
-        mean_y = sum(y) / n
-        
-        # Calculate covariance and standard deviations
-        covariance = sum((x[i] - mean_x) * (y[i] - mean_y) for i in range(n))
-        std_dev_x = math.sqrt(sum((val - mean_x) ** 2 for val in x))
-        std_dev_y = math.sqrt(sum((val - mean_y) ** 2 for val in y))
-        
-        # Calculate correlation coefficient
-        if std_dev_x == 0 or std_dev_y == 0:
-            return 0  # No correlation if there's no variation
-        
-        correlation = covariance / (std_dev_x * std_dev_y)
-        return correlation
-    
     def generate_motivation_insights(self) -> Dict[str, Any]:
         """
         Generate insights based on motivation patterns.
@@ -395,6 +369,7 @@ class MotivationTracker:
             Dictionary with motivation insights
         """
         # Get motivation history for the last 90 days
+        self.time_series.sync()
         motivation_data = self.get_motivation_history(period_days=90)
         
         if not motivation_data:
@@ -403,28 +378,23 @@ class MotivationTracker:
                 'insights': []
             }
         
-        # Group motivation data by day of week
-        motivation_by_day_of_week = {i: [] for i in range(7)}  # 0 = Monday, 6 = Sunday
+        # Average motivation by day of week from the daily rollups (1970-01-01 was a Thursday)
+        end = datetime.now()
+        daily = self.time_series.buckets("motivation.level", end - timedelta(days=90), end, resolution="day")
+        day_of_week = (daily["bucket"] // 86400 + 3) % 7
         
-        for entry in motivation_data:
-            timestamp = entry['timestamp']
-            date_obj = datetime.strptime(timestamp.split(' ')[0], '%Y-%m-%d')
-            day_of_week = date_obj.weekday()
-            
-            motivation_by_day_of_week[day_of_week].append(entry['level'])
+        samples = np.bincount(day_of_week, weights=daily["count"], minlength=7)
+        totals = np.bincount(day_of_week, weights=daily["sum"], minlength=7)
         
-        # Calculate average motivation by day of week
         day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        avg_by_day = []
-        
-        for day_num, levels in motivation_by_day_of_week.items():
-            if levels:
-                avg_motivation = sum(levels) / len(levels)
-                avg_by_day.append({
-                    'day': day_names[day_num],
-                    'average_motivation': avg_motivation,
-                    'sample_size': len(levels)
-                })
+        avg_by_day = [
+            {
+                'day': day_names[day_num],
+                'average_motivation': float(totals[day_num] / samples[day_num]),
+                'sample_size': int(samples[day_num])
+            }
+            for day_num in np.flatnonzero(samples)
+        ]
         
         # Sort by average motivation
         avg_by_day.sort(key=lambda x: x['average_motivation'], reverse=True)
@@ -472,7 +442,7 @@ class MotivationTracker:
                 motivation_values = [entry[0] for entry in sleep_data]
                 sleep_values = [entry[1] for entry in sleep_data]
                 
-                sleep_correlation = self._calculate_correlation(motivation_values, sleep_values)
+                sleep_correlation = correlation(motivation_values, sleep_values)
                 
                 if sleep_correlation > 0.3:
                     insights.append({
@@ -492,7 +462,7 @@ class MotivationTracker:
                 motivation_values = [entry[0] for entry in stress_data]
                 stress_values = [entry[1] for entry in stress_data]
                 
-                stress_correlation = self._calculate_correlation(motivation_values, stress_values)
+                stress_correlation = correlation(motivation_values, stress_values)
                 
                 if stress_correlation < -0.3:
                     insights.append({
@@ -511,15 +481,12 @@ class MotivationTracker:
             sorted_data = sorted(motivation_data, key=lambda x: x['timestamp'])
             
             # Calculate 7-day moving average
-            moving_avgs = []
-            for i in range(len(sorted_data) - 6):
-                window = sorted_data[i:i+7]
-                avg = sum(entry['level'] for entry in window) / 7
-                moving_avgs.append((window[-1]['timestamp'], avg))
+            levels = np.array([entry['level'] for entry in sorted_data], dtype=float)
+            moving_avgs = np.convolve(levels, np.ones(7) / 7, mode='valid')
             
             if len(moving_avgs) >= 2:
-                first_avg = moving_avgs[0][1]
-                last_avg = moving_avgs[-1][1]
+                first_avg = moving_avgs[0]
+                last_avg = moving_avgs[-1]
                 
                 if last_avg > first_avg + 1:
                     insights.append({
@@ -0,0 +1,175 @@
+"""
+Signal buffer module for AI Note System.
+Keeps recent tracking samples in fixed-capacity ring buffers with sliding-window statistics.
+"""
+
+import time
+import threading
+from typing import Optional, Sequence
+
+import numpy as np
+
+class SignalBuffer:
+    """
+    Fixed-capacity ring buffer of timestamped samples with running statistics over a time window.
+    
+    Samples are stored in preallocated arrays and the oldest one is overwritten once the
+    buffer is full, so memory stays constant however long a session runs. The sum and sum
+    of squares of every field are kept for the samples inside the window, which makes
+    appends and windowed counts, means and variances O(1) amortized.
+    """
+    
+    def __init__(self, fields: Sequence[str], capacity: int = 4096, window: float = 60.0):
+        """
+        Initialize the signal buffer.
+        
+        Args:
+            fields (Sequence[str]): Names of the values of each sample
+            capacity (int): Maximum number of samples kept
+            window (float): Length of the statistics window in seconds
+        """
+        self.fields = tuple(fields)
+        self.capacity = capacity
+        self.window = window
+        
+        self._index = {field: i for i, field in enumerate(self.fields)}
+        self._times = np.zeros(capacity)
+        self._values = np.zeros((capacity, len(self.fields)))
+        self._lock = threading.Lock()
+        self.clear()
+    
+    def clear(self) -> None:
+        """
+        Remove all samples.
+        """
+        with self._lock:
+            # Positions count appended samples, their slot is the position modulo capacity
+            self._end = 0
+            self._window_start = 0
+            self._sums = np.zeros(len(self.fields))
+            self._squares = np.zeros(len(self.fields))
+    
+    def __len__(self) -> int:
+        return min(self._end, self.capacity)
+    
+    def append(self, *values: float, timestamp: Optional[float] = None) -> None:
+        """
+        Add a sample, overwriting the oldest one if the buffer is full.
+        
+        Args:
+            *values (float): Value of every field
+            timestamp (float, optional): Monotonic time of the sample, now if not given
+        """
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        row = np.asarray(values, dtype=float)
+        
+        with self._lock:
+            if self._end - self._window_start == self.capacity:
+                self._evict()
+            
+            slot = self._end % self.capacity
+            self._times[slot] = timestamp
+            self._values[slot] = row
+            self._sums += row
+            self._squares += row * row
+            self._end += 1
+            
+            self._expire(timestamp)
+    
+    def _evict(self) -> None:
+        row = self._values[self._window_start % self.capacity]
+        self._sums -= row
+        self._squares -= row * row
+        self._window_start += 1
+    
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.window
+        while self._window_start < self._end and self._times[self._window_start % self.capacity] < cutoff:
+            self._evict()
+        
+        # Start the sums afresh once the window empties, so rounding errors do not build up
+        if self._window_start == self._end:
+            self._sums[:] = 0
+            self._squares[:] = 0
+    
+    def window_count(self, now: Optional[float] = None) -> int:
+        """
+        Count the samples inside the window.
+        
+        Args:
+            now (float, optional): Monotonic time the window ends at, the latest sample if not given
+        
+        Returns:
+            int: Number of samples in the window
+        """
+        with self._lock:
+            if now is not None:
+                self._expire(now)
+            return self._end - self._window_start
+    
+    def window_mean(self, field: str, now: Optional[float] = None) -> float:
+        """
+        Get the mean of a field over the window.
+        
+        Args:
+            field (str): Name of the field
+            now (float, optional): Monotonic time the window ends at, the latest sample if not given
+        
+        Returns:
+            float: Mean of the field, 0.0 if the window is empty
+        """
+        with self._lock:
+            if now is not None:
+                self._expire(now)
+            count = self._end - self._window_start
+            return float(self._sums[self._index[field]] / count) if count else 0.0
+    
+    def window_variance(self, field: str, now: Optional[float] = None) -> float:
+        """
+        Get the population variance of a field over the window.
+        
+        Args:
+            field (str): Name of the field
+            now (float, optional): Monotonic time the window ends at, the latest sample if not given
+        
+        Returns:
+            float: Variance of the field, 0.0 if the window is empty
+        """
+        with self._lock:
+            if now is not None:
+                self._expire(now)
+            count = self._end - self._window_start
+            if not count:
+                return 0.0
+            
+            i = self._index[field]
+            mean = self._sums[i] / count
+            return float(max(self._squares[i] / count - mean * mean, 0.0))
+    
+    def _ordered(self, data: np.ndarray) -> np.ndarray:
+        size = min(self._end, self.capacity)
+        start = (self._end - size) % self.capacity
+        return np.roll(data, -start)[:size]
+    
+    def times(self) -> np.ndarray:
+        """
+        Get the times of the samples kept, oldest first.
+        
+        Returns:
+            np.ndarray: Monotonic times of the samples
+        """
+        with self._lock:
+            return self._ordered(self._times)
+    
+    def values(self, field: str) -> np.ndarray:
+        """
+        Get the values of a field for the samples kept, oldest first.
+        
+        Args:
+            field (str): Name of the field
+        
+        Returns:
+            np.ndarray: Values of the field
+        """
+        with self._lock:
+            return self._ordered(self._values[:, self._index[field]])
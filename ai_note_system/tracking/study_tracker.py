@@ -12,6 +12,8 @@ from datetime import datetime, timedelta
 from enum import Enum
 from dataclasses import dataclass, asdict, field
 
+from .event_sink import get_event_sink
+
 # Setup logging
 logger = logging.getLogger("ai_note_system.tracking.study_tracker")
 
@@ -94,6 +96,9 @@ class StudyTracker:
         # Ensure tables exist
         self._ensure_tables()
         
+        # Note reviews are written in batches by the shared writer thread
+        self.event_sink = get_event_sink(db_path)
+        
         # Current active session
         self.current_session = None
         
@@ -114,6 +119,8 @@ class StudyTracker:
         """
         Close the database connection.
         """
+        self.event_sink.flush()
+        
         if self.conn:
             self.conn.close()
             logger.debug("Database connection closed")
@@ -434,28 +441,20 @@ class StudyTracker:
         if note_id not in self.current_session.notes:
             self.current_session.notes.append(note_id)
         
-        # Save to database
-        try:
-            self.cursor.execute('''
-            INSERT OR REPLACE INTO session_notes (
-                session_id, note_id, review_time, duration
-            ) VALUES (?, ?, ?, ?)
-            ''', (
-                self.current_session.id,
-                note_id,
-                datetime.now().isoformat(),
-                duration
-            ))
-            
-            self.conn.commit()
-            logger.info(f"Added note {note_id} to session (ID: {self.current_session.id})")
-            
-            return True
-            
-        except sqlite3.Error as e:
-            self.conn.rollback()
-            logger.error(f"Error adding note to session: {e}")
-            return False
+        # Queue for the database
+        self.event_sink.emit('''
+        INSERT OR REPLACE INTO session_notes (
+            session_id, note_id, review_time, duration
+        ) VALUES (?, ?, ?, ?)
+        ''', (
+            self.current_session.id,
+            note_id,
+            datetime.now().isoformat(),
+            duration
+        ))
+        
+        logger.info(f"Added note {note_id} to session (ID: {self.current_session.id})")
+        return True
     
     def get_session(self, session_id: int) -> Optional[StudySession]:
         """
@@ -467,6 +466,8 @@ class StudyTracker:
         Returns:
             Optional[StudySession]: The session, or None if not found
         """
+        self.event_sink.flush()
+        
         try:
             # Get session
             self.cursor.execute('''
@@ -640,6 +641,8 @@ class StudyTracker:
         Returns:
             Dict[str, Any]: Dictionary of statistics
         """
+        self.event_sink.flush()
+        
         try:
             # Build query
             sql = """
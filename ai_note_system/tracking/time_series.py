@@ -0,0 +1,607 @@
+"""
+Time series module for AI Note System.
+Mirrors tracking measurements into day-partitioned tables with minute, hour and day rollups.
+"""
+
+import os
+import math
+import time
+import logging
+import sqlite3
+import calendar
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .event_sink import get_event_sink
+
+# Setup logging
+logger = logging.getLogger("ai_note_system.tracking.time_series")
+
+# Rollup resolutions from coarsest to finest, with their bucket sizes in seconds
+RESOLUTIONS: Tuple[Tuple[str, int], ...] = (("day", 86400), ("hour", 3600), ("minute", 60))
+
+# Seconds of data kept per resolution, None keeps it forever
+DEFAULT_RETENTION: Dict[str, Optional[int]] = {
+    "raw": 7 * 86400,
+    "minute": 30 * 86400,
+    "hour": 365 * 86400,
+    "day": None
+}
+
+# Raw points are stored in one table per UTC day, named after it
+PARTITION_PREFIX = "ts_points_"
+
+# Source rows mirrored per transaction
+SYNC_BATCH_SIZE = 5000
+
+TimeValue = Union[datetime, float, int]
+
+def correlation_matrix(values: Any) -> np.ndarray:
+    """
+    Calculate the Pearson correlation coefficient of every pair of rows.
+    
+    Args:
+        values: Matrix with one series per row
+    
+    Returns:
+        np.ndarray: Correlation coefficients, 0 for pairs involving a constant series
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    if values.shape[1] < 2:
+        return np.zeros((values.shape[0], values.shape[0]))
+    
+    centered = values - values.mean(axis=1, keepdims=True)
+    norms = np.sqrt(np.einsum("ij,ij->i", centered, centered))
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlations = (centered @ centered.T) / np.outer(norms, norms)
+    
+    return np.nan_to_num(correlations, nan=0.0, posinf=0.0, neginf=0.0)
+
+def correlation(x: Sequence[float], y: Sequence[float]) -> float:
+    """
+    Calculate the Pearson correlation coefficient of two series.
+    
+    Args:
+        x (Sequence[float]): First series
+        y (Sequence[float]): Second series
+    
+    Returns:
+        float: Correlation coefficient, 0.0 if the series differ in length, are shorter than 2 or constant
+    """
+    if len(x) != len(y) or len(x) < 2:
+        return 0.0
+    
+    return float(correlation_matrix([x, y])[0, 1])
+
+@dataclass(frozen=True)
+class TimeSeriesSource:
+    """
+    Tracking table whose rows are mirrored into the time series.
+    
+    Each row adds one point per metric whose column is not NULL. A metric without
+    a column adds a point of value 1, so its rollups count rows.
+    """
+    name: str
+    table: str
+    time_column: str
+    entity_column: str
+    metrics: Tuple[Tuple[str, Optional[str]], ...]
+    label_column: Optional[str] = None
+    utc: bool = False
+
+def _to_epoch(value: Optional[TimeValue], utc: bool = False) -> Optional[float]:
+    """
+    Convert a datetime, ISO 8601 string or epoch to epoch seconds; naive times are local unless utc.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+    
+    if value.tzinfo is None and utc:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def _partition_name(timestamp: float) -> str:
+    return PARTITION_PREFIX + time.strftime("%Y%m%d", time.gmtime(timestamp))
+
+def _partition_start(name: str) -> int:
+    return calendar.timegm(time.strptime(name[len(PARTITION_PREFIX):], "%Y%m%d"))
+
+def _summary(aggregate: Optional[List[float]]) -> Dict[str, float]:
+    if not aggregate:
+        return {"count": 0, "sum": 0.0, "min": None, "max": None, "mean": None}
+    
+    count, total, minimum, maximum = aggregate
+    return {"count": int(count), "sum": total, "min": minimum, "max": maximum, "mean": total / count}
+
+class TimeSeriesStore:
+    """
+    Keeps tracking measurements as raw points and minute, hour and day rollups.
+    
+    Rows of registered source tables are mirrored incrementally, by rowid, into one raw
+    table per UTC day and into the rollups, which hold count, sum, min and max per bucket.
+    Each resolution is kept for its retention period, after which whole raw partitions are
+    dropped. Queries cover a range with the coarsest buckets that fit inside it and only
+    use finer data for its edges.
+    """
+    
+    def __init__(self, db_path: str, retention: Optional[Dict[str, Optional[int]]] = None):
+        """
+        Initialize the time series store.
+        
+        Args:
+            db_path (str): Path to the SQLite database file
+            retention (Dict[str, Optional[int]], optional): Seconds of data kept per resolution
+                ("raw", "minute", "hour" or "day"), None keeping it forever
+        """
+        self.db_path = db_path
+        self.retention = dict(DEFAULT_RETENTION)
+        self.retention.update(retention or {})
+        self.sources: Dict[str, TimeSeriesSource] = {}
+        
+        # Trackers query from their own threads, so the connection is shared under a lock
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._retention_day = None
+        
+        self._ensure_tables()
+    
+    def _ensure_tables(self) -> None:
+        """
+        Ensure the rollup and source tables exist in the database.
+        """
+        with self._lock:
+            for level, _ in RESOLUTIONS:
+                self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS ts_rollup_{level} (
+                    metric TEXT NOT NULL,
+                    entity TEXT NOT NULL,
+                    label TEXT NOT NULL DEFAULT '',
+                    bucket INTEGER NOT NULL,
+                    count INTEGER NOT NULL,
+                    sum REAL NOT NULL,
+                    min REAL NOT NULL,
+                    max REAL NOT NULL,
+                    PRIMARY KEY (metric, entity, label, bucket)
+                ) WITHOUT ROWID
+                """)
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_ts_rollup_{level}_bucket ON ts_rollup_{level} (bucket)")
+            
+            self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS ts_sources (
+                name TEXT PRIMARY KEY,
+                last_rowid INTEGER NOT NULL DEFAULT 0
+            )
+            """)
+    
+    def register_source(self, source: TimeSeriesSource) -> None:
+        """
+        Mirror a tracking table into the time series from the next sync on.
+        
+        Args:
+            source (TimeSeriesSource): Table and the metrics taken from its rows
+        """
+        with self._lock:
+            self.sources[source.name] = source
+    
+    def _retention_start(self, level: str, now: float) -> float:
+        keep = self.retention.get(level)
+        return -math.inf if keep is None else now - keep
+    
+    def sync(self) -> int:
+        """
+        Mirror the rows added to the registered source tables since the last sync.
+        
+        Returns:
+            int: Number of points added
+        """
+        # Tracking rows may still be waiting in the event sink
+        get_event_sink(self.db_path).flush()
+        
+        added = 0
+        with self._lock:
+            for source in list(self.sources.values()):
+                try:
+                    added += self._sync_source(source)
+                except sqlite3.Error as e:
+                    logger.error(f"Error syncing time series source {source.name}: {e}")
+            
+            # Expired data is removed once a day
+            today = int(time.time() // 86400)
+            if self._retention_day != today:
+                self.apply_retention()
+                self._retention_day = today
+        
+        return added
+    
+    def _sync_source(self, source: TimeSeriesSource) -> int:
+        columns = [source.time_column, source.entity_column, source.label_column or "''"]
+        columns += [column or "1" for _, column in source.metrics]
+        query = f"""
+        SELECT rowid, {", ".join(columns)} FROM {source.table}
+        WHERE rowid > ?
+        ORDER BY rowid
+        LIMIT ?
+        """
+        
+        added = 0
+        while True:
+            # Taking the write lock first keeps two processes from mirroring the same rows
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT last_rowid FROM ts_sources WHERE name = ?", (source.name,)).fetchone()
+                rows = self._conn.execute(query, (row[0] if row else 0, SYNC_BATCH_SIZE)).fetchall()
+                
+                points = []
+                for row in rows:
+                    timestamp = _to_epoch(row[1], source.utc)
+                    if timestamp is None:
+                        continue
+                    
+                    entity = str(row[2])
+                    label = "" if row[3] is None else str(row[3])
+                    for (metric, _), value in zip(source.metrics, row[4:]):
+                        if value is not None:
+                            points.append((metric, entity, label, timestamp, float(value)))
+                
+                if rows:
+                    self._write_points(points)
+                    self._conn.execute("""
+                    INSERT INTO ts_sources (name, last_rowid) VALUES (?, ?)
+                    ON CONFLICT(name) DO UPDATE SET last_rowid = excluded.last_rowid
+                    """, (source.name, rows[-1][0]))
+                
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            
+            added += len(points)
+            if len(rows) < SYNC_BATCH_SIZE:
+                return added
+    
+    def _write_points(self, points: List[Tuple[str, str, str, float, float]]) -> None:
+        """
+        Write points to their raw partitions and add them to the rollups they are still kept in.
+        """
+        now = time.time()
+        raw_start = self._retention_start("raw", now)
+        
+        partitions: Dict[str, List[Tuple[str, str, str, float, float]]] = {}
+        rollups: Dict[str, Dict[Tuple[str, str, str, int], List[float]]] = {level: {} for level, _ in RESOLUTIONS}
+        starts = {level: self._retention_start(level, now) for level, _ in RESOLUTIONS}
+        
+        for point in points:
+            metric, entity, label, timestamp, value = point
+            if timestamp >= raw_start:
+                partitions.setdefault(_partition_name(timestamp), []).append(point)
+            
+            for level, size in RESOLUTIONS:
+                if timestamp < starts[level]:
+                    continue
+                
+                key = (metric, entity, label, int(timestamp // size) * size)
+                aggregate = rollups[level].get(key)
+                if aggregate is None:
+                    rollups[level][key] = [1, value, value, value]
+                else:
+                    aggregate[0] += 1
+                    aggregate[1] += value
+                    aggregate[2] = min(aggregate[2], value)
+                    aggregate[3] = max(aggregate[3], value)
+        
+        for partition, rows in partitions.items():
+            self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {partition} (
+                metric TEXT NOT NULL,
+                entity TEXT NOT NULL,
+                label TEXT NOT NULL DEFAULT '',
+                ts REAL NOT NULL,
+                value REAL NOT NULL
+            )
+            """)
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{partition} ON {partition} (metric, entity, ts)")
+            self._conn.executemany(f"""
+            INSERT INTO {partition} (metric, entity, label, ts, value) VALUES (?, ?, ?, ?, ?)
+            """, rows)
+        
+        for level, aggregates in rollups.items():
+            self._conn.executemany(f"""
+            INSERT INTO ts_rollup_{level} (metric, entity, label, bucket, count, sum, min, max)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(metric, entity, label, bucket) DO UPDATE SET
+                count = count + excluded.count,
+                sum = sum + excluded.sum,
+                min = MIN(min, excluded.min),
+                max = MAX(max, excluded.max)
+            """, [key + tuple(aggregate) for key, aggregate in aggregates.items()])
+    
+    def _get_partitions(self) -> List[str]:
+        rows = self._conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ? ORDER BY name",
+            (PARTITION_PREFIX + "%",)
+        ).fetchall()
+        return [row[0] for row in rows]
+    
+    def apply_retention(self, now: Optional[float] = None) -> None:
+        """
+        Drop raw partitions and delete rollup buckets older than their retention period.
+        
+        Args:
+            now (float, optional): Current time in epoch seconds
+        """
+        now = time.time() if now is None else now
+        
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # A partition goes once the whole day it holds has expired
+                raw_start = self._retention_start("raw", now)
+                for partition in self._get_partitions():
+                    if _partition_start(partition) + 86400 <= raw_start:
+                        self._conn.execute(f"DROP TABLE {partition}")
+                
+                for level, size in RESOLUTIONS:
+                    start = self._retention_start(level, now)
+                    if start > -math.inf:
+                        self._conn.execute(f"DELETE FROM ts_rollup_{level} WHERE bucket < ?", (int(start // size) * size,))
+                
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+    
+    def _cover(self, start: float, end: float, now: float) -> List[Tuple[str, float, float]]:
+        """
+        Split a time range into segments answered by the coarsest resolution holding whole buckets of them.
+        """
+        levels: List[Tuple[str, Optional[int]]] = list(RESOLUTIONS) + [("raw", None)]
+        segments: List[Tuple[str, float, float]] = []
+        
+        def split(lo: float, hi: float, index: int) -> None:
+            if lo >= hi:
+                return
+            
+            level, size = levels[index]
+            if size is None:
+                segments.append((level, lo, hi))
+                return
+            
+            # Finer data of older periods has expired, so their overlapping buckets count whole
+            finer_start = self._retention_start(levels[index + 1][0], now)
+            if lo < finer_start:
+                edge = min(hi, math.ceil(finer_start / size) * size)
+                segments.append((level, math.floor(lo / size) * size, edge))
+                split(edge, hi, index)
+                return
+            
+            first = math.ceil(lo / size) * size
+            last = math.floor(hi / size) * size
+            if first >= last:
+                split(lo, hi, index + 1)
+                return
+            
+            split(lo, first, index + 1)
+            segments.append((level, first, last))
+            split(last, hi, index + 1)
+        
+        split(start, end, 0)
+        return segments
+    
+    def _filters(self, metric: str, entity: Optional[Any], label: Optional[str]) -> Tuple[str, List[Any]]:
+        clauses = ["metric = ?"]
+        params: List[Any] = [metric]
+        
+        if entity is not None:
+            clauses.append("entity = ?")
+            params.append(str(entity))
+        if label is not None:
+            clauses.append("label = ?")
+            params.append(label)
+        
+        return " AND ".join(clauses), params
+    
+    def summarize(
+        self,
+        metric: str,
+        start: TimeValue,
+        end: TimeValue,
+        entity: Optional[Any] = None,
+        label: Optional[str] = None,
+        by_label: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Aggregate a metric over a time range.
+        
+        Args:
+            metric (str): Name of the metric
+            start (TimeValue): Start of the range
+            end (TimeValue): End of the range (exclusive)
+            entity (Any, optional): Only count points of this entity
+            label (str, optional): Only count points with this label
+            by_label (bool): Whether to aggregate each label separately
+        
+        Returns:
+            Dict[str, Any]: count, sum, min, max and mean of the points, or those per label
+        """
+        start, end = _to_epoch(start), _to_epoch(end)
+        where, params = self._filters(metric, entity, label)
+        group = "label" if by_label else "''"
+        
+        totals: Dict[str, List[float]] = {}
+        with self._lock:
+            partitions = set(self._get_partitions())
+            
+            for level, lo, hi in self._cover(start, end, time.time()):
+                if level == "raw":
+                    day = math.floor(lo / 86400) * 86400
+                    queries = []
+                    while day < hi:
+                        partition = _partition_name(day)
+                        if partition in partitions:
+                            queries.append(f"""
+                            SELECT {group}, COUNT(*), TOTAL(value), MIN(value), MAX(value) FROM {partition}
+                            WHERE {where} AND ts >= ? AND ts < ?
+                            GROUP BY {group}
+                            """)
+                        day += 86400
+                else:
+                    queries = [f"""
+                    SELECT {group}, SUM(count), TOTAL(sum), MIN(min), MAX(max) FROM ts_rollup_{level}
+                    WHERE {where} AND bucket >= ? AND bucket < ?
+                    GROUP BY {group}
+                    """]
+                
+                for query in queries:
+                    for key, count, total, minimum, maximum in self._conn.execute(query, params + [lo, hi]):
+                        if not count:
+                            continue
+                        
+                        aggregate = totals.get(key)
+                        if aggregate is None:
+                            totals[key] = [count, total, minimum, maximum]
+                        else:
+                            aggregate[0] += count
+                            aggregate[1] += total
+                            aggregate[2] = min(aggregate[2], minimum)
+                            aggregate[3] = max(aggregate[3], maximum)
+        
+        if by_label:
+            return {key: _summary(aggregate) for key, aggregate in totals.items()}
+        return _summary(totals.get(""))
+    
+    def choose_resolution(self, start: TimeValue, step: Optional[int] = None) -> str:
+        """
+        Choose the coarsest resolution whose buckets divide a step and that still holds data from start.
+        
+        Args:
+            start (TimeValue): Start of the range
+            step (int, optional): Seconds per value wanted, any if not given
+        
+        Returns:
+            str: Name of the resolution, the finest one still holding data if none fits the step
+        """
+        start = _to_epoch(start)
+        now = time.time()
+        retained = [level for level, _ in RESOLUTIONS if start >= self._retention_start(level, now)]
+        
+        for level, size in RESOLUTIONS:
+            if level in retained and (step is None or step % size == 0):
+                return level
+        
+        return retained[-1] if retained else RESOLUTIONS[0][0]
+    
+    def buckets(
+        self,
+        metric: str,
+        start: TimeValue,
+        end: TimeValue,
+        resolution: Optional[str] = None,
+        step: Optional[int] = None,
+        entity: Optional[Any] = None,
+        label: Optional[str] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Get the rollup buckets of a metric overlapping a time range.
+        
+        Args:
+            metric (str): Name of the metric
+            start (TimeValue): Start of the range
+            end (TimeValue): End of the range (exclusive)
+            resolution (str, optional): Resolution of the buckets, chosen from step if not given
+            step (int, optional): Seconds per bucket wanted
+            entity (Any, optional): Only count points of this entity
+            label (str, optional): Only count points with this label
+        
+        Returns:
+            Dict[str, np.ndarray]: bucket start times and count, sum, min, max and mean per bucket
+        """
+        start, end = _to_epoch(start), _to_epoch(end)
+        resolution = resolution or self.choose_resolution(start, step)
+        size = dict(RESOLUTIONS)[resolution]
+        where, params = self._filters(metric, entity, label)
+        
+        with self._lock:
+            rows = self._conn.execute(f"""
+            SELECT bucket, SUM(count), TOTAL(sum), MIN(min), MAX(max) FROM ts_rollup_{resolution}
+            WHERE {where} AND bucket >= ? AND bucket < ?
+            GROUP BY bucket
+            ORDER BY bucket
+            """, params + [math.floor(start / size) * size, end]).fetchall()
+        
+        data = np.array(rows, dtype=float).reshape(-1, 5)
+        return {
+            "bucket": data[:, 0].astype(np.int64),
+            "count": data[:, 1],
+            "sum": data[:, 2],
+            "min": data[:, 3],
+            "max": data[:, 4],
+            "mean": data[:, 2] / np.maximum(data[:, 1], 1)
+        }
+    
+    def aligned_means(
+        self,
+        metrics: Sequence[str],
+        start: TimeValue,
+        end: TimeValue,
+        resolution: Optional[str] = None,
+        step: Optional[int] = None,
+        entity: Optional[Any] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the bucket means of several metrics over the buckets where all of them have points.
+        
+        Args:
+            metrics (Sequence[str]): Names of the metrics
+            start (TimeValue): Start of the range
+            end (TimeValue): End of the range (exclusive)
+            resolution (str, optional): Resolution of the buckets, chosen from step if not given
+            step (int, optional): Seconds per bucket wanted
+            entity (Any, optional): Only count points of this entity
+        
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Bucket start times and a matrix of means with one row per metric
+        """
+        resolution = resolution or self.choose_resolution(start, step)
+        series = [self.buckets(metric, start, end, resolution=resolution, entity=entity) for metric in metrics]
+        
+        common = series[0]["bucket"]
+        for data in series[1:]:
+            common = np.intersect1d(common, data["bucket"], assume_unique=True)
+        
+        means = np.array([data["mean"][np.isin(data["bucket"], common, assume_unique=True)] for data in series])
+        return common, means.reshape(len(series), len(common))
+
+# Time series stores by absolute database path
+_stores: Dict[str, TimeSeriesStore] = {}
+_stores_lock = threading.Lock()
+
+def get_time_series(db_path: str) -> TimeSeriesStore:
+    """
+    Get the shared time series store of a database.
+    
+    Args:
+        db_path (str): Path to the SQLite database file
+    
+    Returns:
+        TimeSeriesStore: Time series store of the database
+    """
+    path = os.path.abspath(db_path)
+    
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = TimeSeriesStore(path)
+        return store
@@ -0,0 +1,92 @@
+"""
+Periodic task module for AI Note System.
+Runs database maintenance jobs at a fixed interval in a background thread.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Optional
+
+# Setup logging
+logger = logging.getLogger("ai_note_system.utils.periodic_task")
+
+class PeriodicTask:
+    """
+    Background thread that runs a job against its own database connection at a fixed interval.
+    
+    SQLite connections belong to the thread that opened them, so the thread opens a
+    new database manager of the same type and path, and builds the job from it.
+    A failing run is logged and retried at the next interval.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        db_manager,
+        make_job: Callable[[Any], Callable[[], Any]],
+        run_immediately: bool = True
+    ):
+        """
+        Initialize a stopped periodic task.
+        
+        Args:
+            name (str): Name of the thread, also used in log messages
+            db_manager: Database manager whose database the job works on
+            make_job (Callable): Builds the job from the thread's database manager
+            run_immediately (bool): Whether the first run starts right away instead of after one interval
+        """
+        self.name = name
+        self.db_manager = db_manager
+        self.make_job = make_job
+        self.run_immediately = run_immediately
+        
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+    
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self, interval_seconds: float) -> bool:
+        """
+        Start running the job in a background thread.
+        
+        Args:
+            interval_seconds (float): Seconds between runs
+        
+        Returns:
+            bool: True if the task was started, False if it is already running
+        """
+        if self.is_running():
+            return False
+        
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval_seconds,), name=self.name, daemon=True)
+        self._thread.start()
+        return True
+    
+    def stop(self) -> None:
+        """
+        Stop the background thread, waiting for a running job to finish.
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+    
+    def _run(self, interval_seconds: float) -> None:
+        db_manager = type(self.db_manager)(self.db_manager.db_path)
+        
+        try:
+            job = self.make_job(db_manager)
+            
+            if self.run_immediately or not self._stop.wait(interval_seconds):
+                while True:
+                    try:
+                        job()
+                    except Exception as e:
+                        logger.error(f"Error in periodic task {self.name}: {e}")
+                    
+                    if self._stop.wait(interval_seconds):
+                        break
+        finally:
+            db_manager.close()
@@ -0,0 +1,637 @@
+"""
+Graph engine module for AI Note System.
+Keeps an in-memory, id-indexed copy of the note graph with CSR adjacency arrays
+so knowledge graph extraction and queries don't hit the database per note.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+import numpy as np
+
+# Setup logging
+logger = logging.getLogger("ai_note_system.visualization.graph_engine")
+
+# Edge relationship type codes
+RELATED = 0
+PREREQUISITE = 1
+BUILDS_ON = 2
+PRECEDES = 3
+RELATIONSHIP_TYPES = ["related", "prerequisite", "builds_on", "precedes"]
+
+PREREQUISITE_TAGS = ("prerequisite", "fundamental", "basic")
+ADVANCED_TAGS = ("advanced", "expert", "complex")
+
+def _format_date(timestamp: Optional[str]) -> str:
+    try:
+        return datetime.fromisoformat(timestamp).strftime("%Y-%m-%d")
+    except (ValueError, TypeError):
+        return "Unknown date"
+
+def _make_node(note: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a note row from DatabaseManager.get_graph_notes into a graph node.
+    """
+    tags = note.get("tags", [])
+    return {
+        "id": note["id"],
+        "title": note["title"],
+        "summary": note.get("summary", ""),
+        "tags": tags,
+        "date": _format_date(note.get("timestamp")),
+        "timestamp": note.get("timestamp") or "",
+        "source_type": note.get("source_type", "text"),
+        "key_concepts": note.get("keypoints", []),
+        "is_prerequisite": any(tag.lower() in PREREQUISITE_TAGS for tag in tags),
+        "is_advanced": any(tag.lower() in ADVANCED_TAGS for tag in tags)
+    }
+
+def build_reasoning_path(source: Dict[str, Any], target: Dict[str, Any], path_type: str) -> Optional[Dict[str, Any]]:
+    """
+    Build the reasoning path explaining an edge, if the edge warrants one.
+
+    Args:
+        source (Dict[str, Any]): Source node
+        target (Dict[str, Any]): Target node
+        path_type (str): 'prerequisite' or 'causal'
+
+    Returns:
+        Optional[Dict[str, Any]]: Reasoning path, or None for a causal pair without shared concepts
+    """
+    if path_type == "prerequisite":
+        return {
+            "source_id": source["id"],
+            "target_id": target["id"],
+            "source_title": source["title"],
+            "target_title": target["title"],
+            "path_type": "prerequisite",
+            "explanation": f"{source['title']} is a prerequisite for understanding {target['title']}. "
+                          f"You should master the concepts in {source['title']} before moving on to {target['title']}."
+        }
+
+    target_concepts = set(target.get("key_concepts", []))
+    common_concepts = [concept for concept in dict.fromkeys(source.get("key_concepts", [])) if concept in target_concepts]
+    if not common_concepts or source["id"] == target["id"]:
+        return None
+
+    return {
+        "source_id": source["id"],
+        "target_id": target["id"],
+        "source_title": source["title"],
+        "target_title": target["title"],
+        "path_type": "causal",
+        "common_concepts": common_concepts,
+        "explanation": f"{source['title']} and {target['title']} are causally related through concepts: {', '.join(common_concepts)}."
+    }
+
+class KnowledgeGraphEngine:
+    """
+    Cached in-memory note graph.
+
+    Nodes are stored in id-sorted arrays with an id -> index table; the
+    related_notes relationships are stored as CSR arrays (out-edges sorted by
+    similarity, plus a reverse index of in-edges). The graph is loaded with a
+    handful of bulk queries and, after database writes, only the changed notes
+    and relationship rows are re-read before the arrays are rebuilt.
+
+    Writes made through a DatabaseManager in this process are reported to the
+    engine. Other writes (other processes, raw SQL) are detected by a cheap
+    signature of the note, tag, key point and relationship tables, which
+    triggers a full reload; edits that leave every table's row count and IDs
+    unchanged, such as a retitled note, are picked up when the TTL expires.
+    """
+
+    def __init__(self, db_path: str, ttl: Optional[float] = None):
+        """
+        Initialize the engine.
+
+        Args:
+            db_path (str): Path to the SQLite database file
+            ttl (float, optional): Seconds after which the graph is fully reloaded,
+                to pick up in-place edits made by other processes. If None, never expires.
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.version = 0
+
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._loaded_at = 0.0
+        self._signature: Optional[Tuple] = None
+        self._dirty_nodes: Set[int] = set()
+        self._dirty_edges: Set[int] = set()
+        self._deleted: Set[int] = set()
+
+        # Source of truth, by note ID
+        self._nodes: Dict[int, Dict[str, Any]] = {}
+        self._edge_src = np.zeros(0, dtype=np.int64)
+        self._edge_dst = np.zeros(0, dtype=np.int64)
+        self._edge_weight = np.zeros(0, dtype=np.float64)
+
+        self._build_index()
+
+    # Invalidation
+
+    def invalidate(self, kind: str, note_ids: List[int]) -> None:
+        """
+        Mark notes or relationships as changed; they are re-read on next access.
+
+        Args:
+            kind (str): 'notes', 'deleted' or 'related_notes'
+            note_ids (List[int]): IDs of the affected notes
+        """
+        with self._lock:
+            if kind == "notes":
+                self._dirty_nodes.update(note_ids)
+            elif kind == "deleted":
+                self._deleted.update(note_ids)
+                self._dirty_nodes.difference_update(note_ids)
+            elif kind == "related_notes":
+                self._dirty_edges.update(note_ids)
+
+    def invalidate_all(self) -> None:
+        """
+        Force a full reload on next access.
+        """
+        with self._lock:
+            self._loaded = False
+
+    def refresh(self, db_manager) -> "KnowledgeGraphEngine":
+        """
+        Bring the in-memory graph up to date.
+
+        Reads through the given database manager so relationships it has
+        written but not yet committed are visible.
+
+        Args:
+            db_manager: Database manager instance
+
+        Returns:
+            KnowledgeGraphEngine: self
+        """
+        with self._lock:
+            expired = self.ttl is not None and time.monotonic() - self._loaded_at > self.ttl
+            signature = self._read_signature(db_manager)
+
+            if not self._loaded or expired:
+                self._load_all(db_manager)
+            elif self._dirty_nodes or self._dirty_edges or self._deleted:
+                # The signature moved with the reported writes
+                self._apply_changes(db_manager)
+            elif signature != self._signature:
+                logger.info("Knowledge graph tables changed outside this process, reloading")
+                self._load_all(db_manager)
+
+            self._signature = signature
+            return self
+
+    @staticmethod
+    def _read_signature(db_manager) -> Tuple:
+        """
+        Get a cheap signature of the tables the graph is loaded from, changing when rows are added, removed or replaced.
+        """
+        conn = db_manager.conn
+        return (
+            tuple(conn.execute("SELECT COUNT(*), MAX(id), TOTAL(id) FROM notes").fetchone())
+            + tuple(conn.execute("SELECT COUNT(*), MAX(rowid), TOTAL(similarity) FROM related_notes").fetchone())
+            + tuple(conn.execute("SELECT COUNT(*), MAX(rowid) FROM note_tags").fetchone())
+            + tuple(conn.execute("SELECT COUNT(*), MAX(id) FROM keypoints").fetchone())
+        )
+
+    def _load_all(self, db_manager) -> None:
+        start = time.perf_counter()
+
+        self._nodes = {note["id"]: _make_node(note) for note in db_manager.get_graph_notes()}
+        self._set_edges(db_manager.get_relationships())
+
+        self._dirty_nodes.clear()
+        self._dirty_edges.clear()
+        self._deleted.clear()
+        self._loaded = True
+        self._loaded_at = time.monotonic()
+        self._build_index()
+
+        logger.info(
+            f"Loaded knowledge graph with {len(self._nodes)} nodes and {len(self._edge_src)} edges "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+
+    def _apply_changes(self, db_manager) -> None:
+        for note_id in self._deleted:
+            self._nodes.pop(note_id, None)
+
+        if self._dirty_nodes:
+            dirty = sorted(self._dirty_nodes)
+            found = {note["id"]: note for note in db_manager.get_graph_notes(dirty)}
+            for note_id in dirty:
+                if note_id in found:
+                    self._nodes[note_id] = _make_node(found[note_id])
+                else:
+                    self._nodes.pop(note_id, None)
+
+        changed_sources = self._dirty_edges | self._deleted
+        if changed_sources:
+            keep = ~np.isin(self._edge_src, np.fromiter(changed_sources, dtype=np.int64))
+            reloaded = db_manager.get_relationships(sorted(self._dirty_edges)) if self._dirty_edges else []
+            self._set_edges(
+                list(zip(self._edge_src[keep].tolist(), self._edge_dst[keep].tolist(), self._edge_weight[keep].tolist()))
+                + reloaded
+            )
+
+        logger.debug(
+            f"Refreshed knowledge graph: {len(self._dirty_nodes)} notes, "
+            f"{len(self._dirty_edges)} relationship sources, {len(self._deleted)} deletions"
+        )
+
+        self._dirty_nodes.clear()
+        self._dirty_edges.clear()
+        self._deleted.clear()
+        self._build_index()
+
+    def _set_edges(self, relationships: List[Tuple[int, int, float]]) -> None:
+        if relationships:
+            src, dst, weight = zip(*relationships)
+        else:
+            src, dst, weight = (), (), ()
+        self._edge_src = np.asarray(src, dtype=np.int64)
+        self._edge_dst = np.asarray(dst, dtype=np.int64)
+        self._edge_weight = np.asarray(weight, dtype=np.float64)
+
+    def _build_index(self) -> None:
+        """
+        Rebuild the node tables and CSR arrays from the stored nodes and edges. O(V + E log E).
+        """
+        self.node_ids = np.array(sorted(self._nodes), dtype=np.int64)
+        self.nodes = [self._nodes[note_id] for note_id in self.node_ids.tolist()]
+        self.index = {note_id: i for i, note_id in enumerate(self.node_ids.tolist())}
+        count = len(self.nodes)
+
+        # Most recent first, matching DatabaseManager.search_notes
+        timestamps = [node["timestamp"] for node in self.nodes]
+        self.recency_order = np.array(
+            sorted(range(count), key=lambda i: timestamps[i], reverse=True), dtype=np.int64
+        )
+
+        self.tag_index: Dict[str, Set[int]] = {}
+        for i, node in enumerate(self.nodes):
+            for tag in node["tags"]:
+                self.tag_index.setdefault(tag, set()).add(i)
+
+        self.is_prerequisite = np.array([node["is_prerequisite"] for node in self.nodes], dtype=bool)
+        self.is_advanced = np.array([node["is_advanced"] for node in self.nodes], dtype=bool)
+        dates = np.array([node["date"] for node in self.nodes] or [""], dtype=str)[:count]
+        self._search_text = [
+            (node["title"].lower(), [concept.lower() for concept in node["key_concepts"]])
+            for node in self.nodes
+        ]
+
+        # Map endpoint IDs to indexes, dropping edges to notes that no longer exist
+        src = np.searchsorted(self.node_ids, self._edge_src)
+        dst = np.searchsorted(self.node_ids, self._edge_dst)
+        valid = (src < count) & (dst < count)
+        valid[valid] &= (self.node_ids[src[valid]] == self._edge_src[valid]) & (self.node_ids[dst[valid]] == self._edge_dst[valid])
+        src, dst, weight = src[valid], dst[valid], self._edge_weight[valid]
+
+        # Out-edges grouped by source, most similar first
+        order = np.lexsort((-weight, src))
+        self.edge_src = src[order]
+        self.edge_dst = dst[order]
+        self.edge_weight = weight[order]
+        self.indptr = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.edge_src, minlength=count), out=self.indptr[1:])
+        self.edge_rank = np.arange(len(self.edge_src)) - self.indptr[self.edge_src]
+
+        # In-edges: edge IDs grouped by target
+        self.rev_edges = np.argsort(self.edge_dst, kind="stable")
+        self.rev_indptr = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.edge_dst, minlength=count), out=self.rev_indptr[1:])
+
+        # Relationship types, same rules as the original per-edge checks
+        types = np.full(len(self.edge_src), RELATED, dtype=np.int8)
+        if len(types):
+            prerequisite = self.is_prerequisite[self.edge_src] & self.is_advanced[self.edge_dst]
+            builds_on = ~prerequisite & self.is_prerequisite[self.edge_dst] & self.is_advanced[self.edge_src]
+            types[prerequisite] = PREREQUISITE
+            types[builds_on] = BUILDS_ON
+            types[(types == RELATED) & (dates[self.edge_src] < dates[self.edge_dst])] = PRECEDES
+        self.edge_type = types
+
+        # Plain-list copies for the per-node loops of BFS, where NumPy scalar access is slow
+        self._traversal = {
+            "src": self.edge_src.tolist(),
+            "dst": self.edge_dst.tolist(),
+            "weight": self.edge_weight.tolist(),
+            "type": self.edge_type.tolist(),
+            "indptr": self.indptr.tolist(),
+            "rev_edges": self.rev_edges.tolist(),
+            "rev_indptr": self.rev_indptr.tolist()
+        }
+
+        self.version += 1
+
+    # Queries
+
+    @property
+    def node_count(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.edge_src)
+
+    def get_node(self, note_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get a node by note ID.
+        """
+        i = self.index.get(note_id)
+        return self.nodes[i] if i is not None else None
+
+    def select_nodes(self, max_nodes: Optional[int] = None, tags: Optional[List[str]] = None) -> np.ndarray:
+        """
+        Select node indexes, most recent first.
+
+        Args:
+            max_nodes (int, optional): Maximum number of nodes. If None, selects all.
+            tags (List[str], optional): Only notes that have all of these tags
+
+        Returns:
+            np.ndarray: Node indexes
+        """
+        order = self.recency_order
+        if tags:
+            matching = set.intersection(*(self.tag_index.get(tag, set()) for tag in tags))
+            order = order[np.fromiter((i in matching for i in order.tolist()), dtype=bool, count=len(order))]
+        return order[:max_nodes] if max_nodes is not None else order
+
+    def find_nodes(self, concept: str, candidates: Optional[np.ndarray] = None) -> List[int]:
+        """
+        Find nodes whose title or key concepts contain a concept.
+
+        Args:
+            concept (str): Concept to look for (case-insensitive)
+            candidates (np.ndarray, optional): Node indexes to search. If None, searches all.
+
+        Returns:
+            List[int]: Matching node indexes
+        """
+        concept = concept.lower()
+        indexes = range(len(self.nodes)) if candidates is None else candidates.tolist()
+        return [
+            i for i in indexes
+            if concept in self._search_text[i][0] or any(concept in kc for kc in self._search_text[i][1])
+        ]
+
+    def out_edges(self, i: int) -> range:
+        """
+        Edge IDs leaving node index i, most similar first.
+        """
+        return range(self.indptr[i], self.indptr[i + 1])
+
+    def in_edges(self, i: int) -> np.ndarray:
+        """
+        Edge IDs entering node index i.
+        """
+        return self.rev_edges[self.rev_indptr[i]:self.rev_indptr[i + 1]]
+
+    def edge_dict(self, e: int) -> Dict[str, Any]:
+        """
+        Convert an edge ID to the edge format used by the visualizations.
+        """
+        return {
+            "source": self.nodes[self.edge_src[e]]["id"],
+            "target": self.nodes[self.edge_dst[e]]["id"],
+            "similarity": float(self.edge_weight[e]),
+            "relationship_type": RELATIONSHIP_TYPES[self.edge_type[e]]
+        }
+
+    def extract_graph_data(
+        self,
+        max_nodes: Optional[int] = None,
+        similarity_threshold: float = 0.5,
+        tags: Optional[List[str]] = None,
+        include_reasoning: bool = False,
+        max_edges_per_node: Optional[int] = 5
+    ) -> Dict[str, Any]:
+        """
+        Extract nodes, edges and reasoning paths of a subgraph.
+
+        Args:
+            max_nodes (int, optional): Maximum number of nodes (most recent first). If None, all nodes.
+            similarity_threshold (float): Minimum similarity of included edges
+            tags (List[str], optional): Only notes that have all of these tags
+            include_reasoning (bool): Whether to include reasoning paths
+            max_edges_per_node (int, optional): Only consider each note's most similar
+                relationships. If None, considers all.
+
+        Returns:
+            Dict[str, Any]: Dictionary containing nodes, edges, and reasoning paths
+        """
+        selected = self.select_nodes(max_nodes, tags)
+        mask = np.zeros(len(self.nodes), dtype=bool)
+        mask[selected] = True
+
+        keep = mask[self.edge_src] & mask[self.edge_dst] & (self.edge_weight >= similarity_threshold)
+        if max_edges_per_node is not None:
+            keep &= self.edge_rank < max_edges_per_node
+
+        # Edges in node order, like the per-note extraction they replace
+        position = np.empty(len(self.nodes), dtype=np.int64)
+        position[selected] = np.arange(len(selected))
+        edge_ids = np.flatnonzero(keep)
+        edge_ids = edge_ids[np.argsort(position[self.edge_src[edge_ids]], kind="stable")]
+
+        nodes = [
+            {key: value for key, value in self.nodes[i].items() if key != "timestamp"}
+            for i in selected.tolist()
+        ]
+        edges = [self.edge_dict(e) for e in edge_ids.tolist()]
+
+        reasoning_paths = self.reasoning_paths(edge_ids) if include_reasoning else []
+
+        return {"nodes": nodes, "edges": edges, "reasoning_paths": reasoning_paths}
+
+    def reasoning_paths(self, edge_ids: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Generate reasoning paths for a set of edges in O(E).
+
+        Prerequisite edges explain the prerequisite; any edge between notes
+        sharing key concepts gets a causal path.
+
+        Args:
+            edge_ids (np.ndarray): Edge IDs
+
+        Returns:
+            List[Dict[str, Any]]: Prerequisite paths followed by causal paths
+        """
+        prerequisite_paths = []
+        causal_paths = []
+        seen = set()
+
+        for e in edge_ids.tolist():
+            source = self.nodes[self.edge_src[e]]
+            target = self.nodes[self.edge_dst[e]]
+
+            if self.edge_type[e] == PREREQUISITE:
+                prerequisite_paths.append(build_reasoning_path(source, target, "prerequisite"))
+
+            pair = (source["id"], target["id"])
+            if pair not in seen:
+                seen.add(pair)
+                path = build_reasoning_path(source, target, "causal")
+                if path:
+                    causal_paths.append(path)
+
+        return prerequisite_paths + causal_paths
+
+    def shortest_path(
+        self,
+        source_id: int,
+        target_id: int,
+        similarity_threshold: float = 0.0,
+        directed: bool = False
+    ) -> Optional[List[int]]:
+        """
+        Find the shortest path between two notes with a BFS. O(V + E).
+
+        Args:
+            source_id (int): Start note ID
+            target_id (int): End note ID
+            similarity_threshold (float): Minimum similarity of traversed edges
+            directed (bool): Whether to follow relationships only in their stored direction
+
+        Returns:
+            Optional[List[int]]: Note IDs along the path, or None if unreachable
+        """
+        start, goal = self.index.get(source_id), self.index.get(target_id)
+        if start is None or goal is None:
+            return None
+
+        t = self._traversal
+        src, dst, weight = t["src"], t["dst"], t["weight"]
+        indptr, rev_edges, rev_indptr = t["indptr"], t["rev_edges"], t["rev_indptr"]
+
+        parent = [-1] * len(self.nodes)
+        parent[start] = start
+        queue = deque([start])
+
+        while queue:
+            i = queue.popleft()
+            if i == goal:
+                path = [i]
+                while path[-1] != start:
+                    path.append(parent[path[-1]])
+                return [self.nodes[j]["id"] for j in reversed(path)]
+
+            neighbours = [dst[e] for e in range(indptr[i], indptr[i + 1]) if weight[e] >= similarity_threshold]
+            if not directed:
+                neighbours += [
+                    src[e] for e in rev_edges[rev_indptr[i]:rev_indptr[i + 1]] if weight[e] >= similarity_threshold
+                ]
+
+            for j in neighbours:
+                if parent[j] < 0:
+                    parent[j] = i
+                    queue.append(j)
+
+        return None
+
+    def prerequisite_chain(
+        self,
+        note_id: int,
+        similarity_threshold: float = 0.0,
+        max_depth: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find all direct and transitive prerequisites of a note with a BFS. O(V + E).
+
+        An edge A -> B is a prerequisite of B when its type is 'prerequisite',
+        and B is a prerequisite of A when its type is 'builds_on'.
+
+        Args:
+            note_id (int): Note ID
+            similarity_threshold (float): Minimum similarity of traversed edges
+            max_depth (int, optional): Maximum chain length. If None, unbounded.
+
+        Returns:
+            List[Dict[str, Any]]: Prerequisites nearest first, with 'id', 'title',
+                'depth' and 'for_id' (the note it is a prerequisite of)
+        """
+        start = self.index.get(note_id)
+        if start is None:
+            return []
+
+        t = self._traversal
+        src, dst, weight, types = t["src"], t["dst"], t["weight"], t["type"]
+        indptr, rev_edges, rev_indptr = t["indptr"], t["rev_edges"], t["rev_indptr"]
+
+        depth = [-1] * len(self.nodes)
+        depth[start] = 0
+        queue = deque([start])
+        chain = []
+
+        while queue:
+            i = queue.popleft()
+            if max_depth is not None and depth[i] >= max_depth:
+                continue
+
+            prerequisites = [
+                src[e] for e in rev_edges[rev_indptr[i]:rev_indptr[i + 1]]
+                if types[e] == PREREQUISITE and weight[e] >= similarity_threshold
+            ] + [
+                dst[e] for e in range(indptr[i], indptr[i + 1])
+                if types[e] == BUILDS_ON and weight[e] >= similarity_threshold
+            ]
+
+            for j in prerequisites:
+                if depth[j] < 0:
+                    depth[j] = depth[i] + 1
+                    queue.append(j)
+                    chain.append({
+                        "id": self.nodes[j]["id"],
+                        "title": self.nodes[j]["title"],
+                        "depth": depth[j],
+                        "for_id": self.nodes[i]["id"]
+                    })
+
+        return chain
+
+# Seconds after which a shared engine is fully reloaded, bounding how long in-place edits
+# made by other processes go unseen
+DEFAULT_TTL = 300.0
+
+# Engines by absolute database path
+_engines: Dict[str, KnowledgeGraphEngine] = {}
+_engines_lock = threading.Lock()
+
+def get_graph_engine(db_manager, ttl: Optional[float] = DEFAULT_TTL) -> KnowledgeGraphEngine:
+    """
+    Get the up-to-date cached graph engine for a database.
+
+    Args:
+        db_manager: Database manager instance
+        ttl (float, optional): Seconds after which the graph is fully reloaded,
+            used when the engine is first created
+
+    Returns:
+        KnowledgeGraphEngine: Engine, refreshed with any pending changes
+    """
+    # Registered on the manager's class so it works however the package was imported
+    type(db_manager).add_change_listener(_on_database_change)
+    
+    db_path = os.path.abspath(db_manager.db_path)
+    with _engines_lock:
+        engine = _engines.get(db_path)
+        if engine is None:
+            engine = KnowledgeGraphEngine(db_path, ttl=ttl)
+            _engines[db_path] = engine
+    return engine.refresh(db_manager)
+
+def _on_database_change(db_path: str, kind: str, note_ids: List[int]) -> None:
+    engine = _engines.get(os.path.abspath(db_path))
+    if engine is not None:
+        engine.invalidate(kind, note_ids)
@@ -0,0 +1,385 @@
+"""
+Graph layout module for AI Note System.
+Computes knowledge graph positions server-side with a multilevel force-directed
+layout and groups notes into communities for level-of-detail rendering.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from ..processing.topic_clustering import label_propagation
+
+# Setup logging
+logger = logging.getLogger("ai_note_system.visualization.graph_layout")
+
+DEFAULT_ITERATIONS = 50
+
+# Above this many nodes, repulsion is estimated from a random sample of nodes
+EXACT_REPULSION_LIMIT = 1024
+REPULSION_SAMPLE_SIZE = 512
+
+# Rows of the pairwise repulsion matrix computed at once
+BLOCK_SIZE = 2048
+
+# Layouts by (graph version, content digest), most recently used last
+_layout_cache: "OrderedDict[Tuple[Any, str], Dict[str, Any]]" = OrderedDict()
+_layout_cache_lock = threading.Lock()
+LAYOUT_CACHE_SIZE = 8
+
+def force_directed_layout(
+    node_count: int,
+    src: np.ndarray,
+    dst: np.ndarray,
+    weights: Optional[np.ndarray] = None,
+    iterations: int = DEFAULT_ITERATIONS,
+    initial: Optional[np.ndarray] = None,
+    temperature: Optional[float] = None,
+    masses: Optional[np.ndarray] = None,
+    seed: int = 0
+) -> np.ndarray:
+    """
+    Compute 2-D positions with the Fruchterman-Reingold algorithm.
+
+    Attraction is computed per edge and repulsion over node pairs. Large graphs
+    estimate repulsion against a random sample of nodes each iteration, so an
+    iteration costs O(n * REPULSION_SAMPLE_SIZE + E) instead of O(n^2).
+
+    Args:
+        node_count (int): Number of nodes
+        src (np.ndarray): Source node index of each edge
+        dst (np.ndarray): Target node index of each edge
+        weights (np.ndarray, optional): Edge weights scaling attraction (default 1)
+        iterations (int): Number of iterations
+        initial (np.ndarray, optional): Initial positions, shape (n, 2)
+        temperature (float, optional): Initial maximum displacement per iteration
+        masses (np.ndarray, optional): Node masses scaling the repulsion they exert
+        seed (int): Random seed
+
+    Returns:
+        np.ndarray: Positions, shape (n, 2), with an ideal edge length of about 1
+    """
+    rng = np.random.default_rng(seed)
+    n = node_count
+    if n == 0:
+        return np.zeros((0, 2), dtype=np.float64)
+
+    spread = np.sqrt(n)
+    pos = rng.random((n, 2)) * spread if initial is None else np.array(initial, dtype=np.float64)
+    if n == 1:
+        return pos - pos.mean(axis=0)
+
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    weights = np.ones(len(src)) if weights is None else np.asarray(weights, dtype=np.float64)
+    masses = np.ones(n) if masses is None else np.asarray(masses, dtype=np.float64)
+
+    t0 = spread / 10.0 if temperature is None else temperature
+    exact = n <= EXACT_REPULSION_LIMIT
+
+    for iteration in range(iterations):
+        displacement = np.zeros((n, 2))
+
+        # Repulsion k^2 / d with k = 1
+        if exact:
+            others, other_masses, scale = pos, masses, 1.0
+        else:
+            sample = rng.choice(n, REPULSION_SAMPLE_SIZE, replace=False)
+            others, other_masses, scale = pos[sample], masses[sample], n / REPULSION_SAMPLE_SIZE
+
+        # sum_j m_j (p_i - p_j) / d_ij^2 as matrix products, with d^2 expanded
+        other_sq = np.einsum("ij,ij->i", others, others)
+        for start in range(0, n, BLOCK_SIZE):
+            block = pos[start:start + BLOCK_SIZE]
+            distance_sq = np.einsum("ij,ij->i", block, block)[:, None] + other_sq[None, :] - 2.0 * (block @ others.T)
+            strength = other_masses[None, :] / np.maximum(distance_sq, 1e-4)
+            displacement[start:start + BLOCK_SIZE] += scale * (
+                block * strength.sum(axis=1)[:, None] - strength @ others
+            )
+
+        # Attraction d^2 / k along edges
+        if len(src):
+            delta = pos[src] - pos[dst]
+            pull = delta * (np.linalg.norm(delta, axis=1) * weights)[:, None]
+            for axis in range(2):
+                displacement[:, axis] -= np.bincount(src, weights=pull[:, axis], minlength=n)
+                displacement[:, axis] += np.bincount(dst, weights=pull[:, axis], minlength=n)
+
+        # Weak gravity keeps disconnected components together
+        displacement -= 0.05 * (pos - pos.mean(axis=0))
+
+        # Limit displacement by a linearly cooling temperature
+        t = t0 * (1.0 - iteration / iterations)
+        length = np.linalg.norm(displacement, axis=1) + 1e-9
+        pos += displacement * (np.minimum(length, t) / length)[:, None]
+
+    return pos - pos.mean(axis=0)
+
+def compute_layout(
+    node_count: int,
+    src: np.ndarray,
+    dst: np.ndarray,
+    weights: Optional[np.ndarray] = None,
+    iterations: int = DEFAULT_ITERATIONS,
+    previous: Optional[np.ndarray] = None,
+    communities: Optional[np.ndarray] = None,
+    seed: int = 0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute a multilevel layout and the communities it is built on.
+
+    The graph is coarsened into communities, the community graph is laid out
+    first, and each note starts next to its community before a shorter
+    refinement pass over the full graph. When positions from a previous layout
+    are given (NaN for new nodes), only the refinement pass runs.
+
+    Args:
+        node_count (int): Number of nodes
+        src (np.ndarray): Source node index of each edge
+        dst (np.ndarray): Target node index of each edge
+        weights (np.ndarray, optional): Edge weights
+        iterations (int): Number of iterations of the coarse layout
+        previous (np.ndarray, optional): Previous positions, shape (n, 2)
+        communities (np.ndarray, optional): Community of each node, numbered from 0.
+            If None, communities are detected by label propagation.
+        seed (int): Random seed
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Positions, shape (n, 2), scaled to a median
+        edge length of 1, and community of each node
+    """
+    rng = np.random.default_rng(seed)
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    weights = np.ones(len(src)) if weights is None else np.asarray(weights, dtype=np.float64)
+
+    if communities is None:
+        communities = label_propagation(node_count, src, dst, weights, seed=seed)
+    community_count = int(communities.max()) + 1 if node_count else 0
+    sizes = np.bincount(communities, minlength=community_count).astype(np.float64)
+
+    if previous is not None:
+        initial = np.array(previous, dtype=np.float64)
+        known = ~np.isnan(initial).any(axis=1)
+
+        # New nodes start at the centre of their community's known nodes
+        centres = np.zeros((community_count, 2))
+        counts = np.bincount(communities[known], minlength=community_count)
+        for axis in range(2):
+            centres[:, axis] = np.bincount(communities[known], weights=initial[known, axis], minlength=community_count)
+        centres /= np.maximum(counts, 1)[:, None]
+        initial[~known] = centres[communities[~known]] + rng.normal(scale=1.0, size=(int((~known).sum()), 2))
+
+        positions = force_directed_layout(
+            node_count, src, dst, weights,
+            iterations=max(5, iterations // 5),
+            initial=initial,
+            temperature=1.0,
+            seed=seed
+        )
+    elif 1 < community_count < node_count:
+        # Coarse level: one super-node per community, weighted by total edge weight
+        coarse_src, coarse_dst = communities[src], communities[dst]
+        between = coarse_src != coarse_dst
+        pairs = np.stack([
+            np.minimum(coarse_src[between], coarse_dst[between]),
+            np.maximum(coarse_src[between], coarse_dst[between])
+        ], axis=1)
+        pairs, inverse = np.unique(pairs, axis=0, return_inverse=True)
+        pair_weights = np.bincount(inverse.ravel(), weights=weights[between], minlength=len(pairs))
+
+        coarse = force_directed_layout(
+            community_count, pairs[:, 0], pairs[:, 1], pair_weights / pair_weights.max() if len(pairs) else None,
+            iterations=iterations,
+            masses=np.sqrt(sizes),
+            seed=seed
+        )
+
+        # Spread communities so their members fit, then scatter members around the centre
+        coarse *= np.sqrt(sizes.mean()) * 2.0
+        initial = coarse[communities] + rng.normal(size=(node_count, 2)) * np.sqrt(sizes[communities])[:, None] * 0.5
+
+        positions = force_directed_layout(
+            node_count, src, dst, weights,
+            iterations=max(10, iterations // 2),
+            initial=initial,
+            temperature=np.sqrt(sizes.max()),
+            seed=seed
+        )
+    else:
+        positions = force_directed_layout(node_count, src, dst, weights, iterations=iterations, seed=seed)
+
+    # Scale so that a typical edge is one unit long, whatever the graph size
+    if len(src):
+        edge_length = np.median(np.linalg.norm(positions[src] - positions[dst], axis=1))
+        if edge_length > 0:
+            positions /= edge_length
+
+    return positions, communities
+
+def _graph_digest(node_ids: List[int], edges: List[Dict[str, Any]], clusters: Optional[Dict[int, int]] = None) -> str:
+    digest = hashlib.sha1(np.asarray(node_ids, dtype=np.int64).tobytes())
+    if clusters is not None:
+        digest.update(np.asarray([clusters.get(node_id, -1) for node_id in node_ids], dtype=np.int64).tobytes())
+    digest.update(np.asarray(
+        [(edge["source"], edge["target"]) for edge in edges], dtype=np.int64
+    ).tobytes())
+    digest.update(np.asarray([edge["similarity"] for edge in edges], dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+def layout_graph_data(
+    graph_data: Dict[str, Any],
+    iterations: int = DEFAULT_ITERATIONS,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Add layout positions and communities to graph data.
+
+    Each node gets "x", "y" and "community" keys. Communities come from the
+    "clusters" mapping of the graph data (note ID to stored topic cluster) when
+    present, and are detected otherwise. Layouts are cached per graph
+    version, so regenerating an unchanged graph skips the layout entirely, and
+    a graph that changed since the previous layout is refined from the previous
+    positions instead of being laid out from scratch.
+
+    Args:
+        graph_data (Dict[str, Any]): Dictionary containing nodes and edges, and
+            optionally clusters and the graph_version of the engine it was extracted from
+        iterations (int): Number of layout iterations
+        seed (int): Random seed
+
+    Returns:
+        Dict[str, Any]: The graph data, with "community_count" set
+    """
+    nodes = graph_data["nodes"]
+    edges = graph_data["edges"]
+    node_ids = [node["id"] for node in nodes]
+    clusters = graph_data.get("clusters")
+    key = (graph_data.get("graph_version"), _graph_digest(node_ids, edges, clusters))
+
+    with _layout_cache_lock:
+        cached = _layout_cache.get(key)
+        if cached is not None:
+            _layout_cache.move_to_end(key)
+        previous_layout = next(reversed(_layout_cache.values()), None) if _layout_cache else None
+
+    if cached is None:
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        pairs = [
+            (index[edge["source"]], index[edge["target"]], edge["similarity"])
+            for edge in edges
+            if edge["source"] in index and edge["target"] in index
+        ]
+        src = np.asarray([p[0] for p in pairs], dtype=np.int64)
+        dst = np.asarray([p[1] for p in pairs], dtype=np.int64)
+        weights = np.asarray([p[2] for p in pairs], dtype=np.float64)
+
+        previous = None
+        if previous_layout is not None:
+            previous = np.full((len(node_ids), 2), np.nan)
+            overlap = 0
+            for i, node_id in enumerate(node_ids):
+                position = previous_layout["positions"].get(node_id)
+                if position is not None:
+                    previous[i] = position
+                    overlap += 1
+            if overlap < len(node_ids) / 2:
+                previous = None
+
+        communities = None
+        if clusters is not None:
+            # Notes without a stored cluster get one of their own
+            labels = [clusters.get(node_id) for node_id in node_ids]
+            unclustered = iter(range(-1, -len(node_ids) - 1, -1))
+            labels = [next(unclustered) if label is None else label for label in labels]
+            communities = np.unique(np.asarray(labels, dtype=np.int64), return_inverse=True)[1]
+
+        positions, communities = compute_layout(
+            len(node_ids), src, dst, weights,
+            iterations=iterations,
+            previous=previous,
+            communities=communities,
+            seed=seed
+        )
+
+        cached = {
+            "positions": {node_id: (float(x), float(y)) for node_id, (x, y) in zip(node_ids, positions.tolist())},
+            "communities": dict(zip(node_ids, communities.tolist())),
+            "community_count": int(communities.max()) + 1 if len(node_ids) else 0
+        }
+
+        with _layout_cache_lock:
+            _layout_cache[key] = cached
+            while len(_layout_cache) > LAYOUT_CACHE_SIZE:
+                _layout_cache.popitem(last=False)
+
+        logger.info(f"Computed layout for {len(node_ids)} nodes in {cached['community_count']} communities")
+
+    for node in nodes:
+        node["x"], node["y"] = cached["positions"][node["id"]]
+        node["community"] = cached["communities"][node["id"]]
+    graph_data["community_count"] = cached["community_count"]
+
+    return graph_data
+
+def summarize_communities(graph_data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Summarize the communities of laid-out graph data as super-nodes and super-edges.
+
+    Args:
+        graph_data (Dict[str, Any]): Graph data processed by layout_graph_data
+
+    Returns:
+        Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]: Super-nodes (id, label,
+        size, x, y, radius) and super-edges (source, target, count, similarity)
+    """
+    members: Dict[int, List[Dict[str, Any]]] = {}
+    for node in graph_data["nodes"]:
+        members.setdefault(node["community"], []).append(node)
+
+    degree = Counter()
+    for edge in graph_data["edges"]:
+        degree[edge["source"]] += 1
+        degree[edge["target"]] += 1
+
+    super_nodes = []
+    for community, community_nodes in sorted(members.items()):
+        xy = np.array([(node["x"], node["y"]) for node in community_nodes])
+        centre = xy.mean(axis=0)
+
+        # Label by the most common tag, or by the best connected note
+        tags = Counter(tag for node in community_nodes for tag in node.get("tags", []))
+        if tags and len(community_nodes) > 1:
+            label = tags.most_common(1)[0][0]
+        else:
+            label = max(community_nodes, key=lambda node: degree[node["id"]])["title"]
+
+        super_nodes.append({
+            "id": community,
+            "label": label,
+            "size": len(community_nodes),
+            "x": float(centre[0]),
+            "y": float(centre[1]),
+            "radius": float(np.linalg.norm(xy - centre, axis=1).max())
+        })
+
+    communities = {node["id"]: node["community"] for node in graph_data["nodes"]}
+    totals: Dict[Tuple[int, int], List[float]] = {}
+    for edge in graph_data["edges"]:
+        source, target = communities.get(edge["source"]), communities.get(edge["target"])
+        if source is None or target is None or source == target:
+            continue
+        total = totals.setdefault((min(source, target), max(source, target)), [0, 0.0])
+        total[0] += 1
+        total[1] += edge["similarity"]
+
+    super_edges = [
+        {"source": source, "target": target, "count": count, "similarity": similarity / count}
+        for (source, target), (count, similarity) in sorted(totals.items())
+    ]
+
+    return super_nodes, super_edges
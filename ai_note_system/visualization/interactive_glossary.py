@@ -8,9 +8,12 @@ import logging
 import json
 from typing import Dict, Any, List, Optional, Union, Tuple
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 import re
 import html
 
+import numpy as np
+
 # Setup logging
 logger = logging.getLogger("ai_note_system.visualization.interactive_glossary")
 
@@ -18,6 +21,126 @@ logger = logging.getLogger("ai_note_system.visualization.interactive_glossary")
 from ..database.db_manager import DatabaseManager
 from ..api.llm_interface import get_llm_interface
 from ..api.embedding_interface import get_embedding_interface
+from ..processing.term_matcher import TermMatcher, init_worker, match_notes
+from ..embeddings.vector_index import VectorIndex
+from ..embeddings.embedding_sync import sync_embeddings
+
+# Term matchers per database, with the glossary signature they were built for
+_matcher_cache: Dict[str, Tuple[Tuple, TermMatcher]] = {}
+
+class TermEmbeddingCache:
+    """
+    Normalized term embeddings of one glossary and embedding model, one matrix per category.
+    
+    Embeddings are persisted in glossary_term_embeddings with a hash of the embedded
+    text; syncing only embeds terms that are new or whose term or definition changed.
+    """
+    
+    def __init__(self, model_name: str):
+        """
+        Initialize an empty cache.
+        
+        Args:
+            model_name (str): Name of the embedding model
+        """
+        self.model_name = model_name
+        self.signature: Optional[Tuple] = None
+        self.indexes: Dict[Optional[str], VectorIndex] = {}
+        self.categories: Dict[int, Optional[str]] = {}
+        self.hashes: Dict[int, str] = {}
+    
+    def _place(self, term_id: int, category: Optional[str], vector: np.ndarray) -> None:
+        old_category = self.categories.get(term_id, category)
+        if old_category != category and old_category in self.indexes:
+            self.indexes[old_category].remove(term_id)
+        
+        self.indexes.setdefault(category, VectorIndex()).add(term_id, vector)
+        self.categories[term_id] = category
+    
+    def sync(self, db_manager: DatabaseManager, embedder, batch_size: int = 256) -> int:
+        """
+        Bring the cache up to date with the glossary tables.
+        
+        Args:
+            db_manager (DatabaseManager): Database manager of the glossary
+            embedder: Embedding interface used for new or changed terms
+            batch_size (int): Texts per embedding request
+        
+        Returns:
+            int: Number of terms embedded
+        """
+        conn = db_manager.conn
+        signature = tuple(conn.execute('''
+        SELECT COUNT(*), MAX(id), TOTAL(id), MAX(updated_at) FROM glossary_terms
+        ''').fetchone())
+        
+        if signature == self.signature:
+            return 0
+        
+        rows = conn.execute('''
+        SELECT t.id, t.term, t.definition, t.category, e.content_hash
+        FROM glossary_terms t
+        LEFT JOIN glossary_term_embeddings e ON e.term_id = t.id AND e.model_name = ?
+        ''', (self.model_name,)).fetchall()
+        
+        categories = {row[0]: row[3] for row in rows}
+        
+        def place(term_ids: List[int], vectors: np.ndarray) -> None:
+            for term_id, vector in zip(term_ids, vectors):
+                self._place(term_id, categories[term_id], vector)
+        
+        def forget(term_id: int) -> None:
+            self.indexes[self.categories.pop(term_id)].remove(term_id)
+        
+        embedded = sync_embeddings(
+            conn, embedder, self.model_name, "glossary_term_embeddings", "term_id",
+            [(term_id, f"{term} {definition}", stored_hash) for term_id, term, definition, _, stored_hash in rows],
+            self.hashes, place, forget, batch_size
+        )
+        
+        # Move unchanged terms whose category changed
+        for term_id, category in categories.items():
+            if term_id in self.categories and self.categories[term_id] != category:
+                self._place(term_id, category, self.indexes[self.categories[term_id]].get(term_id))
+        
+        self.signature = signature
+        if embedded:
+            logger.info(f"Embedded {embedded} new or changed glossary terms")
+        
+        return embedded
+    
+    def search(
+        self,
+        vector: Union[np.ndarray, List[float]],
+        category: Optional[str] = None,
+        k: int = 10,
+        threshold: Optional[float] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Find the terms most similar to a query embedding.
+        
+        Args:
+            vector (np.ndarray): Query embedding
+            category (str, optional): Only search this category
+            k (int): Maximum number of results
+            threshold (float, optional): Minimum cosine similarity
+        
+        Returns:
+            List[Tuple[int, float]]: (term_id, similarity) pairs, most similar first
+        """
+        if category is not None:
+            index = self.indexes.get(category)
+            return index.search(vector, k, threshold) if index else []
+        
+        results = []
+        for index in self.indexes.values():
+            results.extend(index.search(vector, k, threshold))
+        
+        results.sort(key=lambda result: result[1], reverse=True)
+        return results[:k]
+
+# Term embeddings per (database, embedding model)
+_embedding_cache: Dict[Tuple[str, str], TermEmbeddingCache] = {}
 
 class InteractiveGlossary:
     """
@@ -50,6 +173,8 @@ class InteractiveGlossary:
         
         # Initialize embedding interface for semantic search
         self.embedder = get_embedding_interface(embedding_provider)
+        model = getattr(self.embedder, "model", None)
+        self.embedding_model = f"{embedding_provider}:{model}" if isinstance(model, str) else embedding_provider
         
         # Set output directory
         self.output_dir = output_dir
@@ -116,6 +241,23 @@ class InteractiveGlossary:
             )
             ''')
             
+            self.db_manager.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_term_references_note ON term_references (note_id)
+            ''')
+            
+            # Create glossary_term_embeddings table if it doesn't exist
+            self.db_manager.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS glossary_term_embeddings (
+                term_id INTEGER NOT NULL,
+                model_name TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (term_id, model_name),
+                FOREIGN KEY (term_id) REFERENCES glossary_terms (id) ON DELETE CASCADE
+            )
+            ''')
+            
             # Create term_relationships table if it doesn't exist
             self.db_manager.cursor.execute('''
             CREATE TABLE IF NOT EXISTS term_relationships (
@@ -542,6 +684,78 @@ class InteractiveGlossary:
             logger.error(f"Error getting term with ID {term_id}: {e}")
             return None
     
+    def get_terms_by_ids(self, term_ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        Get many terms with their examples, diagrams, related terms and references.
+        
+        Uses one query per table instead of get_term_by_id's queries per term.
+        
+        Args:
+            term_ids (List[int]): IDs of the terms
+            
+        Returns:
+            List[Dict[str, Any]]: Term data in the order of term_ids, skipping unknown IDs
+        """
+        if not self.db_manager:
+            logger.error("Database manager is required to get terms by ID")
+            return []
+        
+        try:
+            terms = {}
+            conn = self.db_manager.conn
+            
+            for i in range(0, len(term_ids), 500):
+                chunk = list(term_ids[i:i + 500])
+                placeholders = ", ".join("?" * len(chunk))
+                
+                for row in conn.execute(f"SELECT * FROM glossary_terms WHERE id IN ({placeholders})", chunk):
+                    term_data = dict(row)
+                    term_data.update({"examples": [], "diagrams": [], "related_terms": [], "references": []})
+                    terms[term_data["id"]] = term_data
+                
+                for row in conn.execute(f"SELECT * FROM term_examples WHERE term_id IN ({placeholders})", chunk):
+                    terms[row["term_id"]]["examples"].append({
+                        "id": row["id"],
+                        "text": row["example_text"],
+                        "source": row["source"]
+                    })
+                
+                for row in conn.execute(f"SELECT * FROM term_diagrams WHERE term_id IN ({placeholders})", chunk):
+                    terms[row["term_id"]]["diagrams"].append({
+                        "id": row["id"],
+                        "path": row["diagram_path"],
+                        "type": row["diagram_type"],
+                        "caption": row["caption"]
+                    })
+                
+                for row in conn.execute(f'''
+                SELECT r.*, t.term
+                FROM term_relationships r
+                JOIN glossary_terms t ON r.term2_id = t.id
+                WHERE r.term1_id IN ({placeholders})
+                ''', chunk):
+                    terms[row["term1_id"]]["related_terms"].append({
+                        "id": row["id"],
+                        "term": row["term"],
+                        "term_id": row["term2_id"],
+                        "relationship_type": row["relationship_type"],
+                        "description": row["description"]
+                    })
+                
+                for row in conn.execute(f"SELECT * FROM term_references WHERE term_id IN ({placeholders})", chunk):
+                    terms[row["term_id"]]["references"].append({
+                        "id": row["id"],
+                        "note_id": row["note_id"],
+                        "context": row["context"],
+                        "location": row["location"]
+                    })
+            
+            return [terms[term_id] for term_id in term_ids if term_id in terms]
+            
+        except Exception as e:
+            logger.error(f"Error getting terms by ID: {e}")
+            return []
+    
     def _save_to_file(self, term_data: Dict[str, Any]) -> str:
         """
         Save term data to file.
@@ -597,53 +811,21 @@ class InteractiveGlossary:
         
         try:
             if semantic_search and self.embedder:
-                # Get all terms
-                self.db_manager.cursor.execute('''
-                SELECT id, term, definition, category FROM glossary_terms
-                ''')
-                
-                all_terms = []
-                for row in self.db_manager.cursor.fetchall():
-                    all_terms.append(dict(row))
-                
-                # Generate query embedding
-                query_embedding = self.embedder.get_embedding(query)
-                
-                # Generate embeddings for terms and definitions
-                results_with_scores = []
-                for term_data in all_terms:
-                    # Create text to embed (term + definition)
-                    text = f"{term_data['term']} {term_data['definition']}"
-                    
-                    # Filter by category if specified
-                    if category and term_data.get("category") != category:
-                        continue
-                    
-                    # Get embedding
-                    embedding = self.embedder.get_embedding(text)
-                    
-                    # Calculate similarity
-                    similarity = self.embedder.calculate_similarity(query_embedding, embedding)
-                    
-                    # Add to results if similarity is above threshold
-                    if similarity > 0.7:  # Adjust threshold as needed
-                        results_with_scores.append((term_data, similarity))
-                
-                # Sort by similarity (highest first)
-                results_with_scores.sort(key=lambda x: x[1], reverse=True)
+                # Embed only new or changed terms, then one matrix product per category
+                cache = self.get_term_embeddings()
+                query_embedding = self.embedder.get_embeddings(query)
                 
-                # Get top results
-                top_results = [item[0] for item in results_with_scores[:limit]]
+                results = cache.search(query_embedding, category=category, k=limit, threshold=0.7)
                 
-                # Fetch full data for each term
-                return [self.get_term_by_id(term["id"]) for term in top_results if term["id"]]
+                # Fetch full data for all results at once
+                return self.get_terms_by_ids([term_id for term_id, _ in results])
             else:
                 # Use simple text search
                 query_pattern = f"%{query}%"
                 
                 # Build query
                 sql_query = '''
-                SELECT id FROM glossary_terms 
+                SELECT id FROM glossary_terms
                 WHERE (term LIKE ? OR definition LIKE ?)
                 '''
                 params = [query_pattern, query_pattern]
@@ -658,19 +840,28 @@ class InteractiveGlossary:
                 # Execute query
                 self.db_manager.cursor.execute(sql_query, params)
                 
-                # Fetch results
-                results = []
-                for row in self.db_manager.cursor.fetchall():
-                    term_data = self.get_term_by_id(row["id"])
-                    if term_data:
-                        results.append(term_data)
-                
-                return results
-                
+                # Fetch full data for all results at once
+                return self.get_terms_by_ids([row["id"] for row in self.db_manager.cursor.fetchall()])
+        
         except Exception as e:
             logger.error(f"Error searching terms: {e}")
             return []
     
+    def get_term_embeddings(self) -> TermEmbeddingCache:
+        """
+        Get the term embeddings of the glossary, embedding terms added or changed since the last call.
+        
+        Returns:
+            TermEmbeddingCache: Up-to-date term embeddings
+        """
+        cache_key = (os.path.abspath(self.db_manager.db_path), self.embedding_model)
+        cache = _embedding_cache.get(cache_key)
+        if cache is None:
+            cache = _embedding_cache[cache_key] = TermEmbeddingCache(self.embedding_model)
+        
+        cache.sync(self.db_manager, self.embedder)
+        return cache
+
     def add_note_reference(
         self,
         term_id: int,
@@ -729,6 +920,68 @@ class InteractiveGlossary:
             logger.error(f"Error adding note reference: {e}")
             return False
     
+    def _glossary_signature(self) -> Tuple:
+        """
+        Get a cheap signature of the set of glossary terms, changing when terms are added or removed.
+        """
+        row = self.db_manager.conn.execute('''
+        SELECT COUNT(*), MAX(id), TOTAL(id) FROM glossary_terms
+        ''').fetchone()
+        return tuple(row)
+    
+    def _load_terms(self) -> List[Tuple[int, str]]:
+        return [(row["id"], row["term"]) for row in self.db_manager.conn.execute("SELECT id, term FROM glossary_terms")]
+    
+    def get_term_matcher(self) -> TermMatcher:
+        """
+        Get the term matcher for the glossary, rebuilding it only if terms were added or removed.
+        
+        Returns:
+            TermMatcher: Matcher over all glossary terms
+        """
+        cache_key = os.path.abspath(self.db_manager.db_path)
+        signature = self._glossary_signature()
+        
+        cached = _matcher_cache.get(cache_key)
+        if cached and cached[0] == signature:
+            return cached[1]
+        
+        matcher = TermMatcher(self._load_terms())
+        _matcher_cache[cache_key] = (signature, matcher)
+        logger.debug(f"Built term matcher for {len(matcher)} glossary terms")
+        
+        return matcher
+    
+    def _replace_note_references(self, note_ids: List[int], rows: List[Tuple[int, int, str, str]]) -> None:
+        """
+        Replace the scanned references of notes in one transaction.
+        
+        References added by hand with add_note_reference keep their own locations and are not removed.
+        
+        Args:
+            note_ids (List[int]): IDs of the scanned notes
+            rows (List[Tuple[int, int, str, str]]): (term_id, note_id, context, location) rows
+        """
+        cursor = self.db_manager.cursor
+        try:
+            for i in range(0, len(note_ids), 500):
+                chunk = note_ids[i:i + 500]
+                cursor.execute(f'''
+                DELETE FROM term_references
+                WHERE note_id IN ({", ".join("?" * len(chunk))}) AND location LIKE 'position:%'
+                ''', chunk)
+            
+            cursor.executemany('''
+            INSERT INTO term_references (term_id, note_id, context, location)
+            VALUES (?, ?, ?, ?)
+            ''', rows)
+            
+            self.db_manager.conn.commit()
+        
+        except Exception:
+            self.db_manager.conn.rollback()
+            raise
+    
     def scan_note_for_terms(
         self,
         note_id: int,
@@ -737,10 +990,12 @@ class InteractiveGlossary:
         """
         Scan a note for terms in the glossary and add references.
         
+        Rescanning a note replaces the references found by its previous scan.
+        
         Args:
             note_id (int): ID of the note
             note_text (str, optional): Text of the note (if not provided, will be fetched from database)
-            
+        
         Returns:
             List[Dict[str, Any]]: Terms found in the note with their references
         """
@@ -749,65 +1004,92 @@ class InteractiveGlossary:
             return []
         
         try:
-            # Get note text if not provided
-            if not note_text:
-                self.db_manager.cursor.execute('''
-                SELECT text FROM notes WHERE id = ?
-                ''', (note_id,))
-                
-                row = self.db_manager.cursor.fetchone()
-                if not row:
-                    logger.error(f"Note with ID {note_id} not found")
-                    return []
-                
-                note_text = row["text"]
-            
-            # Get all terms
+            # Get note text, checking that the note exists
             self.db_manager.cursor.execute('''
-            SELECT id, term FROM glossary_terms
-            ''')
+            SELECT text FROM notes WHERE id = ?
+            ''', (note_id,))
+            
+            row = self.db_manager.cursor.fetchone()
+            if not row:
+                logger.error(f"Note with ID {note_id} not found")
+                return []
             
-            all_terms = []
-            for row in self.db_manager.cursor.fetchall():
-                all_terms.append(dict(row))
+            if not note_text:
+                note_text = row["text"] or ""
             
-            # Find terms in note
-            found_terms = []
-            for term_data in all_terms:
-                term = term_data["term"]
-                term_id = term_data["id"]
-                
-                # Simple search for exact term
-                term_pattern = r'\b' + re.escape(term) + r'\b'
-                matches = list(re.finditer(term_pattern, note_text, re.IGNORECASE))
-                
-                if matches:
-                    # Add reference for each match
-                    for match in matches:
-                        # Get context (text around the match)
-                        start = max(0, match.start() - 50)
-                        end = min(len(note_text), match.end() + 50)
-                        context = note_text[start:end]
-                        
-                        # Add reference
-                        self.add_note_reference(
-                            term_id=term_id,
-                            note_id=note_id,
-                            context=context,
-                            location=f"position:{match.start()}"
-                        )
-                    
-                    # Get full term data
-                    full_term = self.get_term_by_id(term_id)
-                    if full_term:
-                        found_terms.append(full_term)
+            # Find all terms in one pass over the note
+            rows = self.get_term_matcher().find_references(note_id, note_text)
+            self._replace_note_references([note_id], rows)
             
-            return found_terms
+            logger.info(f"Added {len(rows)} glossary references to note {note_id}")
             
+            # Get full data of each term found, in order of first occurrence
+            term_ids = list(dict.fromkeys(row[0] for row in rows))
+            return self.get_terms_by_ids(term_ids)
+        
         except Exception as e:
             logger.error(f"Error scanning note for terms: {e}")
             return []
     
+    def rescan_all_notes(self, workers: Optional[int] = None, batch_size: int = 100) -> Dict[str, int]:
+        """
+        Rescan every note for glossary terms, matching in worker processes.
+        
+        The main process reads notes in batches and writes each batch's references
+        in one transaction while the workers match the next batches.
+        
+        Args:
+            workers (int, optional): Number of worker processes (defaults to the CPU count; 1 matches in-process)
+            batch_size (int): Notes per batch
+        
+        Returns:
+            Dict[str, int]: Numbers of notes scanned and references found
+        """
+        if not self.db_manager:
+            logger.error("Database manager is required to rescan notes")
+            return {"notes": 0, "references": 0}
+        
+        workers = workers or os.cpu_count() or 1
+        conn = self.db_manager.conn
+        
+        note_ids = [row[0] for row in conn.execute("SELECT id FROM notes ORDER BY id")]
+        batches = [note_ids[i:i + batch_size] for i in range(0, len(note_ids), batch_size)]
+        
+        def read_batch(batch: List[int]) -> List[Tuple[int, str]]:
+            placeholders = ", ".join("?" * len(batch))
+            return [(row["id"], row["text"]) for row in conn.execute(f"SELECT id, text FROM notes WHERE id IN ({placeholders})", batch)]
+        
+        reference_count = 0
+        
+        if workers <= 1:
+            matcher = self.get_term_matcher()
+            for batch in batches:
+                rows = []
+                for note_id, text in read_batch(batch):
+                    rows.extend(matcher.find_references(note_id, text or ""))
+                self._replace_note_references(batch, rows)
+                reference_count += len(rows)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(self._load_terms(),)) as executor:
+                # Keep a bounded number of batches in flight
+                pending = []
+                for batch in batches:
+                    pending.append((batch, executor.submit(match_notes, read_batch(batch))))
+                    
+                    if len(pending) >= 2 * workers:
+                        done_batch, future = pending.pop(0)
+                        rows = future.result()
+                        self._replace_note_references(done_batch, rows)
+                        reference_count += len(rows)
+                
+                for done_batch, future in pending:
+                    rows = future.result()
+                    self._replace_note_references(done_batch, rows)
+                    reference_count += len(rows)
+        
+        logger.info(f"Rescanned {len(note_ids)} notes, found {reference_count} glossary references")
+        return {"notes": len(note_ids), "references": reference_count}
+
     def generate_clickable_interface(
         self,
         terms: List[Dict[str, Any]],
@@ -1232,7 +1514,7 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description="Interactive Visual Glossary")
-    parser.add_argument("--action", choices=["add", "update", "get", "search", "scan", "generate"], 
+    parser.add_argument("--action", choices=["add", "update", "get", "search", "scan", "rescan", "generate"], 
                         required=True, help="Action to perform")
     parser.add_argument("--term", help="Term name (for add, update, get actions)")
     parser.add_argument("--definition", help="Term definition (for add, update actions)")
@@ -1242,6 +1524,7 @@ def main():
     parser.add_argument("--term-id", type=int, help="Term ID (for update action)")
     parser.add_argument("--note-id", type=int, help="Note ID (for scan action)")
     parser.add_argument("--note-text", help="Note text (for scan action)")
+    parser.add_argument("--workers", type=int, help="Worker processes (for rescan action)")
     parser.add_argument("--query", help="Search query (for search action)")
     parser.add_argument("--semantic", action="store_true", help="Use semantic search (for search action)")
     parser.add_argument("--format", choices=["html", "markdown", "text"], default="text", 
@@ -1399,6 +1682,14 @@ def main():
                 print(f"   Category: {term['category']}")
             print(f"   {term['definition'][:100]}...")
         
+    elif args.action == "rescan":
+        if not db_manager:
+            print("Error: database is required to rescan notes")
+            return
+        
+        stats = glossary.rescan_all_notes(workers=args.workers)
+        print(f"Found {stats['references']} term references in {stats['notes']} notes")
+        
     elif args.action == "generate":
         # Get all terms if no specific term is provided
         if args.term:
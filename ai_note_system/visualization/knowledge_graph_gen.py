@@ -10,13 +10,21 @@ import tempfile
 import re
 import json
 import webbrowser
+import numpy as np
 from typing import Dict, Any, List, Optional, Tuple, Union
 from pathlib import Path
 from datetime import datetime
 
+from .graph_engine import get_graph_engine, build_reasoning_path
+from .graph_layout import layout_graph_data, summarize_communities
+
 # Setup logging
 logger = logging.getLogger("ai_note_system.visualization.knowledge_graph_gen")
 
+# Points (DOT) and pixels (HTML) per unit of layout distance
+LAYOUT_SCALE = 150
+HTML_LAYOUT_SCALE = 60
+
 def generate_knowledge_graph(
     db_manager,
     output_format: str = "svg",
@@ -25,11 +33,12 @@ def generate_knowledge_graph(
     layout: str = "fdp",
     include_code: bool = True,
     is_3d: bool = True,
-    max_nodes: int = 100,
+    max_nodes: Optional[int] = 100,
     similarity_threshold: float = 0.5,
     tags: Optional[List[str]] = None,
     open_browser: bool = False,
-    include_reasoning: bool = True
+    include_reasoning: bool = True,
+    precompute_layout: bool = True
 ) -> Dict[str, Any]:
     """
     Generate a hierarchical knowledge graph from notes.
@@ -42,11 +51,13 @@ def generate_knowledge_graph(
         layout (str): Graphviz layout engine (fdp, neato, dot, sfdp, twopi, circo)
         include_code (bool): Whether to include the generated code in the result
         is_3d (bool): Whether to generate a 3D-like graph
-        max_nodes (int): Maximum number of nodes to include
+        max_nodes (int, optional): Maximum number of nodes to include. If None, includes all notes.
         similarity_threshold (float): Minimum similarity threshold for related notes
         tags (List[str], optional): Filter notes by tags
         open_browser (bool): Whether to open the output file in a browser
         include_reasoning (bool): Whether to include reasoning paths between concepts
+        precompute_layout (bool): Whether to compute force-directed layouts (fdp, neato, sfdp)
+            with NumPy and only let Graphviz draw them, which is much faster for large graphs
         
     Returns:
         Dict[str, Any]: Dictionary containing the knowledge graph information
@@ -62,6 +73,11 @@ def generate_knowledge_graph(
         include_reasoning=include_reasoning
     )
     
+    # Compute positions up front for force-directed layouts
+    precomputed = precompute_layout and layout in ("fdp", "neato", "sfdp")
+    if precomputed:
+        layout_graph_data(graph_data)
+    
     # Generate DOT code from graph data
     dot_code = generate_dot_code_from_graph_data(graph_data, title, is_3d, layout)
     
@@ -71,6 +87,7 @@ def generate_knowledge_graph(
         "format": output_format,
         "layout": layout,
         "is_3d": is_3d,
+        "precomputed_layout": precomputed,
         "node_count": len(graph_data["nodes"]),
         "edge_count": len(graph_data["edges"])
     }
@@ -94,13 +111,15 @@ def generate_knowledge_graph(
                 f.write(dot_code)
                 temp_file = f.name
             
-            # Use Graphviz to render the knowledge graph
+            # Use Graphviz to render the knowledge graph, keeping precomputed positions
             cmd = [
-                layout,
+                "neato" if precomputed else layout,
                 "-T" + output_format,
                 "-o", output_path,
                 temp_file
             ]
+            if precomputed:
+                cmd.insert(1, "-n2")
             
             subprocess.run(cmd, check=True)
             
@@ -126,7 +145,7 @@ def generate_knowledge_graph(
 
 def extract_graph_data_from_db(
     db_manager,
-    max_nodes: int = 100,
+    max_nodes: Optional[int] = None,
     similarity_threshold: float = 0.5,
     tags: Optional[List[str]] = None,
     include_reasoning: bool = False
@@ -134,9 +153,13 @@ def extract_graph_data_from_db(
     """
     Extract graph data from the database.
     
+    Uses the cached graph engine, so only notes and relationships written
+    since the previous call are read from the database.
+    
     Args:
         db_manager: Database manager instance
-        max_nodes (int): Maximum number of nodes to include
+        max_nodes (int, optional): Maximum number of nodes to include (most recent first).
+            If None, includes all notes.
         similarity_threshold (float): Minimum similarity threshold for related notes
         tags (List[str], optional): Filter notes by tags
         include_reasoning (bool): Whether to include reasoning paths between concepts
@@ -146,110 +169,27 @@ def extract_graph_data_from_db(
     """
     logger.info(f"Extracting graph data from database (max_nodes={max_nodes}, threshold={similarity_threshold}, include_reasoning={include_reasoning})")
     
-    # Get notes from database
-    if tags:
-        notes = db_manager.search_notes(tags=tags, limit=max_nodes)
-    else:
-        notes = db_manager.search_notes(limit=max_nodes)
-    
-    # Create nodes and edges
-    nodes = []
-    edges = []
-    reasoning_paths = []
-    node_ids = set()
-    
-    # Add nodes
-    for note in notes:
-        node_ids.add(note["id"])
-        
-        # Format timestamp
-        timestamp = note.get("timestamp", "")
-        try:
-            dt = datetime.fromisoformat(timestamp)
-            formatted_date = dt.strftime("%Y-%m-%d")
-        except (ValueError, TypeError):
-            formatted_date = "Unknown date"
-        
-        # Extract key concepts from the note
-        key_concepts = []
-        if note.get("keypoints"):
-            for keypoint in note.get("keypoints", []):
-                if isinstance(keypoint, dict) and "text" in keypoint:
-                    key_concepts.append(keypoint["text"])
-                elif isinstance(keypoint, str):
-                    key_concepts.append(keypoint)
-        
-        # Create node
-        node = {
-            "id": note["id"],
-            "title": note["title"],
-            "summary": note.get("summary", ""),
-            "tags": note.get("tags", []),
-            "date": formatted_date,
-            "source_type": note.get("source_type", "text"),
-            "key_concepts": key_concepts,
-            "is_prerequisite": any(tag.lower() in ["prerequisite", "fundamental", "basic"] for tag in note.get("tags", [])),
-            "is_advanced": any(tag.lower() in ["advanced", "expert", "complex"] for tag in note.get("tags", []))
-        }
-        
-        nodes.append(node)
-    
-    # Add edges (relationships between notes)
-    for note in notes:
-        note_id = note["id"]
-        
-        # Get related notes
-        related_notes = db_manager.get_related_notes(note_id)
-        
-        for related_note in related_notes:
-            related_id = related_note["id"]
-            similarity = related_note.get("similarity", 0.0)
-            
-            # Only include edges above the similarity threshold
-            if similarity >= similarity_threshold and related_id in node_ids:
-                # Determine relationship type
-                relationship_type = "related"
-                
-                # Check if this is a prerequisite relationship
-                source_note = next((n for n in nodes if n["id"] == note_id), None)
-                target_note = next((n for n in nodes if n["id"] == related_id), None)
-                
-                if source_note and target_note:
-                    # Check for prerequisite relationship based on tags
-                    if source_note.get("is_prerequisite") and target_note.get("is_advanced"):
-                        relationship_type = "prerequisite"
-                    elif target_note.get("is_prerequisite") and source_note.get("is_advanced"):
-                        relationship_type = "builds_on"
-                    
-                    # Check for temporal relationship based on dates
-                    if source_note.get("date") < target_note.get("date"):
-                        relationship_type = "precedes" if relationship_type == "related" else relationship_type
-                
-                edge = {
-                    "source": note_id,
-                    "target": related_id,
-                    "similarity": similarity,
-                    "relationship_type": relationship_type
-                }
-                
-                edges.append(edge)
+    engine = get_graph_engine(db_manager)
+    graph_data = engine.extract_graph_data(
+        max_nodes=max_nodes,
+        similarity_threshold=similarity_threshold,
+        tags=tags,
+        include_reasoning=include_reasoning
+    )
     
-    # Generate reasoning paths if requested
-    if include_reasoning:
-        reasoning_paths = generate_reasoning_paths(nodes, edges)
+    graph_data["graph_version"] = (os.path.abspath(db_manager.db_path), engine.version)
     
-    logger.info(f"Extracted {len(nodes)} nodes, {len(edges)} edges, and {len(reasoning_paths)} reasoning paths")
+    logger.info(f"Extracted {len(graph_data['nodes'])} nodes, {len(graph_data['edges'])} edges, and {len(graph_data['reasoning_paths'])} reasoning paths")
     
-    return {
-        "nodes": nodes,
-        "edges": edges,
-        "reasoning_paths": reasoning_paths
-    }
+    return graph_data
 
 def generate_reasoning_paths(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Generate reasoning paths between concepts.
     
+    Runs in O(V + E): nodes are looked up by ID and only node pairs joined
+    by an edge are checked for shared concepts.
+    
     Args:
         nodes (List[Dict[str, Any]]): List of nodes
         edges (List[Dict[str, Any]]): List of edges
@@ -257,70 +197,30 @@ def generate_reasoning_paths(nodes: List[Dict[str, Any]], edges: List[Dict[str,
     Returns:
         List[Dict[str, Any]]: List of reasoning paths
     """
-    reasoning_paths = []
-    
-    # Create a graph representation for path finding
-    graph = {}
-    for node in nodes:
-        graph[node["id"]] = []
+    nodes_by_id = {node["id"]: node for node in nodes}
+    prerequisite_paths = []
+    causal_paths = []
+    seen = set()
     
     for edge in edges:
-        source = edge["source"]
-        target = edge["target"]
-        relationship_type = edge.get("relationship_type", "related")
-        
-        if source in graph:
-            graph[source].append((target, relationship_type))
-        if target in graph:  # Add reverse direction for non-directional relationships
-            if relationship_type == "related":
-                graph[target].append((source, relationship_type))
-    
-    # Find paths between nodes that have prerequisite relationships
-    prerequisite_edges = [edge for edge in edges if edge.get("relationship_type") == "prerequisite"]
+        source_node = nodes_by_id.get(edge["source"])
+        target_node = nodes_by_id.get(edge["target"])
+        if not source_node or not target_node:
+            continue
+        
+        # Explain prerequisite relationships
+        if edge.get("relationship_type") == "prerequisite":
+            prerequisite_paths.append(build_reasoning_path(source_node, target_node, "prerequisite"))
+        
+        # Linked notes sharing key concepts are causally related
+        pair = (edge["source"], edge["target"])
+        if pair not in seen:
+            seen.add(pair)
+            path = build_reasoning_path(source_node, target_node, "causal")
+            if path:
+                causal_paths.append(path)
     
-    for edge in prerequisite_edges:
-        source_id = edge["source"]
-        target_id = edge["target"]
-        
-        source_node = next((n for n in nodes if n["id"] == source_id), None)
-        target_node = next((n for n in nodes if n["id"] == target_id), None)
-        
-        if source_node and target_node:
-            # Create a reasoning path explaining the prerequisite relationship
-            path = {
-                "source_id": source_id,
-                "target_id": target_id,
-                "source_title": source_node["title"],
-                "target_title": target_node["title"],
-                "path_type": "prerequisite",
-                "explanation": f"{source_node['title']} is a prerequisite for understanding {target_node['title']}. "
-                              f"You should master the concepts in {source_node['title']} before moving on to {target_node['title']}."
-            }
-            
-            reasoning_paths.append(path)
-    
-    # Find paths between nodes that have causal relationships
-    for i, node1 in enumerate(nodes):
-        for j, node2 in enumerate(nodes):
-            if i != j:
-                # Check if there's a potential causal relationship based on key concepts
-                common_concepts = set(node1.get("key_concepts", [])) & set(node2.get("key_concepts", []))
-                
-                if common_concepts and any(edge["source"] == node1["id"] and edge["target"] == node2["id"] for edge in edges):
-                    # Create a reasoning path explaining the causal relationship
-                    path = {
-                        "source_id": node1["id"],
-                        "target_id": node2["id"],
-                        "source_title": node1["title"],
-                        "target_title": node2["title"],
-                        "path_type": "causal",
-                        "common_concepts": list(common_concepts),
-                        "explanation": f"{node1['title']} and {node2['title']} are causally related through concepts: {', '.join(common_concepts)}."
-                    }
-                    
-                    reasoning_paths.append(path)
-    
-    return reasoning_paths
+    return prerequisite_paths + causal_paths
 
 def generate_dot_code_from_graph_data(
     graph_data: Dict[str, Any],
@@ -331,6 +231,9 @@ def generate_dot_code_from_graph_data(
     """
     Generate Graphviz DOT code from graph data.
     
+    Nodes laid out by layout_graph_data are pinned to their positions, to be
+    drawn with "neato -n2" without running a Graphviz layout.
+    
     Args:
         graph_data (Dict[str, Any]): Dictionary containing nodes and edges
         title (str): Title for the knowledge graph
@@ -342,6 +245,7 @@ def generate_dot_code_from_graph_data(
     """
     nodes = graph_data["nodes"]
     edges = graph_data["edges"]
+    positioned = layout != "dot" and bool(nodes) and all("x" in node for node in nodes)
     
     # Generate DOT code
     dot_code = ["digraph G {"]
@@ -349,7 +253,9 @@ def generate_dot_code_from_graph_data(
     # Add graph attributes
     dot_code.append("    // Graph attributes")
     
-    if layout == "dot":
+    if positioned:
+        dot_code.append('    graph [layout="neato", splines="line", overlap=false, fontname="Arial"];')
+    elif layout == "dot":
         dot_code.append('    graph [rankdir="TB", splines="ortho", nodesep=0.8, ranksep=1.0, fontname="Arial", overlap=false, K=0.6];')
     else:
         dot_code.append(f'    graph [layout="{layout}", splines="spline", overlap=false, fontname="Arial", K=0.6, sep="+25"];')
@@ -412,12 +318,15 @@ def generate_dot_code_from_graph_data(
         saturation = 30
         lightness = 85
         
+        # Pin precomputed positions (in points)
+        pos = f', pos="{node["x"] * LAYOUT_SCALE:.1f},{node["y"] * LAYOUT_SCALE:.1f}!"' if positioned else ""
+        
         if is_3d:
             fillcolor = f"\"#{hsl_to_hex(hue, saturation, lightness)}\""
-            dot_code.append(f'    {node_id} [label="{title}", tooltip="{tooltip}", URL="{url}", fillcolor={fillcolor}, gradientangle="315"];')
+            dot_code.append(f'    {node_id} [label="{title}", tooltip="{tooltip}", URL="{url}", fillcolor={fillcolor}, gradientangle="315"{pos}];')
         else:
             fillcolor = f"\"#{hsl_to_hex(hue, saturation, lightness)}\""
-            dot_code.append(f'    {node_id} [label="{title}", tooltip="{tooltip}", URL="{url}", fillcolor={fillcolor}];')
+            dot_code.append(f'    {node_id} [label="{title}", tooltip="{tooltip}", URL="{url}", fillcolor={fillcolor}{pos}];')
     
     # Add edges
     dot_code.append("\n    // Edges")
@@ -442,6 +351,10 @@ def generate_dot_code_from_graph_data(
     
     return "\n".join(dot_code)
 
+def _script_json(data: Any) -> str:
+    """Serialize data for embedding in a <script> element."""
+    return json.dumps(data).replace("</", "<\\/")
+
 def generate_html_knowledge_graph(
     graph_data: Dict[str, Any],
     output_path: str,
@@ -451,46 +364,66 @@ def generate_html_knowledge_graph(
     """
     Generate an interactive HTML knowledge graph using D3.js.
     
+    Positions are computed up front by layout_graph_data, and the page draws
+    on a canvas with level of detail: communities are shown as super-nodes
+    until they are zoomed into or clicked, and the summaries and links of a
+    community are only parsed when it is first expanded. Graphs with tens of
+    thousands of notes stay interactive.
+    
     Args:
         graph_data (Dict[str, Any]): Dictionary containing nodes and edges
         output_path (str): Path to save the HTML file
         title (str): Title for the knowledge graph
         open_browser (bool): Whether to open the output file in a browser
-        
+    
     Returns:
         Dict[str, Any]: Dictionary containing the knowledge graph information
     """
     logger.info(f"Generating HTML knowledge graph")
     
-    # Convert graph data to D3.js format
-    d3_data = {
+    layout_graph_data(graph_data)
+    super_nodes, super_edges = summarize_communities(graph_data)
+    
+    # Compact per-node data needed for drawing, searching and filtering
+    index = {}
+    core_data = {
         "nodes": [],
-        "links": []
+        "communities": super_nodes,
+        "super_links": super_edges
     }
     
-    # Add nodes
     for node in graph_data["nodes"]:
-        d3_node = {
-            "id": f"node_{node['id']}",
+        index[node["id"]] = len(core_data["nodes"])
+        core_data["nodes"].append({
             "note_id": node["id"],
             "title": node["title"],
-            "summary": node.get("summary", ""),
             "tags": node.get("tags", []),
-            "date": node.get("date", ""),
-            "source_type": node.get("source_type", "text")
+            "source_type": node.get("source_type", "text"),
+            "x": round(node["x"], 3),
+            "y": round(node["y"], 3),
+            "community": node["community"]
+        })
+    
+    # Details loaded on demand, per community
+    details = {community["id"]: {"nodes": {}, "links": []} for community in super_nodes}
+    
+    for node in graph_data["nodes"]:
+        details[node["community"]]["nodes"][node["id"]] = {
+            "summary": node.get("summary", ""),
+            "date": node.get("date", "")
         }
-        
-        d3_data["nodes"].append(d3_node)
     
-    # Add links
     for edge in graph_data["edges"]:
-        d3_link = {
-            "source": f"node_{edge['source']}",
-            "target": f"node_{edge['target']}",
-            "similarity": edge["similarity"]
-        }
-        
-        d3_data["links"].append(d3_link)
+        source, target = index.get(edge["source"]), index.get(edge["target"])
+        if source is None or target is None:
+            continue
+        community = core_data["nodes"][source]["community"]
+        details[community]["links"].append([source, target, round(edge["similarity"], 3)])
+    
+    detail_scripts = "\n".join(
+        f'    <script type="application/json" id="community-{community}">{_script_json(detail)}</script>'
+        for community, detail in details.items()
+    )
     
     # Create HTML template
     html_template = f"""<!DOCTYPE html>
@@ -511,20 +444,8 @@ def generate_html_knowledge_graph(
             height: 100vh;
             overflow: hidden;
         }}
-        .node {{
-            cursor: pointer;
-        }}
-        .node circle {{
-            stroke: #aaa;
-            stroke-width: 1.5px;
-        }}
-        .node text {{
-            font-size: 12px;
-            pointer-events: none;
-        }}
-        .link {{
-            stroke: #999;
-            stroke-opacity: 0.6;
+        #graph-container canvas {{
+            display: block;
         }}
         #tooltip {{
             position: absolute;
@@ -536,6 +457,7 @@ def generate_html_knowledge_graph(
             max-width: 300px;
             display: none;
             z-index: 1000;
+            pointer-events: none;
         }}
         #tooltip h3 {{
             margin-top: 0;
@@ -579,6 +501,11 @@ def generate_html_knowledge_graph(
             padding: 5px;
             width: 200px;
         }}
+        #hint {{
+            margin-top: 8px;
+            font-size: 11px;
+            color: #666;
+        }}
     </style>
 </head>
 <body>
@@ -601,90 +528,249 @@ def generate_html_knowledge_graph(
             <button id="zoom-in">Zoom In</button>
             <button id="zoom-out">Zoom Out</button>
             <button id="reset">Reset</button>
+            <button id="collapse-all">Collapse All</button>
         </div>
+        <div id="hint">Click a cluster to expand it, shift-click a note to collapse its cluster.</div>
     </div>
     <div id="tooltip"></div>
     <div id="graph-container"></div>
     
+    <script type="application/json" id="graph-data">{_script_json(core_data)}</script>
+{detail_scripts}
+    
     <script>
-        // Graph data
-        const graphData = {json.dumps(d3_data)};
+        // Pixels per layout unit, zoom level at which visible clusters expand,
+        // and the number of notes drawn individually at once
+        const SCALE = {HTML_LAYOUT_SCALE};
+        const DETAIL_ZOOM = 0.5;
+        const LABEL_ZOOM = 1.2;
+        const MAX_DETAIL_NODES = 4000;
+        const MAX_LABELS = 1500;
         
-        // Set up the SVG
-        const width = window.innerWidth;
-        const height = window.innerHeight;
-        
-        const svg = d3.select("#graph-container")
-            .append("svg")
-            .attr("width", width)
-            .attr("height", height);
+        // Graph data
+        const graphData = JSON.parse(document.getElementById("graph-data").textContent);
+        const nodes = graphData.nodes;
+        const communities = graphData.communities;
+        const superLinks = graphData.super_links;
+        
+        nodes.forEach(d => {{
+            d.x *= SCALE;
+            d.y *= SCALE;
+        }});
+        communities.forEach(c => {{
+            c.x *= SCALE;
+            c.y *= SCALE;
+            c.radius *= SCALE;
+            c.members = [];
+            c.matches = c.size;
+        }});
+        nodes.forEach((d, i) => communities[d.community].members.push(i));
+        
+        // Community details are parsed the first time they are needed
+        const details = new Map();
+        function loadDetail(c) {{
+            let detail = details.get(c);
+            if (!detail) {{
+                const element = document.getElementById(`community-${{c}}`);
+                detail = element ? JSON.parse(element.textContent) : {{nodes: {{}}, links: []}};
+                details.set(c, detail);
+            }}
+            return detail;
+        }}
         
-        // Create a group for the graph
-        const g = svg.append("g");
+        // Set up the canvas
+        const dpr = window.devicePixelRatio || 1;
+        let width = window.innerWidth;
+        let height = window.innerHeight;
+        
+        const canvas = d3.select("#graph-container")
+            .append("canvas")
+            .node();
+        const context = canvas.getContext("2d");
+        
+        function resize() {{
+            width = window.innerWidth;
+            height = window.innerHeight;
+            canvas.width = width * dpr;
+            canvas.height = height * dpr;
+            canvas.style.width = width + "px";
+            canvas.style.height = height + "px";
+            requestDraw();
+        }}
         
         // Set up zoom behavior
+        let transform = d3.zoomIdentity;
         const zoom = d3.zoom()
-            .scaleExtent([0.1, 4])
+            .scaleExtent([0.005, 8])
             .on("zoom", (event) => {{
-                g.attr("transform", event.transform);
+                transform = event.transform;
+                requestDraw();
             }});
         
-        svg.call(zoom);
-        
-        // Create a force simulation
-        const simulation = d3.forceSimulation(graphData.nodes)
-            .force("link", d3.forceLink(graphData.links).id(d => d.id).distance(100))
-            .force("charge", d3.forceManyBody().strength(-300))
-            .force("center", d3.forceCenter(width / 2, height / 2))
-            .force("collide", d3.forceCollide().radius(50));
-        
-        // Create links
-        const link = g.append("g")
-            .selectAll("line")
-            .data(graphData.links)
-            .enter()
-            .append("line")
-            .attr("class", "link")
-            .attr("stroke-width", d => Math.max(1, d.similarity * 3))
-            .attr("stroke-opacity", d => Math.max(0.3, d.similarity));
-        
-        // Create nodes
-        const node = g.append("g")
-            .selectAll(".node")
-            .data(graphData.nodes)
-            .enter()
-            .append("g")
-            .attr("class", "node")
-            .call(d3.drag()
-                .on("start", dragstarted)
-                .on("drag", dragged)
-                .on("end", dragended));
-        
-        // Add circles to nodes
-        node.append("circle")
-            .attr("r", 10)
-            .attr("fill", d => getNodeColor(d.source_type))
-            .on("mouseover", showTooltip)
-            .on("mouseout", hideTooltip)
-            .on("click", openNote);
-        
-        // Add labels to nodes
-        node.append("text")
-            .attr("dx", 12)
-            .attr("dy", ".35em")
-            .text(d => d.title.length > 20 ? d.title.substring(0, 17) + "..." : d.title);
-        
-        // Set up the simulation tick function
-        simulation.on("tick", () => {{
-            link
-                .attr("x1", d => d.source.x)
-                .attr("y1", d => d.source.y)
-                .attr("x2", d => d.target.x)
-                .attr("y2", d => d.target.y);
+        d3.select(canvas).call(zoom).on("dblclick.zoom", null);
+        
+        // Communities expanded by clicking, and those currently drawn note by note
+        const expanded = new Set();
+        let detailed = new Set();
+        let searchTerm = "";
+        let selectedType = "all";
+        
+        function nodeRadius() {{
+            return Math.max(6, 2 / transform.k);
+        }}
+        
+        function superNodeRadius(c) {{
+            return Math.min(40, Math.max(4, Math.sqrt(c.size) * 3)) / transform.k;
+        }}
+        
+        function isVisible(x, y, r) {{
+            const [sx, sy] = transform.apply([x, y]);
+            const sr = r * transform.k;
+            return sx + sr >= 0 && sx - sr <= width && sy + sr >= 0 && sy - sr <= height;
+        }}
+        
+        // Expand visible communities nearest to the centre of the view, within the budget
+        function chooseDetailed() {{
+            const result = new Set(expanded);
+            let budget = MAX_DETAIL_NODES;
+            expanded.forEach(c => budget -= communities[c].size);
             
-            node
-                .attr("transform", d => `translate(${{d.x}},${{d.y}})`);
-        }});
+            if (transform.k >= DETAIL_ZOOM) {{
+                communities
+                    .filter(c => !result.has(c.id) && isVisible(c.x, c.y, c.radius + nodeRadius()))
+                    .map(c => {{
+                        const [sx, sy] = transform.apply([c.x, c.y]);
+                        return [Math.hypot(sx - width / 2, sy - height / 2), c];
+                    }})
+                    .sort((a, b) => a[0] - b[0])
+                    .forEach(([, c]) => {{
+                        if (c.size <= budget) {{
+                            result.add(c.id);
+                            budget -= c.size;
+                        }}
+                    }});
+            }}
+            return result;
+        }}
+        
+        function isMatch(d) {{
+            const typeMatch = selectedType === "all" || d.source_type.toLowerCase() === selectedType;
+            const textMatch = searchTerm === "" ||
+                d.title.toLowerCase().includes(searchTerm) ||
+                (d.tags && d.tags.some(tag => tag.toLowerCase().includes(searchTerm)));
+            return typeMatch && textMatch;
+        }}
+        
+        function updateMatches() {{
+            nodes.forEach(d => d.match = isMatch(d));
+            communities.forEach(c => c.matches = c.members.filter(i => nodes[i].match).length);
+            requestDraw();
+        }}
+        
+        // Drawing is coalesced to one frame
+        let drawPending = false;
+        function requestDraw() {{
+            if (!drawPending) {{
+                drawPending = true;
+                requestAnimationFrame(draw);
+            }}
+        }}
+        
+        let hitNodes = [];
+        let hitCommunities = [];
+        
+        function draw() {{
+            drawPending = false;
+            detailed = chooseDetailed();
+            const k = transform.k;
+            const r = nodeRadius();
+            
+            context.save();
+            context.setTransform(dpr, 0, 0, dpr, 0, 0);
+            context.clearRect(0, 0, width, height);
+            context.translate(transform.x, transform.y);
+            context.scale(k, k);
+            
+            // Links between clusters
+            context.strokeStyle = "#999";
+            context.globalAlpha = 0.4;
+            context.beginPath();
+            superLinks.forEach(l => {{
+                const a = communities[l.source];
+                const b = communities[l.target];
+                if (detailed.has(a.id) && detailed.has(b.id)) return;
+                context.moveTo(a.x, a.y);
+                context.lineTo(b.x, b.y);
+            }});
+            context.lineWidth = 1 / k;
+            context.stroke();
+            
+            // Links between notes of expanded clusters
+            detailed.forEach(c => {{
+                loadDetail(c).links.forEach(([s, t, similarity]) => {{
+                    const a = nodes[s];
+                    const b = nodes[t];
+                    if (!detailed.has(b.community)) return;
+                    context.globalAlpha = Math.max(0.3, similarity) * 0.6;
+                    context.lineWidth = Math.max(1, similarity * 3) / k;
+                    context.beginPath();
+                    context.moveTo(a.x, a.y);
+                    context.lineTo(b.x, b.y);
+                    context.stroke();
+                }});
+            }});
+            
+            // Collapsed clusters as super-nodes
+            hitCommunities = [];
+            context.font = `${{12 / k}}px Arial`;
+            communities.forEach(c => {{
+                if (detailed.has(c.id)) return;
+                const cr = superNodeRadius(c);
+                if (!isVisible(c.x, c.y, cr)) return;
+                hitCommunities.push([c, cr]);
+                
+                context.globalAlpha = c.matches > 0 ? 0.85 : 0.2;
+                context.fillStyle = d3.schemeTableau10[c.id % 10];
+                context.beginPath();
+                context.arc(c.x, c.y, cr, 0, 2 * Math.PI);
+                context.fill();
+                
+                if (cr * k >= 10) {{
+                    context.fillStyle = "#333";
+                    context.fillText(`${{c.label}} (${{c.size}})`, c.x + cr + 3 / k, c.y + 4 / k);
+                }}
+            }});
+            
+            // Notes of expanded clusters
+            hitNodes = [];
+            detailed.forEach(c => {{
+                communities[c].members.forEach(i => {{
+                    const d = nodes[i];
+                    if (!isVisible(d.x, d.y, r)) return;
+                    hitNodes.push(d);
+                    
+                    context.globalAlpha = d.match === false ? 0.2 : 1;
+                    context.fillStyle = getNodeColor(d.source_type);
+                    context.strokeStyle = "#aaa";
+                    context.lineWidth = 1.5 / k;
+                    context.beginPath();
+                    context.arc(d.x, d.y, r, 0, 2 * Math.PI);
+                    context.fill();
+                    context.stroke();
+                }});
+            }});
+            
+            // Labels once zoomed in far enough
+            if (k >= LABEL_ZOOM && hitNodes.length <= MAX_LABELS) {{
+                context.fillStyle = "#000";
+                hitNodes.forEach(d => {{
+                    context.globalAlpha = d.match === false ? 0.2 : 1;
+                    context.fillText(d.title.length > 20 ? d.title.substring(0, 17) + "..." : d.title, d.x + r + 2 / k, d.y + 4 / k);
+                }});
+            }}
+            
+            context.restore();
+        }}
         
         // Function to get node color based on source type
         function getNodeColor(sourceType) {{
@@ -697,26 +783,48 @@ def generate_html_knowledge_graph(
             }}
         }}
         
-        // Tooltip functions
-        function showTooltip(event, d) {{
-            const tooltip = d3.select("#tooltip");
+        // Find the note or cluster under the pointer
+        function findItem(event) {{
+            const [x, y] = transform.invert(d3.pointer(event, canvas));
+            const r = nodeRadius();
             
-            // Create tooltip content
-            let content = `<h3>${{d.title}}</h3>`;
-            
-            if (d.summary) {{
-                content += `<p>${{d.summary.length > 150 ? d.summary.substring(0, 147) + "..." : d.summary}}</p>`;
+            for (const d of hitNodes) {{
+                if ((d.x - x) ** 2 + (d.y - y) ** 2 <= r * r) return {{node: d}};
             }}
+            for (const [c, cr] of hitCommunities) {{
+                if ((c.x - x) ** 2 + (c.y - y) ** 2 <= cr * cr) return {{community: c}};
+            }}
+            return null;
+        }}
+        
+        // Tooltip functions
+        function showTooltip(event, item) {{
+            const tooltip = d3.select("#tooltip");
+            let content;
             
-            content += `<p><strong>Date:</strong> ${{d.date}}</p>`;
-            content += `<p><strong>Type:</strong> ${{d.source_type}}</p>`;
-            
-            if (d.tags && d.tags.length > 0) {{
-                content += `<div class="tags">`;
-                d.tags.forEach(tag => {{
-                    content += `<span class="tag">${{tag}}</span>`;
-                }});
-                content += `</div>`;
+            if (item.community) {{
+                const c = item.community;
+                content = `<h3>${{c.label}}</h3>`;
+                content += `<p>${{c.size}} notes. Click to expand.</p>`;
+            }} else {{
+                const d = item.node;
+                const detail = loadDetail(d.community).nodes[d.note_id] || {{}};
+                content = `<h3>${{d.title}}</h3>`;
+                
+                if (detail.summary) {{
+                    content += `<p>${{detail.summary.length > 150 ? detail.summary.substring(0, 147) + "..." : detail.summary}}</p>`;
+                }}
+                
+                content += `<p><strong>Date:</strong> ${{detail.date || ""}}</p>`;
+                content += `<p><strong>Type:</strong> ${{d.source_type}}</p>`;
+                
+                if (d.tags && d.tags.length > 0) {{
+                    content += `<div class="tags">`;
+                    d.tags.forEach(tag => {{
+                        content += `<span class="tag">${{tag}}</span>`;
+                    }});
+                    content += `</div>`;
+                }}
             }}
             
             tooltip.html(content)
@@ -729,75 +837,94 @@ def generate_html_knowledge_graph(
             d3.select("#tooltip").style("display", "none");
         }}
         
+        d3.select(canvas)
+            .on("mousemove", (event) => {{
+                const item = findItem(event);
+                canvas.style.cursor = item ? "pointer" : "default";
+                if (item) showTooltip(event, item);
+                else hideTooltip();
+            }})
+            .on("mouseout", hideTooltip)
+            .on("click", (event) => {{
+                const item = findItem(event);
+                if (!item) return;
+                
+                if (item.community) {{
+                    expandCommunity(item.community);
+                }} else if (event.shiftKey) {{
+                    expanded.delete(item.node.community);
+                    requestDraw();
+                }} else {{
+                    openNote(event, item.node);
+                }}
+            }});
+        
+        // Expand a cluster and zoom to it
+        function expandCommunity(c) {{
+            expanded.add(c.id);
+            const extent = Math.max(c.radius, 50) * 2.5;
+            const k = Math.max(DETAIL_ZOOM, Math.min(4, Math.min(width, height) / extent));
+            d3.select(canvas).transition().duration(500).call(
+                zoom.transform,
+                d3.zoomIdentity.translate(width / 2, height / 2).scale(k).translate(-c.x, -c.y)
+            );
+            requestDraw();
+        }}
+        
         // Open note function
         function openNote(event, d) {{
             alert(`Opening note ${{d.note_id}}: ${{d.title}}`);
             // In a real implementation, this would open the note in the application
         }}
         
-        // Drag functions
-        function dragstarted(event, d) {{
-            if (!event.active) simulation.alphaTarget(0.3).restart();
-            d.fx = d.x;
-            d.fy = d.y;
-        }}
-        
-        function dragged(event, d) {{
-            d.fx = event.x;
-            d.fy = event.y;
-        }}
-        
-        function dragended(event, d) {{
-            if (!event.active) simulation.alphaTarget(0);
-            d.fx = null;
-            d.fy = null;
+        // Fit the whole graph in view
+        function fitTransform() {{
+            if (communities.length === 0) return d3.zoomIdentity;
+            const xs = communities.flatMap(c => [c.x - c.radius, c.x + c.radius]);
+            const ys = communities.flatMap(c => [c.y - c.radius, c.y + c.radius]);
+            const [x0, x1] = d3.extent(xs);
+            const [y0, y1] = d3.extent(ys);
+            const k = Math.min(4, 0.9 * Math.min(width / Math.max(x1 - x0, 1), height / Math.max(y1 - y0, 1)));
+            return d3.zoomIdentity.translate(width / 2, height / 2).scale(k).translate(-(x0 + x1) / 2, -(y0 + y1) / 2);
         }}
         
         // Search functionality
         d3.select("#search-input").on("input", function() {{
-            const searchTerm = this.value.toLowerCase();
-            
-            node.each(function(d) {{
-                const element = d3.select(this);
-                const isMatch = d.title.toLowerCase().includes(searchTerm) || 
-                               (d.summary && d.summary.toLowerCase().includes(searchTerm)) ||
-                               (d.tags && d.tags.some(tag => tag.toLowerCase().includes(searchTerm)));
-                
-                element.style("opacity", isMatch || searchTerm === "" ? 1 : 0.2);
-            }});
-            
-            link.style("opacity", searchTerm === "" ? null : 0.1);
+            searchTerm = this.value.toLowerCase();
+            updateMatches();
         }});
         
         // Source type filter
         d3.select("#source-type-filter").on("change", function() {{
-            const selectedType = this.value;
-            
-            node.each(function(d) {{
-                const element = d3.select(this);
-                const isMatch = selectedType === "all" || d.source_type.toLowerCase() === selectedType;
-                
-                element.style("opacity", isMatch ? 1 : 0.2);
-            }});
+            selectedType = this.value;
+            updateMatches();
         }});
         
         // Zoom controls
         d3.select("#zoom-in").on("click", () => {{
-            svg.transition().call(zoom.scaleBy, 1.5);
+            d3.select(canvas).transition().call(zoom.scaleBy, 1.5);
         }});
         
         d3.select("#zoom-out").on("click", () => {{
-            svg.transition().call(zoom.scaleBy, 0.75);
+            d3.select(canvas).transition().call(zoom.scaleBy, 0.75);
         }});
         
         d3.select("#reset").on("click", () => {{
-            svg.transition().call(zoom.transform, d3.zoomIdentity);
+            d3.select(canvas).transition().call(zoom.transform, fitTransform());
         }});
+        
+        d3.select("#collapse-all").on("click", () => {{
+            expanded.clear();
+            requestDraw();
+        }});
+        
+        window.addEventListener("resize", resize);
+        resize();
+        d3.select(canvas).call(zoom.transform, fitTransform());
     </script>
 </body>
 </html>
 """
-    
     # Save HTML file
     try:
         # Ensure directory exists
@@ -821,7 +948,8 @@ def generate_html_knowledge_graph(
             "title": title,
             "output_path": output_path,
             "node_count": len(graph_data["nodes"]),
-            "edge_count": len(graph_data["edges"])
+            "edge_count": len(graph_data["edges"]),
+            "community_count": len(super_nodes)
         }
         
     except Exception as e:
@@ -876,17 +1004,20 @@ def hsl_to_hex(h: float, s: float, l: float) -> str:
 def query_knowledge_graph(
     db_manager,
     query: str,
-    max_nodes: int = 100,
+    max_nodes: Optional[int] = None,
     similarity_threshold: float = 0.5,
     tags: Optional[List[str]] = None
 ) -> Dict[str, Any]:
     """
     Query the knowledge graph for specific relationships.
     
+    Queries run against the cached graph engine instead of rebuilding the
+    graph, and prerequisite queries follow prerequisite chains transitively.
+    
     Args:
         db_manager: Database manager instance
         query (str): The query to search for (e.g., "prerequisites for CNN backpropagation")
-        max_nodes (int): Maximum number of nodes to include
+        max_nodes (int, optional): Only consider the most recent notes. If None, considers all notes.
         similarity_threshold (float): Minimum similarity threshold for related notes
         tags (List[str], optional): Filter notes by tags
         
@@ -895,14 +1026,21 @@ def query_knowledge_graph(
     """
     logger.info(f"Querying knowledge graph: {query}")
     
-    # Extract graph data with reasoning paths
-    graph_data = extract_graph_data_from_db(
-        db_manager, 
-        max_nodes=max_nodes, 
-        similarity_threshold=similarity_threshold,
-        tags=tags,
-        include_reasoning=True
-    )
+    engine = get_graph_engine(db_manager)
+    candidates = engine.select_nodes(max_nodes, tags)
+    in_scope = set(candidates.tolist())
+    
+    def edge_in_scope(e: int) -> bool:
+        return (
+            engine.edge_weight[e] >= similarity_threshold
+            and int(engine.edge_src[e]) in in_scope
+            and int(engine.edge_dst[e]) in in_scope
+        )
+    
+    def incident_paths(i: int, path_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        edge_ids = [e for e in list(engine.out_edges(i)) + engine.in_edges(i).tolist() if edge_in_scope(e)]
+        paths = engine.reasoning_paths(np.array(edge_ids, dtype=np.int64))
+        return [path for path in paths if path_type is None or path["path_type"] == path_type]
     
     # Parse the query to determine the type of relationship to look for
     query_lower = query.lower()
@@ -921,24 +1059,24 @@ def query_knowledge_graph(
         concept = query_lower.split("for ")[-1].split("understanding ")[-1].strip()
         
         # Find nodes that match the concept
-        matching_nodes = []
-        for node in graph_data["nodes"]:
-            node_title = node["title"].lower()
-            if concept in node_title or any(concept in kc.lower() for kc in node.get("key_concepts", [])):
-                matching_nodes.append(node)
+        matching_nodes = engine.find_nodes(concept, candidates)
         
         if matching_nodes:
-            # Find prerequisites for the matching nodes
+            # Follow prerequisite chains from the matching nodes
             prerequisites = []
-            for node in matching_nodes:
-                # Look for prerequisite relationships in reasoning paths
-                for path in graph_data.get("reasoning_paths", []):
-                    if path.get("path_type") == "prerequisite" and path.get("target_id") == node["id"]:
-                        prerequisites.append({
-                            "prerequisite": path.get("source_title"),
-                            "for_concept": path.get("target_title"),
-                            "explanation": path.get("explanation")
-                        })
+            for i in matching_nodes:
+                for step in engine.prerequisite_chain(engine.nodes[i]["id"], similarity_threshold=similarity_threshold):
+                    if engine.index[step["id"]] not in in_scope:
+                        continue
+                    prerequisite = engine.get_node(step["id"])
+                    target = engine.get_node(step["for_id"])
+                    path = build_reasoning_path(prerequisite, target, "prerequisite")
+                    prerequisites.append({
+                        "prerequisite": prerequisite["title"],
+                        "for_concept": target["title"],
+                        "depth": step["depth"],
+                        "explanation": path["explanation"]
+                    })
             
             if prerequisites:
                 result["matches"] = prerequisites
@@ -955,25 +1093,19 @@ def query_knowledge_graph(
         concept = parts[-1].strip() if len(parts) > 1 else parts[0].strip()
         
         # Find nodes that match the concept
-        matching_nodes = []
-        for node in graph_data["nodes"]:
-            node_title = node["title"].lower()
-            if concept in node_title or any(concept in kc.lower() for kc in node.get("key_concepts", [])):
-                matching_nodes.append(node)
+        matching_nodes = engine.find_nodes(concept, candidates)
         
         if matching_nodes:
             # Find causal relationships for the matching nodes
             causal_relations = []
-            for node in matching_nodes:
-                # Look for causal relationships in reasoning paths
-                for path in graph_data.get("reasoning_paths", []):
-                    if path.get("path_type") == "causal" and (path.get("source_id") == node["id"] or path.get("target_id") == node["id"]):
-                        causal_relations.append({
-                            "source": path.get("source_title"),
-                            "target": path.get("target_title"),
-                            "common_concepts": path.get("common_concepts", []),
-                            "explanation": path.get("explanation")
-                        })
+            for i in matching_nodes:
+                for path in incident_paths(i, "causal"):
+                    causal_relations.append({
+                        "source": path.get("source_title"),
+                        "target": path.get("target_title"),
+                        "common_concepts": path.get("common_concepts", []),
+                        "explanation": path.get("explanation")
+                    })
             
             if causal_relations:
                 result["matches"] = causal_relations
@@ -989,26 +1121,20 @@ def query_knowledge_graph(
         concept = query_lower.split("for ")[-1].split("of ")[-1].strip()
         
         # Find nodes that match the concept
-        matching_nodes = []
-        for node in graph_data["nodes"]:
-            node_title = node["title"].lower()
-            if concept in node_title or any(concept in kc.lower() for kc in node.get("key_concepts", [])):
-                matching_nodes.append(node)
+        matching_nodes = engine.find_nodes(concept, candidates)
         
         if matching_nodes:
-            # Find dependencies for the matching nodes
+            # Find dependencies for the matching nodes from their incoming edges
             dependencies = []
-            for node in matching_nodes:
-                # Look for dependency relationships in edges
-                for edge in graph_data["edges"]:
-                    if edge.get("target_id") == node["id"] and edge.get("relationship_type") in ["prerequisite", "builds_on"]:
-                        source_node = next((n for n in graph_data["nodes"] if n["id"] == edge.get("source")), None)
-                        if source_node:
-                            dependencies.append({
-                                "dependency": source_node.get("title"),
-                                "for_concept": node["title"],
-                                "relationship_type": edge.get("relationship_type")
-                            })
+            for i in matching_nodes:
+                for e in engine.in_edges(i).tolist():
+                    edge = engine.edge_dict(e)
+                    if edge_in_scope(e) and edge["relationship_type"] in ["prerequisite", "builds_on"]:
+                        dependencies.append({
+                            "dependency": engine.nodes[engine.edge_src[e]]["title"],
+                            "for_concept": engine.nodes[i]["title"],
+                            "relationship_type": edge["relationship_type"]
+                        })
             
             if dependencies:
                 result["matches"] = dependencies
@@ -1028,18 +1154,14 @@ def query_knowledge_graph(
         # Find relationships between potential concepts
         relationships = []
         for concept in potential_concepts:
-            for node in graph_data["nodes"]:
-                node_title = node["title"].lower()
-                if concept in node_title or any(concept in kc.lower() for kc in node.get("key_concepts", [])):
-                    # Look for relationships in reasoning paths
-                    for path in graph_data.get("reasoning_paths", []):
-                        if path.get("source_id") == node["id"] or path.get("target_id") == node["id"]:
-                            relationships.append({
-                                "source": path.get("source_title"),
-                                "target": path.get("target_title"),
-                                "path_type": path.get("path_type"),
-                                "explanation": path.get("explanation")
-                            })
+            for i in engine.find_nodes(concept, candidates):
+                for path in incident_paths(i):
+                    relationships.append({
+                        "source": path.get("source_title"),
+                        "target": path.get("target_title"),
+                        "path_type": path.get("path_type"),
+                        "explanation": path.get("explanation")
+                    })
         
         if relationships:
             result["matches"] = relationships
@@ -1047,4 +1169,4 @@ def query_knowledge_graph(
         else:
             result["explanation"] = "Could not find any relevant relationships in the knowledge graph."
     
-    return result
\ No newline at end of file
+    return result
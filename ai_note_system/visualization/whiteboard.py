@@ -9,6 +9,9 @@ like auto-labeling and conversion to structured notes.
 import os
 import logging
 import json
+import sqlite3
+import threading
+import time
 from typing import Dict, Any, List, Optional, Union, Tuple
 from datetime import datetime
 import uuid
@@ -22,6 +25,10 @@ from ..api.llm_interface import LLMInterface, get_llm_interface
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Position updates held back for coalescing, per (database, whiteboard)
+_pending_operations: Dict[Tuple[Any, int], Dict[str, Any]] = {}
+_pending_lock = threading.RLock()
+
 class WhiteboardElement:
     """Base class for whiteboard elements"""
     def __init__(self, element_id: str, element_type: str, 
@@ -71,10 +78,19 @@ class Whiteboard:
     """
     
     def __init__(self, db_manager: DatabaseManager, 
-                 llm_interface: Optional[LLMInterface] = None):
-        """Initialize the whiteboard"""
+                 llm_interface: Optional[LLMInterface] = None,
+                 coalesce_window: float = 0.05):
+        """
+        Initialize the whiteboard
+        
+        Args:
+            db_manager: Database manager instance
+            llm_interface: Optional LLM interface for the AI features
+            coalesce_window: Seconds that position-only updates are held back to merge them
+        """
         self.db_manager = db_manager
         self.llm_interface = llm_interface or get_llm_interface()
+        self.coalesce_window = coalesce_window
         
         # Ensure database tables exist
         self._ensure_tables()
@@ -96,6 +112,7 @@ class Whiteboard:
             width INTEGER NOT NULL DEFAULT 1920,
             height INTEGER NOT NULL DEFAULT 1080,
             background_color TEXT DEFAULT '#FFFFFF',
+            version INTEGER NOT NULL DEFAULT 0,
             FOREIGN KEY (user_id) REFERENCES users(id)
         )
         ''')
@@ -111,6 +128,7 @@ class Whiteboard:
             properties TEXT NOT NULL,
             created_at TEXT NOT NULL,
             updated_at TEXT NOT NULL,
+            version INTEGER NOT NULL DEFAULT 0,
             FOREIGN KEY (whiteboard_id) REFERENCES whiteboards(id)
         )
         ''')
@@ -125,6 +143,7 @@ class Whiteboard:
             link_type TEXT NOT NULL,
             properties TEXT,
             created_at TEXT NOT NULL,
+            version INTEGER NOT NULL DEFAULT 0,
             FOREIGN KEY (whiteboard_id) REFERENCES whiteboards(id),
             FOREIGN KEY (source_element_id) REFERENCES whiteboard_elements(id),
             FOREIGN KEY (target_element_id) REFERENCES whiteboard_elements(id)
@@ -145,6 +164,44 @@ class Whiteboard:
         )
         ''')
         
+        # Add the version columns to tables created before boards were versioned
+        for table in ('whiteboards', 'whiteboard_elements', 'whiteboard_links'):
+            cursor.execute(f"PRAGMA table_info({table})")
+            if 'version' not in [row[1] for row in cursor.fetchall()]:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        
+        # Create whiteboard tombstones table, so that clients syncing incrementally see deletions
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS whiteboard_tombstones (
+            whiteboard_id INTEGER NOT NULL,
+            item_type TEXT NOT NULL,
+            item_id TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            PRIMARY KEY (whiteboard_id, item_type, item_id),
+            FOREIGN KEY (whiteboard_id) REFERENCES whiteboards(id)
+        )
+        ''')
+        
+        # Create whiteboard clients table with the last operation sequence number of each client
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS whiteboard_clients (
+            whiteboard_id INTEGER NOT NULL,
+            client_id TEXT NOT NULL,
+            last_seq INTEGER NOT NULL,
+            PRIMARY KEY (whiteboard_id, client_id),
+            FOREIGN KEY (whiteboard_id) REFERENCES whiteboards(id)
+        )
+        ''')
+        
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_whiteboard_elements_version
+        ON whiteboard_elements(whiteboard_id, version)
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_whiteboard_links_version
+        ON whiteboard_links(whiteboard_id, version)
+        ''')
+        
         conn.commit()
     
     def create_whiteboard(self, user_id: int, title: str, 
@@ -190,11 +247,13 @@ class Whiteboard:
         Returns:
             Dictionary with whiteboard details
         """
+        self.flush_operations(whiteboard_id)
+        
         conn = self.db_manager.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
-        SELECT id, user_id, title, description, created_at, updated_at, width, height, background_color
+        SELECT id, user_id, title, description, created_at, updated_at, width, height, background_color, version
         FROM whiteboards
         WHERE id = ?
         ''', (whiteboard_id,))
@@ -214,6 +273,7 @@ class Whiteboard:
             'width': row[6],
             'height': row[7],
             'background_color': row[8],
+            'version': row[9],
             'elements': self.get_whiteboard_elements(row[0]),
             'links': self.get_whiteboard_links(row[0]),
             'note_links': self.get_whiteboard_note_links(row[0])
@@ -258,7 +318,7 @@ class Whiteboard:
     
     def add_element(self, whiteboard_id: int, element_type: str,
                   position: Tuple[float, float],
-                  properties: Dict[str, Any] = None) -> str:
+                  properties: Dict[str, Any] = None) -> Optional[str]:
         """
         Add an element to a whiteboard
         
@@ -269,29 +329,19 @@ class Whiteboard:
             properties: Additional properties of the element
             
         Returns:
-            The ID of the created element
+            The ID of the created element, or None if the whiteboard does not exist
         """
-        conn = self.db_manager.get_connection()
-        cursor = conn.cursor()
-        
-        element_id = str(uuid.uuid4())
-        now = datetime.now().isoformat()
-        
-        cursor.execute('''
-        INSERT INTO whiteboard_elements (id, whiteboard_id, element_type, position_x, position_y, properties, created_at, updated_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (element_id, whiteboard_id, element_type, position[0], position[1], json.dumps(properties or {}), now, now))
-        
-        # Update the whiteboard's updated_at timestamp
-        cursor.execute('''
-        UPDATE whiteboards
-        SET updated_at = ?
-        WHERE id = ?
-        ''', (now, whiteboard_id))
+        result = self.apply_operations(whiteboard_id, [{
+            'op': 'add',
+            'type': element_type,
+            'position': position,
+            'properties': properties or {}
+        }], coalesce=False)
         
-        conn.commit()
+        if not result or result['results'][0]['status'] != 'applied':
+            return None
         
-        return element_id
+        return result['results'][0]['id']
     
     def update_element(self, element_id: str, position: Optional[Tuple[float, float]] = None,
                      properties: Optional[Dict[str, Any]] = None) -> bool:
@@ -306,52 +356,18 @@ class Whiteboard:
         Returns:
             True if the element was updated, False otherwise
         """
-        conn = self.db_manager.get_connection()
-        cursor = conn.cursor()
-        
-        # Get the current element data
-        cursor.execute('''
-        SELECT whiteboard_id, element_type, position_x, position_y, properties
-        FROM whiteboard_elements
-        WHERE id = ?
-        ''', (element_id,))
-        
-        row = cursor.fetchone()
-        
-        if not row:
+        whiteboard_id = self._get_item_whiteboard('whiteboard_elements', element_id)
+        if whiteboard_id is None:
             return False
         
-        whiteboard_id, element_type, current_x, current_y, current_properties_json = row
-        
-        # Update the element
-        now = datetime.now().isoformat()
-        
+        operation = {'op': 'update', 'id': element_id}
         if position is not None:
-            new_x, new_y = position
-        else:
-            new_x, new_y = current_x, current_y
-        
+            operation['position'] = position
         if properties is not None:
-            new_properties = properties
-        else:
-            new_properties = json.loads(current_properties_json)
-        
-        cursor.execute('''
-        UPDATE whiteboard_elements
-        SET position_x = ?, position_y = ?, properties = ?, updated_at = ?
-        WHERE id = ?
-        ''', (new_x, new_y, json.dumps(new_properties), now, element_id))
-        
-        # Update the whiteboard's updated_at timestamp
-        cursor.execute('''
-        UPDATE whiteboards
-        SET updated_at = ?
-        WHERE id = ?
-        ''', (now, whiteboard_id))
+            operation['properties'] = properties
         
-        conn.commit()
-        
-        return True
+        result = self.apply_operations(whiteboard_id, [operation], coalesce=False)
+        return bool(result) and result['results'][0]['status'] == 'applied'
     
     def delete_element(self, element_id: str) -> bool:
         """
@@ -363,55 +379,16 @@ class Whiteboard:
         Returns:
             True if the element was deleted, False otherwise
         """
-        conn = self.db_manager.get_connection()
-        cursor = conn.cursor()
-        
-        # Get the whiteboard ID
-        cursor.execute('''
-        SELECT whiteboard_id FROM whiteboard_elements
-        WHERE id = ?
-        ''', (element_id,))
-        
-        row = cursor.fetchone()
-        
-        if not row:
+        whiteboard_id = self._get_item_whiteboard('whiteboard_elements', element_id)
+        if whiteboard_id is None:
             return False
         
-        whiteboard_id = row[0]
-        
-        # Delete any links involving this element
-        cursor.execute('''
-        DELETE FROM whiteboard_links
-        WHERE source_element_id = ? OR target_element_id = ?
-        ''', (element_id, element_id))
-        
-        # Delete any note links involving this element
-        cursor.execute('''
-        DELETE FROM whiteboard_note_links
-        WHERE element_id = ?
-        ''', (element_id,))
-        
-        # Delete the element
-        cursor.execute('''
-        DELETE FROM whiteboard_elements
-        WHERE id = ?
-        ''', (element_id,))
-        
-        # Update the whiteboard's updated_at timestamp
-        now = datetime.now().isoformat()
-        cursor.execute('''
-        UPDATE whiteboards
-        SET updated_at = ?
-        WHERE id = ?
-        ''', (now, whiteboard_id))
-        
-        conn.commit()
-        
-        return True
+        result = self.apply_operations(whiteboard_id, [{'op': 'delete', 'id': element_id}], coalesce=False)
+        return bool(result) and result['results'][0]['status'] == 'applied'
     
     def add_link(self, whiteboard_id: int, source_element_id: str,
                target_element_id: str, link_type: str = 'default',
-               properties: Dict[str, Any] = None) -> int:
+               properties: Dict[str, Any] = None) -> Optional[int]:
         """
         Add a link between elements on a whiteboard
         
@@ -423,30 +400,20 @@ class Whiteboard:
             properties: Additional properties of the link
             
         Returns:
-            The ID of the created link
+            The ID of the created link, or None if either element is not on the whiteboard
         """
-        conn = self.db_manager.get_connection()
-        cursor = conn.cursor()
-        
-        now = datetime.now().isoformat()
-        
-        cursor.execute('''
-        INSERT INTO whiteboard_links (whiteboard_id, source_element_id, target_element_id, link_type, properties, created_at)
-        VALUES (?, ?, ?, ?, ?, ?)
-        ''', (whiteboard_id, source_element_id, target_element_id, link_type, json.dumps(properties or {}), now))
-        
-        link_id = cursor.lastrowid
-        
-        # Update the whiteboard's updated_at timestamp
-        cursor.execute('''
-        UPDATE whiteboards
-        SET updated_at = ?
-        WHERE id = ?
-        ''', (now, whiteboard_id))
-        
-        conn.commit()
-        
-        return link_id
+        result = self.apply_operations(whiteboard_id, [{
+            'op': 'link',
+            'source_id': source_element_id,
+            'target_id': target_element_id,
+            'link_type': link_type,
+            'properties': properties or {}
+        }], coalesce=False)
+        
+        if not result or result['results'][0]['status'] != 'applied':
+            return None
+        
+        return result['results'][0]['id']
     
     def delete_link(self, link_id: int) -> bool:
         """
@@ -458,39 +425,446 @@ class Whiteboard:
         Returns:
             True if the link was deleted, False otherwise
         """
-        conn = self.db_manager.get_connection()
-        cursor = conn.cursor()
+        whiteboard_id = self._get_item_whiteboard('whiteboard_links', link_id)
+        if whiteboard_id is None:
+            return False
         
-        # Get the whiteboard ID
-        cursor.execute('''
-        SELECT whiteboard_id FROM whiteboard_links
-        WHERE id = ?
-        ''', (link_id,))
+        result = self.apply_operations(whiteboard_id, [{'op': 'unlink', 'id': link_id}], coalesce=False)
+        return bool(result) and result['results'][0]['status'] == 'applied'
+    
+    def apply_operations(self, whiteboard_id: int, operations: List[Dict[str, Any]],
+                         client_id: str = 'default', coalesce: bool = True) -> Dict[str, Any]:
+        """
+        Apply a batch of whiteboard operations in one transaction
+        
+        Each operation is a dictionary with an 'op' and an optional client sequence number 'seq':
+        - add: 'type', 'position', optional 'properties' and client-generated 'id'
+        - update: 'id', and 'position' and/or 'properties'
+        - delete: 'id'
+        - link: 'source_id', 'target_id', optional 'link_type' and 'properties'
+        - unlink: 'id' of the link
+        
+        Operations with a sequence number the client already sent are skipped as duplicates.
+        Updates of an element are merged into its previous add or update in the batch, and
+        batches of position-only updates are held back for coalesce_window seconds so that
+        dragging elements writes their latest positions instead of every intermediate one.
+        Held-back updates are written by the next batch or read, or by a timer once the
+        window is over, and only count towards the client's last_seq once written.
         
-        row = cursor.fetchone()
+        Args:
+            whiteboard_id: The ID of the whiteboard
+            operations: The operations, in the order the client made them
+            client_id: The ID of the client sending the operations
+            coalesce: Whether position-only updates may be held back
+            
+        Returns:
+            Dictionary with the board version, the last sequence number of the client that
+            is written, the number of held-back position updates and the status of each
+            operation (applied, coalesced, queued, duplicate or rejected), or an empty
+            dictionary if the whiteboard does not exist
+        """
+        key = self._pending_key(whiteboard_id)
         
-        if not row:
-            return False
+        with _pending_lock:
+            pending = _pending_operations.get(key)
+            
+            last_seq = committed_seq = self._get_client_seq(whiteboard_id, client_id)
+            if pending:
+                last_seq = max(last_seq, pending['seqs'].get(client_id, 0))
+            
+            # Skip operations the client sent before
+            results = []
+            accepted = []
+            max_seq = last_seq
+            for operation in operations:
+                seq = operation.get('seq')
+                result = {'seq': seq, 'op': operation.get('op'), 'id': operation.get('id')}
+                results.append(result)
+                
+                if seq is not None and seq <= last_seq:
+                    result['status'] = 'duplicate'
+                    continue
+                
+                if seq is not None:
+                    max_seq = max(max_seq, seq)
+                
+                operation = dict(operation)
+                if operation.get('op') == 'add' and not operation.get('id'):
+                    operation['id'] = result['id'] = str(uuid.uuid4())
+                
+                accepted.append((operation, result))
+            
+            seqs = {client_id: max_seq} if max_seq > last_seq else {}
+            
+            if (coalesce and self.coalesce_window > 0 and accepted and
+                    all(self._is_position_update(operation) for operation, _ in accepted)):
+                if pending is None:
+                    timer = threading.Timer(self.coalesce_window, self._flush_expired, args=(whiteboard_id,))
+                    timer.daemon = True
+                    pending = _pending_operations[key] = {
+                        'started': time.monotonic(), 'positions': {}, 'seqs': {}, 'timer': timer
+                    }
+                    timer.start()
+                
+                # Once the window is over, the held-back positions are written with this batch
+                if time.monotonic() - pending['started'] < self.coalesce_window:
+                    for operation, result in accepted:
+                        pending['positions'][operation['id']] = operation['position']
+                        result['status'] = 'queued'
+                    
+                    if seqs:
+                        pending['seqs'][client_id] = max_seq
+                    
+                    version = self._get_version(whiteboard_id)
+                    if version is None:
+                        return {}
+                    
+                    # Queued operations are not acknowledged until they are written
+                    return {
+                        'whiteboard_id': whiteboard_id,
+                        'version': version,
+                        'last_seq': committed_seq,
+                        'pending': len(pending['positions']),
+                        'results': results
+                    }
+            
+            # Held-back position updates were made before this batch, so they go first
+            pending = _pending_operations.pop(key, None)
+            if pending:
+                pending['timer'].cancel()
+                queued = [({'op': 'update', 'id': element_id, 'position': position}, None)
+                          for element_id, position in pending['positions'].items()]
+                accepted = queued + accepted
+                
+                for pending_client, pending_seq in pending['seqs'].items():
+                    seqs[pending_client] = max(seqs.get(pending_client, 0), pending_seq)
+            
+            merged, targets = self._coalesce_operations([operation for operation, _ in accepted])
+            version, written = self._write_operations(whiteboard_id, merged, seqs)
+            
+            if version is None:
+                return {}
+            
+            # Report merged operations as coalesced into the operation they were merged with
+            seen = set()
+            for (_, result), target in zip(accepted, targets):
+                first = target not in seen
+                seen.add(target)
+                
+                if result is None:
+                    continue
+                
+                status = written[target]['status']
+                result['status'] = 'coalesced' if status == 'applied' and not first else status
+                if written[target].get('id') is not None:
+                    result['id'] = written[target]['id']
+            
+            return {
+                'whiteboard_id': whiteboard_id,
+                'version': version,
+                'last_seq': max_seq,
+                'pending': 0,
+                'results': results
+            }
+    
+    def flush_operations(self, whiteboard_id: Optional[int] = None) -> None:
+        """
+        Write position updates held back for coalescing
         
-        whiteboard_id = row[0]
+        Args:
+            whiteboard_id: Optional ID of the whiteboard (defaults to all whiteboards of the database)
+        """
+        if not _pending_operations:
+            return
         
-        # Delete the link
-        cursor.execute('''
-        DELETE FROM whiteboard_links
-        WHERE id = ?
-        ''', (link_id,))
+        database_key = self._pending_key(0)[0]
+        
+        with _pending_lock:
+            whiteboard_ids = [key[1] for key in _pending_operations
+                              if key[0] == database_key and whiteboard_id in (None, key[1])]
+            
+            for pending_whiteboard_id in whiteboard_ids:
+                self.apply_operations(pending_whiteboard_id, [], coalesce=False)
+    
+    def _flush_expired(self, whiteboard_id: int) -> None:
+        """
+        Write a whiteboard's held-back position updates once their coalescing window is over
+        
+        Runs on the timer thread, so it writes through a connection of its own.
+        
+        Args:
+            whiteboard_id: The ID of the whiteboard
+        """
+        key = self._pending_key(whiteboard_id)
+        
+        with _pending_lock:
+            # The updates may have been written by a batch or read in the meantime
+            pending = _pending_operations.get(key)
+            if pending is None or pending['timer'] is not threading.current_thread():
+                return
+            del _pending_operations[key]
+            
+            operations = [{'op': 'update', 'id': element_id, 'position': position}
+                          for element_id, position in pending['positions'].items()]
+            
+            db_path = getattr(self.db_manager, 'db_path', None)
+            conn = sqlite3.connect(db_path, timeout=30) if isinstance(db_path, str) else None
+            try:
+                self._write_operations(whiteboard_id, operations, pending['seqs'], conn)
+            except Exception as e:
+                logger.error(f"Error writing held-back updates of whiteboard {whiteboard_id}: {e}")
+            finally:
+                if conn is not None:
+                    conn.close()
+    
+    def _pending_key(self, whiteboard_id: int) -> Tuple[Any, int]:
+        """Get the key of a whiteboard's held-back updates, shared by all instances on the same database"""
+        db_path = getattr(self.db_manager, 'db_path', None)
+        return (os.path.abspath(db_path) if isinstance(db_path, str) else id(self.db_manager), whiteboard_id)
+    
+    @staticmethod
+    def _is_position_update(operation: Dict[str, Any]) -> bool:
+        """Check whether an operation only moves an element"""
+        return (operation.get('op') == 'update' and operation.get('id') is not None and
+                'position' in operation and 'properties' not in operation)
+    
+    @staticmethod
+    def _coalesce_operations(operations: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[int]]:
+        """
+        Merge updates of an element into its previous add or update in the batch
+        
+        Args:
+            operations: The operations, in the order they were made
+            
+        Returns:
+            The operations to write, and for each given operation the index of the one it ended up in
+        """
+        merged = []
+        targets = []
+        open_elements = {}
+        
+        for operation in operations:
+            kind = operation.get('op')
+            element_id = operation.get('id')
+            
+            if kind == 'update' and element_id in open_elements:
+                target = open_elements[element_id]
+                for field in ('position', 'properties'):
+                    if field in operation:
+                        merged[target][field] = operation[field]
+                
+                targets.append(target)
+                continue
+            
+            targets.append(len(merged))
+            merged.append(dict(operation))
+            
+            if kind in ('add', 'update'):
+                open_elements[element_id] = len(merged) - 1
+            elif kind == 'delete':
+                open_elements.pop(element_id, None)
+        
+        return merged, targets
+    
+    def _write_operations(self, whiteboard_id: int, operations: List[Dict[str, Any]],
+                          seqs: Dict[str, int], conn=None) -> Tuple[Optional[int], List[Dict[str, Any]]]:
+        """
+        Write operations to a whiteboard in one transaction under a new board version
+        
+        Args:
+            whiteboard_id: The ID of the whiteboard
+            operations: The operations, already coalesced
+            seqs: The last sequence number of each client that sent them
+            conn: Optional connection to write with (defaults to the database manager's)
+            
+        Returns:
+            The board version, or None if the whiteboard does not exist, and the result of each operation
+        """
+        conn = conn or self.db_manager.get_connection()
+        cursor = conn.cursor()
         
-        # Update the whiteboard's updated_at timestamp
         now = datetime.now().isoformat()
-        cursor.execute('''
-        UPDATE whiteboards
-        SET updated_at = ?
-        WHERE id = ?
-        ''', (now, whiteboard_id))
         
-        conn.commit()
+        try:
+            # Claiming the next version first also takes the write lock for the whole batch
+            cursor.execute('''
+            UPDATE whiteboards
+            SET version = version + 1, updated_at = ?
+            WHERE id = ?
+            ''', (now, whiteboard_id))
+            
+            if cursor.rowcount == 0:
+                conn.rollback()
+                return None, []
+            
+            cursor.execute('SELECT version FROM whiteboards WHERE id = ?', (whiteboard_id,))
+            version = cursor.fetchone()[0]
+            
+            results = [self._write_operation(cursor, whiteboard_id, operation, version, now)
+                       for operation in operations]
+            
+            # Nothing changed, so the board keeps its version
+            if not any(result['status'] == 'applied' for result in results):
+                conn.rollback()
+                return version - 1, results
+            
+            cursor.executemany('''
+            INSERT INTO whiteboard_clients (whiteboard_id, client_id, last_seq)
+            VALUES (?, ?, ?)
+            ON CONFLICT(whiteboard_id, client_id) DO UPDATE SET last_seq = MAX(last_seq, excluded.last_seq)
+            ''', [(whiteboard_id, client_id, seq) for client_id, seq in seqs.items()])
+            
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Error applying operations to whiteboard {whiteboard_id}: {e}")
+            raise
         
-        return True
+        return version, results
+    
+    def _write_operation(self, cursor, whiteboard_id: int, operation: Dict[str, Any],
+                         version: int, now: str) -> Dict[str, Any]:
+        """
+        Write one operation inside the transaction of its batch
+        
+        Args:
+            cursor: Cursor of the batch transaction
+            whiteboard_id: The ID of the whiteboard
+            operation: The operation
+            version: The board version of the batch
+            now: The timestamp of the batch
+            
+        Returns:
+            Dictionary with the status of the operation and the ID of the item it created
+        """
+        kind = operation.get('op')
+        item_id = operation.get('id')
+        
+        if kind == 'add' and operation.get('type') and operation.get('position') is not None:
+            x, y = operation['position']
+            cursor.execute('''
+            INSERT OR IGNORE INTO whiteboard_elements
+            (id, whiteboard_id, element_type, position_x, position_y, properties, created_at, updated_at, version)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (item_id, whiteboard_id, operation['type'], x, y,
+                  json.dumps(operation.get('properties') or {}), now, now, version))
+            
+            if cursor.rowcount:
+                cursor.execute('''
+                DELETE FROM whiteboard_tombstones
+                WHERE whiteboard_id = ? AND item_type = 'element' AND item_id = ?
+                ''', (whiteboard_id, item_id))
+                return {'status': 'applied', 'id': item_id}
+        
+        elif kind == 'update' and item_id is not None:
+            assignments = ['updated_at = ?', 'version = ?']
+            params = [now, version]
+            
+            if 'position' in operation:
+                assignments.append('position_x = ?, position_y = ?')
+                params.extend(operation['position'])
+            if 'properties' in operation:
+                assignments.append('properties = ?')
+                params.append(json.dumps(operation['properties'] or {}))
+            
+            cursor.execute(f'''
+            UPDATE whiteboard_elements
+            SET {", ".join(assignments)}
+            WHERE id = ? AND whiteboard_id = ?
+            ''', params + [item_id, whiteboard_id])
+            
+            if cursor.rowcount:
+                return {'status': 'applied'}
+        
+        elif kind == 'delete' and item_id is not None:
+            cursor.execute('''
+            DELETE FROM whiteboard_elements
+            WHERE id = ? AND whiteboard_id = ?
+            ''', (item_id, whiteboard_id))
+            
+            if cursor.rowcount:
+                # Delete any links involving this element
+                cursor.execute('''
+                SELECT id FROM whiteboard_links
+                WHERE whiteboard_id = ? AND (source_element_id = ? OR target_element_id = ?)
+                ''', (whiteboard_id, item_id, item_id))
+                link_ids = [row[0] for row in cursor.fetchall()]
+                
+                cursor.execute('''
+                DELETE FROM whiteboard_links
+                WHERE whiteboard_id = ? AND (source_element_id = ? OR target_element_id = ?)
+                ''', (whiteboard_id, item_id, item_id))
+                
+                # Delete any note links involving this element
+                cursor.execute('''
+                DELETE FROM whiteboard_note_links
+                WHERE element_id = ?
+                ''', (item_id,))
+                
+                cursor.executemany('''
+                INSERT OR REPLACE INTO whiteboard_tombstones (whiteboard_id, item_type, item_id, version)
+                VALUES (?, ?, ?, ?)
+                ''', [(whiteboard_id, 'element', item_id, version)] +
+                     [(whiteboard_id, 'link', str(link_id), version) for link_id in link_ids])
+                return {'status': 'applied'}
+        
+        elif kind == 'link':
+            source_id = operation.get('source_id')
+            target_id = operation.get('target_id')
+            
+            # Both ends must be on the board, which earlier operations of the batch may have changed
+            cursor.execute('''
+            SELECT COUNT(*) FROM whiteboard_elements
+            WHERE whiteboard_id = ? AND id IN (?, ?)
+            ''', (whiteboard_id, source_id, target_id))
+            
+            if cursor.fetchone()[0] == len({source_id, target_id}):
+                cursor.execute('''
+                INSERT INTO whiteboard_links
+                (whiteboard_id, source_element_id, target_element_id, link_type, properties, created_at, version)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (whiteboard_id, source_id, target_id, operation.get('link_type') or 'default',
+                      json.dumps(operation.get('properties') or {}), now, version))
+                return {'status': 'applied', 'id': cursor.lastrowid}
+        
+        elif kind == 'unlink' and item_id is not None:
+            cursor.execute('''
+            DELETE FROM whiteboard_links
+            WHERE id = ? AND whiteboard_id = ?
+            ''', (item_id, whiteboard_id))
+            
+            if cursor.rowcount:
+                cursor.execute('''
+                INSERT OR REPLACE INTO whiteboard_tombstones (whiteboard_id, item_type, item_id, version)
+                VALUES (?, 'link', ?, ?)
+                ''', (whiteboard_id, str(item_id), version))
+                return {'status': 'applied'}
+        
+        return {'status': 'rejected'}
+    
+    def _get_version(self, whiteboard_id: int) -> Optional[int]:
+        """Get the version of a whiteboard as written to the database"""
+        cursor = self.db_manager.get_connection().cursor()
+        cursor.execute('SELECT version FROM whiteboards WHERE id = ?', (whiteboard_id,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+    
+    def _get_client_seq(self, whiteboard_id: int, client_id: str) -> int:
+        """Get the last operation sequence number written for a client"""
+        cursor = self.db_manager.get_connection().cursor()
+        cursor.execute('''
+        SELECT last_seq FROM whiteboard_clients
+        WHERE whiteboard_id = ? AND client_id = ?
+        ''', (whiteboard_id, client_id))
+        row = cursor.fetchone()
+        return row[0] if row else 0
+    
+    def _get_item_whiteboard(self, table: str, item_id: Union[str, int]) -> Optional[int]:
+        """Get the ID of the whiteboard an element or link belongs to"""
+        cursor = self.db_manager.get_connection().cursor()
+        cursor.execute(f'SELECT whiteboard_id FROM {table} WHERE id = ?', (item_id,))
+        row = cursor.fetchone()
+        return row[0] if row else None
     
     def link_to_note(self, whiteboard_id: int, element_id: str, note_id: int) -> int:
         """
@@ -527,24 +901,29 @@ class Whiteboard:
         
         return link_id
     
-    def get_whiteboard_elements(self, whiteboard_id: int) -> List[Dict[str, Any]]:
+    def get_whiteboard_elements(self, whiteboard_id: int,
+                                since_version: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Get elements for a whiteboard
         
         Args:
             whiteboard_id: The ID of the whiteboard
+            since_version: Optional board version the client already has; only elements changed
+                after it are returned, and deleted ones as {'id', 'deleted': True, 'version'}
             
         Returns:
             List of elements
         """
+        self.flush_operations(whiteboard_id)
+        
         conn = self.db_manager.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
-        SELECT id, element_type, position_x, position_y, properties, created_at, updated_at
+        SELECT id, element_type, position_x, position_y, properties, created_at, updated_at, version
         FROM whiteboard_elements
-        WHERE whiteboard_id = ?
-        ''', (whiteboard_id,))
+        WHERE whiteboard_id = ? AND version > ?
+        ''', (whiteboard_id, -1 if since_version is None else since_version))
         
         elements = []
         for row in cursor.fetchall():
@@ -554,30 +933,42 @@ class Whiteboard:
                 'position': (row[2], row[3]),
                 'properties': json.loads(row[4]),
                 'created_at': row[5],
-                'updated_at': row[6]
+                'updated_at': row[6],
+                'version': row[7]
             }
             elements.append(element)
         
+        if since_version is not None:
+            elements.extend(
+                {'id': item_id, 'deleted': True, 'version': version}
+                for item_id, version in self._get_tombstones(whiteboard_id, 'element', since_version)
+            )
+        
         return elements
     
-    def get_whiteboard_links(self, whiteboard_id: int) -> List[Dict[str, Any]]:
+    def get_whiteboard_links(self, whiteboard_id: int,
+                             since_version: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Get links for a whiteboard
         
         Args:
             whiteboard_id: The ID of the whiteboard
+            since_version: Optional board version the client already has; only links changed
+                after it are returned, and deleted ones as {'id', 'deleted': True, 'version'}
             
         Returns:
             List of links
         """
+        self.flush_operations(whiteboard_id)
+        
         conn = self.db_manager.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
-        SELECT id, source_element_id, target_element_id, link_type, properties, created_at
+        SELECT id, source_element_id, target_element_id, link_type, properties, created_at, version
         FROM whiteboard_links
-        WHERE whiteboard_id = ?
-        ''', (whiteboard_id,))
+        WHERE whiteboard_id = ? AND version > ?
+        ''', (whiteboard_id, -1 if since_version is None else since_version))
         
         links = []
         for row in cursor.fetchall():
@@ -587,12 +978,28 @@ class Whiteboard:
                 'target_id': row[2],
                 'type': row[3],
                 'properties': json.loads(row[4]) if row[4] else {},
-                'created_at': row[5]
+                'created_at': row[5],
+                'version': row[6]
             }
             links.append(link)
         
+        if since_version is not None:
+            links.extend(
+                {'id': int(item_id), 'deleted': True, 'version': version}
+                for item_id, version in self._get_tombstones(whiteboard_id, 'link', since_version)
+            )
+        
         return links
     
+    def _get_tombstones(self, whiteboard_id: int, item_type: str, since_version: int) -> List[Tuple[str, int]]:
+        """Get the elements or links deleted from a whiteboard after a version"""
+        cursor = self.db_manager.get_connection().cursor()
+        cursor.execute('''
+        SELECT item_id, version FROM whiteboard_tombstones
+        WHERE whiteboard_id = ? AND item_type = ? AND version > ?
+        ''', (whiteboard_id, item_type, since_version))
+        return [(row[0], row[1]) for row in cursor.fetchall()]
+    
     def get_whiteboard_note_links(self, whiteboard_id: int) -> List[Dict[str, Any]]:
         """
         Get note links for a whiteboard
@@ -989,4 +1396,20 @@ def convert_to_diagram(db_manager, whiteboard_id: int, format: str = 'mermaid')
         Dictionary with the generated diagram code
     """
     whiteboard = Whiteboard(db_manager)
-    return whiteboard.convert_to_diagram(whiteboard_id, format)
\ No newline at end of file
+    return whiteboard.convert_to_diagram(whiteboard_id, format)
+def apply_operations(db_manager, whiteboard_id: int, operations: List[Dict[str, Any]],
+                     client_id: str = 'default') -> Dict[str, Any]:
+    """
+    Apply a batch of whiteboard operations in one transaction
+    
+    Args:
+        db_manager: Database manager instance
+        whiteboard_id: The ID of the whiteboard
+        operations: The operations, in the order the client made them
+        client_id: The ID of the client sending the operations
+        
+    Returns:
+        Dictionary with the board version and the status of each operation
+    """
+    whiteboard = Whiteboard(db_manager)
+    return whiteboard.apply_operations(whiteboard_id, operations, client_id)